@@ -37,6 +37,9 @@ from .handlers import *
 from .forms import *
 from .forms.actionform import import_file
 from ..db import DbTxn
+from ..utils.jobs import JobRunner
+from ..utils.localepool import get_translator
+from ..utils.nameindex import get_name_index
 from ..version import VERSION
 
 from tornado.web import Application, url, StaticFileHandler
@@ -58,6 +61,13 @@ def get_image_path_from_media(database, media):
         return media_path_full(database, media.get_path())
     return ""
 
+def make_cookie_secret():
+    """
+    Return a new random secret to sign the cookies with.
+    """
+    return base64.b64encode(uuid.uuid4().bytes +
+                            uuid.uuid4().bytes).decode()
+
 class GPrimeApp(Application):
     """
     Main webapp class
@@ -66,9 +76,21 @@ class GPrimeApp(Application):
         import gprime.const
         self.options = options
         self.prefix = self.options.prefix
-        self.user_data = {} # user to user_data map
+        self.user_data = {} # user to their session, see get_user_data
         self.database = database
         self.sitename = options.sitename
+        # Number of server processes; 1 if this is the only one:
+        self.workers = getattr(options, "workers", 1)
+        # The database, for the jobs and exports that open it themselves:
+        self.database_dir = os.path.join(options.site_dir, "database")
+        # Reports, imports and exports run out of the requests:
+        self.jobs = JobRunner(self.database_dir,
+                              os.path.join(options.site_dir, "jobs"),
+                              workers=getattr(options, "jobs", 2))
+        if hasattr(database, "connect"):
+            database.connect('user-changed', self.clear_user_data)
+            # the names to complete, kept up to date from now on:
+            get_name_index(database)
         settings = kwargs
         settings.update(self.default_settings())
         handlers = [
@@ -135,6 +157,14 @@ class GPrimeApp(Application):
             })),
             (self.make_url(r"/json/"),
              JsonHandler, "json", self.make_env({})),
+            (self.make_url(r"/api/v1/?(.*)"),
+             ApiHandler, "api", self.make_env({})),
+            (self.make_url(r"/job/?(.*)"),
+             JobHandler, "job", self.make_env({})),
+            (self.make_url(r"/export/(.*)"),
+             ExportHandler, "export", self.make_env({})),
+            (self.make_url(r"/import/(.*)"),
+             ImportHandler, "import", self.make_env({})),
             (self.make_url(r"/data/(.*)"),
              StaticFileHandler, "data", {
                 'path': gprime.const.DATA_DIR,
@@ -180,59 +210,63 @@ class GPrimeApp(Application):
         env.update(handler_env)
         return env
 
-    def clear_user_data(self, user):
-        if user in self.user_data:
+    def clear_user_data(self, user=None):
+        if user is None:
+            self.user_data.clear()
+        elif user in self.user_data:
             del self.user_data[user]
 
-    def get_translate_func(self, user):
-        from gprime.utils.locale import Locale, _
-        def func(*args, **kwargs):
-            if user not in self.user_data:
-                try:
-                    user_data = self.database.get_user_data(user)
-                except:
-                    user_data = {}
-                if user_data:
-                    self.user_data[user] = user_data
-                else:
-                    self.user_data[user] = {}
-            if "language" in self.user_data[user] and self.user_data[user]["language"]:
-                self.user_data[user]["glocale"] = Locale(lang=self.user_data[user]["language"])
-                self.user_data[user]["_"] = self.user_data[user]["glocale"].translation.gettext
-            else:
-                self.user_data[user]["language"] = "en"
-                self.user_data[user]["glocale"] = Locale
-                self.user_data[user]["_"] = _
-            return self.user_data[user]["_"](*args, **kwargs)
-        return func
+    def follow_changes(self):
+        """
+        Bring the caches of this process up to date with the commits of
+        the other server processes and of the jobs.
+        """
+        if ((self.workers != 1 or self.jobs.changed()) and
+                hasattr(self.database, "follow_changes")):
+            self.database.follow_changes()
 
-    def get_css(self, user):
-        if user not in self.user_data:
+    def get_user_data(self, user):
+        """
+        Return the session of the user: their settings, with the
+        Translator of their language as "translator", its gettext as "_"
+        and its Locale as "glocale". It is loaded once, and kept until the
+        user changes, see clear_user_data.
+        """
+        user_data = self.user_data.get(user)
+        if user_data is None:
             try:
-                user_data = self.database.get_user_data(user)
-            except:
+                user_data = dict(self.database.get_user_data(user) or {})
+            except Exception:
                 user_data = {}
-            if user_data:
-                self.user_data[user] = user_data
-            else:
-                self.user_data[user] = {}
-        if "css" in self.user_data[user]:
-            if not self.user_data[user]["css"]:
-                self.user_data[user]["css"] = "Web_Mainz.css"
-        else:
-            self.user_data[user]["css"] = "Web_Mainz.css"
-        return self.user_data[user]["css"]
+            translator = get_translator(user_data.get("language") or None)
+            if not user_data.get("language"):
+                user_data["language"] = "en"
+            if not user_data.get("css"):
+                user_data["css"] = "Web_Mainz.css"
+            user_data["translator"] = translator
+            user_data["glocale"] = translator.locale
+            user_data["_"] = translator.gettext
+            self.user_data[user] = user_data
+        return user_data
+
+    def get_translate_func(self, user):
+        return self.get_user_data(user)["_"]
+
+    def get_css(self, user):
+        return self.get_user_data(user)["css"]
 
     def default_settings(self):
         """
         """
         import gprime.const
         return {
-            "cookie_secret": base64.b64encode(uuid.uuid4().bytes + uuid.uuid4().bytes),
+            "cookie_secret": (getattr(self.options, "cookie_secret", None) or
+                              make_cookie_secret()),
             "login_url":     self.make_url("/login"),
             'template_path': os.path.join(gprime.const.DATA_DIR, "templates"),
             'debug':         self.options.debug,
             "xsrf_cookies":  self.options.xsrf,
+            "compress_response": True,
         }
 
     def get_image_path_from_handle(self, identifier):
@@ -371,6 +405,12 @@ def run_app():
            help="Open default web browser", type=bool)
     define("prefix", default="",
            help="Site URL prefix", type=str)
+    define("workers", default=1,
+           help="Number of server processes, each with its own database connection (0 for one per CPU)", type=int)
+    define("cookie-secret", default=None,
+           help="Secret to sign the login cookies with (a new one on every start if not given)", type=str)
+    define("jobs", default=2,
+           help="Number of processes that run reports, imports and exports", type=int)
     define("version", default=False,
            help="Show the version of gprime (%s)" % VERSION, type=bool)
     # Let's go!
@@ -533,17 +573,42 @@ def run_app():
                 template_filename = os.path.join(dirpath, filename)
                 tornado.log.logging.info("   watching: " + os.path.relpath(template_filename))
                 tornado.autoreload.watch(template_filename)
+    # The same for all the worker processes, so that they accept the
+    # logins of each other:
+    if not options.cookie_secret:
+        options.cookie_secret = make_cookie_secret()
+    task_id = None
+    if options.workers != 1:
+        if options.debug:
+            tornado.log.logging.warning("Debug mode runs a single server process...")
+            options.workers = 1
+        else:
+            import tornado.netutil
+            import tornado.process
+            import tornado.httpserver
+            # Every worker process opens the database itself, and follows
+            # the commits of the others through the database:
+            database.close()
+            sockets = tornado.netutil.bind_sockets(options.port)
+            task_id = tornado.process.fork_processes(options.workers)
+            database = DbState().open_database(database_dir)
+            database.set_mediapath(os.path.abspath(media_dir))
     app = GPrimeApp(options, database)
-    app.listen(options.port)
-    tornado.log.logging.info("Starting with the folowing settings:")
-    tornado.log.logging.info("    DATA_DIR = " + gprime.const.DATA_DIR)
-    tornado.log.logging.info("    serving  = http://%s:%s%s" % (options.hostname, options.port, options.prefix))
-    for key in ["port", "site_dir", "hostname", "sitename",
-                "debug", "xsrf", "config_file"]:
-        tornado.log.logging.info("    " + key + " = " + repr(getattr(options, key)))
-    tornado.log.logging.info("Control+C twice to stop server. Running...")
+    if task_id is None:
+        app.listen(options.port)
+    else:
+        server = tornado.httpserver.HTTPServer(app)
+        server.add_sockets(sockets)
+    if task_id is None or task_id == 0:
+        tornado.log.logging.info("Starting with the folowing settings:")
+        tornado.log.logging.info("    DATA_DIR = " + gprime.const.DATA_DIR)
+        tornado.log.logging.info("    serving  = http://%s:%s%s" % (options.hostname, options.port, options.prefix))
+        for key in ["port", "site_dir", "hostname", "sitename",
+                    "debug", "xsrf", "config_file", "workers"]:
+            tornado.log.logging.info("    " + key + " = " + repr(getattr(options, key)))
+        tornado.log.logging.info("Control+C twice to stop server. Running...")
     # Open up a browser window:
-    if options.open_browser:
+    if options.open_browser and (task_id is None or task_id == 0):
         try:
             browser = webbrowser.get(None)
         except webbrowser.Error as e:
@@ -553,7 +618,9 @@ def run_app():
             b = lambda : browser.open("http://%s:%s%s" % (options.hostname, options.port, app.make_url("/")), new=2)
             threading.Thread(target=b).start()
 
-    app.init_signal()
+    if task_id is None:
+        # the worker processes are stopped by the signals to the parent
+        app.init_signal()
 
     if sys.platform.startswith('win'):
         # add no-op to wake every 5s
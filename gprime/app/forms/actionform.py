@@ -21,6 +21,7 @@
 # Python imports:
 import time
 import os
+from urllib.parse import quote
 
 # Gramps Connect imports:
 from .forms import Form, Column, Row
@@ -29,6 +30,7 @@ from .forms import Form, Column, Row
 from gprime.cli.plug import BasePluginManager, run_report
 from ..dictionarydb import DictionaryDb
 from gprime.cli.user import User
+from gprime.utils.stream import SpoolReader
 
 # Classes:
 class Action(object):
@@ -223,41 +225,82 @@ class ActionForm(Form):
         args = {}
         for key, default_value in options.items():
             args[key] = handler.get_argument(key)
+        username = self.handler.current_user
+        jobs = self.handler.app.jobs
         if action.ptype == "Report":
-            output_file = "/tmp/%s.pdf" % action.name
-            clr = run_report(self.gramps_database,
-                             action.handle,
-                             username=self.handler.current_user,
-                             of=output_file,
-                             off="pdf", **args)
-            # can check for results with clr
-            if clr:
-                download_to_user(output_file, self.handler)
-            else:
-                handler.send_message("Error in report")
-                handler.redirect(self.handler.app.make_url("/action"))
+            job = jobs.submit(username, action.name, "report", report_job,
+                              action.handle, action.name, username, args)
         elif action.ptype == "Import":
-            filename = upload(args["i"], "/tmp/%s-%s-%s.%s" % (str(profile.user.username),
-                                                                 str(handle),
-                                                                 timestamp(),
-                                                                 args["iff"]))
-            if filename is not None:
-                result = import_file(self.gramps_database, filename, User()) # callback
-                if result:
-                    handler.redirect(self.handler.app.make_url("/action"))
-                else:
-                    handler.send_message("Error in import")
-                    handler.redirect(self.handler.app.make_url("/action"))
+            job = jobs.submit(username, action.name, "import", import_job,
+                              args["i"], args["iff"])
         elif action.ptype == "Export":
             pmgr = BasePluginManager.get_instance()
             pdata = pmgr.get_plugin(action.handle)
-            output_file = "/tmp/export." + pdata.extension
-            result = export_file(self.gramps_database, output_file, User()) # callback
-            if result:
-                download_to_user(output_file, self.handler)
-            else:
-                handler.send_message("Error in export")
-                handler.redirect(self.handler.app.make_url("/action"))
+            if pdata.extension in STREAMING_EXPORTS:
+                handler.redirect(self.handler.app.make_url(
+                    "/export/%s" % quote(action.handle)))
+                return
+            job = jobs.submit(username, action.name, "export", export_job,
+                              pdata.extension)
+        else:
+            handler.send_message("Invalid action")
+            handler.redirect(self.handler.app.make_url("/action"))
+            return
+        handler.redirect(self.handler.app.make_url("/job/%s" % job))
+
+## Jobs, run by the JobRunner of the app in a process of its own, with the
+## name of their output file in output_dir as result, or False on error:
+
+def report_job(db, output_dir, user, pid, name, username, args):
+    output_file = os.path.join(output_dir, "%s.pdf" % name)
+    clr = run_report(db, pid, username=username, user=user, of=output_file,
+                     off="pdf", **args)
+    return output_file if clr else False
+
+def import_job(db, output_dir, user, url, extension):
+    filename = upload(url, os.path.join(output_dir, "import.%s" % extension))
+    if filename is None or not import_file(db, filename, user):
+        return False
+    return None
+
+## Imports that can read a file while it is uploaded, rather than after:
+
+STREAMING_IMPORTS = ["gramps", "ged", "json"]
+
+def upload_job(db, output_dir, user, extension, size):
+    """
+    Import the file being uploaded to output_dir, of about size bytes if
+    known, as it arrives if the format allows.
+    """
+    filename = os.path.join(output_dir, "upload.%s" % extension)
+    with SpoolReader(filename, size) as reader:
+        if extension in STREAMING_IMPORTS:
+            result = import_file(db, reader, user, extension)
+        else:
+            reader.wait()
+            result = import_file(db, filename, user, extension)
+    return None if result else False
+
+def export_job(db, output_dir, user, extension):
+    output_file = os.path.join(output_dir, "export.%s" % extension)
+    return output_file if export_file(db, output_file, user) else False
+
+## Exports that can be written to a file object, and so streamed to the
+## user as they are made, rather than run as jobs:
+
+STREAMING_EXPORTS = ["gramps", "ged", "json"]
+
+def export_stream(output, database_dir, extension):
+    """
+    Export the database in database_dir to the binary file object output,
+    on a connection of its own, as exports are streamed from a thread.
+    """
+    from gprime.dbstate import DbState
+    db = DbState().open_database(database_dir)
+    try:
+        return export_file(db, output, User(quiet=True), extension)
+    finally:
+        db.close(update=False)
 
 def download_to_user(file_name, header, content_type='application/octet-stream'):
     buf_size = 4096
@@ -273,9 +316,10 @@ def download_to_user(file_name, header, content_type='application/octet-stream')
 
 ## Copied from django-webapp; need to integrate:
 
-def import_file(db, filename, user):
+def import_file(db, filename, user, extension=None):
     """
-    Import a file (such as a GEDCOM file) into the given db.
+    Import a file (such as a GEDCOM file) into the given db, or a binary
+    file object in the format of the extension.
 
     >>> import_file(DbDjango(), "/home/user/Untitled_1.ged", User())
     """
@@ -285,8 +329,10 @@ def import_file(db, filename, user):
     climanager = CLIManager(dbstate, setloader=False, user=user) # do not load db_loader
     climanager.do_reg_plugins(dbstate, None)
     pmgr = BasePluginManager.get_instance()
-    (name, ext) = os.path.splitext(os.path.basename(filename))
-    format = ext[1:].lower()
+    if extension is None:
+        (name, ext) = os.path.splitext(os.path.basename(filename))
+        extension = ext[1:]
+    format = extension.lower()
     import_list = pmgr.get_reg_importers()
     for pdata in import_list:
         if format == pdata.extension:
@@ -328,9 +374,10 @@ def upload(url, filename=None):
         r.close()
     return success
 
-def export_file(db, filename, user):
+def export_file(db, filename, user, extension=None):
     """
-    Export the db to a file (such as a GEDCOM file).
+    Export the db to a file (such as a GEDCOM file), or to a binary file
+    object in the format of the extension.
 
     >>> export_file(DbDjango(), "/home/user/Untitled_1.ged", User())
     """
@@ -340,8 +387,10 @@ def export_file(db, filename, user):
     climanager = CLIManager(dbstate, setloader=False, user=user) # do not load db_loader
     climanager.do_reg_plugins(dbstate, None)
     pmgr = BasePluginManager.get_instance()
-    (name, ext) = os.path.splitext(os.path.basename(filename))
-    format = ext[1:].lower()
+    if extension is None:
+        (name, ext) = os.path.splitext(os.path.basename(filename))
+        extension = ext[1:]
+    format = extension.lower()
     export_list = pmgr.get_reg_exporters()
     for pdata in export_list:
         if format == pdata.extension:
@@ -353,6 +402,5 @@ def export_file(db, filename, user):
                     print("ERROR:", name, exception)
                 return False
             export_function = getattr(mod, pdata.export_function)
-            export_function(db, filename, user)
-            return True
+            return bool(export_function(db, filename, user))
     return False
@@ -33,6 +33,7 @@ class CitationForm(Form):
     view = "citation"
     tview = "Citations"
     table = "Citation"
+    prefetch_paths = [("Source",), ("Note",), ("Media",), ("Tag",)]
 
     # Fields for editor:
     edit_fields = [
@@ -33,6 +33,8 @@ class EventForm(Form):
     view = "event"
     tview = "Events"
     table = "Event"
+    prefetch_paths = [("Place",), ("Citation",), ("Note",), ("Media",),
+                      ("Tag",)]
 
     # Fields for editor:
     edit_fields = [
@@ -30,6 +30,8 @@ class FamilyForm(Form):
     view = "family"
     tview = "Family"
     table = "Family"
+    prefetch_paths = [("Person", "Event"), ("Event", "Place"),
+                      ("Citation",), ("Note",), ("Media",), ("Tag",)]
 
     # Fields for editor:
     edit_fields = [
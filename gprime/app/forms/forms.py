@@ -68,6 +68,9 @@ class Form(object):
     page_size = 25
     count_width = 5
     table = None
+    # Chains of the classes of the objects the page shows, through
+    # references from the instance, to read in batches:
+    prefetch_paths = []
 
     def __init__(self, handler, instance=None):
         # scheme is a map from FIELD to Python Type, list[Gramps objects], or Handle
@@ -86,6 +89,17 @@ class Form(object):
         self.set_post_process_functions()
         self.sa = SimpleAccess(self.database)
         self.original_select_fields = self.select_fields
+        self.prefetch()
+
+    def prefetch(self):
+        """
+        Load the objects the page of the instance shows, if the database
+        can load them in batches.
+        """
+        if (getattr(self.instance, "handle", None) and
+                hasattr(self.database, "prefetch")):
+            for path in self.prefetch_paths:
+                self.database.prefetch([self.instance], *path)
 
     def make_url(self, *parts):
         """
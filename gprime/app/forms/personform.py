@@ -37,6 +37,8 @@ class PersonForm(Form):
     view = "person"
     tview = "People"
     table = "Person"
+    prefetch_paths = [("Event", "Place"), ("Family", "Person"),
+                      ("Citation",), ("Note",), ("Media",), ("Tag",)]
 
     # Fields for editor:
     edit_fields = [
@@ -33,6 +33,8 @@ class PlaceForm(Form):
     view = "place"
     tview = "Place"
     table = "Place"
+    prefetch_paths = [("Place",), ("Citation",), ("Note",), ("Media",),
+                      ("Tag",)]
 
     # Fields for editor:
     edit_fields = [
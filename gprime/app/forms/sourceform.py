@@ -32,6 +32,7 @@ class SourceForm(Form):
     view = "source"
     tview = "Source"
     table = "Source"
+    prefetch_paths = [("Repository",), ("Note",), ("Media",), ("Tag",)]
 
     # Fields for editor:
     edit_fields = [
@@ -0,0 +1,224 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Cache of the html the table renderers of the detail pages make.
+"""
+
+# Python imports:
+import functools
+import weakref
+
+# gPrime imports:
+from gprime.proxy import LoaderProxyDb
+from gprime.utils.callback import Callback
+from gprime.utils.lru import LRU
+
+# The object types whose changes can change a fragment:
+NAMESPACES = ['Person', 'Family', 'Event', 'Place', 'Source', 'Citation',
+              'Media', 'Note', 'Repository', 'Tag']
+
+class FragmentCache:
+    """
+    Cache of rendered fragments of a database, keyed on the renderer, the
+    owning object and its change time, the user, their language and the
+    action.
+
+    Every entry remembers the objects read to render it, and is dropped
+    when one of them is updated or deleted, as the database signals.
+    """
+    def __init__(self, size=None):
+        if size is None:
+            size = 1000
+            try:
+                from gprime.config import config
+                size = config.get('behavior.fragment-cache-size')
+            except ImportError:
+                pass
+        self.entries = LRU(size)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def connect_db_signals(self, db):
+        """
+        Follow the changes of db through its signals.
+        """
+        for namespace in NAMESPACES:
+            callback = self._make_callback(namespace)
+            for operation in ('update', 'delete'):
+                db.connect('%s-%s' % (namespace.lower(), operation),
+                           callback)
+            db.connect('%s-rebuild' % namespace.lower(), self.clear)
+        db.connect('user-changed', self.clear)
+
+    def _make_callback(self, namespace):
+        return lambda handles: self.changed(namespace, handles)
+
+    def changed(self, namespace, handles):
+        """
+        Drop the fragments that show one of the objects.
+        """
+        objects = set((namespace, str(handle, "utf-8")
+                       if isinstance(handle, bytes) else handle)
+                      for handle in handles)
+        for key, (html, reads) in self.entries.items():
+            if not reads.isdisjoint(objects):
+                del self.entries[key]
+                self.invalidations += 1
+
+    def get(self, key):
+        """
+        Return the html cached for key, or None.
+        """
+        if key not in self.entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self.entries[key][0]
+
+    def set(self, key, html, reads):
+        """
+        Cache the html for key; reads is the set of the (class name,
+        handle) of the objects it shows.
+        """
+        self.entries[key] = (html, frozenset(reads))
+
+    def clear(self, *args):
+        """
+        Remove all entries.
+        """
+        self.entries.clear()
+
+    def get_metrics(self):
+        """
+        Return a dictionary with the cache statistics.
+        """
+        return {'size': len(self.entries),
+                'capacity': self.entries.count,
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations}
+
+_CACHES = weakref.WeakKeyDictionary()
+
+def get_fragment_cache(db):
+    """
+    Return the FragmentCache of db, creating it on first use, or None if
+    the changes of db can't be followed.
+    """
+    if isinstance(db, LoaderProxyDb):
+        # the objects are the database's
+        db = db.db
+    if not isinstance(db, Callback):
+        return None
+    cache = _CACHES.get(db)
+    if cache is None:
+        cache = FragmentCache()
+        cache.connect_db_signals(db)
+        _CACHES[db] = cache
+    return cache
+
+class RecordingDb:
+    """
+    A database that records the objects read through it.
+    """
+    def __init__(self, db):
+        self.db = db
+        self.reads = set()
+
+    def __getattr__(self, attr):
+        value = getattr(self.db, attr)
+        if attr.startswith("get_") and attr.endswith("_from_handle"):
+            return self._make_getter(attr[4:-len("_from_handle")].title(),
+                                     value)
+        return value
+
+    def _make_getter(self, class_name, get_object):
+        def getter(handle):
+            if isinstance(handle, bytes):
+                handle = str(handle, "utf-8")
+            self.reads.add((class_name, handle))
+            return get_object(handle)
+        return getter
+
+    def get_table_func(self, table=None, func=None):
+        value = self.db.get_table_func(table, func)
+        if func == "handle_func":
+            return self._make_getter(table, value)
+        return value
+
+    def get_from_name_and_handle(self, table_name, handle):
+        if handle:
+            self.reads.add((table_name, handle))
+        return self.db.get_from_name_and_handle(table_name, handle)
+
+def get_arg_key(value):
+    """
+    Return a hashable key for an argument of a renderer, or raise
+    TypeError.
+    """
+    if isinstance(value, (list, tuple)):
+        return tuple(get_arg_key(item) for item in value)
+    if hasattr(value, "to_struct"):
+        return repr(value.to_struct())
+    hash(value)
+    return value
+
+def cached_fragment(render):
+    """
+    Decorator of the table renderers of the detail pages, called as
+    render(form, user, action, *args), that caches the html they return
+    for the stored objects of GET requests.
+    """
+    @functools.wraps(render)
+    def wrapper(form, user, action, *args, **kwargs):
+        instance = form.instance
+        handler = form.handler
+        if (handler.request.method != "GET" or
+                not getattr(instance, "handle", None) or
+                not getattr(instance, "change", None)):
+            # new objects, or edits that aren't saved yet
+            return render(form, user, action, *args, **kwargs)
+        cache = get_fragment_cache(form.database)
+        try:
+            language = handler.app.get_user_data(user)["language"]
+            key = (render.__name__, form.__class__.__name__,
+                   instance.__class__.__name__, instance.handle,
+                   instance.change, user, language, action,
+                   get_arg_key(args), get_arg_key(sorted(kwargs.items())))
+        except TypeError:
+            key = None
+        if cache is None or key is None:
+            return render(form, user, action, *args, **kwargs)
+        html = cache.get(key)
+        if html is None:
+            database, sa_database = form.database, form.sa.dbase
+            recorder = RecordingDb(database)
+            form.database = form.sa.dbase = recorder
+            try:
+                html = render(form, user, action, *args, **kwargs)
+            finally:
+                form.database, form.sa.dbase = database, sa_database
+            recorder.reads.add((instance.__class__.__name__,
+                                instance.handle))
+            cache.set(key, html, recorder.reads)
+        return html
+    return wrapper
@@ -23,6 +23,10 @@ from .personhandler import PersonHandler
 from .familyhandler import FamilyHandler
 from .imagehandler import ImageHandler
 from .jsonhandler import JsonHandler
+from .apihandler import ApiHandler
+from .jobhandler import JobHandler
+from .exporthandler import ExportHandler
+from .importhandler import ImportHandler
 from .actionhandler import ActionHandler
 from .notehandler import NoteHandler
 from .citationhandler import CitationHandler
@@ -0,0 +1,312 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+import tornado.web
+import simplejson
+import binascii
+import base64
+
+from .handlers import BaseHandler
+from ..forms import (PersonForm, FamilyForm, EventForm, PlaceForm,
+                     SourceForm, CitationForm, MediaForm, RepositoryForm,
+                     NoteForm, TagForm)
+from gprime.errors import HandleError
+from gprime.proxy import PrivateProxyDb
+
+# The forms of the tables, whose search grammar the API shares, by view:
+FORMS = dict((form.view, form) for form in
+             (PersonForm, FamilyForm, EventForm, PlaceForm, SourceForm,
+              CitationForm, MediaForm, RepositoryForm, NoteForm, TagForm))
+# Objects per page, by default and at most:
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Objects written at a time when streaming:
+CHUNK_SIZE = 100
+# The fields that PrivateProxyDb copies unchanged, that users who may not
+# see private data may search and order by, by table:
+PUBLIC_FIELDS = {
+    "Person": ["handle", "gid", "gender", "change"],
+    "Family": ["handle", "gid", "change"],
+    "Event": ["handle", "gid", "description", "change"],
+    "Place": ["handle", "gid", "title", "long", "lat", "code", "change"],
+    "Source": ["handle", "gid", "title", "author", "pubinfo", "abbrev",
+               "change"],
+    "Citation": ["handle", "gid", "page", "confidence", "source_handle",
+                 "change"],
+    "Media": ["handle", "gid", "path", "mime", "desc", "change"],
+    "Repository": ["handle", "gid", "name", "change"],
+    "Note": ["handle", "gid", "format", "change"],
+    "Tag": ["handle", "name", "color", "priority", "change"],
+}
+
+def encode_cursor(values):
+    """
+    Return the opaque cursor of the page after the row with the values of
+    the order_by fields.
+    """
+    return base64.urlsafe_b64encode(
+        simplejson.dumps(values).encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor, count):
+    """
+    Return the values of the count order_by fields in the cursor.
+    """
+    try:
+        values = simplejson.loads(
+            base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8"))
+    except (ValueError, UnicodeError, binascii.Error):
+        values = None
+    if not isinstance(values, list) or len(values) != count:
+        raise tornado.web.HTTPError(400, reason="Invalid cursor")
+    return values
+
+def get_where_fields(where):
+    """
+    Return the fields of the conditions of a where clause.
+    """
+    if len(where) == 3: # (field, op, value)
+        return [where[0]]
+    connector, exprs = where
+    if connector == "NOT":
+        exprs = [exprs]
+    return [field for expr in exprs for field in get_where_fields(expr)]
+
+class ApiHandler(BaseHandler):
+    """
+    Version 1 of the JSON API of the primary tables:
+
+    /api/v1/              - the names of the tables
+    /api/v1/TABLE         - the objects of the table, a page at a time
+    /api/v1/TABLE/HANDLE  - an object
+
+    Arguments:
+
+    fields=F1,F2     - the fields to return, rather than whole objects
+    where=SEARCH     - only the objects that match, as on the list pages
+    order_by=F1,-F2  - the order, by handle at last
+    limit=N          - the number of objects per page
+    cursor=C         - the page that follows the one that gave C as next
+    format=ndjson    - an object per line, streamed; a last line with
+                       next follows when a limit was reached
+
+    Private objects and data are left out for users without the admin
+    permission, who may only search and order by the PUBLIC_FIELDS.
+    """
+    @tornado.web.authenticated
+    def get(self, path):
+        self.private_db = self.get_private_db()
+        parts = [part for part in path.split("/") if part]
+        if not parts:
+            self.write_json({"tables": sorted(FORMS)})
+        elif len(parts) > 2 or parts[0] not in FORMS:
+            raise tornado.web.HTTPError(404, reason="No such table")
+        elif len(parts) == 2:
+            self.get_object(FORMS[parts[0]](self), parts[1])
+        else:
+            self.get_objects(FORMS[parts[0]](self))
+
+    def get_private_db(self):
+        """
+        Return the PrivateProxyDb through which the user sees the database,
+        or None if they may see everything.
+        """
+        user_data = self.app.get_user_data(self.current_user)
+        if "admin" in (user_data.get("permissions") or ()):
+            return None
+        return PrivateProxyDb(self.database)
+
+    def get_object(self, form, handle):
+        database = (self.database if self.private_db is None
+                    else self.private_db)
+        try:
+            obj = database.get_table_func(form.table, "handle_func")(handle)
+        except HandleError:
+            obj = None
+        if obj is None:
+            raise tornado.web.HTTPError(404, reason="No such object")
+        if self.not_modified(obj.change):
+            return
+        self.write_json(self.make_row(obj, self.get_fields(form)))
+
+    def get_objects(self, form):
+        fields = self.get_fields(form)
+        order_by = self.get_order_by(form)
+        search = self.get_argument("where", None)
+        where = [self.get_where(form, search)] if search else []
+        stream = self.get_argument("format", "json") == "ndjson"
+        try:
+            limit = int(self.get_argument("limit",
+                                          -1 if stream else PAGE_SIZE))
+        except ValueError:
+            limit = 0
+        if not (0 < limit <= MAX_PAGE_SIZE or (stream and limit == -1)):
+            raise tornado.web.HTTPError(400, reason="Invalid limit")
+        cursor = self.get_argument("cursor", None)
+        if self.not_modified():
+            return
+        queryset = self.database.get_queryset_by_table_name(form.table)
+        queryset.order_by = order_by
+        obj_class = self.database.get_table_func(form.table, "class_func")
+        if (self.private_db is not None and
+                "private" in dict(obj_class.get_secondary_fields())):
+            where.append(("private", "=", False))
+        if len(where) == 1:
+            queryset.where_by = where[0]
+        elif where:
+            queryset.where_by = ["AND", where]
+        if cursor:
+            queryset.after(decode_cursor(cursor, len(order_by)))
+        if limit != -1:
+            # one more, to know if there is a next page
+            queryset.limit(count=limit + 1)
+        order_fields = [field for (field, direction) in order_by]
+        if fields is None or self.private_db is not None:
+            # the fields of private objects are taken from their
+            # sanitized copies
+            rows = queryset.select()
+        else:
+            rows = queryset.select(*(fields + [field for field in order_fields
+                                               if field not in fields]))
+        if stream:
+            self.set_header("Content-Type", "application/x-ndjson")
+        results = []
+        last = None
+        next_cursor = None
+        count = 0
+        for row in rows:
+            if count == limit:
+                next_cursor = encode_cursor(last)
+                break
+            if self.private_db is not None:
+                # the cursor, like the fields, comes from the sanitized copy
+                row = self.private_db.get_table_func(
+                    form.table, "handle_func")(row.handle)
+                last = [row.get_field(field, self.private_db,
+                                      ignore_errors=True)
+                        for field in order_fields]
+            elif fields is None:
+                last = [row.get_field(field, self.database,
+                                      ignore_errors=True)
+                        for field in order_fields]
+            else:
+                last = [row[field] for field in order_fields]
+            results.append(self.make_row(row, fields))
+            count += 1
+            if stream and len(results) == CHUNK_SIZE:
+                self.write_rows(results)
+                self.flush()
+                results = []
+        if stream:
+            if next_cursor:
+                results.append({"next": next_cursor})
+            self.write_rows(results)
+        else:
+            self.write_json({"results": results, "next": next_cursor})
+
+    def get_fields(self, form):
+        """
+        Return the list of the fields asked for, or None for whole objects.
+        """
+        fields = self.get_argument("fields", None)
+        if not fields:
+            return None
+        try:
+            fields = form.parse_select(fields)
+        except Exception:
+            raise tornado.web.HTTPError(400, reason="Invalid fields")
+        self.check_fields(form, fields)
+        return fields
+
+    def get_where(self, form, search):
+        """
+        Return the where clause of the search.
+        """
+        try:
+            where = form.parse_where(search)
+        except Exception:
+            raise tornado.web.HTTPError(400, reason="Invalid search")
+        self.check_fields(form, get_where_fields(where), public=True)
+        return where
+
+    def check_fields(self, form, fields, public=False):
+        """
+        Raise a 400 error unless the fields are fields of the table and, if
+        public, fields that the user may search and order by.
+        """
+        obj_class = self.database.get_table_func(form.table, "class_func")
+        for field in fields:
+            try:
+                obj_class.get_field_type(field)
+            except Exception:
+                raise tornado.web.HTTPError(400, reason="Invalid field: %s" %
+                                            field)
+            if (public and self.private_db is not None and
+                    field not in PUBLIC_FIELDS[form.table]):
+                raise tornado.web.HTTPError(400, reason="Private field: %s" %
+                                            field)
+
+    def get_order_by(self, form):
+        """
+        Return the order asked for, that ends with handle, so that the
+        rows after a cursor are well defined.
+        """
+        order_by = []
+        for field in self.get_argument("order_by", "").split(","):
+            field = field.strip()
+            if field.startswith("-"):
+                direction, field = "DESC", field[1:].strip()
+            else:
+                direction = "ASC"
+            if field:
+                try:
+                    field = form.parse_select(field)[0]
+                except Exception:
+                    raise tornado.web.HTTPError(400, reason="Invalid order")
+                order_by.append((field, direction))
+        self.check_fields(form, [field for (field, direction) in order_by],
+                          public=True)
+        if not order_by or order_by[-1][0] != "handle":
+            order_by.append(("handle", "ASC"))
+        return order_by
+
+    def make_row(self, row, fields):
+        """
+        Return the JSON data of an object, or of a row of the fields.
+        """
+        if fields is None:
+            return row.to_struct()
+        elif isinstance(row, dict):
+            return dict((field, row[field]) for field in fields)
+        database = (self.database if self.private_db is None
+                    else self.private_db)
+        return dict((field, row.get_field(field, database,
+                                          ignore_errors=True))
+                    for field in fields)
+
+    def write_json(self, data):
+        self.set_header("Content-Type", "application/json")
+        self.write(simplejson.dumps(data))
+
+    def write_rows(self, rows):
+        self.write("".join(simplejson.dumps(row) + "\n" for row in rows))
+
+    def write_error(self, status_code, **kwargs):
+        self.set_header("Content-Type", "application/json")
+        self.finish(simplejson.dumps({"error": self._reason}))
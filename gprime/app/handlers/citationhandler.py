@@ -55,6 +55,8 @@ class CitationHandler(BaseHandler):
                     form = CitationForm(self, instance=citation)
                     form.delete()
                     return
+                elif handle != "add" and self.not_modified(citation.change):
+                    return
                 else:
                     self.render("citation.html",
                                 **self.get_template_dict(tview=_("citation detail"),
@@ -68,6 +70,8 @@ class CitationHandler(BaseHandler):
                 self.set_status(404)
                 self.finish("<html><body>No such citation</body></html>")
                 return
+        if self.not_modified():
+            return
         form = CitationForm(self)
         try:
             form.select(page, search)
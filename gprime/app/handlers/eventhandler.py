@@ -55,6 +55,8 @@ class EventHandler(BaseHandler):
                     form = EventForm(self, instance=event)
                     form.delete()
                     return
+                elif handle != "add" and self.not_modified(event.change):
+                    return
                 else:
                     self.render("event.html",
                                 **self.get_template_dict(tview=_("event detail"),
@@ -68,6 +70,8 @@ class EventHandler(BaseHandler):
                 self.set_status(404)
                 self.finish("<html><body>No such event</body></html>")
                 return
+        if self.not_modified():
+            return
         form = EventForm(self)
         try:
             form.select(page, search)
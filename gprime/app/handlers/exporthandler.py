@@ -0,0 +1,84 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2015 Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+from concurrent.futures import ThreadPoolExecutor
+
+import tornado.gen
+import tornado.web
+from tornado.iostream import StreamClosedError
+
+from .handlers import BaseHandler
+from ..forms.actionform import STREAMING_EXPORTS, export_stream
+from gprime.cli.plug import BasePluginManager
+from gprime.utils.stream import stream
+
+# Threads that wait for the chunks of the exports:
+_READERS = ThreadPoolExecutor(max_workers=8)
+
+class ExportHandler(BaseHandler):
+    """
+    Streams an export to the user as it is written, in chunks, gzipped
+    on the way unless the format is compressed already:
+
+    /export/PLUGIN-ID
+    """
+    @tornado.web.authenticated
+    @tornado.gen.coroutine
+    def get(self, pid):
+        pmgr = BasePluginManager.get_instance()
+        pdata = pmgr.get_plugin(pid)
+        if (pdata is None or
+                getattr(pdata, "extension", None) not in STREAMING_EXPORTS):
+            raise tornado.web.HTTPError(404, reason="No such export")
+        # .gramps files are gzipped by the exporter
+        compress = (pdata.extension != "gramps" and
+                    "gzip" in self.request.headers.get("Accept-Encoding", ""))
+        self.writer = stream(export_stream, self.app.database_dir,
+                             pdata.extension, compress=compress)
+        self.set_header("Content-Type", "application/octet-stream")
+        self.set_header("Content-Disposition",
+                        "attachment; filename=export.%s" % pdata.extension)
+        if compress:
+            self.set_header("Content-Encoding", "gzip")
+        try:
+            while True:
+                chunk = yield _READERS.submit(self.writer.get)
+                if chunk is None:
+                    break
+                self.write(chunk)
+                # wait for the client before getting more
+                yield self.flush()
+        except StreamClosedError:
+            self.writer.cancel()
+            return
+        except Exception as exc:
+            self.writer.cancel()
+            self.log.error("export %s failed: %s", pid, exc)
+            if self._headers_written:
+                # too late for an error page; the download breaks off
+                self.request.connection.close()
+                return
+            raise tornado.web.HTTPError(500, reason="Export failed")
+        self.finish()
+
+    def on_connection_close(self):
+        writer = getattr(self, "writer", None)
+        if writer is not None:
+            writer.cancel()
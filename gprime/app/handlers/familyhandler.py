@@ -55,6 +55,8 @@ class FamilyHandler(BaseHandler):
                     form = FamilyForm(self, instance=family)
                     form.delete()
                     return
+                elif handle != "add" and self.not_modified(family.change):
+                    return
                 else:
                     self.render("family.html",
                                 **self.get_template_dict(tview=_("family detail"),
@@ -68,6 +70,8 @@ class FamilyHandler(BaseHandler):
                 self.set_status(404)
                 self.finish("<html><body>No such family</body></html>")
                 return
+        if self.not_modified():
+            return
         form = FamilyForm(self)
         try:
             form.select(page, search)
@@ -23,10 +23,14 @@ import sys
 import logging
 import hmac
 import json
+import hashlib
+import datetime
+import email.utils
 from passlib.hash import sha256_crypt as crypt
 
 from gprime.utils.locale import Locale, _
 from gprime.const import VERSION
+from gprime.proxy import LoaderProxyDb
 
 template_functions = {}
 exec("from gprime.app.template_functions import *",
@@ -42,8 +46,57 @@ class BaseHandler(tornado.web.RequestHandler):
             if name in kwargs:
                 setattr(self, name, kwargs[name])
                 del kwargs[name]
+        if self.database is not None:
+            # one object per handle, for this request:
+            self.database = LoaderProxyDb(self.database)
         super().__init__(*args, **kwargs)
 
+    def prepare(self):
+        self.app.follow_changes()
+
+    def not_modified(self, change=None):
+        """
+        Set the validators of the page: a strong ETag made from the
+        request, the user with their language and css theme, the database
+        change generation, the gPrime version and the change time of the
+        object shown, if any; and Last-Modified, the later of the last
+        commit and that change time.
+
+        Returns True, having answered 304 Not Modified, if the client has
+        this version of the page, so that it needn't be rendered. The ETag
+        is compared if the client sends one, else Last-Modified.
+        """
+        if (not hasattr(self.database, "get_change_generation") or
+                self.get_cookie("gprime-messages")):
+            # pages with messages are shown once
+            return False
+        user = self.current_user
+        user_data = self.app.get_user_data(user)
+        css, language = user_data["css"], user_data["language"]
+        key = (VERSION, user, language, css,
+               self.database.get_change_generation(), change,
+               self.request.path, sorted(self.request.arguments.items()))
+        etag = '"%s"' % hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        modified = int(max(self.database.get_change_time(), change or 0))
+        self.set_header("Etag", etag)
+        self.set_header("Cache-Control", "private, no-cache")
+        if modified:
+            self.set_header("Last-Modified",
+                            datetime.datetime.utcfromtimestamp(modified))
+        if self.request.headers.get("If-None-Match"):
+            fresh = self.check_etag_header()
+        else:
+            since = self.request.headers.get("If-Modified-Since")
+            parsed = since and email.utils.parsedate_tz(since)
+            # Last-Modified is in whole seconds, so a change in the same
+            # second as the one the client has may be newer
+            fresh = bool(modified and parsed and
+                         modified < email.utils.mktime_tz(parsed))
+        if fresh:
+            self.set_status(304)
+            self.finish()
+        return fresh
+
     def get_template_namespace(self):
         ns = super(BaseHandler, self).get_template_namespace()
         ns['_T_'] = lambda *x: '"{0}"'.format(ns['_'](*x))
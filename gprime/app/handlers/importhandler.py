@@ -0,0 +1,119 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2015 Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+import os
+
+import tornado.web
+import simplejson
+
+from .handlers import BaseHandler
+from ..forms.actionform import upload_job
+from gprime.cli.plug import BasePluginManager
+from gprime.utils.multipart import MultipartParser, parse_header
+from gprime.utils.stream import Spool
+
+# Largest upload, in bytes:
+MAX_UPLOAD_SIZE = 10 * 1024 ** 3
+
+@tornado.web.stream_request_body
+class ImportHandler(BaseHandler):
+    """
+    Imports a file POSTed to /import/PLUGIN-ID, either as the body or as
+    the file of a multipart/form-data body. The file is spooled to disk,
+    and hashed, as it arrives, and imported by a job that starts at once:
+    formats that allow it are parsed while the upload is under way.
+
+    Returns the url of the job, and the sha256 of the file, as JSON.
+    """
+    def prepare(self):
+        super().prepare()
+        self.spool = None
+        if not self.current_user:
+            raise tornado.web.HTTPError(403)
+        if self.request.method != "POST":
+            return
+        pid = self.path_args[0]
+        pmgr = BasePluginManager.get_instance()
+        importers = dict((pdata.id, pdata)
+                         for pdata in pmgr.get_reg_importers())
+        if pid not in importers:
+            raise tornado.web.HTTPError(404, reason="No such import")
+        pdata = importers[pid]
+        self.request.connection.set_max_body_size(MAX_UPLOAD_SIZE)
+        self.parser = None
+        self.in_file = False
+        content_type, params = parse_header(
+            self.request.headers.get("Content-Type", ""))
+        if content_type == "multipart/form-data":
+            if "boundary" not in params:
+                raise tornado.web.HTTPError(400, reason="No boundary")
+            self.parser = MultipartParser(params["boundary"], self.start_part,
+                                          self.write_part)
+        size = int(self.request.headers.get("Content-Length", 0)) or None
+        self.job = self.app.jobs.submit(self.current_user, pdata.name,
+                                        "import", upload_job,
+                                        pdata.extension, size)
+        self.spool = Spool(os.path.join(self.app.jobs.get_output_dir(self.job),
+                                        "upload.%s" % pdata.extension))
+
+    def start_part(self, headers):
+        """
+        Upload the first file of the body, and skip its other parts.
+        """
+        disposition, params = parse_header(
+            headers.get("content-disposition", ""))
+        self.in_file = "filename" in params and self.spool.size == 0
+
+    def write_part(self, data):
+        if self.in_file:
+            self.spool.write(data)
+
+    def data_received(self, chunk):
+        if self.parser is None:
+            self.spool.write(chunk)
+        else:
+            try:
+                self.parser.feed(chunk)
+            except ValueError:
+                self.spool.fail()
+                raise tornado.web.HTTPError(400, reason="Invalid body")
+
+    def post(self, pid):
+        if self.parser is not None:
+            try:
+                self.parser.close()
+            except ValueError:
+                raise tornado.web.HTTPError(400, reason="Incomplete body")
+        digest = self.spool.finish()
+        self.set_header("Content-Type", "application/json")
+        self.write(simplejson.dumps({
+            "job": self.app.make_url("/job/%s" % self.job),
+            "sha256": digest,
+            "size": self.spool.size,
+        }))
+
+    def on_finish(self):
+        # the job stops, rather than waiting for an upload that broke off
+        if self.spool is not None:
+            self.spool.fail()
+
+    def on_connection_close(self):
+        if self.spool is not None:
+            self.spool.fail()
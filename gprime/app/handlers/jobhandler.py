@@ -0,0 +1,95 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2015 Gramps Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+import os
+
+import tornado.web
+import simplejson
+
+from .handlers import BaseHandler
+from ..forms.actionform import download_to_user
+
+class JobHandler(BaseHandler):
+    """
+    The jobs of the user, as JSON:
+
+    /job/               - the jobs, the latest first
+    /job/HANDLE         - a job, with its status and progress
+    /job/HANDLE/output  - the file the job made
+    /job/HANDLE/cancel  - (POST) cancel the job
+    """
+    @tornado.web.authenticated
+    def get(self, path=""):
+        if "/" in path:
+            handle, action = path.split("/", 1)
+        else:
+            handle, action = path, ""
+        if not handle:
+            self.write_json({"results": [
+                self.make_job(job)
+                for job in self.app.jobs.get_all(self.current_user)]})
+            return
+        job = self.get_job(handle)
+        if action == "output":
+            output = os.path.realpath(job["output"] or "")
+            output_dir = os.path.realpath(self.app.jobs.get_output_dir(handle))
+            if (not job["output"] or
+                    os.path.dirname(output) != output_dir or
+                    not os.path.isfile(output)):
+                raise tornado.web.HTTPError(404, reason="No output")
+            download_to_user(output, self)
+        elif action:
+            raise tornado.web.HTTPError(404)
+        else:
+            self.write_json(self.make_job(job))
+
+    @tornado.web.authenticated
+    def post(self, path=""):
+        if "/" in path:
+            handle, action = path.split("/", 1)
+        else:
+            handle, action = path, ""
+        if action != "cancel":
+            raise tornado.web.HTTPError(404)
+        self.get_job(handle)
+        self.write_json({"cancelled": self.app.jobs.cancel(handle)})
+
+    def get_job(self, handle):
+        """
+        Return the job of the user with the handle.
+        """
+        job = self.app.jobs.get(handle)
+        if job is None or job["username"] != self.current_user:
+            raise tornado.web.HTTPError(404, reason="No such job")
+        return job
+
+    def make_job(self, job):
+        """
+        Return the JSON data of the job, with the url of its output.
+        """
+        data = dict((key, value) for (key, value) in job.items()
+                    if key not in ("output", "cancel"))
+        if job["output"]:
+            data["output"] = self.app.make_url("/job/%s/output" % job["handle"])
+        return data
+
+    def write_json(self, data):
+        self.set_header("Content-Type", "application/json")
+        self.write(simplejson.dumps(data))
@@ -55,6 +55,8 @@ class MediaHandler(BaseHandler):
                     form = MediaForm(self, instance=media)
                     form.delete()
                     return
+                elif handle != "add" and self.not_modified(media.change):
+                    return
                 else:
                     self.render("media.html",
                                 **self.get_template_dict(tview=_("media detail"),
@@ -68,6 +70,8 @@ class MediaHandler(BaseHandler):
                 self.set_status(404)
                 self.finish("<html><body>No such media</body></html>")
                 return
+        if self.not_modified():
+            return
         form = MediaForm(self)
         try:
             form.select(page, search)
@@ -55,6 +55,8 @@ class NoteHandler(BaseHandler):
                     form = NoteForm(self, instance=note)
                     form.delete()
                     return
+                elif handle != "add" and self.not_modified(note.change):
+                    return
                 else:
                     self.render("note.html",
                                 **self.get_template_dict(tview=_("note detail"),
@@ -68,6 +70,8 @@ class NoteHandler(BaseHandler):
                 self.set_status(404)
                 self.finish("<html><body>No such note</body></html>")
                 return
+        if self.not_modified():
+            return
         form = NoteForm(self)
         try:
             form.select(page, search)
@@ -63,6 +63,8 @@ class PersonHandler(BaseHandler):
                     form = PersonForm(self, instance=person)
                     form.delete()
                     return
+                elif handle != "add" and self.not_modified(person.change):
+                    return
                 else:
                     ## Action can be edit or view
                     self.render("person.html",
@@ -77,6 +79,8 @@ class PersonHandler(BaseHandler):
                 self.set_status(404)
                 self.finish("<html><body>No such person</body></html>")
                 return
+        if self.not_modified():
+            return
         form = PersonForm(self)
         # Do this here, to catch errors:
         try:
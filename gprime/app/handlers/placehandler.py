@@ -55,6 +55,8 @@ class PlaceHandler(BaseHandler):
                     form = PlaceForm(self, instance=place)
                     form.delete()
                     return
+                elif handle != "add" and self.not_modified(place.change):
+                    return
                 else:
                     self.render("place.html",
                                 **self.get_template_dict(tview=_("place detail"),
@@ -68,6 +70,8 @@ class PlaceHandler(BaseHandler):
                 self.set_status(404)
                 self.finish("<html><body>No such place</body></html>")
                 return
+        if self.not_modified():
+            return
         form = PlaceForm(self)
         try:
             form.select(page, search)
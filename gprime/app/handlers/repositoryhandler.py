@@ -55,6 +55,8 @@ class RepositoryHandler(BaseHandler):
                     form = RepositoryForm(self, instance=repository)
                     form.delete()
                     return
+                elif handle != "add" and self.not_modified(repository.change):
+                    return
                 else:
                     self.render("repository.html",
                                 **self.get_template_dict(tview=_("repository detail"),
@@ -68,6 +70,8 @@ class RepositoryHandler(BaseHandler):
                 self.set_status(404)
                 self.finish("<html><body>No such repository</body></html>")
                 return
+        if self.not_modified():
+            return
         form = RepositoryForm(self)
         try:
             form.select(page, search)
@@ -55,6 +55,8 @@ class SourceHandler(BaseHandler):
                     form = SourceForm(self, instance=source)
                     form.delete()
                     return
+                elif handle != "add" and self.not_modified(source.change):
+                    return
                 else:
                     self.render("source.html",
                                 **self.get_template_dict(tview=_("source detail"),
@@ -68,6 +70,8 @@ class SourceHandler(BaseHandler):
                 self.set_status(404)
                 self.finish("<html><body>No such source</body></html>")
                 return
+        if self.not_modified():
+            return
         form = SourceForm(self)
         try:
             form.select(page, search)
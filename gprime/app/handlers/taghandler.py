@@ -55,6 +55,8 @@ class TagHandler(BaseHandler):
                     form = TagForm(self, instance=tag)
                     form.delete()
                     return
+                elif handle != "add" and self.not_modified(tag.change):
+                    return
                 else:
                     self.render("tag.html",
                                 **self.get_template_dict(tview=_("tag detail"),
@@ -68,6 +70,8 @@ class TagHandler(BaseHandler):
                 self.set_status(404)
                 self.finish("<html><body>No such tag</body></html>")
                 return
+        if self.not_modified():
+            return
         form = TagForm(self)
         try:
             form.select(page, search)
@@ -25,6 +25,7 @@ from gprime.lib import *
 from gprime.lib.struct import Struct
 from gprime.display.name import NameDisplay
 from gprime.datehandler import displayer
+from gprime.app.fragmentcache import cached_fragment
 
 # Python imports:
 import tornado.log
@@ -145,6 +146,7 @@ style="background:url(%s) no-repeat; font-size:0; width: 30px; height: 30px;" %s
         return str(html) #.replace("&amp;nbsp;", "&nbsp;")
 
 #TODO: Ensure user and privacy levels are accounted for in tables
+@cached_fragment
 def event_table(form, user, action):
     retval = ""
     has_data = False
@@ -193,6 +195,7 @@ def event_table(form, user, action):
         retval += """ <SCRIPT LANGUAGE="JavaScript">setHasData("%s", 1)</SCRIPT>\n""" % cssid
     return retval
 
+@cached_fragment
 def name_table(form, user, action):
     retval = ""
     has_data = False
@@ -283,6 +286,7 @@ def surname_table(form, user, action, name_row):
         retval += """ <SCRIPT LANGUAGE="JavaScript">setHasData("%s", 1)</SCRIPT>\n""" % cssid
     return retval
 
+@cached_fragment
 def enclosed_by_table(form, user, action, placeref_list):
     cssid = "tab-enclosed-by"
     retval = ""
@@ -361,6 +365,7 @@ def alt_name_table(form, user, action, alt_names):
     return retval
 
 
+@cached_fragment
 def citation_table(form, user, action, citation_list, path=""):
     # FIXME: how can citation_table and source_table both be on same
     # page? This causes problems with form names, tab names, etc.
@@ -404,6 +409,7 @@ def citation_table(form, user, action, citation_list, path=""):
         retval += """ <SCRIPT LANGUAGE="JavaScript">setHasData("%s", 1)</SCRIPT>\n""" % cssid
     return retval
 
+@cached_fragment
 def repository_table(form, user, action, reporef_list):
     retval = ""
     has_data = False
@@ -447,6 +453,7 @@ def repository_table(form, user, action, reporef_list):
         retval += """ <SCRIPT LANGUAGE="JavaScript">setHasData("%s", 1)</SCRIPT>\n""" % cssid
     return retval
 
+@cached_fragment
 def note_table(form, user, action, note_list, path=""):
     retval = ""
     has_data = False
@@ -565,6 +572,7 @@ def address_table(form, user, action, address_list):
         retval += """ <SCRIPT LANGUAGE="JavaScript">setHasData("%s", 1)</SCRIPT>\n""" % cssid
     return retval
 
+@cached_fragment
 def media_table(form, user, action, media_list):
     retval = ""
     has_data = False
@@ -639,6 +647,7 @@ def internet_table(form, user, action, urls):
         retval += """ <SCRIPT LANGUAGE="JavaScript">setHasData("%s", 1)</SCRIPT>\n""" % cssid
     return retval
 
+@cached_fragment
 def association_table(form, user, action):
     retval = ""
     has_data = False
@@ -765,6 +774,7 @@ def lds_table(form, user, action, lds_ord_list):
         retval += """ <SCRIPT LANGUAGE="JavaScript">setHasData("%s", 1)</SCRIPT>\n""" % cssid
     return retval
 
+@cached_fragment
 def person_reference_table(form, user, action):
     from gprime.simple import SimpleAccess
     sa = SimpleAccess(form.database)
@@ -862,6 +872,7 @@ def reference_table(form, user, action):
         retval += """ <SCRIPT LANGUAGE="JavaScript">setHasData("%s", 1)</SCRIPT>\n""" % cssid
     return retval
 
+@cached_fragment
 def children_table(form, user, action):
     retval = ""
     has_data = False
@@ -0,0 +1,157 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for apihandler.py """
+
+import unittest
+
+import simplejson
+
+from .handlers_test import AppTestCase, make_person
+
+class ApiTest(AppTestCase):
+    """
+    Seven people; the fourth is private, and the sixth has a private name.
+    """
+    def add_objects(self, trans):
+        self.people = [make_person(name, "Smith", trans, self.db)
+                       for name in ("Ann", "Bob", "Cid", "Dan", "Eve",
+                                    "Fay", "Gus")]
+        self.people[3].set_privacy(True)
+        self.people[5].get_primary_name().set_privacy(True)
+        for person in self.people[3], self.people[5]:
+            self.db.commit_person(person, trans)
+        self.person = self.people[0]
+
+    def get_json(self, url, user="joe", code=200):
+        response = self.get(url, user)
+        self.assertEqual(response.code, code, response.body)
+        return simplejson.loads(response.body.decode("utf-8"))
+
+    def get_all(self, url, user="joe", limit=2):
+        """
+        Return the results of all the pages, and the number of pages.
+        """
+        results = []
+        pages = 0
+        cursor = None
+        while True:
+            page = self.get_json(url + "&limit=%d" % limit +
+                                 ("&cursor=" + cursor if cursor else ""),
+                                 user)
+            results.extend(page["results"])
+            pages += 1
+            cursor = page["next"]
+            if cursor is None:
+                return results, pages
+
+    def public_gids(self):
+        return [person.gid for person in self.people
+                if not person.private]
+
+    def test_tables(self):
+        tables = self.get_json("/api/v1/")["tables"]
+        self.assertIn("person", tables)
+        self.assertEqual(tables, sorted(tables))
+
+    def test_paging(self):
+        results, pages = self.get_all("/api/v1/person?fields=gid&order_by=gid")
+        self.assertEqual([row["gid"] for row in results], self.public_gids())
+        self.assertEqual(pages, 3)
+        results, pages = self.get_all(
+            "/api/v1/person?fields=gid&order_by=-gid", "ann", limit=3)
+        self.assertEqual([row["gid"] for row in results],
+                         sorted([person.gid for person in self.people],
+                                reverse=True))
+        self.assertEqual(pages, 3)
+        # a page of whole objects, ordered by handle
+        page = self.get_json("/api/v1/person?limit=100", "ann")
+        self.assertEqual([row["handle"] for row in page["results"]],
+                         sorted(person.handle for person in self.people))
+        self.assertIsNone(page["next"])
+
+    def test_where(self):
+        page = self.get_json("/api/v1/person?fields=gid&where=" +
+                             "primary_name.first_name%3DBob", "ann")
+        self.assertEqual(page["results"], [{"gid": self.people[1].gid}])
+        page = self.get_json("/api/v1/person?fields=gid&where=gid%3D" +
+                             self.people[2].gid)
+        self.assertEqual(page["results"], [{"gid": self.people[2].gid}])
+
+    def test_invalid(self):
+        for query in ("fields=nonsense", "fields=primary_name.nonsense",
+                      "where=nonsense%3D1", "where=%3D1",
+                      "order_by=nonsense"):
+            self.assertIn("error", self.get_json("/api/v1/person?" + query,
+                                                 "ann", code=400))
+
+    def test_cursor(self):
+        page = self.get_json("/api/v1/person?order_by=gid&limit=1")
+        # the cursor belongs to the order it was made for
+        self.get_json("/api/v1/person?order_by=gid,gender&cursor=" +
+                      page["next"], code=400)
+        self.get_json("/api/v1/person?cursor=nonsense", code=400)
+        self.get_json("/api/v1/person?limit=0", code=400)
+
+    def test_stream(self):
+        response = self.get("/api/v1/person?format=ndjson&fields=gid"
+                            "&order_by=gid&limit=4", "ann")
+        self.assertEqual(response.headers["Content-Type"],
+                         "application/x-ndjson")
+        lines = [simplejson.loads(line) for line in
+                 response.body.decode("utf-8").splitlines()]
+        self.assertEqual(lines[:4], [{"gid": person.gid} for person
+                                     in self.people[:4]])
+        self.assertIn("next", lines[4])
+
+    def test_not_found(self):
+        for url in ("/api/v1/person/unknown", "/api/v1/unknown",
+                    "/api/v1/person/%s/more" % self.person.handle):
+            self.assertIn("error", self.get_json(url, code=404))
+        obj = self.get_json("/api/v1/person/" + self.person.handle)
+        self.assertEqual(obj["handle"], self.person.handle)
+
+    def test_private(self):
+        url = "/api/v1/person/" + self.people[3].handle
+        self.get_json(url, code=404)
+        self.assertEqual(self.get_json(url, "ann")["handle"],
+                         self.people[3].handle)
+        # private data are left out of public objects
+        url = "/api/v1/person/" + self.people[5].handle
+        obj = self.get_json(url)
+        self.assertNotEqual(obj["primary_name"]["first_name"], "Fay")
+        self.assertEqual(self.get_json(url, "ann")
+                         ["primary_name"]["first_name"], "Fay")
+        page = self.get_json("/api/v1/person?fields=primary_name.first_name"
+                             "&order_by=gid&limit=100")
+        names = [row["primary_name.first_name"] for row in page["results"]]
+        self.assertNotIn("Dan", names)
+        self.assertNotIn("Fay", names)
+        self.assertIn("Eve", names)
+        # which can't be searched or ordered by either
+        for query in ("where=primary_name.first_name%3DFay",
+                      "where=Fay", "order_by=primary_name.first_name",
+                      "order_by=birth_ref_index"):
+            self.get_json("/api/v1/person?" + query, code=400)
+        self.get_json("/api/v1/person?order_by=primary_name.first_name",
+                      "ann")
+
+if __name__ == "__main__":
+    unittest.main()
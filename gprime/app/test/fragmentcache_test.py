@@ -0,0 +1,116 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for fragmentcache.py """
+
+import unittest
+
+from ...db import make_database, DbTxn
+from ...lib import Person, Note, Date
+from ..fragmentcache import get_fragment_cache, get_arg_key, cached_fragment
+
+class Namespace:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+class Form:
+    """
+    The parts of a form and its handler that a table renderer uses.
+    """
+    def __init__(self, db, instance, method="GET"):
+        app = Namespace(get_user_data=lambda user: {"language": "en"})
+        request = Namespace(method=method)
+        self.handler = Namespace(app=app, request=request)
+        self.database = db
+        self.sa = Namespace(dbase=db)
+        self.instance = instance
+
+class FragmentCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db = make_database("inmemorydb")
+        self.db.load(None)
+        with DbTxn("Add objects", self.db, batch=True) as trans:
+            self.note = Note()
+            self.note.set("A note")
+            self.db.add_note(self.note, trans)
+            self.person = Person()
+            self.person.add_note(self.note.handle)
+            self.person.change = 1
+            self.db.add_person(self.person, trans)
+        self.cache = get_fragment_cache(self.db)
+        self.calls = 0
+
+        @cached_fragment
+        def render_notes(form, user, action, *args):
+            self.calls += 1
+            return ", ".join(
+                str(form.database.get_note_from_handle(handle).get())
+                for handle in form.instance.get_note_list())
+        self.render = render_notes
+
+    def test_hit(self):
+        form = Form(self.db, self.person)
+        html = self.render(form, "joe", "view")
+        self.assertEqual(html, "A note")
+        hits = self.cache.get_metrics()["hits"]
+        self.assertEqual(self.render(form, "joe", "view"), html)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.cache.get_metrics()["hits"], hits + 1)
+        # another user, action or method is rendered again
+        self.render(form, "ann", "view")
+        self.render(form, "joe", "edit")
+        self.render(Form(self.db, self.person, "POST"), "joe", "view")
+        self.assertEqual(self.calls, 4)
+
+    def test_edit(self):
+        form = Form(self.db, self.person)
+        self.render(form, "joe", "view")
+        with DbTxn("Edit note", self.db, batch=True) as trans:
+            self.note.set("Another note")
+            self.db.commit_note(self.note, trans)
+        # batch transactions don't emit
+        self.db.emit('note-update', ([self.note.handle],))
+        self.assertEqual(self.render(form, "joe", "view"), "Another note")
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(self.cache.get_metrics()["invalidations"], 1)
+        # objects that weren't read leave it alone
+        self.db.emit('note-update', (["unknown"],))
+        self.render(form, "joe", "view")
+        self.assertEqual(self.calls, 2)
+
+    def test_user_changed(self):
+        form = Form(self.db, self.person)
+        self.render(form, "joe", "view")
+        self.assertEqual(self.cache.get_metrics()["size"], 1)
+        self.db.emit('user-changed', ("joe",))
+        self.assertEqual(self.cache.get_metrics()["size"], 0)
+        self.render(form, "joe", "view")
+        self.assertEqual(self.calls, 2)
+
+    def test_arg_key(self):
+        date = Date(1900)
+        self.assertEqual(get_arg_key([date, 1]),
+                         (repr(date.to_struct()), 1))
+        self.assertNotEqual(get_arg_key(Date(1901)), get_arg_key(date))
+        self.assertRaises(TypeError, get_arg_key, {})
+
+if __name__ == "__main__":
+    unittest.main()
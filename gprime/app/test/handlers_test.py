@@ -0,0 +1,167 @@
+#
+# gPrime - a web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for the conditional GETs of handlers.py """
+
+import email.utils
+import os
+import shutil
+import tempfile
+import unittest
+
+from tornado.testing import AsyncHTTPTestCase
+from tornado.web import create_signed_value
+
+from ...dbstate import DbState
+from ...db import DbTxn
+from ...lib import Person, Name, Surname
+from ..app import GPrimeApp
+
+COOKIE_SECRET = "secret"
+
+class Options:
+    """
+    The server options the app uses.
+    """
+    prefix = ""
+    sitename = "Test"
+    database = "Test"
+    debug = False
+    xsrf = False
+    port = 8000
+    hostname = "localhost"
+    workers = 1
+    jobs = 1
+    cookie_secret = COOKIE_SECRET
+
+def make_person(first_name, surname, trans, db):
+    person = Person()
+    name = Name()
+    name.set_first_name(first_name)
+    surname_obj = Surname()
+    surname_obj.set_surname(surname)
+    name.add_surname(surname_obj)
+    person.set_primary_name(name)
+    db.add_person(person, trans)
+    return person
+
+class AppTestCase(AsyncHTTPTestCase):
+    """
+    Serves a new database, with the users joe, who may edit, and ann, an
+    admin, and the objects that add_objects adds.
+    """
+    def get_app(self):
+        self.site_dir = tempfile.mkdtemp()
+        options = Options()
+        options.site_dir = self.site_dir
+        self.db = DbState().create_database(os.path.join(self.site_dir,
+                                                         "database"))
+        self.db.add_user("joe", "", {"edit"}, {})
+        self.db.add_user("ann", "", {"admin"}, {})
+        with DbTxn("Add objects", self.db, batch=True) as trans:
+            self.add_objects(trans)
+        return GPrimeApp(options, self.db)
+
+    def add_objects(self, trans):
+        self.person = make_person("Ann", "Smith", trans, self.db)
+
+    def tearDown(self):
+        super().tearDown()
+        self.db.close(update=False)
+        shutil.rmtree(self.site_dir)
+
+    def get(self, url, user="joe", headers=None):
+        """
+        Fetch url, logged in as user.
+        """
+        cookie = create_signed_value(COOKIE_SECRET, "user", user)
+        headers = dict(headers or {})
+        headers["Cookie"] = "user=" + cookie.decode()
+        return self.fetch(url, headers=headers)
+
+class NotModifiedTest(AppTestCase):
+
+    def assertNotModified(self, url, edit):
+        """
+        Check that url is answered with 304 while it is the same, and with
+        200 once edit has been called.
+        """
+        response = self.get(url)
+        self.assertEqual(response.code, 200)
+        etag = response.headers["Etag"]
+        response = self.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.code, 304)
+        self.assertEqual(response.body, b"")
+        self.assertEqual(response.headers["Etag"], etag)
+        edit()
+        response = self.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.code, 200)
+        self.assertNotEqual(response.headers["Etag"], etag)
+
+    def edit_person(self):
+        with DbTxn("Edit person", self.db, batch=True) as trans:
+            self.person.get_primary_name().set_first_name("Anne")
+            self.db.commit_person(self.person, trans)
+
+    def test_object(self):
+        self.assertNotModified("/person/" + self.person.handle,
+                               self.edit_person)
+
+    def test_list(self):
+        self.assertNotModified("/person/", self.edit_person)
+
+    def test_json(self):
+        self.assertNotModified("/json/?field=mother&q=A", self.edit_person)
+
+    def test_user(self):
+        url = "/person/" + self.person.handle
+        etag = self.get(url).headers["Etag"]
+        headers = {"If-None-Match": etag}
+        self.assertEqual(self.get(url, "ann", headers).code, 200)
+        # other arguments make another page
+        self.assertEqual(self.get(url + "?tab=2", headers=headers).code, 200)
+        self.assertEqual(self.get(url, headers=headers).code, 304)
+        # and so do the language and the css theme of the session
+        user_data = self._app.get_user_data("joe")
+        for key, value in (("language", "fr"), ("css", "Web_Basic-Blue.css")):
+            user_data[key] = value
+            response = self.get(url, headers=headers)
+            self.assertEqual(response.code, 200)
+            headers = {"If-None-Match": response.headers["Etag"]}
+
+    def test_modified_since(self):
+        url = "/person/"
+        response = self.get(url)
+        modified = email.utils.parsedate_to_datetime(
+            response.headers["Last-Modified"]).timestamp()
+        # there may have been other changes in the same second
+        headers = {"If-Modified-Since": response.headers["Last-Modified"]}
+        self.assertEqual(self.get(url, headers=headers).code, 200)
+        later = email.utils.formatdate(modified + 1, usegmt=True)
+        headers = {"If-Modified-Since": later}
+        self.assertEqual(self.get(url, headers=headers).code, 304)
+        headers = {"If-Modified-Since": "Mon, 01 Jan 1990 00:00:00 GMT"}
+        self.assertEqual(self.get(url, headers=headers).code, 200)
+        # the ETag comes first
+        headers = {"If-Modified-Since": later, "If-None-Match": '"other"'}
+        self.assertEqual(self.get(url, headers=headers).code, 200)
+
+if __name__ == "__main__":
+    unittest.main()
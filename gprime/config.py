@@ -132,6 +132,7 @@ register('behavior.addmedia-relative-path', False)
 register('behavior.autoload', False)
 register('behavior.avg-generation-gap', 20)
 register('behavior.betawarn', False)
+register('behavior.cache-proxy-bytes', 50000000)
 register('behavior.check-for-updates', 0)
 register('behavior.check-for-update-types', ["new"])
 register('behavior.last-check-for-updates', "1970/01/01")
@@ -140,13 +141,18 @@ register('behavior.do-not-show-previously-seen-updates', True)
 register('behavior.date-about-range', 50)
 register('behavior.date-after-range', 50)
 register('behavior.date-before-range', 50)
+register('behavior.filter-cache-size', 100)
+register('behavior.fragment-cache-size', 1000)
 register('behavior.generation-depth', 15)
 register('behavior.max-age-prob-alive', 110)
+register('behavior.max-generations-prob-alive', 10)
 register('behavior.max-sib-age-diff', 20)
 register('behavior.min-generation-years', 13)
 register('behavior.owner-warn', False)
 register('behavior.pop-plugin-status', False)
+register('behavior.private-proxy-cache-size', 10000)
 register('behavior.recent-export-type', 3)
+register('behavior.relationship-cache-size', 10000)
 register('behavior.spellcheck', False)
 register('behavior.startup', 0)
 register('behavior.surname-guessing', 0)
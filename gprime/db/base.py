@@ -628,6 +628,129 @@ class DbReadBase:
         """
         raise NotImplementedError
 
+    def get_place_enclosure(self, handle):
+        """
+        Return a list of (ancestor handle, depth, start, stop) rows, one
+        for every route up the place hierarchy from the place with handle
+        to an enclosing place, ordered on depth.
+
+        See :func:`~gprime.utils.location.get_enclosure`.
+        """
+        from ..utils.location import get_enclosure
+        from ..errors import HandleError
+        try:
+            place = self.get_place_from_handle(handle)
+        except HandleError:
+            place = None
+        if place is None:
+            return []
+        return sorted(get_enclosure(self, place), key=itemgetter(1))
+
+    def get_enclosed_place_handles(self, handle):
+        """
+        Return a list of the handles of all places enclosed by the place
+        with handle, at any depth.
+        """
+        return [place_handle for place_handle in self.iter_place_handles()
+                if any(row[0] == handle for row
+                       in self.get_place_enclosure(place_handle))]
+
+    def get_cached_place_title(self, handle, key):
+        """
+        Return the display title of the place with handle cached for the
+        display format key, or None. The cache is kept in the memory of
+        the process, so that displaying never writes to the database.
+        """
+        return None
+
+    def set_cached_place_title(self, handle, key, title):
+        """
+        Cache the display title of the place with handle for the display
+        format key. The title must not depend on a date.
+        """
+        pass
+
+    def get_cached_alive_range(self, handle, key):
+        """
+        Return the probably alive range of the person with handle cached
+        in the memory of the process for the parameters key, as a tuple (birth, death, explanation,
+        relative handle) with the dates as JSON text, or None.
+        """
+        return None
+
+    def set_cached_alive_ranges(self, key, items):
+        """
+        Cache the probably alive ranges of people for the parameters key;
+        items is a list of (handle, range), with the range as returned by
+        get_cached_alive_range.
+        """
+        pass
+
+    def clear_cached_alive_ranges(self, handles=None):
+        """
+        Drop the cached probably alive ranges of the people with the given
+        handles, or of all people if None.
+        """
+        pass
+
+    def get_place_coordinates(self, handle):
+        """
+        Return the (latitude, longitude) of the place with handle as floats
+        in degrees, or (None, None) if it has no valid coordinates.
+        """
+        from ..utils.place import conv_lat_lon_float
+        from ..errors import HandleError
+        try:
+            place = self.get_place_from_handle(handle)
+        except HandleError:
+            place = None
+        if place is None:
+            return (None, None)
+        return conv_lat_lon_float(place.get_latitude(),
+                                  place.get_longitude())
+
+    def _place_coordinates_within(self, bbox):
+        """
+        Return a list of (handle, latitude, longitude) for places with
+        coordinates inside the bounding box.
+        """
+        from ..utils.place import conv_lat_lon_float, split_bounding_box
+        boxes = split_bounding_box(bbox)
+        rows = []
+        for place in self.iter_places():
+            lat, lon = conv_lat_lon_float(place.get_latitude(),
+                                          place.get_longitude())
+            if lat is None:
+                continue
+            if any(min_lat <= lat <= max_lat and min_lon <= lon <= max_lon
+                   for (min_lat, min_lon, max_lat, max_lon) in boxes):
+                rows.append((place.handle, lat, lon))
+        return rows
+
+    def places_within(self, bbox):
+        """
+        Return a list of handles of places with coordinates inside the
+        bounding box (min_lat, min_lon, max_lat, max_lon), in degrees.
+        If min_lon is larger than max_lon, the box crosses the 180th
+        meridian.
+        """
+        return [row[0] for row in self._place_coordinates_within(bbox)]
+
+    def places_near(self, lat, lon, radius):
+        """
+        Return a list of (handle, distance) for places within radius km of
+        the position lat, lon (in degrees), nearest first.
+        """
+        from ..utils.place import get_bounding_box, get_distance
+        results = []
+        for (handle, place_lat, place_lon) in self._place_coordinates_within(
+                get_bounding_box(lat, lon, radius)):
+            distance = get_distance(lat, lon, place_lat, place_lon)
+            if distance <= radius:
+                results.append((handle, distance))
+        results.sort(key=itemgetter(1))
+        return results
+
     def get_raw_event_data(self, handle):
         """
         Return raw (serialized) Event object from handle
@@ -1381,6 +1504,25 @@ class DbReadBase:
             if get_count_only:
                 yield selected
 
+    def select_handles(self, table, where):
+        """
+        Return a list of the handles of the objects in table (Person,
+        Family, etc.) that match where (see _select), or None if the
+        database can't do this without building every object.
+        """
+        return None
+
+    def select_references(self, handles, backlinks=False,
+                          include_classes=None):
+        """
+        Return a list of (class_name, handle) tuples of the primary objects
+        that the objects with the handles refer to, or that refer to them if
+        backlinks is True, restricted to include_classes if given. Returns
+        None if the database can't look up the references of many objects
+        at once.
+        """
+        return None
+
     def _hash_name(self, table, name):
         """
         Used in SQL functions to eval expressions involving selected
@@ -2057,6 +2199,26 @@ class QuerySet:
         self.needs_to_run = True
         return self
 
+    def after(self, values):
+        """
+        Select only the rows that come after the row with the values of the
+        order_by fields, for pagination by keyset. The last order_by field
+        should be unique, like handle.
+        """
+        or_expr = []
+        for position, (field, direction) in enumerate(self.order_by):
+            and_expr = [(name, "=", value) for ((name, ignore), value)
+                        in zip(self.order_by[:position], values)]
+            and_expr.append((field, ">" if direction == "ASC" else "<",
+                             values[position]))
+            if len(and_expr) == 1:
+                or_expr.append(and_expr[0])
+            else:
+                or_expr.append(["AND", and_expr])
+        if len(or_expr) == 1:
+            return self._add_where_clause(or_expr[0])
+        return self._add_where_clause(["OR", or_expr])
+
     def _add_where_clause(self, *args):
         """
         Add a condition to the where clause.
@@ -2160,6 +2322,32 @@ class QuerySet:
         self._add_where_clause(where_by)
         return self
 
+    def within(self, bbox):
+        """
+        Select the places with coordinates inside the bounding box
+        (min_lat, min_lon, max_lat, max_lon).
+        """
+        if self.table != "Place":
+            raise Exception("within() requires coordinates: '%s'" % self.table)
+        if self.generator:
+            raise Exception("Queries in invalid order")
+        self._add_where_clause(("handle", "IN",
+                                self.database.places_within(bbox)))
+        return self
+
+    def near(self, lat, lon, radius):
+        """
+        Select the places within radius km of the position lat, lon.
+        """
+        if self.table != "Place":
+            raise Exception("near() requires coordinates: '%s'" % self.table)
+        if self.generator:
+            raise Exception("Queries in invalid order")
+        self._add_where_clause(("handle", "IN",
+                                [handle for (handle, distance) in
+                                 self.database.places_near(lat, lon, radius)]))
+        return self
+
     def filter(self, *args):
         """
         Apply a filter to the database.
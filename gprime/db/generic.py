@@ -453,6 +453,9 @@ class DbGeneric(DbWriteBase, DbReadBase, UpdateCallback, Callback):
     # 4. Signal for change in person group name, parameters are
     __signals__['person-groupname-rebuild'] = (str, str)
 
+    # 5. Signal for change in the data of a user (None for all users)
+    __signals__['user-changed'] = (object, )
+
     __callback_map = {}
 
     VERSION = (18, 0, 0)
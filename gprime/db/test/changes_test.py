@@ -0,0 +1,125 @@
+#
+# gPrime - A web-based genealogy program
+#
+# Copyright (C) 2017  gPrime contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for following the changes of other database connections """
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from gprime.dbstate import DbState
+from gprime.db import DbTxn
+from gprime.lib import Person
+from gprime.plugins.db.dbapi.dbapi import CHANGE_LOG_SIZE
+
+class ChangesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        path = os.path.join(self.tmpdir, "database")
+        # two processes with the same database open
+        self.writer = DbState().create_database(path)
+        self.reader = DbState().open_database(path)
+        self.signals = []
+        for signal in ('person-update', 'person-rebuild', 'user-changed',
+                       'home-person-changed'):
+            self.reader.connect(signal, self._make_callback(signal))
+
+    def tearDown(self):
+        self.writer.close(update=False)
+        self.reader.close(update=False)
+        shutil.rmtree(self.tmpdir)
+
+    def _make_callback(self, signal):
+        return lambda *args: self.signals.append((signal,) + args)
+
+    def test_logged(self):
+        self.assertEqual(self.reader.follow_changes(), 0)
+        self.assertEqual(self.reader.get_change_time(), 0)
+        self.writer.add_user("joe", "secret", {"edit"}, {})
+        self.writer.set_default_person_handle("abc")
+        self.writer._log_change([("person-update", (["abc"], ))])
+        self.writer.dbapi.commit()
+        self.assertEqual(self.writer.get_change_generation(), 3)
+        self.assertGreater(self.reader.get_change_time(), 0)
+        self.assertEqual(self.reader.follow_changes(), 3)
+        self.assertEqual(self.signals, [('user-changed', 'joe'),
+                                        ('home-person-changed',),
+                                        ('person-update', ['abc'])])
+        self.assertEqual(self.reader.follow_changes(), 0)
+        # the writer doesn't follow its own commits
+        self.assertEqual(self.writer.follow_changes(), 0)
+
+    def test_home_person(self):
+        self.writer.set_default_person_handle("abc")
+        self.assertEqual(self.reader.get_default_handle(), "abc")
+        self.assertEqual(self.reader.follow_changes(), 1)
+        self.assertEqual(self.signals, [('home-person-changed',)])
+        # committed on its own, which lets the others write
+        self.reader.add_user("joe", "secret", {"edit"}, {})
+        # or with the transaction it is set in
+        with DbTxn("Home", self.writer, batch=True) as trans:
+            self.writer.add_person(Person(), trans)
+            self.writer.set_default_person_handle("def")
+        self.assertEqual(self.writer.get_change_generation(), 3)
+        self.assertEqual(self.reader.follow_changes(), 1)
+        self.assertIn(('home-person-changed',), self.signals)
+        self.assertEqual(self.reader.get_default_handle(), "def")
+
+    def test_rebuild(self):
+        with DbTxn("Add", self.writer, batch=True) as trans:
+            self.writer.add_person(Person(), trans)
+        self.assertEqual(self.reader.follow_changes(), 1)
+        self.assertIn(('person-rebuild',), self.signals)
+        self.assertIn(('user-changed', None), self.signals)
+        # more commits than the log holds
+        self.signals = []
+        for count in range(CHANGE_LOG_SIZE + 1):
+            self.writer._log_change([("person-update", (["abc"], ))])
+        self.writer.dbapi.commit()
+        self.assertEqual(self.reader.follow_changes(), CHANGE_LOG_SIZE + 1)
+        self.assertNotIn(('person-update', ['abc']), self.signals)
+        self.assertIn(('person-rebuild',), self.signals)
+        # one row per commit, the oldest ones are dropped
+        self.writer.dbapi.execute("SELECT COUNT(*) FROM change_log;")
+        self.assertEqual(self.writer.dbapi.fetchone()[0], CHANGE_LOG_SIZE)
+
+    def test_display_caches(self):
+        generation = self.reader.get_change_generation()
+        self.reader.set_cached_place_title("abc", "key", "Town")
+        self.reader.set_cached_alive_ranges("key", [("def", ("", "", "",
+                                                             None))])
+        # caching a display doesn't commit
+        self.assertEqual(self.reader.get_change_generation(), generation)
+        self.assertIsNone(self.writer.get_cached_place_title("abc", "key"))
+        self.writer._log_change([("place-update", (["xyz"], ))])
+        self.writer.dbapi.commit()
+        self.reader.follow_changes()
+        self.assertIsNone(self.reader.get_cached_place_title("abc", "key"))
+        self.assertIsNotNone(self.reader.get_cached_alive_range("def",
+                                                                "key"))
+        self.writer._log_change([("family-update", (["xyz"], ))])
+        self.writer.dbapi.commit()
+        self.reader.follow_changes()
+        self.assertIsNone(self.reader.get_cached_alive_range("def", "key"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+#
+# gPrime - A web-based genealogy program
+#
+# Copyright (C) 2017  gPrime contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for the pagination of QuerySets by keyset """
+
+import unittest
+
+from gprime.db import make_database, DbTxn
+from gprime.lib import Person
+
+class QuerySetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db = make_database("inmemorydb")
+        self.db.load(None)
+        with DbTxn("Add people", self.db, batch=True) as trans:
+            for count in range(7):
+                person = Person()
+                person.gender = count % 2
+                self.db.add_person(person, trans)
+
+    def select_pages(self, order_by, size):
+        """
+        Return the handles of all people, a page of size at a time.
+        """
+        handles = []
+        last = None
+        while True:
+            queryset = self.db.get_queryset_by_table_name("Person")
+            queryset.order_by = list(order_by)
+            if last:
+                queryset.after(last)
+            queryset.limit(count=size)
+            rows = list(queryset.select(*[field for (field, direction)
+                                          in order_by]))
+            handles.extend(row["handle"] for row in rows)
+            if len(rows) < size:
+                return handles
+            last = [rows[-1][field] for (field, direction) in order_by]
+
+    def test_after(self):
+        for order_by in ([("handle", "ASC")],
+                         [("gender", "ASC"), ("handle", "ASC")],
+                         [("gender", "DESC"), ("gid", "DESC"),
+                          ("handle", "ASC")]):
+            queryset = self.db.get_queryset_by_table_name("Person")
+            queryset.order_by = list(order_by)
+            expected = [row["handle"] for row in queryset.select("handle")]
+            self.assertEqual(len(expected), 7)
+            for size in (1, 2, 3, 7):
+                self.assertEqual(self.select_pages(order_by, size), expected)
+
+if __name__ == "__main__":
+    unittest.main()
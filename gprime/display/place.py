@@ -28,7 +28,7 @@ Class handling displaying of places.
 #
 #-------------------------------------------------------------------------
 from ..config import config
-from ..utils.location import get_location_list
+from ..utils.location import get_dated_location_list
 from ..lib import PlaceType
 
 #-------------------------------------------------------------------------
@@ -55,7 +55,14 @@ class PlaceDisplay:
             return place.title
         else:
             lang = config.get('preferences.place-lang')
-            places = get_location_list(db, place, date, lang)
+            key = "%s|%s|%s|%s" % (lang,
+                                   config.get('preferences.place-restrict'),
+                                   config.get('preferences.place-number'),
+                                   config.get('preferences.place-reverse'))
+            title = db.get_cached_place_title(place.handle, key)
+            if title is not None:
+                return title
+            places, dated = get_dated_location_list(db, place, date, lang)
 
             if config.get('preferences.place-restrict') > 0:
                 index = _find_populated_place(places)
@@ -75,7 +82,11 @@ class PlaceDisplay:
             if config.get('preferences.place-reverse'):
                 names.reverse()
 
-            return ", ".join(names)
+            title = ", ".join(names)
+            if not dated:
+                # the same for every date, so share it:
+                db.set_cached_place_title(place.handle, key, title)
+            return title
 
 def _find_populated_place(places):
     populated_place = None
@@ -0,0 +1,207 @@
+#
+# gPrime - A web-based genealogy program
+#
+# Copyright (C) 2017  gPrime contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Cache of the results of filters, shared by all filters on a database.
+"""
+
+#------------------------------------------------------------------------
+#
+# Python modules
+#
+#------------------------------------------------------------------------
+import weakref
+
+#------------------------------------------------------------------------
+#
+# Gprime modules
+#
+#------------------------------------------------------------------------
+from ..utils.callback import Callback
+from ..utils.lru import LRU
+from ..proxy import LoaderProxyDb
+
+# The object types a filter result can depend on:
+NAMESPACES = ['Person', 'Family', 'Event', 'Place', 'Source', 'Citation',
+              'Media', 'Note', 'Repository', 'Tag']
+
+#-------------------------------------------------------------------------
+#
+# FilterCache
+#
+#-------------------------------------------------------------------------
+class FilterCache:
+    """
+    Cache of filter results of a database, keyed on the definition of the
+    filter (see :func:`get_filter_key`).
+
+    A generation is kept per object type, incremented by the add, update,
+    delete and rebuild signals of that type. Every entry remembers the
+    generations of the types its filter depends on, and is only used
+    while none of them changed. A change of the home person increments
+    all generations.
+    """
+    def __init__(self, size=None):
+        if size is None:
+            size = 100
+            try:
+                from ..config import config
+                size = config.get('behavior.filter-cache-size')
+            except ImportError:
+                pass
+        self.generations = dict.fromkeys(NAMESPACES, 0)
+        self.entries = LRU(size)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def connect_db_signals(self, db):
+        """
+        Follow the changes of db through its signals.
+        """
+        for namespace in NAMESPACES:
+            callback = self._make_callback(namespace)
+            for operation in ('add', 'update', 'delete', 'rebuild'):
+                db.connect('%s-%s' % (namespace.lower(), operation),
+                           callback)
+        db.connect('home-person-changed', self.changed_all)
+
+    def _make_callback(self, namespace):
+        return lambda *args: self.changed(namespace)
+
+    def changed(self, namespace):
+        """
+        Record a change to the objects of the given type.
+        """
+        self.generations[namespace] += 1
+
+    def changed_all(self):
+        """
+        Record a change that can affect any filter.
+        """
+        for namespace in NAMESPACES:
+            self.generations[namespace] += 1
+
+    def get_generations(self, namespaces):
+        """
+        Return the current generations of the given object types.
+        """
+        return tuple(self.generations[namespace] for namespace in namespaces)
+
+    def get(self, key, namespaces):
+        """
+        Return the list of handles cached for key, or None. namespaces are
+        the object types the result depends on.
+        """
+        if key not in self.entries:
+            self.misses += 1
+            return None
+        generations, handles = self.entries[key]
+        if generations != self.get_generations(namespaces):
+            del self.entries[key]
+            self.invalidations += 1
+            self.misses += 1
+            return None
+        self.hits += 1
+        return list(handles)
+
+    def set(self, key, namespaces, handles):
+        """
+        Cache the list of handles for key.
+        """
+        size = len(self.entries)
+        replace = key in self.entries
+        self.entries[key] = (self.get_generations(namespaces), tuple(handles))
+        if not replace and len(self.entries) == size:
+            self.evictions += 1
+
+    def clear(self):
+        """
+        Remove all entries.
+        """
+        self.entries.clear()
+
+    def get_metrics(self):
+        """
+        Return a dictionary with the cache statistics.
+        """
+        return {'size': len(self.entries),
+                'capacity': self.entries.count,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations}
+
+_CACHES = weakref.WeakKeyDictionary()
+
+def get_filter_cache(db):
+    """
+    Return the FilterCache of db, creating it on first use, or None if the
+    changes of db can't be followed (eg db is a proxy).
+    """
+    if isinstance(db, LoaderProxyDb):
+        # the objects are the database's
+        db = db.db
+    if not isinstance(db, Callback):
+        return None
+    cache = _CACHES.get(db)
+    if cache is None:
+        cache = FilterCache()
+        cache.connect_db_signals(db)
+        _CACHES[db] = cache
+    return cache
+
+def get_filter_key(filt, seen=()):
+    """
+    Return a tuple (key, namespaces) for the result of the filter: key is
+    built from the definition of the filter and of the custom filters its
+    rules use, and namespaces are the object types the result depends on.
+    Return (None, None) if the result can't be cached.
+    """
+    namespaces = set([filt.namespace])
+    rules = []
+    for rule in filt.flist:
+        if not rule.cacheable:
+            return None, None
+        if rule.depends is None:
+            namespaces.update(NAMESPACES)
+        else:
+            namespaces.update(rule.depends)
+        inner = rule.find_filter()
+        if inner is not None:
+            if id(inner) in seen:
+                return None, None
+            inner, inner_namespaces = get_filter_key(inner,
+                                                     seen + (id(inner),))
+            if inner is None:
+                return None, None
+            namespaces.update(inner_namespaces)
+        rule_class = rule.__class__
+        rules.append(("%s.%s" % (rule_class.__module__,
+                                 rule_class.__name__),
+                      tuple(rule.list), bool(rule.use_regex), inner))
+    key = (filt.namespace, filt.logical_op, bool(filt.invert), tuple(rules))
+    try:
+        hash(key)
+    except TypeError:
+        # a rule with values that are not strings
+        return None, None
+    return key, sorted(namespaces)
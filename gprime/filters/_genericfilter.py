@@ -24,6 +24,13 @@
 Package providing filtering framework for GRAMPS.
 """
 
+#------------------------------------------------------------------------
+#
+# Python modules
+#
+#------------------------------------------------------------------------
+from time import perf_counter
+
 #------------------------------------------------------------------------
 #
 # Gramps imports
@@ -40,6 +47,20 @@ from ..lib.repo import Repository
 from ..lib.media import Media
 from ..lib.note import Note
 from ..lib.tag import Tag
+from ._filtercache import get_filter_cache, get_filter_key
+from ._parallelfilter import apply_parallel
+
+# Number of objects after which the rules are reordered with the
+# statistics gathered so far:
+REORDER_INTERVAL = 1000
+
+def _handle(handle):
+    """
+    Return the handle as a str; cursors return bytes.
+    """
+    if isinstance(handle, bytes):
+        return handle.decode()
+    return handle
 
 #-------------------------------------------------------------------------
 #
@@ -50,6 +71,7 @@ class GenericFilter:
     """Filter class that consists of several rules."""
 
     logical_functions = ['or', 'and', 'xor', 'one']
+    namespace = 'Person'
 
     def __init__(self, source=None):
         if source:
@@ -66,6 +88,9 @@ class GenericFilter:
             self.comment = ''
             self.logical_op = 'and'
             self.invert = False
+        self.rule_order = None
+        self.where_rules = []
+        self.nr_checked = 0
 
     def match(self, handle, db):
         """
@@ -129,6 +154,49 @@ class GenericFilter:
     def find_from_handle(self, db, handle):
         return db.get_person_from_handle(handle)
 
+    def get_handles(self, db):
+        return db.get_person_handles()
+
+    def select_handles(self, db, where):
+        return db.select_handles("Person", where)
+
+    def get_rule_order(self):
+        """
+        Return the rules in the order that is expected to be cheapest to
+        evaluate: the rules that are cheap and most likely to decide the
+        result first. The order doesn't change the result.
+        """
+        if self.logical_op == 'and':
+            key = lambda rule: (rule.get_cost() /
+                                max(1. - rule.get_selectivity(), 0.01))
+        elif self.logical_op in ('or', 'one'):
+            key = lambda rule: (rule.get_cost() /
+                                max(rule.get_selectivity(), 0.01))
+        else: # xor needs all of them anyway
+            return list(self.flist)
+        return sorted(self.flist, key=key)
+
+    def apply_rule(self, rule, db, obj):
+        """
+        Apply the rule to obj, keeping the statistics used for ordering.
+        """
+        start = perf_counter()
+        matched = rule.apply(db, obj)
+        rule.total_time += perf_counter() - start
+        rule.nr_calls += 1
+        if matched:
+            rule.nr_matches += 1
+        return matched
+
+    def next_obj(self):
+        """
+        Count the objects checked, and reorder the rules from time to time
+        with the statistics of this run.
+        """
+        self.nr_checked += 1
+        if self.nr_checked % REORDER_INTERVAL == 0:
+            self.rule_order = self.get_rule_order()
+
     def check_func(self, db, id_list, task, cb_progress=None, tupleind=None):
         final_list = []
 
@@ -138,6 +206,7 @@ class GenericFilter:
                     obj = self.make_obj(data)
                     if cb_progress:
                         cb_progress()
+                    self.next_obj()
                     if task(db, obj) != self.invert:
                         final_list.append(handle)
         else:
@@ -149,13 +218,14 @@ class GenericFilter:
                 obj = self.find_from_handle(db, handle)
                 if cb_progress:
                     cb_progress()
+                self.next_obj()
                 if task(db, obj) != self.invert:
                     final_list.append(data)
         return final_list
 
     def check_and(self, db, id_list, cb_progress=None, tupleind=None):
         final_list = []
-        flist = self.flist
+        apply_rule = self.apply_rule
 
         if id_list is None:
             with self.get_cursor(db) as cursor:
@@ -163,7 +233,9 @@ class GenericFilter:
                     obj = self.make_obj(data)
                     if cb_progress:
                         cb_progress()
-                    val = all(rule.apply(db, obj) for rule in flist)
+                    self.next_obj()
+                    val = all(apply_rule(rule, db, obj)
+                              for rule in self.get_rule_list())
                     if val != self.invert:
                         final_list.append(handle)
         else:
@@ -175,7 +247,9 @@ class GenericFilter:
                 obj = self.find_from_handle(db, handle)
                 if cb_progress:
                     cb_progress()
-                val = all(rule.apply(db, obj) for rule in flist if obj)
+                self.next_obj()
+                val = all(apply_rule(rule, db, obj)
+                          for rule in self.get_rule_list() if obj)
                 if val != self.invert:
                     final_list.append(data)
         return final_list
@@ -194,21 +268,30 @@ class GenericFilter:
 
     def xor_test(self, db, obj):
         test = False
-        for rule in self.flist:
-            test = test ^ rule.apply(db, obj)
+        for rule in self.get_rule_list():
+            test = test ^ self.apply_rule(rule, db, obj)
         return test
 
     def one_test(self, db, obj):
         found_one = False
-        for rule in self.flist:
-            if rule.apply(db, obj):
+        for rule in self.get_rule_list():
+            if self.apply_rule(rule, db, obj):
                 if found_one:
                     return False    # There can be only one!
                 found_one = True
         return found_one
 
     def or_test(self, db, obj):
-        return any(rule.apply(db, obj) for rule in self.flist)
+        return any(self.apply_rule(rule, db, obj)
+                   for rule in self.get_rule_list())
+
+    def get_rule_list(self):
+        """
+        Return the rules in the order they are evaluated.
+        """
+        if self.rule_order is None:
+            return self.flist
+        return self.rule_order
 
     def get_check_func(self):
         try:
@@ -220,7 +303,8 @@ class GenericFilter:
     def check(self, db, handle):
         return self.get_check_func()(db, [handle])
 
-    def apply(self, db, id_list=None, cb_progress=None, tupleind=None):
+    def apply(self, db, id_list=None, cb_progress=None, tupleind=None,
+              profile=False, workers=1):
         """
         Apply the filter using db.
         If id_list given, the handles in id_list are used. If not given
@@ -234,21 +318,146 @@ class GenericFilter:
         tuples, with the handle being index tupleind. So
         handle_0 = id_list[0][tupleind]
 
+        The rules are evaluated in the order of get_rule_order, which uses
+        their estimated cost and the cost and selectivity observed in
+        earlier runs.
+
+        If profile is True, a tuple (result, profile) is returned, where
+        profile is a list with a dictionary per rule, in evaluation order,
+        with the number of objects the rule was applied to ("calls"), the
+        number it matched ("matches"), the time spent in seconds ("time")
+        and whether the database selected the objects instead ("where").
+
+        If workers is more than 1 and id_list isn't given, the objects are
+        split in ranges of handles that are filtered by that many worker
+        processes, each with its own database connection (see
+        :func:`.apply_parallel`). This is only done for a database on disk
+        with enough objects, if the database can't select the objects
+        itself and all rules are partition_safe.
+
+        The results are kept in the filter cache of the database (see
+        :class:`.FilterCache`), so applying the same filter again returns
+        the cached handles as long as the objects it depends on didn't
+        change. The cache isn't used when profiling.
+
         :Returns: if id_list given, it is returned with the items that
                 do not match the filter, filtered out.
                 if id_list not given, all items in the database that
                 match the filter are returned as a list of handles
         """
+        cache = key = None
+        if not profile:
+            cache = get_filter_cache(db)
+        if cache is not None:
+            key, namespaces = get_filter_key(self)
+        if key is not None:
+            handles = cache.get(key, namespaces)
+            if handles is not None:
+                if id_list is None:
+                    return handles
+                return self.select_cached(handles, id_list, tupleind)
         m = self.get_check_func()
         for rule in self.flist:
             rule.requestprepare(db)
-        res = m(db, id_list, cb_progress, tupleind)
+        if profile:
+            before = [(rule.nr_calls, rule.nr_matches, rule.total_time)
+                      for rule in self.flist]
+        self.rule_order = self.get_rule_order()
+        self.where_rules = []
+        self.nr_checked = 0
+        res = None
+        if id_list is None:
+            res = self.check_where(db, cb_progress)
+        if res is None and id_list is None and workers > 1 and not profile:
+            res = apply_parallel(self, db, workers, cb_progress)
+        if res is None:
+            res = m(db, id_list, cb_progress, tupleind)
+        if key is not None and id_list is None:
+            cache.set(key, namespaces, res)
+        order = self.where_rules + self.rule_order
+        self.rule_order = None
         for rule in self.flist:
             rule.requestreset()
+        if profile:
+            stats = []
+            for rule in order:
+                calls, matches, total_time = before[self.flist.index(rule)]
+                stats.append({
+                    "rule": rule.__class__.__name__,
+                    "name": rule.name,
+                    "calls": rule.nr_calls - calls,
+                    "matches": rule.nr_matches - matches,
+                    "time": rule.total_time - total_time,
+                    "where": rule in self.where_rules,
+                    })
+            return res, stats
         return res
 
+    def select_cached(self, handles, id_list, tupleind=None):
+        """
+        Return the items of id_list whose handle is in the cached result
+        handles.
+        """
+        matched = set(_handle(handle) for handle in handles)
+        if tupleind is None:
+            return [data for data in id_list if _handle(data) in matched]
+        return [data for data in id_list
+                if _handle(data[tupleind]) in matched]
+
+    def check_where(self, db, cb_progress=None):
+        """
+        Let the database select the candidates for the rules that have a
+        where clause, and apply the other rules to those only.
+
+        Returns None if the filter can't be done this way.
+        """
+        self.where_rules = []
+        wheres = [rule.get_where() for rule in self.flist]
+        pushed = [where for where in wheres if where is not None]
+        if not pushed:
+            return None
+        if self.logical_op == 'and':
+            where = pushed[0] if len(pushed) == 1 else ["AND", pushed]
+        elif len(pushed) < len(wheres):
+            # the others would have to run on everything anyway
+            return None
+        elif self.logical_op == 'or':
+            where = ["OR", pushed]
+        elif self.logical_op == 'one':
+            where = ["OR", [["AND", [pushed[i]] +
+                             [["NOT", other] for (j, other)
+                              in enumerate(pushed) if j != i]]
+                            for i in range(len(pushed))]]
+        else:
+            return None
+        handles = self.select_handles(db, where)
+        if handles is None:
+            return None
+        self.where_rules = [rule for (rule, where) in zip(self.flist, wheres)
+                            if where is not None]
+        self.rule_order = [rule for rule in self.rule_order
+                           if rule not in self.where_rules]
+        if self.rule_order:
+            final_list = []
+            for handle in handles:
+                obj = self.find_from_handle(db, handle)
+                if cb_progress:
+                    cb_progress()
+                if obj and all(self.apply_rule(rule, db, obj)
+                               for rule in self.rule_order):
+                    final_list.append(handle)
+        else:
+            final_list = handles
+        if self.invert:
+            matched = set(final_list)
+            final_list = [handle for handle in self.get_handles(db)
+                          if handle not in matched]
+        return final_list
+
 class GenericFamilyFilter(GenericFilter):
 
+    namespace = 'Family'
+
     def __init__(self, source=None):
         GenericFilter.__init__(self, source)
 
@@ -261,8 +470,16 @@ class GenericFamilyFilter(GenericFilter):
     def find_from_handle(self, db, handle):
         return db.get_family_from_handle(handle)
 
+    def get_handles(self, db):
+        return db.get_family_handles()
+
+    def select_handles(self, db, where):
+        return db.select_handles("Family", where)
+
 class GenericEventFilter(GenericFilter):
 
+    namespace = 'Event'
+
     def __init__(self, source=None):
         GenericFilter.__init__(self, source)
 
@@ -275,8 +492,16 @@ class GenericEventFilter(GenericFilter):
     def find_from_handle(self, db, handle):
         return db.get_event_from_handle(handle)
 
+    def get_handles(self, db):
+        return db.get_event_handles()
+
+    def select_handles(self, db, where):
+        return db.select_handles("Event", where)
+
 class GenericSourceFilter(GenericFilter):
 
+    namespace = 'Source'
+
     def __init__(self, source=None):
         GenericFilter.__init__(self, source)
 
@@ -289,8 +514,16 @@ class GenericSourceFilter(GenericFilter):
     def find_from_handle(self, db, handle):
         return db.get_source_from_handle(handle)
 
+    def get_handles(self, db):
+        return db.get_source_handles()
+
+    def select_handles(self, db, where):
+        return db.select_handles("Source", where)
+
 class GenericCitationFilter(GenericFilter):
 
+    namespace = 'Citation'
+
     def __init__(self, source=None):
         GenericFilter.__init__(self, source)
 
@@ -303,8 +536,16 @@ class GenericCitationFilter(GenericFilter):
     def find_from_handle(self, db, handle):
         return db.get_citation_from_handle(handle)
 
+    def get_handles(self, db):
+        return db.get_citation_handles()
+
+    def select_handles(self, db, where):
+        return db.select_handles("Citation", where)
+
 class GenericPlaceFilter(GenericFilter):
 
+    namespace = 'Place'
+
     def __init__(self, source=None):
         GenericFilter.__init__(self, source)
 
@@ -317,8 +558,16 @@ class GenericPlaceFilter(GenericFilter):
     def find_from_handle(self, db, handle):
         return db.get_place_from_handle(handle)
 
+    def get_handles(self, db):
+        return db.get_place_handles()
+
+    def select_handles(self, db, where):
+        return db.select_handles("Place", where)
+
 class GenericMediaFilter(GenericFilter):
 
+    namespace = 'Media'
+
     def __init__(self, source=None):
         GenericFilter.__init__(self, source)
 
@@ -331,8 +580,16 @@ class GenericMediaFilter(GenericFilter):
     def find_from_handle(self, db, handle):
         return db.get_media_from_handle(handle)
 
+    def get_handles(self, db):
+        return db.get_media_handles()
+
+    def select_handles(self, db, where):
+        return db.select_handles("Media", where)
+
 class GenericRepoFilter(GenericFilter):
 
+    namespace = 'Repository'
+
     def __init__(self, source=None):
         GenericFilter.__init__(self, source)
 
@@ -345,8 +602,16 @@ class GenericRepoFilter(GenericFilter):
     def find_from_handle(self, db, handle):
         return db.get_repository_from_handle(handle)
 
+    def get_handles(self, db):
+        return db.get_repository_handles()
+
+    def select_handles(self, db, where):
+        return db.select_handles("Repository", where)
+
 class GenericNoteFilter(GenericFilter):
 
+    namespace = 'Note'
+
     def __init__(self, source=None):
         GenericFilter.__init__(self, source)
 
@@ -359,6 +624,12 @@ class GenericNoteFilter(GenericFilter):
     def find_from_handle(self, db, handle):
         return db.get_note_from_handle(handle)
 
+    def get_handles(self, db):
+        return db.get_note_handles()
+
+    def select_handles(self, db, where):
+        return db.select_handles("Note", where)
+
 
 def GenericFilterFactory(namespace):
     if namespace == 'Person':
@@ -0,0 +1,174 @@
+#
+# gPrime - A web-based genealogy program
+#
+# Copyright (C) 2017  gPrime contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Evaluation of a filter in worker processes, each on a range of handles.
+"""
+
+#------------------------------------------------------------------------
+#
+# Python modules
+#
+#------------------------------------------------------------------------
+import importlib
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+#------------------------------------------------------------------------
+#
+# Gprime modules
+#
+#------------------------------------------------------------------------
+from ..dbstate import DbState
+
+LOG = logging.getLogger(".filter")
+
+# Tables with fewer objects are filtered in the calling process:
+MIN_OBJECTS = 1000
+# Number of handle ranges per worker, so that the progress can be
+# reported and a slow range doesn't keep the other workers idle:
+PARTITIONS_PER_WORKER = 4
+
+#-------------------------------------------------------------------------
+#
+# Filter definitions
+#
+#-------------------------------------------------------------------------
+def get_filter_definition(filt):
+    """
+    Return the definition of the filter as a tuple of strings, booleans
+    and lists, that can be passed to another process.
+    """
+    rules = []
+    for rule in filt.flist:
+        rule_class = rule.__class__
+        rules.append((rule_class.__module__, rule_class.__name__,
+                      list(rule.list), bool(rule.use_regex)))
+    return (filt.namespace, filt.logical_op, bool(filt.invert), rules)
+
+def make_filter(definition):
+    """
+    Return a new filter from a definition made by get_filter_definition.
+    """
+    from ._genericfilter import GenericFilterFactory
+    namespace, logical_op, invert, rules = definition
+    filt = GenericFilterFactory(namespace)()
+    filt.set_logical_op(logical_op)
+    filt.set_invert(invert)
+    for (module, name, values, use_regex) in rules:
+        rule_class = getattr(importlib.import_module(module), name)
+        filt.add_rule(rule_class(values, use_regex))
+    return filt
+
+#-------------------------------------------------------------------------
+#
+# Workers
+#
+#-------------------------------------------------------------------------
+# The database of a worker process:
+_WORKER_DB = None
+
+def _open_database(dbpath):
+    """
+    Open the database of a worker process, read-only.
+    """
+    global _WORKER_DB
+    dbpath, locked, locked_by, backend = \
+        DbState().lookup_family_tree(dbpath)
+    _WORKER_DB = DbState().make_database(backend)
+    _WORKER_DB.load(dbpath)
+    _WORKER_DB.readonly = True
+
+def _apply_partition(definition, first, last):
+    """
+    Apply the filter to the objects with first <= handle < last (no upper
+    bound if None) in the database of the worker; return the matching
+    handles.
+    """
+    filt = make_filter(definition)
+    where = [("handle", ">=", first)]
+    if last is not None:
+        where.append(("handle", "<", last))
+    handles = _WORKER_DB.select_handles(filt.namespace, ["AND", where])
+    return filt.apply(_WORKER_DB, sorted(handles))
+
+def get_dbpath(db):
+    """
+    Return the path other processes can open db with, or None if they
+    can't (eg an in-memory database or a proxy).
+    """
+    if not hasattr(db, "get_save_path") or db.get_save_path() is None:
+        return None
+    if db.basedb is not db:
+        return None
+    dbpath, locked, locked_by, backend = \
+        DbState().lookup_family_tree(db.get_save_path())
+    if backend == "inmemorydb":
+        return None
+    return dbpath
+
+def apply_parallel(filt, db, workers, cb_progress=None):
+    """
+    Apply the filter to all objects of db with the given number of worker
+    processes. Every worker opens the database itself, read-only, and
+    gets ranges of handles to filter, preparing the rules for each range.
+    The results are merged in handle order.
+
+    cb_progress is called once per object, as ranges are completed.
+
+    Returns None if the filter has to be applied in this process: the
+    database can't be opened by other processes, a rule isn't
+    partition safe, or there are too few objects.
+    """
+    if workers < 2 or not all(rule.partition_safe for rule in filt.flist):
+        return None
+    dbpath = get_dbpath(db)
+    if dbpath is None:
+        return None
+    handles = sorted(handle.decode() if isinstance(handle, bytes) else handle
+                     for handle in filt.get_handles(db))
+    if len(handles) < MIN_OBJECTS:
+        return None
+    nr_parts = min(workers * PARTITIONS_PER_WORKER, len(handles))
+    starts = [len(handles) * part // nr_parts for part in range(nr_parts)]
+    bounds = []
+    for part, start in enumerate(starts):
+        if part + 1 < nr_parts:
+            end = starts[part + 1]
+            bounds.append((handles[start], handles[end], end - start))
+        else:
+            bounds.append((handles[start], None, len(handles) - start))
+    # the first range also gets handles that sort before the known ones:
+    bounds[0] = ("",) + bounds[0][1:]
+    definition = get_filter_definition(filt)
+    result = []
+    LOG.debug("filtering %d objects in %d ranges with %d workers",
+              len(handles), nr_parts, workers)
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_open_database,
+                             initargs=(dbpath,)) as executor:
+        futures = [executor.submit(_apply_partition, definition, first, last)
+                   for (first, last, count) in bounds]
+        for future, (first, last, count) in zip(futures, bounds):
+            result.extend(future.result())
+            if cb_progress:
+                for dummy in range(count):
+                    cb_progress()
+    return result
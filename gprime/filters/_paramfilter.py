@@ -45,7 +45,7 @@ class ParamFilter(GenericFilter):
     def set_parameter(self, param):
         self.param_list = [param]
 
-    def apply(self, db, id_list=None):
+    def apply(self, db, id_list=None, profile=False, workers=1):
         for rule in self.flist:
             #rule.set_list(self.param_list)
             #
@@ -61,7 +61,8 @@ class ParamFilter(GenericFilter):
                 raise FilterError('Custom filters can not twice be used' \
                                    ' in a parameter filter')
             rule.requestprepare(db)
-        result = GenericFilter.apply(self, db, id_list)
+        result = GenericFilter.apply(self, db, id_list, profile=profile,
+                                     workers=workers)
         for rule in self.flist:
             rule.requestreset()
         return result
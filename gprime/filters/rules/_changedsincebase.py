@@ -54,6 +54,7 @@ class ChangedSinceBase(Rule):
                     "date/time (yyyy-mm-dd hh:mm:ss) or in range, if a second " \
                     "date/time is given."
     category    = _('General filters')
+    depends     = []
 
     def add_time(self, date):
         if re.search("\d.*\s+\d{1,2}:\d{2}:\d{2}", date):
@@ -104,3 +105,13 @@ class ChangedSinceBase(Rule):
         if self.before:
             return obj_time < self.before
         return False
+
+    def get_where(self):
+        if self.since and self.before:
+            return ["AND", [("change", ">=", self.since),
+                            ("change", "<", self.before)]]
+        if self.since:
+            return ("change", ">=", self.since)
+        if self.before:
+            return ("change", "<", self.before)
+        return None
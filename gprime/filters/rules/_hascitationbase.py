@@ -52,6 +52,7 @@ class HasCitationBase(Rule):
     name        = _('Citations matching parameters')
     description = _("Matches citations with particular parameters")
     category    = _('Citation/source filters')
+    cost        = 10
     allow_regex = True
 
     def prepare(self, db):
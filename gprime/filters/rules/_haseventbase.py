@@ -54,6 +54,7 @@ class HasEventBase(Rule):
     name        =  'Events matching parameters'
     description =  "Matches events with particular parameters"
     category    = _('Event filters')
+    cost        = 10
     allow_regex = True
 
     def prepare(self, db):
@@ -46,6 +46,7 @@ class HasGrampsId(Rule):
     name        = 'Object with <Id>'
     description = "Matches objects with a specified GID"
     category    = _('General filters')
+    depends     = []
 
     def apply(self, db, obj):
         """
@@ -53,3 +54,6 @@ class HasGrampsId(Rule):
         return true if the rule passes, false otherwise.
         """
         return obj.gid == self.list[0]
+
+    def get_where(self):
+        return ("gid", "=", self.list[0])
@@ -45,6 +45,7 @@ class HasNoteRegexBase(Rule):
     description = ("Matches objects whose notes contain a substring "
                    "or match a regular expression")
     category    = _('General filters')
+    cost        = 10
     allow_regex = True
 
     def apply(self, db, person):
@@ -44,6 +44,7 @@ class HasNoteSubstrBase(Rule):
     description = "Matches objects whose notes contain text matching a " \
                     "substring"
     category    = _('General filters')
+    cost        = 10
 
     def apply(self, db, person):
         notelist = person.get_note_list()
@@ -46,6 +46,7 @@ class HasSourceOfBase(Rule):
     name        = 'Object with the <source>'
     category    = _('Citation/source filters')
     description = 'Matches objects who have a particular source'
+    cost        = 10
 
     def prepare(self,db):
         if self.list[0] == '':
@@ -40,6 +40,10 @@ class IsPrivate(Rule):
     name        = 'Objects marked private'
     description = "Matches objects that are indicated as private"
     category    = _('General filters')
+    depends     = []
 
     def apply(self, db, obj):
         return obj.get_privacy()
+
+    def get_where(self):
+        return ("private", "=", True)
@@ -37,6 +37,10 @@ class IsPublic(Rule):
     name        = 'Objects not marked private'
     description = "Matches objects that are not indicated as private"
     category    = _('General filters')
+    depends     = []
 
     def apply(self, db, obj):
         return not obj.get_privacy()
+
+    def get_where(self):
+        return ("private", "=", False)
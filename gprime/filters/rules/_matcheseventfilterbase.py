@@ -67,6 +67,6 @@ class MatchesEventFilterBase(MatchesFilterBase):
         eventlist = [x.ref for x in object.get_event_ref_list()]
         for eventhandle in eventlist:
             #check if event in event filter
-            if self.MEF_filt.check(db, eventhandle):
+            if eventhandle in self.matches:
                 return True
         return False
@@ -31,7 +31,7 @@ LOG = logging.getLogger(".filter")
 # Gprime modules
 #
 #-------------------------------------------------------------------------
-# we need global variableCustomFilters, so we need to query gramps.gen.filters
+# we need global variableCustomFilters, so we need to query gprime.filters
 # when we need this variable, not import it at the start!
 from gprime.const import LOCALE as glocale
 _ = glocale.translation.gettext
@@ -55,43 +55,39 @@ class MatchesFilterBase(Rule):
     name        = 'Objects matching the <filter>'
     description = "Matches objects matched by the specified filter name"
     category    = _('General filters')
+    partition_safe = False
 
     def prepare(self, db):
-        if gramps.gen.filters.CustomFilters:
-            filters = gramps.gen.filters.CustomFilters.get_filters_dict(self.namespace)
-            if self.list[0] in filters:
-                filt = filters[self.list[0]]
-                for rule in filt.flist:
-                    rule.requestprepare(db)
-            else:
-                LOG.warning(_("Can't find filter %s in the defined custom filters")
-                                    % self.list[0])
-        else:
+        if self.find_filter() is None:
             LOG.warning(_("Can't find filter %s in the defined custom filters")
-                                    % self.list[0])
+                        % self.list[0])
+        self.matches = self.find_matches(db)
 
     def reset(self):
-        if gramps.gen.filters.CustomFilters:
-            filters = gramps.gen.filters.CustomFilters.get_filters_dict(self.namespace)
-            if self.list[0] in filters:
-                filt = filters[self.list[0]]
-                for rule in filt.flist:
-                    rule.requestreset()
+        self.matches = set()
 
     def apply(self, db, obj):
-        if gramps.gen.filters.CustomFilters:
-            filters = gramps.gen.filters.CustomFilters.get_filters_dict(self.namespace)
-            if self.list[0] in filters:
-                filt = filters[self.list[0]]
-                return filt.check(db, obj.handle)
-        return False
+        return obj.handle in self.matches
 
     def find_filter(self):
         """
         Return the selected filter or None.
         """
-        if gramps.gen.filters.CustomFilters:
-            filters = gramps.gen.filters.CustomFilters.get_filters_dict(self.namespace)
+        if gprime.filters.CustomFilters:
+            filters = gprime.filters.CustomFilters.get_filters_dict(
+                self.namespace)
             if self.list[0] in filters:
                 return filters[self.list[0]]
         return None
+
+    def find_matches(self, db):
+        """
+        Return the set of the handles of the objects matched by the
+        selected filter. The results of the filter are cached per database,
+        so the filter only runs again after the database changed.
+        """
+        filt = self.find_filter()
+        if filt is None:
+            return set()
+        return set(handle.decode() if isinstance(handle, bytes) else handle
+                   for handle in filt.apply(db))
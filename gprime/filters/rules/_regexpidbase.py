@@ -51,6 +51,20 @@ class RegExpIdBase(Rule):
                    "or matches a regular expression"
     category    = _('General filters')
     allow_regex = True
+    depends     = []
 
     def apply(self, db, obj):
         return self.match_substring(0, obj.gid)
+
+    def get_where(self):
+        if not self.list[0]:
+            return None
+        if self.use_regex:
+            pattern = "(?i)" + self.list[0]
+        else:
+            pattern = "(?i)" + re.escape(self.list[0])
+        try:
+            re.compile(pattern)
+        except re.error:
+            return None
+        return ("gid", "REGEXP", pattern)
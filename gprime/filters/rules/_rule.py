@@ -40,19 +40,48 @@ import re
 import logging
 LOG = logging.getLogger(".")
 
+# Calls of apply needed before the measured cost and selectivity are used:
+MIN_CALLS = 20
+# Time in seconds of one unit of Rule.cost:
+COST_UNIT = 0.00001
+
 #-------------------------------------------------------------------------
 #
 # Rule
 #
 #-------------------------------------------------------------------------
 class Rule:
-    """Base rule class."""
+    """
+    Base rule class.
+
+    cost is an estimate of the relative cost of apply, used to order the
+    rules of a filter until the cost has been measured: 1 for a check on
+    the object itself, 10 for a rule that looks up other objects, 100 for
+    a rule that searches text or walks the family tree.
+
+    depends lists the object types, besides the one filtered, whose
+    changes can change the result of apply; None if it can be any of them.
+    cacheable is False if the result depends on more than the objects in
+    the database (eg the bookmarks), so that the filter results can't be
+    cached. partition_safe is False if prepare computes something for the
+    whole database (eg an ancestor map), so that the rule shouldn't be
+    prepared again by every worker of a parallel apply.
+    """
 
     labels      = []
     name        = ''
     category    = _('Miscellaneous filters')
     description = _('No description')
     allow_regex = False
+    cost        = 1
+    depends     = None
+    cacheable   = True
+    partition_safe = True
+
+    # statistics of the calls of apply, kept by GenericFilter:
+    nr_calls    = 0
+    nr_matches  = 0
+    total_time  = 0.
 
     def __init__(self, arg, use_regex=False):
         self.list = []
@@ -133,6 +162,41 @@ class Rule:
         """Apply the rule to some database entry; must be overwritten."""
         return True
 
+    def get_cost(self):
+        """
+        Return the expected time in seconds of a call of apply: the
+        measured average, or the estimate from cost if there are too few
+        calls yet.
+        """
+        if self.nr_calls >= MIN_CALLS:
+            return self.total_time / self.nr_calls
+        return self.cost * COST_UNIT
+
+    def get_selectivity(self):
+        """
+        Return the expected fraction of the objects that apply matches:
+        the measured one, or one half if there are too few calls yet.
+        """
+        if self.nr_calls >= MIN_CALLS:
+            return self.nr_matches / self.nr_calls
+        return 0.5
+
+    def get_where(self):
+        """
+        Return a where clause ((field, op, value), or ["AND"|"OR"|"NOT", ...])
+        selecting exactly the objects that apply would match, so that the
+        database can evaluate the rule without building the objects.
+        Return None if the rule can't be expressed that way. Called after
+        prepare.
+        """
+        return None
+
+    def find_filter(self):
+        """
+        Return the custom filter the rule applies to other objects, or None.
+        """
+        return None
+
     def display_values(self):
         """Return the labels and values of this rule."""
         l_v = ( '%s="%s"' % (_(self.labels[ix]), self.list[ix])
@@ -47,6 +47,8 @@ class HasSourceIdOf(HasGrampsId):
     description = _("Matches a citation with a source with a specified Gramps "
                     "ID")
     category    = _('Source filters')
+    cost        = 10
+    depends     = ['Source']
 
     def apply(self, dbase, citation):
         source = dbase.get_source_from_handle(
@@ -54,3 +56,7 @@ class HasSourceIdOf(HasGrampsId):
         if HasGrampsId.apply(self, dbase, source):
             return True
         return False
+
+    def get_where(self):
+        # the ID is the one of the source, not of the citation
+        return None
@@ -63,6 +63,6 @@ class MatchesSourceFilter(MatchesFilterBase):
             return False
 
         source_handle = object.source_handle
-        if self.MRF_filt.check(db, source_handle):
+        if source_handle in self.matches:
             return True
         return False
@@ -49,6 +49,8 @@ class RegExpSourceIdOf(RegExpIdBase):
     description = _("Matches citations whose source has a GID that "
                     "matches the regular expression")
     category    = _('Source filters')
+    cost        = 10
+    depends     = ['Source']
 
     def apply(self, dbase, citation):
         source = dbase.get_source_from_handle(
@@ -56,3 +58,7 @@ class RegExpSourceIdOf(RegExpIdBase):
         if RegExpIdBase.apply(self, dbase, source):
             return True
         return False
+
+    def get_where(self):
+        # the ID is the one of the source, not of the citation
+        return None
@@ -69,22 +69,18 @@ class MatchesPersonFilter(MatchesFilterBase):
 
 
     def apply(self, db, event):
-        filt = self.find_filter()
-        if filt:
+        for (classname, handle) in db.find_backlink_handles(
+                                        event.get_handle(), ['Person']):
+            if handle in self.matches:
+                return True
+        if self.MPF_famevents :
+            #also include if family event of the person
             for (classname, handle) in db.find_backlink_handles(
-                                            event.get_handle(), ['Person']):
-                if filt.check(db, handle):
+                                        event.get_handle(), ['Family']):
+                family = db.get_family_from_handle(handle)
+                if family.father_handle in self.matches:
+                    return True
+                if family.mother_handle in self.matches:
                     return True
-            if self.MPF_famevents :
-                #also include if family event of the person
-                for (classname, handle) in db.find_backlink_handles(
-                                            event.get_handle(), ['Family']):
-                    family = db.get_family_from_handle(handle)
-                    if family.father_handle and filt.check(db,
-                                                    family.father_handle) :
-                        return True
-                    if family.mother_handle and filt.check(db,
-                                                    family.mother_handle) :
-                        return True
 
         return False
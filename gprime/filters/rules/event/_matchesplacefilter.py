@@ -55,9 +55,7 @@ class MatchesPlaceFilter(MatchesFilterBase):
     namespace   = 'Place'
 
     def apply(self, db, event):
-        filt = self.find_filter()
-        if filt:
-            handle = event.get_place_handle()
-            if handle and filt.check(db, handle):
-                return True
+        handle = event.get_place_handle()
+        if handle and handle in self.matches:
+            return True
         return False
@@ -47,5 +47,11 @@ class ChildHasIdOf(RegExpIdBase):
     description = _("Matches families where child has a specified "
                     "GID")
     category    = _('Child filters')
+    cost        = 10
+    depends     = ['Person']
     base_class = RegExpIdBase
     apply = child_base
+
+    def get_where(self):
+        # the ID is the one of the person, not of the family
+        return None
@@ -47,5 +47,11 @@ class FatherHasIdOf(RegExpIdBase):
     description = _("Matches families whose father has a specified "
                     "GID")
     category    = _('Father filters')
+    cost        = 10
+    depends     = ['Person']
     base_class = RegExpIdBase
     apply = father_base
+
+    def get_where(self):
+        # the ID is the one of the person, not of the family
+        return None
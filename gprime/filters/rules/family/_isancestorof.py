@@ -45,6 +45,7 @@ class IsAncestorOf(Rule):
     name = _('Ancestor families of <family>')
     category = _('General filters')
     description = _('Matches ancestor families of the specified family')
+    partition_safe = False
 
     def prepare(self, db):
         self.map = set()
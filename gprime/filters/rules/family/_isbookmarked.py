@@ -44,6 +44,7 @@ class IsBookmarked(Rule):
     name        = _('Bookmarked families')
     category    = _('General filters')
     description = _("Matches the families on the bookmark list")
+    cacheable   = False
 
     def prepare(self, db):
         self.bookmarks = db.get_family_bookmarks().get()
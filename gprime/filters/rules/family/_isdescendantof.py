@@ -45,6 +45,7 @@ class IsDescendantOf(Rule):
     name = _('Descendant families of <family>')
     category = _('General filters')
     description = _('Matches descendant families of the specified family')
+    partition_safe = False
 
     def prepare(self, db):
         self.map = set()
@@ -47,5 +47,11 @@ class MotherHasIdOf(RegExpIdBase):
     description = _("Matches families whose mother has a specified "
                     "GID")
     category    = _('Mother filters')
+    cost        = 10
+    depends     = ['Person']
     base_class = RegExpIdBase
     apply = mother_base
+
+    def get_where(self):
+        # the ID is the one of the person, not of the family
+        return None
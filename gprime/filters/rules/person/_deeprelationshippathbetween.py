@@ -45,18 +45,8 @@ def filter_database(db, progress, filter_name):
     """Returns a list of person handles"""
 
     filt = MatchesFilter([filter_name])
-    progress.set_header(_('Preparing sub-filter'))
-    filt.requestprepare(db)
-
     progress.set_header(_('Retrieving all sub-filter matches'))
-    matches = []
-    for handle in db.iter_person_handles():
-        person = db.get_person_from_handle(handle)
-        if filt.apply(db, person):
-            matches.append(handle)
-        progress.step()
-
-    filt.requestreset()
+    matches = list(filt.find_matches(db))
 
     return matches
 
@@ -130,6 +120,7 @@ class DeepRelationshipPathBetween(Rule):
                     " with a filter.  This produces a set of relationship paths (including"
                     " by marriage) between the specified person and the target people."
                     "  Each path is not necessarily the shortest path.")
+    partition_safe = False
 
     def prepare(self, db):
         # FIXME: this should use the User class
@@ -152,6 +143,9 @@ class DeepRelationshipPathBetween(Rule):
         self.__matches = set()
         list(map(self.__matches.update, paths))
 
+    def find_filter(self):
+        return MatchesFilter(self.list[1:2]).find_filter()
+
     def reset(self):
         self.__matches = set()
 
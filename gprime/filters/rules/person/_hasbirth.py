@@ -49,6 +49,7 @@ class HasBirth(Rule):
     name        = _('People with the <birth data>')
     description = _("Matches people with birth data of a particular value")
     category    = _('Event filters')
+    cost        = 10
     allow_regex = True
 
     def prepare(self, db):
@@ -31,7 +31,6 @@ _ = glocale.translation.gettext
 # Gprime modules
 #
 #-------------------------------------------------------------------------
-from ....utils.db import for_each_ancestor
 from ._hascommonancestorwith import HasCommonAncestorWith
 from ._matchesfilter import MatchesFilter
 
@@ -50,26 +49,11 @@ class HasCommonAncestorWithFilterMatch(HasCommonAncestorWith):
                     "with anybody matched by a filter")
     category    = _("Ancestral filters")
 
-    def __init__(self, list, use_regex=False):
-        HasCommonAncestorWith.__init__(self, list, use_regex)
-        self.ancestor_cache = {}
-
     def prepare(self, db):
         self.db = db
-        # For each(!) person we keep track of who their ancestors
-        # are, in a set(). So we only have to compute a person's
-        # ancestor list once.
-        # Start with filling the cache for root person (gid in self.list[0])
-        self.ancestor_cache = {}
-        self.with_people = []
-        filt = MatchesFilter(self.list)
-        filt.requestprepare(db)
-        for handle in db.iter_person_handles():
-            person = db.get_person_from_handle(handle)
-            if person and filt.apply(db, person):
-                #store all people in the filter so as to compare later
-                self.with_people.append(person.handle)
-                #fill list of ancestor of person if not present yet
-                if handle not in self.ancestor_cache:
-                    self.add_ancs(db, person)
-        filt.requestreset()
+        filt = MatchesFilter(self.list[0:1])
+        self.with_people = list(filt.find_matches(db))
+        self.init_matches(db)
+
+    def find_filter(self):
+        return MatchesFilter(self.list[0:1]).find_filter()
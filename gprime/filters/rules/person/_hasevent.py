@@ -54,6 +54,7 @@ class HasEvent(HasEventBase):
     name        =  _('People with the personal <event>')
     description = _("Matches people with a personal event of a particular "
                     "value")
+    cost        = 10
 
     def apply(self, dbase, person):
         for event_ref in person.get_event_ref_list():
@@ -52,6 +52,7 @@ class HasFamilyEvent(Rule):
     name        =  _('People with the family <event>')
     description = _("Matches people with a family event of a particular value")
     category    = _('Event filters')
+    cost        = 10
     allow_regex = True
 
     def prepare(self,db):
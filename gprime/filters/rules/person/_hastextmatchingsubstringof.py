@@ -49,6 +49,7 @@ class HasTextMatchingSubstringOf(Rule):
     description = _("Matches people whose records contain text "
                     "matching a substring")
     category    = _('General filters')
+    cost        = 100
     allow_regex = True
 
     def prepare(self,db):
@@ -44,7 +44,11 @@ class HasUnknownGender(Rule):
 
     name        = _('People with unknown gender')
     category    = _('General filters')
+    depends     = []
     description = _('Matches all people with unknown gender')
 
     def apply(self,db,person):
         return person.gender == Person.UNKNOWN
+
+    def get_where(self):
+        return ("gender", "=", Person.UNKNOWN)
@@ -32,6 +32,7 @@ _ = glocale.translation.gettext
 #
 #-------------------------------------------------------------------------
 from .. import Rule
+from ....utils.traversal import get_traversal
 
 #-------------------------------------------------------------------------
 #
@@ -45,42 +46,23 @@ class IsAncestorOf(Rule):
     name        = _('Ancestors of <person>')
     category    = _("Ancestral filters")
     description = _("Matches people that are ancestors of a specified person")
+    partition_safe = False
 
     def prepare(self, db):
         """Assume that if 'Inclusive' not defined, assume inclusive"""
         self.db = db
         self.map = set()
         try:
-            first = 0 if int(self.list[1]) else 1
+            inclusive = bool(int(self.list[1]))
         except IndexError:
-            first = 1
-        try:
-            root_person = db.get_person_from_gid(self.list[0])
-            self.init_ancestor_list(db,root_person,first)
-        except:
-            pass
+            inclusive = False
+        root_person = db.get_person_from_gid(self.list[0])
+        if root_person:
+            self.map = set(get_traversal(db).ancestors(
+                [root_person.handle], inclusive=inclusive))
 
     def reset(self):
         self.map.clear()
 
     def apply(self, db, person):
         return person.handle in self.map
-
-    def init_ancestor_list(self, db, person,first):
-        if not person:
-            return
-        if person.handle in self.map:
-            return
-        if not first:
-            self.map.add(person.handle)
-        fam_id = person.get_main_parents_family_handle()
-        if fam_id:
-            fam = db.get_family_from_handle(fam_id)
-            if fam:
-                f_id = fam.get_father_handle()
-                m_id = fam.get_mother_handle()
-
-                if f_id:
-                    self.init_ancestor_list(db,db.get_person_from_handle(f_id),0)
-                if m_id:
-                    self.init_ancestor_list(db,db.get_person_from_handle(m_id),0)
@@ -33,6 +33,7 @@ _ = glocale.translation.gettext
 #-------------------------------------------------------------------------
 from ._isancestorof import IsAncestorOf
 from ._matchesfilter import MatchesFilter
+from ....utils.traversal import get_traversal
 
 #-------------------------------------------------------------------------
 #
@@ -51,21 +52,16 @@ class IsAncestorOfFilterMatch(IsAncestorOf):
 
     def prepare(self,db):
         self.db = db
-        self.map = set()
         try:
-            if int(self.list[1]):
-                first = 0
-            else:
-                first = 1
+            inclusive = bool(int(self.list[1]))
         except IndexError:
-            first = 1
-
+            inclusive = False
         filt = MatchesFilter(self.list[0:1])
-        filt.requestprepare(db)
-        for person in db.iter_people():
-            if filt.apply(db, person):
-                self.init_ancestor_list(db, person, first)
-        filt.requestreset()
+        self.map = set(get_traversal(db).ancestors(
+            filt.find_matches(db), inclusive=inclusive))
+
+    def find_filter(self):
+        return MatchesFilter(self.list[0:1]).find_filter()
 
     def reset(self):
         self.map.clear()
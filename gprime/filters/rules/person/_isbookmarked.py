@@ -45,6 +45,7 @@ class IsBookmarked(Rule):
     name        = _('Bookmarked people')
     category    = _('General filters')
     description = _("Matches the people on the bookmark list")
+    cacheable   = False
 
     def prepare(self,db):
         self.bookmarks = db.get_bookmarks().get()
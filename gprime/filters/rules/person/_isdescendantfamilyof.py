@@ -35,6 +35,7 @@ except NameError:
 # Gprime modules
 #
 #-------------------------------------------------------------------------
+from ....utils.traversal import get_traversal
 from .. import Rule
 
 #-------------------------------------------------------------------------
@@ -51,6 +52,7 @@ class IsDescendantFamilyOf(Rule):
     category    = _('Descendant filters')
     description = _("Matches people that are descendants or the spouse "
                     "of a descendant of a specified person")
+    partition_safe = False
 
     def prepare(self,db):
         self.db = db
@@ -76,38 +78,16 @@ class IsDescendantFamilyOf(Rule):
     def add_matches(self,person):
         if not person:
             return
-
-        # Add self
-        expand = [person]
-
-        while expand:
-            person = expand.pop(0)
-            if person is None:
-                continue
-            self.matches.add(person.handle)
-            for family_handle in person.get_family_handle_list():
-                family = self.db.get_family_from_handle(family_handle)
-                if family:
-                    # Add every child recursively
-                    for child_ref in family.get_child_ref_list():
-                        if child_ref:
-                            expand.append(self.db.get_person_from_handle(child_ref.ref))
-                    # Add spouse
-                    if person.handle == family.get_father_handle():
-                        spouse_handle = family.get_mother_handle()
-                    else:
-                        spouse_handle = family.get_father_handle()
-                    self.matches.add(spouse_handle)
+        traversal = get_traversal(self.db)
+        # Add self and every child recursively
+        descendants = traversal.descendants([person.handle])
+        self.matches.update(descendants)
+        # Add spouses
+        self.matches.update(traversal.partners(descendants))
 
     def exclude(self):
         # This removes root person and his/her spouses from the matches set
         if not self.root_person: return
-        self.matches.remove(self.root_person.handle)
-        for family_handle in self.root_person.get_family_handle_list():
-            family = self.db.get_family_from_handle(family_handle)
-            if family:
-                if self.root_person.handle == family.get_father_handle():
-                    spouse_handle = family.get_mother_handle()
-                else:
-                    spouse_handle = family.get_father_handle()
-                self.matches.remove(spouse_handle)
+        self.matches.discard(self.root_person.handle)
+        self.matches.difference_update(
+            get_traversal(self.db).partners([self.root_person.handle]))
@@ -54,9 +54,10 @@ class IsDescendantFamilyOfFilterMatch(IsDescendantFamilyOf):
         self.matches = set()
 
         filt = MatchesFilter(self.list[0:1])
-        filt.requestprepare(db)
-        for person in db.iter_people():
-            if filt.apply(db, person):
+        for handle in filt.find_matches(db):
+            person = db.get_person_from_handle(handle)
+            if person:
                 self.add_matches(person)
-        filt.requestreset()
 
+    def find_filter(self):
+        return MatchesFilter(self.list[0:1]).find_filter()
@@ -32,6 +32,7 @@ _ = glocale.translation.gettext
 #
 #-------------------------------------------------------------------------
 from .. import Rule
+from ....utils.traversal import get_traversal
 
 #-------------------------------------------------------------------------
 #
@@ -46,35 +47,22 @@ class IsDescendantOf(Rule):
     name        = _('Descendants of <person>')
     category    = _('Descendant filters')
     description = _('Matches all descendants for the specified person')
+    partition_safe = False
 
     def prepare(self, db):
         self.db = db
         self.map = set()
         try:
-            first = False if int(self.list[1]) else True
+            inclusive = bool(int(self.list[1]))
         except IndexError:
-            first = True
-        try:
-            root_person = db.get_person_from_gid(self.list[0])
-            self.init_list(root_person,first)
-        except:
-            pass
+            inclusive = False
+        root_person = db.get_person_from_gid(self.list[0])
+        if root_person:
+            self.map = set(get_traversal(db).descendants(
+                [root_person.handle], inclusive=inclusive))
 
     def reset(self):
         self.map.clear()
 
     def apply(self, db, person):
         return person.handle in self.map
-
-    def init_list(self, person, first):
-        if not person:
-            return
-        if not first:
-            self.map.add(person.handle)
-
-        for fam_id in person.get_family_handle_list():
-            fam = self.db.get_family_from_handle(fam_id)
-            if fam:
-                for child_ref in fam.get_child_ref_list():
-                    self.init_list(
-                        self.db.get_person_from_handle(child_ref.ref), 0)
@@ -33,6 +33,7 @@ _ = glocale.translation.gettext
 #
 #-------------------------------------------------------------------------
 from .. import Rule
+from ....utils.traversal import get_traversal
 
 #-------------------------------------------------------------------------
 #
@@ -48,42 +49,18 @@ class IsDuplicatedAncestorOf(Rule):
     category    = _("Ancestral filters")
     description = _("Matches people that are ancestors twice or more "
                     "of a specified person")
+    partition_safe = False
 
     def prepare(self, db):
         self.db = db
-        self.map = set()
         self.map2 = set()
         root_person = db.get_person_from_gid(self.list[0])
         if root_person:
-            self.init_ancestor_list(db,root_person)
+            self.map2 = get_traversal(db).duplicated_ancestors(
+                root_person.handle)
 
     def reset(self):
-        self.map.clear()
         self.map2.clear()
 
     def apply(self, db, person):
         return person.handle in self.map2
-
-    def init_ancestor_list(self, db, person):
-        fam_id = person.get_main_parents_family_handle()
-        if fam_id:
-            fam = db.get_family_from_handle(fam_id)
-            if fam:
-                f_id = fam.get_father_handle()
-                m_id = fam.get_mother_handle()
-                if m_id:
-                    self.mother_side(db, db.get_person_from_handle(m_id))
-                if f_id:
-                    self.father_side(db, db.get_person_from_handle(f_id))
-
-    def mother_side(self, db, person):
-        if person and person.handle in self.map:
-            self.map2.add((person.handle))
-        self.map.add((person.handle))
-        self.init_ancestor_list(db, person)
-
-    def father_side(self, db, person):
-        if person and person.handle in self.map:
-            self.map2.add((person.handle))
-        self.map.add((person.handle))
-        self.init_ancestor_list(db, person)
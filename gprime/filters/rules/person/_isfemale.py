@@ -44,7 +44,11 @@ class IsFemale(Rule):
 
     name        = _('Females')
     category    = _('General filters')
+    depends     = []
     description = _('Matches all females')
 
     def apply(self,db,person):
         return person.gender == Person.FEMALE
+
+    def get_where(self):
+        return ("gender", "=", Person.FEMALE)
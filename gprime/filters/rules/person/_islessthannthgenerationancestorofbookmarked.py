@@ -37,6 +37,7 @@ except:
 #
 #-------------------------------------------------------------------------
 from .. import Rule
+from ....utils.traversal import get_traversal
 
 #-------------------------------------------------------------------------
 #
@@ -54,6 +55,8 @@ class IsLessThanNthGenerationAncestorOfBookmarked(Rule):
     category    = _('Ancestral filters')
     description = _("Matches ancestors of the people on the bookmark list "
                     "not more than N generations away")
+    cacheable   = False
+    partition_safe = False
 
     def prepare(self, db):
         self.db = db
@@ -64,31 +67,9 @@ class IsLessThanNthGenerationAncestorOfBookmarked(Rule):
         else:
             self.bookmarks = set(bookmarks)
             self.apply = self.apply_real
-            for self.bookmarkhandle in self.bookmarks:
-                self.init_ancestor_list(self.bookmarkhandle, 1)
-
-
-    def init_ancestor_list(self, handle, gen):
-#        if p.get_handle() in self.map:
-#            loop_error(self.orig,p)
-        if not handle:
-            return
-        if gen:
-            self.map.add(handle)
-            if gen >= int(self.list[0]):
-                return
-
-        p = self.db.get_person_from_handle(handle)
-        fam_id = p.get_main_parents_family_handle()
-        fam = self.db.get_family_from_handle(fam_id)
-        if fam:
-            f_id = fam.get_father_handle()
-            m_id = fam.get_mother_handle()
-
-            if f_id:
-                self.init_ancestor_list(f_id, gen+1)
-            if m_id:
-                self.init_ancestor_list(m_id, gen+1)
+            # the bookmarked people are the first generation
+            self.map = set(get_traversal(db).ancestors(
+                self.bookmarks, max(int(self.list[0]) - 1, 0)))
 
     def apply_real(self, db, person):
         return person.handle in self.map
@@ -32,6 +32,7 @@ _ = glocale.translation.gettext
 #
 #-------------------------------------------------------------------------
 from .. import Rule
+from ....utils.traversal import get_traversal
 
 #-------------------------------------------------------------------------
 #
@@ -49,6 +50,7 @@ class IsLessThanNthGenerationAncestorOfDefaultPerson(Rule):
     category    = _('Ancestral filters')
     description = _("Matches ancestors of the default person "
                     "not more than N generations away")
+    partition_safe = False
 
     def prepare(self,db):
         self.db = db
@@ -57,32 +59,12 @@ class IsLessThanNthGenerationAncestorOfDefaultPerson(Rule):
         if p:
             self.def_handle = p.get_handle()
             self.apply = self.apply_real
-            self.init_ancestor_list(self.def_handle, 1)
+            # the default person is the first generation
+            self.map = set(get_traversal(db).ancestors(
+                [self.def_handle], max(int(self.list[0]) - 1, 0)))
         else:
             self.apply = lambda db,p: False
 
-    def init_ancestor_list(self, handle, gen):
-#        if p.get_handle() in self.map:
-#            loop_error(self.orig,p)
-        if not handle:
-            return
-        if gen:
-            self.map.add(handle)
-            if gen >= int(self.list[0]):
-                return
-
-        p = self.db.get_person_from_handle(handle)
-        fam_id = p.get_main_parents_family_handle()
-        fam = self.db.get_family_from_handle(fam_id)
-        if fam:
-            f_id = fam.get_father_handle()
-            m_id = fam.get_mother_handle()
-
-            if f_id:
-                self.init_ancestor_list(f_id, gen+1)
-            if m_id:
-                self.init_ancestor_list(m_id, gen+1)
-
     def apply_real(self,db,person):
         return person.handle in self.map
 
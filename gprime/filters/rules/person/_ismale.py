@@ -44,7 +44,11 @@ class IsMale(Rule):
 
     name        = _('Males')
     category    = _('General filters')
+    depends     = []
     description = _('Matches all males')
 
     def apply(self,db,person):
         return person.gender == Person.MALE
+
+    def get_where(self):
+        return ("gender", "=", Person.MALE)
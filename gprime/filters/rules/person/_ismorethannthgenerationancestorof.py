@@ -32,6 +32,7 @@ _ = glocale.translation.gettext
 #
 #-------------------------------------------------------------------------
 from .. import Rule
+from ....utils.traversal import get_traversal
 
 #-------------------------------------------------------------------------
 #
@@ -47,38 +48,18 @@ class IsMoreThanNthGenerationAncestorOf(Rule):
     category    = _("Ancestral filters")
     description = _("Matches people that are ancestors "
                     "of a specified person at least N generations away")
+    partition_safe = False
 
     def prepare(self,db):
         self.db = db
         self.map = set()
-        try:
-            root_handle = db.get_person_from_gid(self.list[0]).get_handle()
-            self.init_ancestor_list(root_handle,0)
-        except:
-            pass
+        root_person = db.get_person_from_gid(self.list[0])
+        if root_person:
+            self.map = get_traversal(db).ancestors_beyond(
+                [root_person.handle], int(self.list[1]))
 
     def reset(self):
         self.map.clear()
 
     def apply(self,db,person):
         return person.handle in self.map
-
-    def init_ancestor_list(self, handle, gen):
-#        if p.get_handle() in self.map:
-#            loop_error(self.orig,p)
-        if not handle:
-            return
-        if gen >= int(self.list[1]):
-            self.map.add(handle)
-
-        p = self.db.get_person_from_handle(handle)
-        fam_id = p.get_main_parents_family_handle()
-        fam = self.db.get_family_from_handle(fam_id)
-        if fam:
-            f_id = fam.get_father_handle()
-            m_id = fam.get_mother_handle()
-
-            if f_id:
-                self.init_ancestor_list(f_id, gen+1)
-            if m_id:
-                self.init_ancestor_list(m_id, gen+1)
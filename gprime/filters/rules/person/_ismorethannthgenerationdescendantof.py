@@ -32,6 +32,7 @@ _ = glocale.translation.gettext
 #
 #-------------------------------------------------------------------------
 from .. import Rule
+from ....utils.traversal import get_traversal
 
 #-------------------------------------------------------------------------
 #
@@ -47,32 +48,19 @@ class IsMoreThanNthGenerationDescendantOf(Rule):
     category    = _("Descendant filters")
     description = _("Matches people that are descendants of a specified "
                  "person at least N generations away")
+    partition_safe = False
 
 
     def prepare(self ,db):
         self.db = db
         self.map = set()
-        try:
-            root_person = db.get_person_from_gid(self.list[0])
-            self.init_list(root_person, 0)
-        except:
-            pass
+        root_person = db.get_person_from_gid(self.list[0])
+        if root_person:
+            self.map = get_traversal(db).descendants_beyond(
+                [root_person.handle], int(self.list[1]))
 
     def reset(self):
         self.map.clear()
 
     def apply(self,db,person):
         return person.handle in self.map
-
-    def init_list(self, person, gen):
-        if not person:
-            return
-        if gen >= int(self.list[1]):
-            self.map.add(person.handle)
-
-        for fam_id in person.get_family_handle_list():
-            fam = self.db.get_family_from_handle(fam_id)
-            if fam:
-                for child_ref in fam.get_child_ref_list():
-                    self.init_list(
-                        self.db.get_person_from_handle(child_ref.ref), gen+1)
@@ -45,6 +45,7 @@ class IsRelatedWith(Rule):
     name        = _('People related to <Person>')
     category    = _("Relationship filters")
     description = _("Matches people related to a specified person")
+    partition_safe = False
 
     def prepare(self, db):
         """prepare so the rule can be executed efficiently
@@ -46,16 +46,19 @@ class IsSiblingOfFilterMatch(Rule):
     name        = _('Siblings of <filter> match')
     category    = _('Family filters')
     description = _("Matches siblings of anybody matched by a filter")
+    partition_safe = False
 
     def prepare(self,db):
         self.db = db
         self.map = set()
-        filt = MatchesFilter(self.list)
-        filt.requestprepare(db)
-        for person in db.iter_people():
-            if filt.apply (db, person):
-                self.init_list (person)
-        filt.requestreset()
+        filt = MatchesFilter(self.list[0:1])
+        for handle in filt.find_matches(db):
+            person = db.get_person_from_handle(handle)
+            if person:
+                self.init_list(person)
+
+    def find_filter(self):
+        return MatchesFilter(self.list[0:1]).find_filter()
 
     def reset(self):
         self.map.clear()
@@ -47,10 +47,13 @@ class IsSpouseOfFilterMatch(Rule):
     name        = _('Spouses of <filter> match')
     description = _("Matches people married to anybody matching a filter")
     category    = _('Family filters')
+    partition_safe = False
 
     def prepare(self,db):
-        self.filt = MatchesFilter (self.list)
-        self.filt.requestprepare(db)
+        self.matches = MatchesFilter(self.list[0:1]).find_matches(db)
+
+    def find_filter(self):
+        return MatchesFilter(self.list[0:1]).find_filter()
 
     def apply(self,db,person):
         for family_handle in person.get_family_handle_list ():
@@ -62,9 +65,9 @@ class IsSpouseOfFilterMatch(Rule):
                         continue
                     if spouse_id == person.handle:
                         continue
-                    if self.filt.apply (db, db.get_person_from_handle( spouse_id)):
+                    if spouse_id in self.matches:
                         return True
         return False
 
     def reset(self):
-        self.filt.requestreset()
+        self.matches = set()
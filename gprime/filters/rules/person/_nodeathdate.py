@@ -42,6 +42,7 @@ class NoDeathdate(Rule):
     name        = _('People without a known death date')
     description = _("Matches people without a known deathdate")
     category    = _('General filters')
+    cost        = 10
 
     def apply(self,db,person):
         death_ref = person.get_death_ref()
@@ -45,6 +45,7 @@ class ProbablyAlive(Rule):
     name        =  _('People probably alive')
     description = _("Matches people without indications of death that are not too old")
     category    = _('General filters')
+    cost        = 100
 
     def prepare(self,db):
         try:
@@ -48,6 +48,7 @@ class RelationshipPathBetween(Rule):
     description = _("Matches the ancestors of two persons back "
                     "to a common ancestor, producing the relationship "
                     "path between two persons.")
+    partition_safe = False
 
     def prepare(self, db):
         self.db = db
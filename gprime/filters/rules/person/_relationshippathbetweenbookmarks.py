@@ -53,6 +53,8 @@ class RelationshipPathBetweenBookmarks(Rule):
     description = _("Matches the ancestors of bookmarked individuals "
                     "back to common ancestors, producing the relationship "
                     "path(s) between bookmarked persons.")
+    cacheable   = False
+    partition_safe = False
 
     def prepare(self,db):
         self.db = db
@@ -33,7 +33,6 @@ _ = glocale.translation.sgettext
 #
 #-------------------------------------------------------------------------
 from .. import Rule
-from ....utils.location import located_in
 
 #-------------------------------------------------------------------------
 #
@@ -52,15 +51,18 @@ class IsEnclosedBy(Rule):
 
     def prepare(self, db):
         self.handle = None
+        self.enclosed = set()
         place = db.get_place_from_gid(self.list[0])
         if place:
             self.handle = place.handle
+            self.enclosed = set(db.get_enclosed_place_handles(self.handle))
+
+    def reset(self):
+        self.enclosed = set()
 
     def apply(self, db, place):
         if self.handle is None:
             return False
         if self.list[1] == '1' and place.handle == self.handle:
             return True
-        if located_in(db, place.handle, self.handle):
-            return True
-        return False
+        return place.handle in self.enclosed
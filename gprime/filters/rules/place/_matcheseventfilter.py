@@ -56,9 +56,7 @@ class MatchesEventFilter(MatchesFilterBase):
 
 
     def apply(self,db,event):
-        filt = self.find_filter()
-        if filt:
-            for (classname, handle) in db.find_backlink_handles(event.get_handle(), ['Event']):
-                if filt.check(db, handle):
-                    return True
+        for (classname, handle) in db.find_backlink_handles(event.get_handle(), ['Event']):
+            if handle in self.matches:
+                return True
         return False
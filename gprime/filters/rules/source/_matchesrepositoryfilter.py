@@ -61,6 +61,6 @@ class MatchesRepositoryFilter(MatchesFilterBase):
         repolist = [x.ref for x in object.get_reporef_list()]
         for repohandle in repolist:
             #check if repo in repository filter
-            if self.MRF_filt.check(db, repohandle):
+            if repohandle in self.matches:
                 return True
         return False
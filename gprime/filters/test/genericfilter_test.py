@@ -0,0 +1,216 @@
+#
+# gPrime - A web-based genealogy program
+#
+# Copyright (C) 2017  gPrime contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for _genericfilter.py """
+
+import unittest
+
+from ...db import make_database, DbTxn
+from ...lib import Person, Name, Surname
+from ... import filters
+from .. import GenericFilter, GenericFilterFactory, FilterList
+from .._filtercache import get_filter_cache, get_filter_key
+from ..rules.family import ChildHasIdOf
+from ..rules.person import (IsMale, IsFemale, RegExpIdOf, PeoplePrivate,
+                            HasNameOf, ProbablyAlive, Disconnected,
+                            MatchesFilter, IsSpouseOfFilterMatch)
+
+def make_db():
+    """
+    Twelve people, alternating male and female, every third one private.
+    """
+    db = make_database("inmemorydb")
+    db.load(None)
+    with DbTxn("Add people", db, batch=True) as trans:
+        for index in range(12):
+            person = Person()
+            person.set_gender(Person.MALE if index % 2 else Person.FEMALE)
+            person.set_privacy(index % 3 == 0)
+            name = Name()
+            name.set_first_name("Ann" if index % 4 == 0 else "Bob")
+            surname = Surname()
+            surname.set_surname("Smith")
+            name.add_surname(surname)
+            person.set_primary_name(name)
+            db.add_person(person, trans)
+    return db
+
+class GenericFilterTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.db = make_db()
+
+    def filter_with_rules(self, rules, logical_op='and', invert=False):
+        """
+        Apply the filter with and without the where clauses of the rules,
+        check that the results agree and return them.
+        """
+        results = []
+        for where in (True, False):
+            gfilter = GenericFilter()
+            gfilter.set_rules(rules)
+            gfilter.set_logical_op(logical_op)
+            gfilter.set_invert(invert)
+            if not where:
+                gfilter.check_where = lambda db, cb_progress=None: None
+            get_filter_cache(self.db).clear()
+            results.append(set(gfilter.apply(self.db)))
+        self.assertEqual(results[0], results[1])
+        return results[0]
+
+    def test_where(self):
+        self.assertEqual(IsMale([]).get_where(), ("gender", "=", Person.MALE))
+        self.assertIsNone(HasNameOf([''] * 11).get_where())
+
+    def test_and(self):
+        self.assertEqual(len(self.filter_with_rules([IsMale([])])), 6)
+        self.assertEqual(
+            len(self.filter_with_rules([IsMale([]), PeoplePrivate([])])), 2)
+        name = ['Ann'] + [''] * 10
+        self.assertEqual(
+            len(self.filter_with_rules([PeoplePrivate([]),
+                                        HasNameOf(name)])), 1)
+        self.assertEqual(
+            len(self.filter_with_rules([IsFemale([]), PeoplePrivate([])],
+                                       invert=True)), 10)
+
+    def test_or_one(self):
+        rules = [IsMale([]), PeoplePrivate([])]
+        self.assertEqual(len(self.filter_with_rules(rules, 'or')), 8)
+        self.assertEqual(len(self.filter_with_rules(rules, 'one')), 6)
+        self.assertEqual(len(self.filter_with_rules(rules, 'xor')), 6)
+
+    def test_regexp(self):
+        self.assertEqual(len(self.filter_with_rules([RegExpIdOf(['i001'])])),
+                         2)
+        self.assertEqual(
+            len(self.filter_with_rules([RegExpIdOf(['^I000[1-3]$'],
+                                                   use_regex=True)])), 3)
+
+    def test_rule_order(self):
+        alive, disconnected = ProbablyAlive(['']), Disconnected([])
+        gfilter = GenericFilter()
+        gfilter.set_rules([alive, disconnected])
+        self.assertEqual(gfilter.get_rule_order(), [disconnected, alive])
+        # measured: disconnected matches everybody, so it decides nothing
+        disconnected.nr_calls = disconnected.nr_matches = 100
+        disconnected.total_time = 0.01
+        self.assertEqual(gfilter.get_rule_order(), [alive, disconnected])
+        gfilter.set_logical_op('or')
+        self.assertEqual(gfilter.get_rule_order(), [disconnected, alive])
+
+    def test_profile(self):
+        gfilter = GenericFilter()
+        name = ['Ann'] + [''] * 10
+        gfilter.set_rules([HasNameOf(name), IsMale([])])
+        result, profile = gfilter.apply(self.db, profile=True)
+        self.assertEqual(result, [])
+        self.assertEqual([(stats["rule"], stats["where"]) for stats in profile],
+                         [("IsMale", True), ("HasNameOf", False)])
+        self.assertEqual(profile[1]["calls"], 6)
+        gfilter.set_logical_op('xor')
+        result, profile = gfilter.apply(self.db, profile=True)
+        self.assertEqual(len(result), 9)
+        self.assertEqual([stats["calls"] for stats in profile], [12, 12])
+        self.assertEqual(profile[0]["matches"], 3)
+
+    def test_cache(self):
+        cache = get_filter_cache(self.db)
+        cache.clear()
+        gfilter = GenericFilter()
+        gfilter.set_rules([IsMale([]), PeoplePrivate([])])
+        result = gfilter.apply(self.db)
+        hits = cache.get_metrics()["hits"]
+        self.assertEqual(gfilter.apply(self.db), result)
+        self.assertEqual(cache.get_metrics()["hits"], hits + 1)
+        # the same definition in another filter instance
+        other = GenericFilter()
+        other.set_rules([IsMale([]), PeoplePrivate([])])
+        handles = self.db.get_person_handles()
+        self.assertEqual(other.apply(self.db, handles), result)
+        self.assertEqual(cache.get_metrics()["hits"], hits + 2)
+        # a change to notes doesn't affect these rules
+        self.db.emit('note-update', ([],))
+        other.apply(self.db)
+        self.assertEqual(cache.get_metrics()["hits"], hits + 3)
+        self.db.emit('person-update', ([],))
+        invalidations = cache.get_metrics()["invalidations"]
+        self.assertEqual(other.apply(self.db), result)
+        self.assertEqual(cache.get_metrics()["invalidations"],
+                         invalidations + 1)
+
+    def test_cache_key(self):
+        cache = get_filter_cache(self.db)
+        cache.clear()
+        hits = cache.get_metrics()["hits"]
+        gfilter = GenericFilter()
+        gfilter.set_rules([IsMale([])])
+        self.assertEqual(len(gfilter.apply(self.db)), 6)
+        gfilter.set_invert(True)
+        self.assertEqual(len(gfilter.apply(self.db)), 6)
+        gfilter.set_rules([RegExpIdOf(['i001'])])
+        self.assertEqual(len(gfilter.apply(self.db)), 10)
+        gfilter.set_rules([RegExpIdOf(['i001'], use_regex=True)])
+        self.assertEqual(len(gfilter.apply(self.db)), 10)
+        self.assertEqual(cache.get_metrics()["hits"], hits)
+        # profiling always runs the rules
+        result, profile = gfilter.apply(self.db, profile=True)
+        self.assertEqual(profile[0]["calls"], 0)
+        self.assertEqual(cache.get_metrics()["hits"], hits)
+
+    def test_cache_depends(self):
+        gfilter = GenericFilterFactory('Family')()
+        gfilter.set_rules([ChildHasIdOf(['I0001'])])
+        self.assertIsNone(gfilter.flist[0].get_where())
+        key, namespaces = get_filter_key(gfilter)
+        self.assertEqual(namespaces, ['Family', 'Person'])
+
+    def test_cache_nested(self):
+        custom_filters = filters.CustomFilters
+        filters.CustomFilters = FilterList("")
+        try:
+            men = GenericFilter()
+            men.set_name("Men")
+            men.set_rules([IsMale([])])
+            filters.CustomFilters.add('Person', men)
+            cache = get_filter_cache(self.db)
+            cache.clear()
+            gfilter = GenericFilter()
+            gfilter.set_rules([MatchesFilter(["Men"]), PeoplePrivate([])])
+            self.assertEqual(len(gfilter.apply(self.db)), 2)
+            # the inner filter was cached while preparing the outer one
+            hits = cache.get_metrics()["hits"]
+            self.assertEqual(len(men.apply(self.db)), 6)
+            self.assertEqual(cache.get_metrics()["hits"], hits + 1)
+            spouses = GenericFilter()
+            spouses.set_rules([IsSpouseOfFilterMatch(["Men"])])
+            self.assertEqual(spouses.apply(self.db), [])
+            self.assertEqual(cache.get_metrics()["hits"], hits + 2)
+            # changing the custom filter changes the key of the outer one
+            men.set_rules([IsFemale([])])
+            self.assertEqual(len(gfilter.apply(self.db)), 2)
+            self.assertEqual(len(gfilter.apply(self.db, [])), 0)
+            self.assertEqual(cache.get_metrics()["size"], 5)
+        finally:
+            filters.CustomFilters = custom_filters
+
+if __name__ == "__main__":
+    unittest.main()
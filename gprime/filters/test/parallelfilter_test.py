@@ -0,0 +1,98 @@
+#
+# gPrime - A web-based genealogy program
+#
+# Copyright (C) 2017  gPrime contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for _parallelfilter.py """
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from ...dbstate import DbState
+from ...db import DbTxn
+from ...lib import Person, Name, Surname
+from .. import GenericFilter, _parallelfilter
+from .._parallelfilter import (apply_parallel, get_filter_definition,
+                               make_filter)
+from ..rules.person import HasNameOf, IsMale, IsAncestorOf
+
+class ParallelFilterTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.db = DbState().create_database(os.path.join(cls.tmpdir, "tree"))
+        with DbTxn("Add people", cls.db, batch=True) as trans:
+            for index in range(40):
+                person = Person()
+                person.set_gender(Person.MALE if index % 2 else Person.FEMALE)
+                name = Name()
+                name.set_first_name("Ann" if index % 4 == 0 else "Bob")
+                surname = Surname()
+                surname.set_surname("Smith")
+                name.add_surname(surname)
+                person.set_primary_name(name)
+                cls.db.add_person(person, trans)
+        cls.min_objects = _parallelfilter.MIN_OBJECTS
+        _parallelfilter.MIN_OBJECTS = 0
+
+    @classmethod
+    def tearDownClass(cls):
+        _parallelfilter.MIN_OBJECTS = cls.min_objects
+        cls.db.close(update=False)
+        shutil.rmtree(cls.tmpdir)
+
+    def make_filter(self, rules, invert=False):
+        gfilter = GenericFilter()
+        gfilter.set_rules(rules)
+        gfilter.set_invert(invert)
+        return gfilter
+
+    def test_definition(self):
+        gfilter = self.make_filter([HasNameOf(['Ann'] + [''] * 10),
+                                    IsMale([])], invert=True)
+        copy = make_filter(get_filter_definition(gfilter))
+        self.assertEqual(get_filter_definition(copy),
+                         get_filter_definition(gfilter))
+
+    def test_parallel(self):
+        for invert in (False, True):
+            gfilter = self.make_filter([HasNameOf(['Bob'] + [''] * 10)],
+                                       invert)
+            progress = []
+            result = apply_parallel(gfilter, self.db, 3,
+                                    lambda: progress.append(1))
+            self.assertEqual(len(progress), 40)
+            self.assertEqual(result, sorted(result))
+            gfilter.check_where = lambda db, cb_progress=None: None
+            self.assertEqual(set(result),
+                             set(gfilter.check_and(self.db, None)))
+        self.assertEqual(len(result), 10)
+
+    def test_fallback(self):
+        # prepare walks the tree
+        gfilter = self.make_filter([IsAncestorOf(['I0000', '1'])])
+        self.assertIsNone(apply_parallel(gfilter, self.db, 3))
+        gfilter = self.make_filter([HasNameOf(['Bob'] + [''] * 10)])
+        self.assertIsNone(apply_parallel(gfilter, self.db, 1))
+        self.assertEqual(len(gfilter.apply(self.db, workers=2)), 30)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -959,6 +959,26 @@ class Date:
         else:
             return False
 
+    def get_match_exact_range(self):
+        """
+        Return the (start, stop) range of sortvals of the dates that
+        :meth:`match_exact` this date, where None means unbounded. An empty
+        date gives (None, None); a date that matches nothing returns None.
+        """
+        if self.is_empty():
+            return (None, None)
+        elif self.modifier == Date.MOD_NONE:
+            return (self.sortval, self.sortval)
+        elif self.modifier == Date.MOD_BEFORE:
+            return (None, self.sortval - 1)
+        elif self.modifier == Date.MOD_AFTER:
+            return (self.sortval + 1, None)
+        elif self.is_compound():
+            start, stop = self.get_start_stop_range()
+            return (Date(*start).sortval, Date(*stop).sortval)
+        else:
+            return None
+
     def match(self, other_date, comparison="="):
         """
         Compare two dates using sophisticated techniques looking for any match
@@ -320,7 +320,7 @@ class Family(CitationBase, NoteBase, MediaBase, AttributeBase, LdsOrdBase,
         if self.mother_handle in handle_list:
             self.mother_handle = None
 
-    def remove_place_references(self):
+    def remove_place_references(self, handle_list):
         for lds_ord in self.lds_ord_list:
             if lds_ord.place in handle_list:
                 lds_ord.place = None
@@ -110,6 +110,7 @@ def run_private_data_option(report, menu):
     include_private_data = menu.get_option_by_name('incl_private').get_value()
     if not include_private_data:
         report.database = PrivateProxyDb(report.database)
+        report.database.precompute_privacy()
 
 def add_living_people_option(menu, category,
                              mode=LivingProxyDb.MODE_INCLUDE_ALL,
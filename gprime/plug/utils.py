@@ -30,7 +30,7 @@ General utility functions useful for the generic plugin system
 import sys
 import os
 import datetime
-from io import StringIO, BytesIO
+from io import StringIO, BytesIO, TextIOWrapper
 
 #-------------------------------------------------------------------------
 #
@@ -280,7 +280,10 @@ def available_updates():
 #
 #-------------------------------------------------------------------------
 class OpenFileOrStdout:
-    """Context manager to open a file or stdout for writing."""
+    """
+    Context manager to open a file or stdout for writing. The filename may
+    also be a binary file object, that is written as text and left open.
+    """
     def __init__(self, filename, encoding=None, errors=None, newline=None):
         self.filename = filename
         self.filehandle = None
@@ -291,13 +294,21 @@ class OpenFileOrStdout:
     def __enter__(self):
         if self.filename == '-':
             self.filehandle = sys.stdout
+        elif hasattr(self.filename, "write"):
+            self.filehandle = TextIOWrapper(self.filename,
+                                            encoding=self.encoding,
+                                            errors=self.errors,
+                                            newline=self.newline)
         else:
             self.filehandle = open(self.filename, 'w', encoding=self.encoding,
                                    errors=self.errors, newline=self.newline)
         return self.filehandle
 
     def __exit__(self, exc_type, exc_value, traceback):
-        if self.filehandle and self.filename != '-':
+        if self.filehandle and hasattr(self.filename, "write"):
+            self.filehandle.flush()
+            self.filehandle.detach()
+        elif self.filehandle and self.filename != '-':
             self.filehandle.close()
         return False
 
@@ -307,7 +318,11 @@ class OpenFileOrStdout:
 #
 #-------------------------------------------------------------------------
 class OpenFileOrStdin:
-    """Context manager to open a file or stdin for reading."""
+    """
+    Context manager to open a file or stdin for reading. The filename may
+    also be a binary file object, that is read as text if encoding is
+    given, and left open.
+    """
     def __init__(self, filename, add_mode='', encoding=None):
         self.filename = filename
         self.mode = 'r%s' % add_mode
@@ -317,6 +332,12 @@ class OpenFileOrStdin:
     def __enter__(self):
         if self.filename == '-':
             self.filehandle = sys.stdin
+        elif hasattr(self.filename, "read"):
+            if self.encoding:
+                self.filehandle = TextIOWrapper(self.filename,
+                                                encoding=self.encoding)
+            else:
+                self.filehandle = self.filename
         elif self.encoding:
             self.filehandle = open(self.filename, self.mode, encoding=self.encoding)
         else:
@@ -324,6 +345,9 @@ class OpenFileOrStdin:
         return self.filehandle
 
     def __exit__(self, exc_type, exc_value, traceback):
-        if self.filename != '-':
+        if hasattr(self.filename, "read"):
+            if self.filehandle is not self.filename:
+                self.filehandle.detach()
+        elif self.filename != '-':
             self.filehandle.close()
         return False
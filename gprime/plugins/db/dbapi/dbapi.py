@@ -45,12 +45,29 @@ from gprime.db.dbconst import (DBLOGNAME, DBBACKEND, KEY_TO_NAME_MAP,
 from gprime.db.generic import DbGeneric
 from gprime.lib import (Tag, Media, Person, Family, Source,
                             Citation, Event, Place, Repository, Note)
+from gprime.utils.alive import get_alive_dependents
+from gprime.utils.location import get_enclosure
+from gprime.utils.place import conv_lat_lon_float, split_bounding_box
 from gprime.const import LOCALE as glocale
 _ = glocale.translation.gettext
 
 LOG = logging.getLogger(".dbapi")
 _LOG = logging.getLogger(DBLOGNAME)
 
+# Number of handles per query when looking up many objects, or their
+# references, at once:
+REFERENCE_BATCH = 500
+
+# Metadata keys of the counter of the commits, which with the signals of
+# the last commits in the change_log table let the processes that have
+# the database open follow each other's changes:
+CHANGE_GENERATION = "change-generation"
+CHANGE_TIME = "change-time"
+# Number of commits kept in the change log:
+CHANGE_LOG_SIZE = 100
+# Commits with more handles make the other processes rebuild everything:
+CHANGE_LOG_HANDLES = 1000
+
 class DBAPI(DbGeneric):
     """
     Database backends class for DB-API 2.0 databases
@@ -214,8 +231,30 @@ class DBAPI(DbGeneric):
                            Column("permissions", "VARCHAR(20)"),
                           ])
 
+        PlaceEnclosureTable = Table("place_enclosure",
+                                    [Column("place_handle", "VARCHAR(50)",
+                                            index=True),
+                                     Column("ancestor_handle", "VARCHAR(50)",
+                                            index=True),
+                                     Column("depth", "INTEGER"),
+                                     Column("start_sortval", "INTEGER"),
+                                     Column("stop_sortval", "INTEGER")])
+        PlaceGeoTable = Table("place_geo",
+                              [Column("geo_id", "INTEGER", primary=True),
+                               Column("place_handle", "VARCHAR(50)",
+                                      index=True),
+                               Column("lat", "REAL", index=True),
+                               Column("lon", "REAL")])
+        ChangeLogTable = Table("change_log",
+                               [Column("generation", "INTEGER",
+                                       primary=True),
+                                Column("signals", "TEXT")])
+
+        new_enclosure = not self.dbapi.table_exists(PlaceEnclosureTable.name)
+        new_geo = not self.dbapi.table_exists(PlaceGeoTable.name)
         for table in [ReferenceTable, NamegroupTable, MetadataTable,
-                      UserTable]:
+                      UserTable, PlaceEnclosureTable, PlaceGeoTable,
+                      ChangeLogTable]:
             if not self.dbapi.table_exists(table.name):
                 self.create_table(table)
             else:
@@ -228,6 +267,28 @@ class DBAPI(DbGeneric):
                                            % (index_name, table.name, column.name))
 
         self.rebuild_secondary_fields()
+        # Spatial index on the coordinates, if the backend has one:
+        self._place_rtree = False
+        if hasattr(self.dbapi, "create_rtree"):
+            new_geo |= not self.dbapi.table_exists("place_rtree")
+            self._place_rtree = self.dbapi.create_rtree(
+                "place_rtree", ["min_lat", "max_lat", "min_lon", "max_lon"])
+
+        self._place_enclosure_dirty = False
+        self._alive_dirty = False
+        # Display caches, kept in the memory of this process so that
+        # reading never writes to the database:
+        self._place_titles = {}
+        self._alive_ranges = {}
+        self._change_generation = self.get_change_generation()
+        # whether the home person was set in the current transaction:
+        self._home_person_changed = False
+        if (new_enclosure or new_geo) and self.get_number_of_places() > 0:
+            if new_enclosure:
+                self.rebuild_place_enclosure()
+            if new_geo:
+                self.rebuild_place_geo()
+            self.dbapi.commit()
 
     def close_backend(self):
         self.dbapi.close()
@@ -282,9 +343,13 @@ class DBAPI(DbGeneric):
             self.build_surname_list()
             # FIXME: need a User GUI update callback here:
             self.reindex_reference_map(lambda percent: percent)
-        self.dbapi.commit()
+            if self._place_enclosure_dirty:
+                self.rebuild_place_enclosure()
+            if self._alive_dirty:
+                self.clear_cached_alive_ranges()
+                self._alive_dirty = False
+        signals = []
         if not txn.batch:
-            # Now, emit signals:
             for (obj_type_val, txn_type_val) in list(txn):
                 if txn_type_val == TXNDEL:
                     handles = [handle for (handle, data) in
@@ -297,7 +362,20 @@ class DBAPI(DbGeneric):
                 if handles:
                     signal = KEY_TO_NAME_MAP[
                         obj_type_val] + action[txn_type_val]
-                    self.emit(signal, (handles, ))
+                    signals.append((signal, (handles, )))
+        logged = signals
+        if self._home_person_changed:
+            logged = signals + [("home-person-changed", ())]
+            self._home_person_changed = False
+        if txn.batch or sum(len(args[0]) for (signal, args) in signals) \
+                > CHANGE_LOG_HANDLES:
+            self._log_change(None)
+        elif logged:
+            self._log_change(logged)
+        self.dbapi.commit()
+        # Now, emit signals:
+        for (signal, args) in signals:
+            self.emit(signal, args)
         self.transaction = None
         msg = txn.get_description()
         self.undodb.commit(txn, msg)
@@ -311,11 +389,99 @@ class DBAPI(DbGeneric):
         """
         self.dbapi.rollback()
         self.transaction = None
+        self._home_person_changed = False
         txn.clear()
         txn.first = None
         txn.last = None
         self._after_commit(txn)
 
+    def get_change_generation(self):
+        """
+        Return the number of commits made to the database, by any process.
+        """
+        return self.get_metadata(CHANGE_GENERATION, 0)
+
+    def get_change_time(self):
+        """
+        Return the time of the last commit to the database, by any process,
+        or 0 if not known.
+        """
+        return self.get_metadata(CHANGE_TIME, 0)
+
+    def _log_change(self, signals):
+        """
+        Count a commit, and log the list of (signal, args) it emits for the
+        other processes; None means they have to rebuild everything. Has to
+        be called in the transaction of the commit, which keeps the other
+        processes from committing at the same time.
+        """
+        generation = self.get_change_generation()
+        self.dbapi.execute("""INSERT INTO change_log (generation, signals)
+                              VALUES(?, ?);""",
+                           [generation + 1, json.dumps(signals)])
+        self.dbapi.execute("DELETE FROM change_log WHERE generation <= ?;",
+                           [generation + 1 - CHANGE_LOG_SIZE])
+        self.set_metadata(CHANGE_GENERATION, generation + 1)
+        self.set_metadata(CHANGE_TIME, time.time())
+        if generation == self._change_generation:
+            # else the commits of the others are still to be followed
+            self._change_generation = generation + 1
+
+    def follow_changes(self):
+        """
+        Emit the signals of the commits other processes made since the last
+        call, so that the caches of this process follow them. If some of
+        them aren't logged, all rebuild signals are emitted. Returns the
+        number of commits followed.
+        """
+        generation = self.get_change_generation()
+        if generation == self._change_generation:
+            return 0
+        count = generation - self._change_generation
+        self.dbapi.execute("""SELECT signals FROM change_log
+                              WHERE generation > ? AND generation <= ?
+                              ORDER BY generation;""",
+                           [self._change_generation, generation])
+        changes = [json.loads(row[0]) for row in self.dbapi.fetchall()]
+        self._change_generation = generation
+        if count < 0 or len(changes) < count or None in changes:
+            self._place_titles.clear()
+            self._alive_ranges.clear()
+            for obj_type_val in sorted(KEY_TO_NAME_MAP):
+                self.emit(KEY_TO_NAME_MAP[obj_type_val] + "-rebuild")
+            self.emit('home-person-changed')
+            self.emit('user-changed', (None, ))
+        else:
+            for signals in changes:
+                for (signal, args) in signals:
+                    self._forget_cached(signal)
+                    self.emit(signal, tuple(args))
+        return max(count, 0)
+
+    def _forget_cached(self, signal):
+        """
+        Drop the display caches that a change signal of another process
+        can make stale; which titles and ranges depend on the changed
+        objects can't be found any more once the change is committed.
+        """
+        name = signal.split("-")[0]
+        if name == "place":
+            self._place_titles.clear()
+        elif name in ("person", "family", "event"):
+            self._alive_ranges.clear()
+
+    def set_default_person_handle(self, handle):
+        if self.transaction is not None:
+            # logged with the commit of the transaction
+            self._home_person_changed = True
+            super().set_default_person_handle(handle)
+            return
+        self.dbapi.begin()
+        self.set_metadata("default-person-handle", handle)
+        self._log_change([("home-person-changed", ())])
+        self.dbapi.commit()
+        self.emit('home-person-changed')
+
     def get_metadata(self, key, default=[]):
         """
         Get an item from the database.
@@ -674,6 +840,7 @@ class DBAPI(DbGeneric):
                  json.dumps(person.to_struct(), sort_keys=True),
                  given_name, surname, gender_type])
         self.update_secondary_values(person)
+        self._invalidate_alive_ranges([person.handle], trans)
         if not trans.batch:
             self.update_backlinks(person)
             if old_person:
@@ -742,6 +909,10 @@ class DBAPI(DbGeneric):
                  family.mother_handle,
                  json.dumps(family.to_struct(), sort_keys=True)])
         self.update_secondary_values(family)
+        self._invalidate_alive_ranges(
+            self._get_family_members(family.to_struct()) +
+            (self._get_family_members(old_family) if old_family else []),
+            trans)
         if not trans.batch:
             self.update_backlinks(family)
             db_op = TXNUPD if old_family else TXNADD
@@ -958,12 +1129,16 @@ class DBAPI(DbGeneric):
                  place.gid,
                  json.dumps(place.to_struct(), sort_keys=True)])
         self.update_secondary_values(place)
+        self._update_place_geo(place)
         if not trans.batch:
             self.update_backlinks(place)
+            self.update_place_enclosure(place.handle)
             db_op = TXNUPD if old_place else TXNADD
             trans.add(PLACE_KEY, db_op, place.handle,
                       old_place,
                       place.to_struct())
+        else:
+            self._place_enclosure_dirty = True
         # Misc updates:
         if place.get_type().is_custom():
             self.place_types.add(str(place.get_type()))
@@ -1000,6 +1175,9 @@ class DBAPI(DbGeneric):
                  event.gid,
                  json.dumps(event.to_struct(), sort_keys=True)])
         self.update_secondary_values(event)
+        if self._has_alive_ranges():
+            self._invalidate_alive_ranges(
+                self._get_event_people(event.handle), trans)
         if not trans.batch:
             self.update_backlinks(event)
             db_op = TXNUPD if old_event else TXNADD
@@ -1139,10 +1317,21 @@ class DBAPI(DbGeneric):
             return
         if handle in data_map:
             data = data_map[handle]
+            if key == PERSON_KEY:
+                self._invalidate_alive_ranges([handle], transaction)
+            elif key == FAMILY_KEY:
+                self._invalidate_alive_ranges(
+                    self._get_family_members(data), transaction)
+            elif key == EVENT_KEY and self._has_alive_ranges():
+                self._invalidate_alive_ranges(
+                    self._get_event_people(handle), transaction)
             self.remove_backlinks(data["_class"], data["handle"], transaction)
             self.dbapi.execute(
                 "DELETE FROM %s WHERE handle = ?;" % key2table[key],
                 [handle])
+            if key == PLACE_KEY:
+                self.update_place_enclosure(handle)
+                self._delete_place_geo(handle)
             if not transaction.batch:
                 transaction.add(key, TXNDEL, handle, data, None)
 
@@ -1173,6 +1362,272 @@ class DBAPI(DbGeneric):
             if (include_classes is None) or (row[0] in include_classes):
                 yield (row[0], row[1])
 
+    def select_references(self, handles, backlinks=False,
+                          include_classes=None):
+        """
+        Return a list of (class_name, handle) tuples of the objects that
+        the objects with the handles refer to, or that refer to them if
+        backlinks is True, from the reference table, a batch of handles
+        per query.
+        """
+        if backlinks:
+            columns, match = "obj_class, obj_handle", "ref_handle"
+        else:
+            columns, match = "ref_class, ref_handle", "obj_handle"
+        handles = [str(handle, "utf-8") if isinstance(handle, bytes)
+                   else handle for handle in handles]
+        result = []
+        for start in range(0, len(handles), REFERENCE_BATCH):
+            batch = handles[start:start + REFERENCE_BATCH]
+            self.dbapi.execute(
+                "SELECT DISTINCT %s FROM reference WHERE %s IN (%s);"
+                % (columns, match, ", ".join(["?"] * len(batch))), batch)
+            for row in self.dbapi.fetchall():
+                if (include_classes is None) or (row[0] in include_classes):
+                    result.append((row[0], row[1]))
+        return result
+
+    def select_raw_data(self, class_name, handles):
+        """
+        Return a dictionary of the raw data of the objects of the class
+        with the handles, by handle, a batch of handles per query. Handles
+        that are not found are left out.
+        """
+        handles = [str(handle, "utf-8") if isinstance(handle, bytes)
+                   else handle for handle in handles]
+        result = {}
+        for start in range(0, len(handles), REFERENCE_BATCH):
+            batch = handles[start:start + REFERENCE_BATCH]
+            self.dbapi.execute(
+                "SELECT handle, json_data FROM %s WHERE handle IN (%s);"
+                % (class_name.lower(), ", ".join(["?"] * len(batch))), batch)
+            for row in self.dbapi.fetchall():
+                result[row[0]] = json.loads(row[1])
+        return result
+
+    def rebuild_place_enclosure(self):
+        """
+        Rebuild the place enclosure table, and clear the place title cache.
+        """
+        self.dbapi.execute("DELETE FROM place_enclosure;")
+        self._place_titles.clear()
+        for place_handle in self.get_place_handles():
+            self._insert_place_enclosure(place_handle)
+        self._place_enclosure_dirty = False
+
+    def update_place_enclosure(self, handle):
+        """
+        Recompute the place enclosure of the place with handle and of all
+        places it encloses, and drop their cached titles.
+        """
+        self.dbapi.execute("""SELECT DISTINCT place_handle FROM place_enclosure
+                              WHERE ancestor_handle = ?;""", [handle])
+        handles = [handle] + [row[0] for row in self.dbapi.fetchall()]
+        for place_handle in handles:
+            self.dbapi.execute(
+                "DELETE FROM place_enclosure WHERE place_handle = ?;",
+                [place_handle])
+            self._place_titles.pop(place_handle, None)
+            self._insert_place_enclosure(place_handle)
+
+    def _insert_place_enclosure(self, handle):
+        if isinstance(handle, bytes):
+            handle = str(handle, "utf-8")
+        place = self._get_raw_place_data(handle)
+        if place is None:
+            return
+        for (ancestor_handle, depth, start, stop) in get_enclosure(
+                self, Place.create(place)):
+            self.dbapi.execute("""INSERT INTO place_enclosure
+                       (place_handle, ancestor_handle, depth,
+                        start_sortval, stop_sortval)
+                       VALUES(?, ?, ?, ?, ?);""",
+                               [handle, ancestor_handle, depth, start, stop])
+
+    def get_place_enclosure(self, handle):
+        if isinstance(handle, bytes):
+            handle = str(handle, "utf-8")
+        self.dbapi.execute("""SELECT ancestor_handle, depth, start_sortval,
+                                     stop_sortval
+                              FROM place_enclosure WHERE place_handle = ?
+                              ORDER BY depth;""", [handle])
+        return [tuple(row) for row in self.dbapi.fetchall()]
+
+    def get_enclosed_place_handles(self, handle):
+        if isinstance(handle, bytes):
+            handle = str(handle, "utf-8")
+        self.dbapi.execute("""SELECT DISTINCT place_handle FROM place_enclosure
+                              WHERE ancestor_handle = ?;""", [handle])
+        return [row[0] for row in self.dbapi.fetchall()]
+
+    def get_cached_place_title(self, handle, key):
+        if isinstance(handle, bytes):
+            handle = str(handle, "utf-8")
+        return self._place_titles.get(handle, {}).get(key)
+
+    def set_cached_place_title(self, handle, key, title):
+        if isinstance(handle, bytes):
+            handle = str(handle, "utf-8")
+        self._place_titles.setdefault(handle, {})[key] = title
+
+    def get_cached_alive_range(self, handle, key):
+        if isinstance(handle, bytes):
+            handle = str(handle, "utf-8")
+        return self._alive_ranges.get(handle, {}).get(key)
+
+    def set_cached_alive_ranges(self, key, items):
+        for (handle, data) in items:
+            if isinstance(handle, bytes):
+                handle = str(handle, "utf-8")
+            self._alive_ranges.setdefault(handle, {})[key] = tuple(data)
+
+    def clear_cached_alive_ranges(self, handles=None):
+        if handles is None:
+            self._alive_ranges.clear()
+        else:
+            for handle in handles:
+                if isinstance(handle, bytes):
+                    handle = str(handle, "utf-8")
+                self._alive_ranges.pop(handle, None)
+
+    def _has_alive_ranges(self):
+        return bool(self._alive_ranges)
+
+    def _invalidate_alive_ranges(self, handles, trans):
+        """
+        Drop the cached probably alive ranges that can depend on the people
+        with the given handles. In a batch transaction, all ranges are
+        dropped at the end instead.
+        """
+        if trans.batch:
+            self._alive_dirty = True
+        elif handles and self._has_alive_ranges():
+            self.clear_cached_alive_ranges(
+                get_alive_dependents(self, handles))
+
+    def _get_family_members(self, data):
+        """
+        Return the handles of the parents and children of serialized
+        family data.
+        """
+        handles = [data.get("father_handle"), data.get("mother_handle")]
+        handles.extend(ref["ref"] for ref in data.get("child_ref_list", []))
+        return [str(handle) for handle in handles if handle]
+
+    def _get_event_people(self, handle):
+        """
+        Return the handles of the people whose alive range can depend on
+        the event: the people referencing it, and the members of the
+        families referencing it.
+        """
+        handles = []
+        for (obj_class, obj_handle) in self.find_backlink_handles(
+                handle, ["Person", "Family"]):
+            if obj_class == "Person":
+                handles.append(obj_handle)
+            else:
+                data = self._get_raw_family_data(obj_handle)
+                if data:
+                    handles.extend(self._get_family_members(data))
+        return handles
+
+    def rebuild_place_geo(self):
+        """
+        Rebuild the float coordinates of all places, and their spatial
+        index.
+        """
+        self.dbapi.execute("DELETE FROM place_geo;")
+        if self._place_rtree:
+            self.dbapi.execute("DELETE FROM place_rtree;")
+        for place_handle in self.get_place_handles():
+            if isinstance(place_handle, bytes):
+                place_handle = str(place_handle, "utf-8")
+            place = self._get_raw_place_data(place_handle)
+            if place is not None:
+                self._update_place_geo(Place.create(place))
+
+    def _update_place_geo(self, place):
+        """
+        Store the coordinates of the place as floats. Does not commit.
+        """
+        lat, lon = conv_lat_lon_float(place.get_latitude(),
+                                      place.get_longitude())
+        self.dbapi.execute(
+            "SELECT geo_id FROM place_geo WHERE place_handle = ?;",
+            [place.handle])
+        row = self.dbapi.fetchone()
+        if lat is None:
+            if row:
+                self._delete_place_geo(place.handle)
+            return
+        if row:
+            geo_id = row[0]
+            self.dbapi.execute("""UPDATE place_geo SET lat = ?, lon = ?
+                                  WHERE geo_id = ?;""", [lat, lon, geo_id])
+            if self._place_rtree:
+                self.dbapi.execute("""UPDATE place_rtree
+                                      SET min_lat = ?, max_lat = ?,
+                                          min_lon = ?, max_lon = ?
+                                      WHERE id = ?;""",
+                                   [lat, lat, lon, lon, geo_id])
+            return
+        self.dbapi.execute("SELECT MAX(geo_id) FROM place_geo;")
+        geo_id = (self.dbapi.fetchone()[0] or 0) + 1
+        self.dbapi.execute("""INSERT INTO place_geo
+                              (geo_id, place_handle, lat, lon)
+                              VALUES(?, ?, ?, ?);""",
+                           [geo_id, place.handle, lat, lon])
+        if self._place_rtree:
+            self.dbapi.execute("""INSERT INTO place_rtree
+                                  (id, min_lat, max_lat, min_lon, max_lon)
+                                  VALUES(?, ?, ?, ?, ?);""",
+                               [geo_id, lat, lat, lon, lon])
+
+    def _delete_place_geo(self, handle):
+        if self._place_rtree:
+            self.dbapi.execute("""DELETE FROM place_rtree WHERE id IN
+                                  (SELECT geo_id FROM place_geo
+                                   WHERE place_handle = ?);""", [handle])
+        self.dbapi.execute("DELETE FROM place_geo WHERE place_handle = ?;",
+                           [handle])
+
+    def get_place_coordinates(self, handle):
+        if isinstance(handle, bytes):
+            handle = str(handle, "utf-8")
+        self.dbapi.execute(
+            "SELECT lat, lon FROM place_geo WHERE place_handle = ?;",
+            [handle])
+        row = self.dbapi.fetchone()
+        if row:
+            return (row[0], row[1])
+        return (None, None)
+
+    def _place_coordinates_within(self, bbox):
+        rows = []
+        for (min_lat, min_lon, max_lat, max_lon) in split_bounding_box(bbox):
+            if self._place_rtree:
+                # The R*Tree rounds outward, so check the exact values too:
+                self.dbapi.execute(
+                    """SELECT place_geo.place_handle, place_geo.lat,
+                              place_geo.lon
+                       FROM place_rtree
+                       JOIN place_geo ON place_geo.geo_id = place_rtree.id
+                       WHERE place_rtree.max_lat >= ?
+                         AND place_rtree.min_lat <= ?
+                         AND place_rtree.max_lon >= ?
+                         AND place_rtree.min_lon <= ?
+                         AND place_geo.lat BETWEEN ? AND ?
+                         AND place_geo.lon BETWEEN ? AND ?;""",
+                    [min_lat, max_lat, min_lon, max_lon,
+                     min_lat, max_lat, min_lon, max_lon])
+            else:
+                self.dbapi.execute(
+                    """SELECT place_handle, lat, lon FROM place_geo
+                       WHERE lat BETWEEN ? AND ? AND lon BETWEEN ? AND ?;""",
+                    [min_lat, max_lat, min_lon, max_lon])
+            rows.extend(tuple(row) for row in self.dbapi.fetchall())
+        return rows
+
     def find_initial_person(self):
         """
         Returns first person in the database
@@ -1443,6 +1898,9 @@ class DBAPI(DbGeneric):
                 """UPDATE media SET order_by = ? WHERE handle = ?;""",
                 [order_by, media.handle])
             row = self.dbapi.fetchone()
+        ## Rebuild place enclosure and coordinates:
+        self.rebuild_place_enclosure()
+        self.rebuild_place_geo()
 
     def has_handle_for_person(self, key):
         if isinstance(key, bytes):
@@ -1936,7 +2394,9 @@ class DBAPI(DbGeneric):
         elif value is None:
             return '""'
         elif isinstance(value, list):
-            return repr(tuple(value))
+            return "(%s)" % ", ".join([self._sql_repr(item) for item in value])
+        elif isinstance(value, str):
+            return "'%s'" % value.replace("'", "''")
         else:
             return repr(value)
 
@@ -2035,6 +2495,23 @@ class DBAPI(DbGeneric):
             # just the ones we need for where
             return self._hash_name(table, name) in secondary_fields
 
+    def select_handles(self, table, where):
+        """
+        Return a list of the handles of the objects in table that match
+        where, or None if it refers to fields that are not in the table.
+        """
+        secondary_fields = ([self._hash_name(table, field)
+                             for (field, ptype)
+                             in self.get_table_func(
+                                 table, "class_func").get_secondary_fields()]
+                            + ["handle"])
+        if not self._check_where_fields(table, where, secondary_fields):
+            return None
+        self.dbapi.execute("SELECT handle FROM %s %s;"
+                           % (table.lower(),
+                              self._build_where_clause(table, where)))
+        return [bytes(row[0], "utf-8") for row in self.dbapi.fetchall()]
+
     def _select(self, table, fields=None, start=0, limit=-1,
                 where=None, order_by=None):
         """
@@ -2168,7 +2645,9 @@ class DBAPI(DbGeneric):
                             data.get("language", old_data["language"]),
                             data.get("email", old_data["email"]),
                             username])
+        self._log_change([("user-changed", (username, ))])
         self.dbapi.commit()
+        self.emit('user-changed', (username, ))
 
     def add_user(self, username, password, permissions, data):
         """
@@ -2187,7 +2666,9 @@ class DBAPI(DbGeneric):
                             data.get("language", "en"),
                             data.get("email", ""),
                            ])
+        self._log_change([("user-changed", (username, ))])
         self.dbapi.commit()
+        self.emit('user-changed', (username, ))
 
     def decode_permissions(self, permissions):
         retval = set()
@@ -2250,4 +2731,6 @@ class DBAPI(DbGeneric):
         Remove user from table
         """
         self.dbapi.execute("DELETE FROM user WHERE username = ?;", [username])
+        self._log_change([("user-changed", (username, ))])
         self.dbapi.commit()
+        self.emit('user-changed', (username, ))
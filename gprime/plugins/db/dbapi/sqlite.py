@@ -165,6 +165,26 @@ class Sqlite:
         # (1, 'given_name', 'TEXT', 0, None, 0)
         return column in [row[1] for row in self.fetchall()]
 
+    def create_rtree(self, table, columns):
+        """
+        Create an R*Tree virtual table with an integer id and the given
+        minimum/maximum columns, if it doesn't exist yet.
+
+        :param table: table name to create.
+        :type table: str
+        :param columns: pairs of minimum and maximum column names.
+        :type columns: list
+        :returns: True if the table exists, False if the sqlite3 library was
+                  built without the R*Tree module.
+        :rtype: bool
+        """
+        try:
+            self.execute("CREATE VIRTUAL TABLE IF NOT EXISTS %s "
+                         "USING rtree(id, %s);" % (table, ", ".join(columns)))
+        except sqlite3.OperationalError:
+            return False
+        return True
+
     def close(self):
         """
         Close the current database.
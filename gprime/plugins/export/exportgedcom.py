@@ -50,6 +50,7 @@ from gprime.version import VERSION
 import gprime.plugins.lib.libgedcom as libgedcom
 from gprime.errors import DatabaseError
 from gprime.updatecallback import UpdateCallback
+from gprime.plug.utils import OpenFileOrStdout
 from gprime.utils.file import media_path_full
 from gprime.utils.place import conv_lat_lon
 from gprime.utils.location import get_main_location
@@ -233,12 +234,17 @@ class GedcomWriter(UpdateCallback):
 
     def write_gedcom_file(self, filename):
         """
-        Write the actual GEDCOM file to the specified filename.
+        Write the actual GEDCOM file to the specified filename, or binary
+        file object.
         """
-
-        self.dirname = os.path.dirname (filename)
-        with open(filename, "w", encoding='utf-8') as self.gedcom_file:
-            self._header(filename)
+        if hasattr(filename, "write"):
+            self.dirname = None
+            name = getattr(filename, "name", "")
+        else:
+            self.dirname = os.path.dirname(filename)
+            name = filename
+        with OpenFileOrStdout(filename, encoding='utf-8') as self.gedcom_file:
+            self._header(name)
             self._submitter()
             self._individuals()
             self._families()
@@ -1327,8 +1327,9 @@ def conf_priv(obj):
 def export_data(database, filename, user, option_box=None):
     """
     Call the XML writer with the syntax expected by the export plugin.
+    The filename may also be a binary file object.
     """
-    if os.path.isfile(filename):
+    if not hasattr(filename, "write") and os.path.isfile(filename):
         try:
             shutil.copyfile(filename, filename + ".bak")
             shutil.copystat(filename, filename + ".bak")
@@ -1362,11 +1363,14 @@ class XmlWriter(GrampsXmlWriter):
 
     def write(self, filename):
         """
-        Write the database to the specified file.
+        Write the database to the specified file, or binary file object.
         """
         ret = 0 #False
         try:
-            ret = GrampsXmlWriter.write(self, filename)
+            if hasattr(filename, "write"):
+                ret = GrampsXmlWriter.write_handle(self, filename)
+            else:
+                ret = GrampsXmlWriter.write(self, filename)
         except DbWriteFailure as msg:
             (m1, m2) = msg.messages()
             self.user.notify_error("%s\n%s" % (m1, m2))
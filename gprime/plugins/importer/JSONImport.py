@@ -36,6 +36,7 @@ import logging
 #-------------------------------------------------------------------------
 from gprime.db import DbTxn
 from gprime.plug.utils import OpenFileOrStdin
+from gprime.utils.libformatting import ImportInfo
 from gprime.lib import (Note, Person, Event, Family, Repository, Place,
                         Media, Source, Tag, Citation)
 from gprime.const import LOCALE as glocale
@@ -91,6 +92,10 @@ def importData(db, filename, user):
                     line = fp.readline()
     except EnvironmentError as err:
         user.notify_error(_("%s could not be opened\n") % filename, str(err))
+        info = None
+    else:
+        info = ImportInfo({_("Results"): _("done")})
 
     db.enable_signals()
     db.request_rebuild()
+    return info
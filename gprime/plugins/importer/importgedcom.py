@@ -26,6 +26,7 @@
 # Set up logging
 #
 #------------------------------------------------------------------------
+from io import TextIOWrapper
 import logging
 LOG = logging.getLogger(".GedcomImport")
 
@@ -50,6 +51,9 @@ from gprime.config import config
 def importData(database, filename, user):
     """
     Try to handle ANSEL encoded files that are not really ANSEL encoded
+
+    filename may also be a seekable binary file object, such as one still
+    arriving, that is left open.
     """
 
     if DbMixin not in database.__class__.__bases__:
@@ -60,8 +64,13 @@ def importData(database, filename, user):
         # If the file is really UTF16 or a varient, the next block code will not
         # find anything even if it is there, but this is ok since it won't be
         # ANSEL, or is inconsistent...
-        with open(filename, "r", encoding='utf-8', errors='replace',
-                  newline=None) as ifile:
+        if hasattr(filename, "read"):
+            ifile = TextIOWrapper(filename, encoding='utf-8',
+                                  errors='replace', newline=None)
+        else:
+            ifile = open(filename, "r", encoding='utf-8', errors='replace',
+                         newline=None)
+        try:
             ansel = False
             gramps = False
             for index in range(50):
@@ -80,6 +89,12 @@ def importData(database, filename, user):
                 if len(line) > 2 and line[1][0:4] == 'SOUR' \
                                  and line[2] == "GRAMPS":
                     gramps = True
+        finally:
+            if hasattr(filename, "read"):
+                ifile.detach()
+                filename.seek(0)
+            else:
+                ifile.close()
     except IOError:
         return
 
@@ -99,7 +114,12 @@ def importData(database, filename, user):
     assert(isinstance(code_set, str))
 
     try:
-        ifile = open(filename, "rb")
+        own_file = not hasattr(filename, "read")
+        if own_file:
+            ifile = open(filename, "rb")
+        else:
+            ifile = filename
+            filename = getattr(ifile, "name", "")
         stage_one = libgedcom.GedcomStageOne(ifile)
         stage_one.parse()
 
@@ -128,7 +148,8 @@ def importData(database, filename, user):
         database.readonly = False
         gedparse.parse_gedcom_file(False)
         database.readonly = read_only
-        ifile.close()
+        if own_file:
+            ifile.close()
     except IOError as msg:
         msg = _("%s could not be opened\n") % filename
         user.notify_error(msg, str(msg))
@@ -88,7 +88,6 @@ try:
 except:
     GZIP_OK = False
 
-PERSON_RE = re.compile(r"\s*\<person\s(.*)$")
 
 CHILD_REL_MAP = {
     "Birth"     : ChildRefType(ChildRefType.BIRTH),
@@ -114,19 +113,23 @@ INSTANTIATED = 1
 #
 #-------------------------------------------------------------------------
 def importData(database, filename, user):
-    filename = os.path.normpath(filename)
-    basefile = os.path.dirname(filename)
+    """
+    Import the file, or binary file object, filename. The progress is told
+    by the position in the file, rather than by its lines, so that the
+    file is read only once, and a file object may still be arriving.
+    """
+    if not hasattr(filename, "read"):
+        filename = os.path.normpath(filename)
     database.smap = {}
     database.pmap = {}
     database.fmap = {}
-    line_cnt = 0
-    person_cnt = 0
 
-    with ImportOpenFileContextManager(filename, user) as xml_file:
+    manager = ImportOpenFileContextManager(filename, user)
+    with manager as xml_file:
         if xml_file is None:
             return
 
-        if filename == '-':
+        if filename == '-' or hasattr(filename, "read"):
             change = time.time()
         else:
             change = os.path.getmtime(filename)
@@ -137,16 +140,11 @@ def importData(database, filename, user):
                                   (config.get('preferences.tag-on-import-format') if
                                    config.get('preferences.tag-on-import') else None))
 
-        if filename != '-':
-            linecounter = LineParser(filename)
-            line_cnt = linecounter.get_count()
-            person_cnt = linecounter.get_person_count()
-
         read_only = database.readonly
         database.readonly = False
 
         try:
-            info = parser.parse(xml_file, line_cnt, person_cnt)
+            info = parser.parse(xml_file, rawfile=manager.rawfile)
         except GrampsImportError as err: # version error
             user.notify_error(*err.messages())
             return
@@ -330,59 +328,6 @@ class ImportInfo:
 
         return txt
 
-class LineParser:
-    def __init__(self, filename):
-
-        self.count = 0
-        self.person_count = 0
-
-        if GZIP_OK:
-            use_gzip = 1
-            try:
-                with gzip.open(filename, "r") as f:
-                    f.read(1)
-            except IOError as msg:
-                use_gzip = 0
-            except ValueError as msg:
-                use_gzip = 1
-        else:
-            use_gzip = 0
-
-        try:
-            if use_gzip:
-                import io
-                # Bug 6255. TextIOWrapper is required for python3 to
-                #           present file contents as text, otherwise they
-                #           are read as binary. However due to a missing
-                #           method (read1) in early python3 versions this
-                #           try block will fail.
-                #           Gramps will still import XML files using python
-                #           versions < 3.3.0 but the file progress meter
-                #           will not work properly, going immediately to
-                #           100%.
-                #           It should work correctly from version 3.3.
-                ofile = io.TextIOWrapper(gzip.open(filename, "rb"),
-                                         encoding='utf8', errors='replace')
-            else:
-                ofile = open(filename, "r", encoding='utf8', errors='replace')
-
-            for line in ofile:
-                self.count += 1
-                if PERSON_RE.match(line):
-                    self.person_count += 1
-        except:
-            self.count = 0
-            self.person_count = 0
-        finally:
-            # Ensure the file handle is always closed
-            ofile.close()
-
-    def get_count(self):
-        return self.count
-
-    def get_person_count(self):
-        return self.person_count
-
 #-------------------------------------------------------------------------
 #
 # ImportOpenFileContextManager
@@ -390,11 +335,14 @@ class LineParser:
 #-------------------------------------------------------------------------
 class ImportOpenFileContextManager:
     """
-    Context manager to open a file or stdin for reading.
+    Context manager to open a file, binary file object or stdin for
+    reading, uncompressed if gzipped. rawfile is the file read from, whose
+    position tells the progress; None for stdin.
     """
     def __init__(self, filename, user):
         self.filename = filename
         self.filehandle = None
+        self.rawfile = None
         self.user = user
 
     def __enter__(self):
@@ -406,8 +354,11 @@ class ImportOpenFileContextManager:
 
     def __exit__(self, exc_type, exc_value, traceback):
         if self.filename != '-':
-            if self.filehandle:
+            if self.filehandle and self.filehandle is not self.rawfile:
                 self.filehandle.close()
+            # a file object given is closed by its owner:
+            if self.rawfile and not hasattr(self.filename, "read"):
+                self.rawfile.close()
         return False
 
     def open_file(self, filename):
@@ -416,28 +367,24 @@ class ImportOpenFileContextManager:
         Return a valid file handle if the file opened sucessfully.
         Return None if the file was not able to be opened.
         """
-        if GZIP_OK:
-            use_gzip = True
-            try:
-                with gzip.open(filename, "r") as ofile:
-                    ofile.read(1)
-            except IOError as msg:
-                use_gzip = False
-            except ValueError as msg:
-                use_gzip = True
-        else:
-            use_gzip = False
-
+        name = getattr(filename, "name", filename)
         try:
+            if hasattr(filename, "read"):
+                self.rawfile = filename
+            else:
+                self.rawfile = open(filename, "rb")
+            # gzipped files start with a magic number:
+            use_gzip = GZIP_OK and self.rawfile.read(2) == b"\x1f\x8b"
+            self.rawfile.seek(0)
             if use_gzip:
-                xml_file = gzip.open(filename, "rb")
+                xml_file = gzip.GzipFile(mode="rb", fileobj=self.rawfile)
             else:
-                xml_file = open(filename, "rb")
+                xml_file = self.rawfile
         except IOError as msg:
-            self.user.notify_error(_("%s could not be opened") % filename, str(msg))
+            self.user.notify_error(_("%s could not be opened") % name, str(msg))
             xml_file = None
         except:
-            self.user.notify_error(_("%s could not be opened") % filename)
+            self.user.notify_error(_("%s could not be opened") % name)
             xml_file = None
 
         return xml_file
@@ -898,11 +845,13 @@ class GrampsParser(UpdateCallback):
                 gids[id_] = gid
         return gids[id_]
 
-    def parse(self, ifile, linecount=0, personcount=0):
+    def parse(self, ifile, linecount=0, personcount=0, rawfile=None):
         """
         Parse the xml file
         :param ifile: must be a file handle that is already open, with position
                       at the start of the file
+        :param rawfile: the file ifile reads from, if any, whose position
+                        tells the progress rather than the lines of linecount
         """
         if personcount < 1000:
             no_magic = True
@@ -910,7 +859,19 @@ class GrampsParser(UpdateCallback):
             no_magic = False
         with DbTxn(_("Gramps XML import"), self.db, batch=True,
                    no_magic=no_magic) as self.trans:
-            self.set_total(linecount)
+            if rawfile is not None:
+                # the expected size of a file that is still arriving
+                size = getattr(rawfile, "size", None)
+                if not size:
+                    try:
+                        size = os.fstat(rawfile.fileno()).st_size
+                    except OSError:
+                        size = 0
+                self.set_total(size)
+                self.get_position = rawfile.tell
+            else:
+                self.set_total(linecount)
+                self.get_position = lambda: self.p.CurrentLineNumber
 
             self.db.disable_signals()
 
@@ -959,6 +920,7 @@ class GrampsParser(UpdateCallback):
             del self.func_list
             del self.p
             del self.update
+            del self.get_position
         self.db.enable_signals()
         self.db.request_rebuild()
         return self.info
@@ -1136,7 +1098,7 @@ class GrampsParser(UpdateCallback):
         # Gramps LEGACY: title in the placeobj tag
         self.placeobj.title = attrs.get('title', '')
         self.locations = 0
-        self.update(self.p.CurrentLineNumber)
+        self.update(self.get_position())
         return self.placeobj
 
     def start_location(self, attrs):
@@ -1243,7 +1205,7 @@ class GrampsParser(UpdateCallback):
             self.info.add('new-object', EVENT_KEY, self.event)
         else:
             # This is new event, with ID and handle already existing
-            self.update(self.p.CurrentLineNumber)
+            self.update(self.get_position())
             self.event = Event()
             if 'handle' in attrs:
                 orig_handle = attrs['handle'].replace('_', '')
@@ -1440,7 +1402,7 @@ class GrampsParser(UpdateCallback):
         Add a person to db if it doesn't exist yet and assign
         id, privacy and changetime.
         """
-        self.update(self.p.CurrentLineNumber)
+        self.update(self.get_position())
         self.person = Person()
         if 'handle' in attrs:
             orig_handle = attrs['handle'].replace('_', '')
@@ -1574,7 +1536,7 @@ class GrampsParser(UpdateCallback):
         Add a family object to db if it doesn't exist yet and assign
         id, privacy and changetime.
         """
-        self.update(self.p.CurrentLineNumber)
+        self.update(self.get_position())
         self.family = Family()
         if 'handle' in attrs:
             orig_handle = attrs['handle'].replace('_', '')
@@ -1854,7 +1816,7 @@ class GrampsParser(UpdateCallback):
         self.in_note = 0
         if 'handle' in attrs:
             # This is new note, with ID and handle already existing
-            self.update(self.p.CurrentLineNumber)
+            self.update(self.get_position())
             self.note = Note()
             if 'handle' in attrs:
                 orig_handle = attrs['handle'].replace('_', '')
@@ -2052,7 +2014,7 @@ class GrampsParser(UpdateCallback):
         Add a citation object to db if it doesn't exist yet and assign
         id, privacy and changetime.
         """
-        self.update(self.p.CurrentLineNumber)
+        self.update(self.get_position())
         self.citation = Citation()
         orig_handle = attrs['handle'].replace('_', '')
         is_merge_candidate = (self.replace_import_handle and
@@ -2105,7 +2067,7 @@ class GrampsParser(UpdateCallback):
         Add a source object to db if it doesn't exist yet and assign
         id, privacy and changetime.
         """
-        self.update(self.p.CurrentLineNumber)
+        self.update(self.get_position())
         self.source = Source()
         if 'handle' in attrs:
             orig_handle = attrs['handle'].replace('_', '')
@@ -2247,7 +2209,7 @@ class GrampsParser(UpdateCallback):
         pass
 
     def stop_database(self, *tag):
-        self.update(self.p.CurrentLineNumber)
+        self.update(self.get_position())
 
     def stop_media(self, *tag):
         self.db.commit_media(self.object, self.trans,
@@ -39,6 +39,7 @@ from gprime.const import LOCALE as glocale
 _ = glocale.translation.gettext
 from gprime.errors import ReportError
 from gprime.relationship import get_relationship_calculator
+from gprime.utils.graph import get_genealogy_graph, NONE
 from gprime.plug.docgen import (IndexMark, FontStyle, ParagraphStyle,
                                     FONT_SANS_SERIF, INDEX_TYPE_TOC,
                                     PARA_ALIGN_CENTER)
@@ -109,6 +110,8 @@ class KinshipReport(Report):
         self.rel_calc = get_relationship_calculator(reinit=True,
                                                     clocale=rlocale)
 
+        self.graph = get_genealogy_graph(self.__db)
+
         self.kinship_map = {}
         self.spouse_map = {}
 
@@ -239,17 +242,15 @@ class KinshipReport(Report):
         Return an array of handles for all the parents of the
         given person handle.
         """
+        graph = self.graph
         parent_handles = []
-        person = self.__db.get_person_from_handle(person_handle)
-        family_handle = person.get_main_parents_family_handle()
-        if family_handle:
-            family = self.__db.get_family_from_handle(family_handle)
-            father_handle = family.get_father_handle()
-            if father_handle:
-                parent_handles.append(father_handle)
-            mother_handle = family.get_mother_handle()
-            if mother_handle:
-                parent_handles.append(mother_handle)
+        family_ids = graph.get_parent_family_ids(
+            graph.get_person_id(person_handle))
+        if family_ids:
+            for parent in (graph.father[family_ids[0]],
+                           graph.mother[family_ids[0]]):
+                if parent != NONE:
+                    parent_handles.append(graph.person_handles[parent])
         return parent_handles
 
     def get_spouse_handles(self, person_handle):
@@ -257,20 +258,22 @@ class KinshipReport(Report):
         Return an array of handles for all the spouses of the
         given person handle.
         """
+        graph = self.graph
+        pid = graph.get_person_id(person_handle)
         spouses = []
-        person = self.__db.get_person_from_handle(person_handle)
-        for family_handle in person.get_family_handle_list():
-            family = self.__db.get_family_from_handle(family_handle)
-            father_handle = family.get_father_handle()
-            mother_handle = family.get_mother_handle()
-            spouse_handle = None
-            if mother_handle and father_handle == person_handle:
-                spouse_handle = mother_handle
-            elif father_handle and mother_handle == person_handle:
-                spouse_handle = father_handle
-
-            if spouse_handle and spouse_handle not in spouses:
-                spouses.append(spouse_handle)
+        for family_id in graph.get_family_ids(pid):
+            father = graph.father[family_id]
+            mother = graph.mother[family_id]
+            spouse = NONE
+            if mother != NONE and father == pid:
+                spouse = mother
+            elif father != NONE and mother == pid:
+                spouse = father
+
+            if spouse != NONE:
+                spouse_handle = graph.person_handles[spouse]
+                if spouse_handle not in spouses:
+                    spouses.append(spouse_handle)
         return spouses
 
     def get_children_handles(self, person_handle):
@@ -278,12 +281,12 @@ class KinshipReport(Report):
         Return an array of handles for all the children of the
         given person handle.
         """
+        graph = self.graph
         children = []
-        person = self.__db.get_person_from_handle(person_handle)
-        for family_handle in person.get_family_handle_list():
-            family = self.__db.get_family_from_handle(family_handle)
-            for child_ref in family.get_child_ref_list():
-                children.append(child_ref.get_reference_handle())
+        for family_id in graph.get_family_ids(
+                graph.get_person_id(person_handle)):
+            for child in graph.get_child_ids(family_id):
+                children.append(graph.person_handles[child])
         return children
 
     def write_people(self, title, people_handles):
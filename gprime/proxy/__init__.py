@@ -20,10 +20,13 @@
 #
 # gen/proxy/__init__.py
 
-__all__ = [ "filter", "living", "private", "proxybase", "referencedbyselection" ]
+__all__ = [ "filter", "fused", "living", "loader", "private", "proxybase",
+            "referencedbyselection" ]
 
 from .filter import FilterProxyDb
+from .fused import FusedProxyDb
 from .living import LivingProxyDb
 from .private import PrivateProxyDb
 from .referencedbyselection import ReferencedBySelectionProxyDb
 from .cache import CacheProxyDb
+from .loader import LoaderProxyDb
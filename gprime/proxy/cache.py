@@ -22,25 +22,103 @@
 Proxy class for the Gramps databases. Caches lookups from handles.
 """
 
+#-------------------------------------------------------------------------
+#
+# Python modules
+#
+#-------------------------------------------------------------------------
+import sys
+
+#-------------------------------------------------------------------------
+#
+# Gprime modules
+#
+#-------------------------------------------------------------------------
 from gprime.utils.lru import LRU
+from gprime.utils.callback import Callback
+
+# The tables, with the names of their get_*_from_handle and get_raw_*_data
+# methods:
+TABLES = {
+    'Person': ('get_person_from_handle', 'get_raw_person_data'),
+    'Family': ('get_family_from_handle', 'get_raw_family_data'),
+    'Event': ('get_event_from_handle', 'get_raw_event_data'),
+    'Place': ('get_place_from_handle', 'get_raw_place_data'),
+    'Source': ('get_source_from_handle', 'get_raw_source_data'),
+    'Citation': ('get_citation_from_handle', 'get_raw_citation_data'),
+    'Media': ('get_media_from_handle', 'get_raw_media_data'),
+    'Repository': ('get_repository_from_handle',
+                   'get_raw_repository_data'),
+    'Note': ('get_note_from_handle', 'get_raw_note_data'),
+    'Tag': ('get_tag_from_handle', 'get_raw_tag_data'),
+    }
+
+def get_size(value):
+    """
+    Return the approximate number of bytes used by value, with the
+    containers and the attributes of objects it holds.
+    """
+    size = 0
+    seen = set()
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        if id(value) in seen:
+            continue
+        seen.add(id(value))
+        size += sys.getsizeof(value)
+        if isinstance(value, (str, bytes, int, float, bool, type(None))):
+            continue
+        if isinstance(value, dict):
+            stack.extend(value.keys())
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            stack.extend(value)
+        elif hasattr(value, '__dict__'):
+            stack.extend(value.__dict__.values())
+    return size
 
 class CacheProxyDb:
     """
     A Proxy for a database with cached lookups on handles.
 
-    Does not invalid caches. Should be used only in read-only
-    places, and not where caches are altered.
+    Objects and raw data are kept in one LRU of approximately the
+    configured number of bytes. Hits, misses and evictions are counted per
+    table.
+
+    Does not invalidate caches unless connected to the signals of the
+    database, see :meth:`connect_db_signals`. Should be used only in
+    read-only places, and not where cached objects are altered.
     """
-    def __init__(self, database):
+    def __init__(self, database, cache_size=None, connect=False):
         """
         CacheProxy will cache items based on their handle.
 
-        Assumes all handles (regardless of type) are unique.
         Database is called self.db for consistency with other
-        proxies.
+        proxies. cache_size is the approximate number of bytes to use; if
+        connect is True, changes to the database drop the changed objects.
         """
+        if cache_size is None:
+            cache_size = 50000000
+            try:
+                from ..config import config
+                cache_size = config.get('behavior.cache-proxy-bytes')
+            except ImportError:
+                pass
         self.db = database
+        self.cache_size = cache_size
+        self.stats = {}
         self.clear_cache()
+        for class_name in TABLES:
+            self.stats[class_name] = {'hits': 0, 'misses': 0,
+                                      'evictions': 0}
+        for class_name, (handle_func, raw_func) in TABLES.items():
+            setattr(self, handle_func,
+                    self.__make_getter(class_name, handle_func, False))
+            setattr(self, raw_func,
+                    self.__make_getter(class_name, raw_func, True))
+        if connect:
+            self.connect_db_signals()
 
     def __getattr__(self, attr):
         """
@@ -49,133 +127,141 @@ class CacheProxyDb:
         """
         return getattr(self.db, attr)
 
-    def clear_cache(self, handle=None):
-        """
-        Clears all caches if handle is None, or
-        specific entry.
-        """
-        if handle:
-            del self.cache_handle[handle]
-        else:
-            self.cache_handle = LRU(100000)
-
-    def get_person_from_handle(self, handle):
-        """
-        Gets item from cache if it exists. Converts
-        handles to string, for uniformity.
-        """
-        if isinstance(handle, bytes):
-            handle = str(handle, "utf-8")
-        if handle not in self.cache_handle:
-            self.cache_handle[handle] = self.db.get_person_from_handle(handle)
-        return self.cache_handle[handle]
+    def __make_getter(self, class_name, func_name, raw):
+        get_data = getattr(self.db, func_name)
+        return lambda handle: self.__get(class_name, handle, raw, get_data)
 
-    def get_event_from_handle(self, handle):
+    def __get(self, class_name, handle, raw, get_data):
         """
         Gets item from cache if it exists. Converts
         handles to string, for uniformity.
         """
         if isinstance(handle, bytes):
             handle = str(handle, "utf-8")
-        if handle not in self.cache_handle:
-            self.cache_handle[handle] = self.db.get_event_from_handle(handle)
-        return self.cache_handle[handle]
+        key = (class_name, handle, raw)
+        stats = self.stats[class_name]
+        if key in self.cache_handle:
+            stats['hits'] += 1
+            return self.cache_handle[key][0]
+        stats['misses'] += 1
+        data = get_data(handle)
+        if data is not None:
+            self.__add(key, data)
+        return data
 
-    def get_family_from_handle(self, handle):
+    def __add(self, key, data, size=None):
         """
-        Gets item from cache if it exists. Converts
-        handles to string, for uniformity.
+        Add the data to the cache, evicting the least recently used entries
+        beyond the number of bytes.
         """
-        if isinstance(handle, bytes):
-            handle = str(handle, "utf-8")
-        if handle not in self.cache_handle:
-            self.cache_handle[handle] = self.db.get_family_from_handle(handle)
-        return self.cache_handle[handle]
+        if size is None:
+            size = get_size(data)
+        if size > self.cache_size:
+            return
+        self.cache_handle[key] = (data, size)
+        self.cache_bytes += size
+        while self.cache_bytes > self.cache_size:
+            old_key = self.cache_handle.first.value[0]
+            self.stats[old_key[0]]['evictions'] += 1
+            self.__remove(old_key)
 
-    def get_repository_from_handle(self, handle):
-        """
-        Gets item from cache if it exists. Converts
-        handles to string, for uniformity.
-        """
-        if isinstance(handle, bytes):
-            handle = str(handle, "utf-8")
-        if handle not in self.cache_handle:
-            self.cache_handle[handle] = self.db.get_repository_from_handle(handle)
-        return self.cache_handle[handle]
+    def __remove(self, key):
+        self.cache_bytes -= self.cache_handle.data[key].value[1][1]
+        del self.cache_handle[key]
 
-    def get_place_from_handle(self, handle):
+    def clear_cache(self, handle=None, class_name=None):
         """
-        Gets item from cache if it exists. Converts
-        handles to string, for uniformity.
-        """
-        if isinstance(handle, bytes):
-            handle = str(handle, "utf-8")
-        if handle not in self.cache_handle:
-            self.cache_handle[handle] = self.db.get_place_from_handle(handle)
-        return self.cache_handle[handle]
-
-    def get_place_from_handle(self, handle):
-        """
-        Gets item from cache if it exists. Converts
-        handles to string, for uniformity.
+        Clears all caches if handle is None, or
+        specific entry (of the class, if given).
         """
-        if isinstance(handle, bytes):
-            handle = str(handle, "utf-8")
-        if handle not in self.cache_handle:
-            self.cache_handle[handle] = self.db.get_place_from_handle(handle)
-        return self.cache_handle[handle]
+        if handle:
+            if isinstance(handle, bytes):
+                handle = str(handle, "utf-8")
+            for name in ([class_name] if class_name else TABLES):
+                for raw in (False, True):
+                    if (name, handle, raw) in self.cache_handle:
+                        self.__remove((name, handle, raw))
+        elif class_name:
+            for key in self.cache_handle.keys():
+                if key[0] == class_name:
+                    self.__remove(key)
+        else:
+            # the size is bounded in bytes, not in entries
+            self.cache_handle = LRU(sys.maxsize)
+            self.cache_bytes = 0
 
-    def get_citation_from_handle(self, handle):
+    def connect_db_signals(self):
         """
-        Gets item from cache if it exists. Converts
-        handles to string, for uniformity.
+        Drop the objects that are changed in the database. Only the
+        signals of the base database are followed; batch transactions
+        emit none.
         """
-        if isinstance(handle, bytes):
-            handle = str(handle, "utf-8")
-        if handle not in self.cache_handle:
-            self.cache_handle[handle] = self.db.get_citation_from_handle(handle)
-        return self.cache_handle[handle]
+        database = getattr(self.db, 'basedb', self.db)
+        if not isinstance(database, Callback):
+            return False
+        for class_name in TABLES:
+            callback = self.__make_callback(class_name)
+            for operation in ('update', 'delete'):
+                database.connect('%s-%s' % (class_name.lower(), operation),
+                                 callback)
+            database.connect('%s-rebuild' % class_name.lower(),
+                             self.__make_rebuild_callback(class_name))
+        return True
 
-    def get_source_from_handle(self, handle):
-        """
-        Gets item from cache if it exists. Converts
-        handles to string, for uniformity.
-        """
-        if isinstance(handle, bytes):
-            handle = str(handle, "utf-8")
-        if handle not in self.cache_handle:
-            self.cache_handle[handle] = self.db.get_source_from_handle(handle)
-        return self.cache_handle[handle]
+    def __make_callback(self, class_name):
+        def changed(handles):
+            for handle in handles:
+                self.clear_cache(handle, class_name)
+        return changed
 
-    def get_note_from_handle(self, handle):
-        """
-        Gets item from cache if it exists. Converts
-        handles to string, for uniformity.
-        """
-        if isinstance(handle, bytes):
-            handle = str(handle, "utf-8")
-        if handle not in self.cache_handle:
-            self.cache_handle[handle] = self.db.get_note_from_handle(handle)
-        return self.cache_handle[handle]
+    def __make_rebuild_callback(self, class_name):
+        return lambda *args: self.clear_cache(class_name=class_name)
 
-    def get_media_from_handle(self, handle):
+    def warm_up(self, class_name, handles=None):
         """
-        Gets item from cache if it exists. Converts
-        handles to string, for uniformity.
+        Load the objects of the class with the handles (all objects of the
+        class if None) into the cache, until it is full; no entries are
+        evicted for them. Returns the number of objects loaded.
         """
-        if isinstance(handle, bytes):
-            handle = str(handle, "utf-8")
-        if handle not in self.cache_handle:
-            self.cache_handle[handle] = self.db.get_media_from_handle(handle)
-        return self.cache_handle[handle]
+        handle_func, raw_func = TABLES[class_name]
+        get_object = getattr(self.db, handle_func)
+        if handles is None:
+            if getattr(self.db, 'basedb', self.db) is self.db:
+                # a database, whose objects can be read in one pass
+                iter_objects = self.db.get_table_func(class_name,
+                                                      "iter_func")()
+                handle_objects = ((obj.handle, obj) for obj in iter_objects)
+            else:
+                handle_objects = ((handle, None) for handle in
+                                  self.db.get_table_func(class_name,
+                                                         "handles_func")())
+        else:
+            handle_objects = ((handle, None) for handle in handles)
+        count = 0
+        for handle, obj in handle_objects:
+            if isinstance(handle, bytes):
+                handle = str(handle, "utf-8")
+            key = (class_name, handle, False)
+            if key in self.cache_handle:
+                continue
+            if obj is None:
+                obj = get_object(handle)
+            if obj is None:
+                continue
+            size = get_size(obj)
+            if self.cache_bytes + size > self.cache_size:
+                break
+            self.__add(key, obj, size)
+            count += 1
+        return count
 
-    def get_tag_from_handle(self, handle):
+    def get_metrics(self):
         """
-        Gets item from cache if it exists. Converts
-        handles to string, for uniformity.
+        Return a dictionary with the cache statistics, with the counters of
+        every table under 'tables'.
         """
-        if isinstance(handle, bytes):
-            handle = str(handle, "utf-8")
-        if handle not in self.cache_handle:
-            self.cache_handle[handle] = self.db.get_tag_from_handle(handle)
-        return self.cache_handle[handle]
+        return {'size': len(self.cache_handle),
+                'bytes': self.cache_bytes,
+                'capacity': self.cache_size,
+                'tables': dict((class_name, dict(stats))
+                               for class_name, stats in self.stats.items())}
@@ -42,6 +42,8 @@ class FilterProxyDb(ProxyDbBase):
     the user.
     """
 
+    keeps_references = True
+
     def __init__(self, db, person_filter=None, event_filter=None,
                  note_filter=None):
         """
@@ -0,0 +1,517 @@
+#
+# gPrime - A web-based genealogy program
+#
+# Copyright (C) 2017  gPrime contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Proxy class for the Gramps databases. Does the work of the private, living,
+filter and referenced proxies in one layer, for exports.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Gprime modules
+#
+#-------------------------------------------------------------------------
+from .proxybase import ProxyDbBase
+from .living import LivingProxyDb, restrict_person
+from .private import (sanitize_person, sanitize_family, sanitize_event,
+                      sanitize_place, sanitize_source, sanitize_citation,
+                      sanitize_media, sanitize_repository)
+from .referencedbyselection import ReferencedBySelectionProxyDb
+from ..lib import Date
+from ..utils.alive import probably_alive
+from ..config import config
+from gprime.db.base import sort_objects
+from gprime.const import LOCALE as glocale
+
+# The classes of the primary objects, with the functions that take the
+# private data out of them:
+SANITIZERS = {
+    'Person': sanitize_person,
+    'Family': sanitize_family,
+    'Event': sanitize_event,
+    'Place': sanitize_place,
+    'Source': sanitize_source,
+    'Citation': sanitize_citation,
+    'Media': sanitize_media,
+    'Repository': sanitize_repository,
+    'Note': None,
+    'Tag': None,
+    }
+
+class ObjectCursor:
+    """
+    A cursor over the serialized objects of an iterator.
+    """
+    def __init__(self, iter_objects):
+        self.iter_objects = iter_objects
+
+    def __enter__(self):
+        """
+        Context manager enter method
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    def __iter__(self):
+        for obj in self.iter_objects():
+            yield obj.handle.encode("utf-8"), obj.to_struct()
+
+#-------------------------------------------------------------------------
+#
+# FusedProxyDb
+#
+#-------------------------------------------------------------------------
+class FusedProxyDb(ProxyDbBase):
+    """
+    A proxy to a Gramps database, which shows what a PrivateProxyDb, a
+    LivingProxyDb, FilterProxyDbs and a ReferencedBySelectionProxyDb (with
+    all people), applied in this order, would show.
+
+    The objects to include are found once, when the proxy is made. After
+    that, every object is fetched from the database once, and its private
+    data, living people and references to objects that are not included are
+    taken out of it in a single pass.
+    """
+
+    def __init__(self, dbase, private=False,
+                 living_mode=LivingProxyDb.MODE_INCLUDE_ALL,
+                 current_year=None, years_after_death=0, llocale=glocale,
+                 person_filter=None, event_filter=None, note_filter=None,
+                 referenced=False):
+        """
+        Create a new FusedProxyDb instance.
+
+        :param dbase: The database to be a proxy for
+        :type dbase: DbBase
+        :param private: if True, hide the data marked private
+        :type private: boolean
+        :param living_mode: how to handle living people, see LivingProxyDb
+        :type living_mode: int
+        :param current_year: the current year, for living determination
+        :type current_year: int or None
+        :param years_after_death: the number of years after a person's death
+                                  to still consider them living
+        :type years_after_death: int
+        :param llocale: allow deferred translation of "[Living]"
+        :type llocale: a :class:`.Locale` instance
+        :param person_filter: the filter of the people to include, or None
+        :param event_filter: the filter of the events to include, or None
+        :param note_filter: the filter of the notes to include, or None
+        :param referenced: if True, only include the objects referenced by
+                           the included people
+        :type referenced: boolean
+        """
+        ProxyDbBase.__init__(self, dbase)
+        self.private = private
+        self.living_mode = living_mode
+        _ = llocale.translation.gettext
+        self._p_f_n = _(config.get('preferences.private-given-text'))
+        self._p_s_n = _(config.get('preferences.private-surname-text'))
+        # Only whole objects are hidden, when no private data is taken out
+        # and living people are kept:
+        self.keeps_references = (
+            not private and living_mode == LivingProxyDb.MODE_INCLUDE_ALL)
+        # References to objects that are not included have to be removed:
+        self.hides_objects = bool(
+            person_filter or event_filter or note_filter or
+            living_mode == LivingProxyDb.MODE_EXCLUDE_ALL)
+
+        self.included = {}
+        for class_name in SANITIZERS:
+            self.included[class_name] = self.__find_visible(class_name)
+
+        self.living = set()
+        if living_mode != LivingProxyDb.MODE_INCLUDE_ALL:
+            current_date = None
+            if current_year is not None:
+                current_date = Date()
+                current_date.set_year(current_year)
+            for handle in self.included['Person']:
+                person = self.basedb.get_person_from_handle(handle)
+                if probably_alive(person, self.basedb, current_date,
+                                  years_after_death):
+                    self.living.add(handle)
+            if living_mode == LivingProxyDb.MODE_EXCLUDE_ALL:
+                self.included['Person'] -= self.living
+
+        for class_name, gfilter in (('Person', person_filter),
+                                    ('Event', event_filter),
+                                    ('Note', note_filter)):
+            if gfilter:
+                self.included[class_name] = self.__handle_set(gfilter.apply(
+                    self, sorted(self.included[class_name])))
+        if person_filter:
+            # only the families of the people
+            self.included['Family'] &= self.__find_families()
+
+        if referenced:
+            proxy = ReferencedBySelectionProxyDb(self, all_people=True)
+            for class_name in SANITIZERS:
+                self.included[class_name] &= proxy.referenced[class_name]
+
+    @staticmethod
+    def __handle_set(handles):
+        return set(str(handle, "utf-8") if isinstance(handle, bytes)
+                   else handle for handle in handles)
+
+    def __find_visible(self, class_name):
+        """
+        Return the set of the handles of the objects of the class, leaving
+        out the private ones if private data is hidden.
+        """
+        if self.private and class_name != 'Tag':
+            handles = self.basedb.select_handles(class_name,
+                                                 ("private", "=", False))
+            if handles is None:
+                iter_objects = self.basedb.get_table_func(class_name,
+                                                          "iter_func")
+                handles = [obj.handle for obj in iter_objects()
+                           if not obj.get_privacy()]
+        else:
+            handles = self.basedb.get_table_func(class_name, "handles_func")()
+        return self.__handle_set(handles)
+
+    def __find_families(self):
+        """
+        Return the set of the handles of the families of the included
+        people.
+        """
+        people = self.included['Person']
+        found = self.basedb.select_references(people,
+                                              include_classes=['Family'])
+        if found is not None:
+            return set(handle for (class_name, handle) in found)
+        families = set()
+        for handle in people:
+            person = self.basedb.get_person_from_handle(handle)
+            families.update(person.get_family_handle_list())
+            families.update(person.get_parent_family_handle_list())
+        return families
+
+    def __include(self, class_name, handle):
+        if isinstance(handle, bytes):
+            handle = str(handle, "utf-8")
+        return handle in self.included[class_name]
+
+    def __get_object(self, class_name, obj):
+        """
+        Return the object as this proxy shows it, or None.
+        """
+        if obj is None or obj.handle not in self.included[class_name]:
+            return None
+        # check the parents before sanitizing leaves out the excluded ones
+        living_parent = (self.living and class_name == 'Family' and
+                         (obj.get_father_handle() in self.living or
+                          obj.get_mother_handle() in self.living))
+        if self.private and SANITIZERS[class_name]:
+            # this leaves out the references to objects not included too
+            obj = SANITIZERS[class_name](self, obj)
+        elif self.hides_objects:
+            self.__remove_references(obj)
+        if self.living:
+            if class_name == 'Person' and obj.handle in self.living:
+                if self.living_mode != LivingProxyDb.MODE_EXCLUDE_ALL:
+                    obj = restrict_person(obj, self.living_mode,
+                                          self._p_f_n, self._p_s_n)
+            elif living_parent:
+                # Clear all events for families where a parent is living.
+                obj.set_event_ref_list([])
+        return obj
+
+    def __remove_references(self, obj):
+        """
+        Remove the references to objects that are not included from obj.
+        """
+        hidden = {}
+        for (class_name, handle) in obj.get_referenced_handles_recursively():
+            if handle not in self.included[class_name]:
+                hidden.setdefault(class_name, []).append(handle)
+        for class_name, handles in hidden.items():
+            obj.remove_handle_references(class_name, handles)
+
+    def __iter_objects(self, class_name, iter_objects, order_by):
+        """
+        Return an iterator over the objects of the class as this proxy shows
+        them, fetching every object once.
+        """
+        objects = (self.__get_object(class_name, obj)
+                   for obj in iter_objects()
+                   if obj.handle in self.included[class_name])
+        if order_by:
+            return iter(sort_objects(list(objects), order_by, self))
+        return objects
+
+    # Define predicate functions for use by default iterator methods
+
+    def include_person(self, handle):
+        return self.__include('Person', handle)
+
+    def include_family(self, handle):
+        return self.__include('Family', handle)
+
+    def include_event(self, handle):
+        return self.__include('Event', handle)
+
+    def include_place(self, handle):
+        return self.__include('Place', handle)
+
+    def include_source(self, handle):
+        return self.__include('Source', handle)
+
+    def include_citation(self, handle):
+        return self.__include('Citation', handle)
+
+    def include_media(self, handle):
+        return self.__include('Media', handle)
+
+    def include_repository(self, handle):
+        return self.__include('Repository', handle)
+
+    def include_note(self, handle):
+        return self.__include('Note', handle)
+
+    def include_tag(self, handle):
+        return self.__include('Tag', handle)
+
+    def include_citation_ref(self, handle):
+        """
+        Predicate returning True if a reference to the citation is to be
+        included, which needs both the citation and its source
+        """
+        if not self.include_citation(handle):
+            return False
+        citation = self.basedb.get_citation_from_handle(handle)
+        return self.include_source(citation.get_reference_handle())
+
+    has_person_handle = include_person
+    has_family_handle = include_family
+    has_event_handle = include_event
+    has_place_handle = include_place
+    has_source_handle = include_source
+    has_citation_handle = include_citation
+    has_media_handle = include_media
+    has_repository_handle = include_repository
+    has_note_handle = include_note
+    has_tag_handle = include_tag
+
+    def get_person_from_handle(self, handle):
+        return self.__get_object('Person',
+                                 self.basedb.get_person_from_handle(handle))
+
+    def get_family_from_handle(self, handle):
+        return self.__get_object('Family',
+                                 self.basedb.get_family_from_handle(handle))
+
+    def get_event_from_handle(self, handle):
+        return self.__get_object('Event',
+                                 self.basedb.get_event_from_handle(handle))
+
+    def get_place_from_handle(self, handle):
+        return self.__get_object('Place',
+                                 self.basedb.get_place_from_handle(handle))
+
+    def get_source_from_handle(self, handle):
+        return self.__get_object('Source',
+                                 self.basedb.get_source_from_handle(handle))
+
+    def get_citation_from_handle(self, handle):
+        return self.__get_object('Citation',
+                                 self.basedb.get_citation_from_handle(handle))
+
+    def get_media_from_handle(self, handle):
+        return self.__get_object('Media',
+                                 self.basedb.get_media_from_handle(handle))
+
+    def get_repository_from_handle(self, handle):
+        return self.__get_object(
+            'Repository', self.basedb.get_repository_from_handle(handle))
+
+    def get_note_from_handle(self, handle):
+        return self.__get_object('Note',
+                                 self.basedb.get_note_from_handle(handle))
+
+    def get_tag_from_handle(self, handle):
+        return self.__get_object('Tag',
+                                 self.basedb.get_tag_from_handle(handle))
+
+    def get_person_from_gid(self, val):
+        return self.__get_object('Person',
+                                 self.basedb.get_person_from_gid(val))
+
+    def get_family_from_gid(self, val):
+        return self.__get_object('Family',
+                                 self.basedb.get_family_from_gid(val))
+
+    def get_event_from_gid(self, val):
+        return self.__get_object('Event',
+                                 self.basedb.get_event_from_gid(val))
+
+    def get_place_from_gid(self, val):
+        return self.__get_object('Place',
+                                 self.basedb.get_place_from_gid(val))
+
+    def get_source_from_gid(self, val):
+        return self.__get_object('Source',
+                                 self.basedb.get_source_from_gid(val))
+
+    def get_citation_from_gid(self, val):
+        return self.__get_object('Citation',
+                                 self.basedb.get_citation_from_gid(val))
+
+    def get_media_from_gid(self, val):
+        return self.__get_object('Media',
+                                 self.basedb.get_media_from_gid(val))
+
+    def get_repository_from_gid(self, val):
+        return self.__get_object('Repository',
+                                 self.basedb.get_repository_from_gid(val))
+
+    def get_note_from_gid(self, val):
+        return self.__get_object('Note',
+                                 self.basedb.get_note_from_gid(val))
+
+    def get_tag_from_name(self, val):
+        return self.__get_object('Tag',
+                                 self.basedb.get_tag_from_name(val))
+
+    def iter_people(self, order_by=None):
+        return self.__iter_objects('Person', self.basedb.iter_people,
+                                   order_by)
+
+    def iter_families(self, order_by=None):
+        return self.__iter_objects('Family', self.basedb.iter_families,
+                                   order_by)
+
+    def iter_events(self, order_by=None):
+        return self.__iter_objects('Event', self.basedb.iter_events,
+                                   order_by)
+
+    def iter_places(self, order_by=None):
+        return self.__iter_objects('Place', self.basedb.iter_places,
+                                   order_by)
+
+    def iter_sources(self, order_by=None):
+        return self.__iter_objects('Source', self.basedb.iter_sources,
+                                   order_by)
+
+    def iter_citations(self, order_by=None):
+        return self.__iter_objects('Citation', self.basedb.iter_citations,
+                                   order_by)
+
+    def iter_media(self, order_by=None):
+        return self.__iter_objects('Media', self.basedb.iter_media,
+                                   order_by)
+
+    def iter_repositories(self, order_by=None):
+        return self.__iter_objects('Repository',
+                                   self.basedb.iter_repositories, order_by)
+
+    def iter_notes(self, order_by=None):
+        return self.__iter_objects('Note', self.basedb.iter_notes, order_by)
+
+    def iter_tags(self, order_by=None):
+        return self.__iter_objects('Tag', self.basedb.iter_tags, order_by)
+
+    def get_person_cursor(self):
+        return ObjectCursor(self.iter_people)
+
+    def get_family_cursor(self):
+        return ObjectCursor(self.iter_families)
+
+    def get_event_cursor(self):
+        return ObjectCursor(self.iter_events)
+
+    def get_place_cursor(self):
+        return ObjectCursor(self.iter_places)
+
+    def get_source_cursor(self):
+        return ObjectCursor(self.iter_sources)
+
+    def get_citation_cursor(self):
+        return ObjectCursor(self.iter_citations)
+
+    def get_media_cursor(self):
+        return ObjectCursor(self.iter_media)
+
+    def get_repository_cursor(self):
+        return ObjectCursor(self.iter_repositories)
+
+    def get_note_cursor(self):
+        return ObjectCursor(self.iter_notes)
+
+    def get_tag_cursor(self):
+        return ObjectCursor(self.iter_tags)
+
+    def get_number_of_people(self):
+        return len(self.included['Person'])
+
+    def get_number_of_families(self):
+        return len(self.included['Family'])
+
+    def get_number_of_events(self):
+        return len(self.included['Event'])
+
+    def get_number_of_places(self):
+        return len(self.included['Place'])
+
+    def get_number_of_sources(self):
+        return len(self.included['Source'])
+
+    def get_number_of_citations(self):
+        return len(self.included['Citation'])
+
+    def get_number_of_media(self):
+        return len(self.included['Media'])
+
+    def get_number_of_repositories(self):
+        return len(self.included['Repository'])
+
+    def get_number_of_notes(self):
+        return len(self.included['Note'])
+
+    def get_number_of_tags(self):
+        return len(self.included['Tag'])
+
+    def get_default_person(self):
+        """returns the default Person of the database"""
+        handle = self.get_default_handle()
+        if handle:
+            return self.get_person_from_handle(handle)
+        return None
+
+    def get_default_handle(self):
+        """returns the default Person of the database"""
+        handle = self.basedb.get_default_handle()
+        if handle and self.include_person(handle):
+            return handle
+        return None
+
+    def find_backlink_handles(self, handle, include_classes=None):
+        """
+        Find the included objects that hold a reference to the object
+        handle. Returns an iterator over a list of (class_name, handle)
+        tuples.
+        """
+        for (class_name, handle) in self.basedb.find_backlink_handles(
+                handle, include_classes):
+            if self.__include(class_name, handle):
+                yield (class_name, handle)
@@ -421,47 +421,54 @@ class LivingProxyDb(ProxyDbBase):
         Remove information from a person and replace the first name with
         "[Living]" or what has been set in Preferences -> Text.
         """
-        new_person = Person()
-        new_name = Name()
-        old_name = person.get_primary_name()
-
-        new_name.set_group_as(old_name.get_group_as())
-        new_name.set_sort_as(old_name.get_sort_as())
-        new_name.set_display_as(old_name.get_display_as())
-        new_name.set_type(old_name.get_type())
-        if (self.mode == self.MODE_INCLUDE_LAST_NAME_ONLY or
-            self.mode == self.MODE_REPLACE_COMPLETE_NAME):
-            new_name.set_first_name(self._p_f_n)
-            new_name.set_title("")
-        else: # self.mode == self.MODE_INCLUDE_FULL_NAME_ONLY
-            new_name.set_first_name(old_name.get_first_name())
-            new_name.set_suffix(old_name.get_suffix())
-            new_name.set_title(old_name.get_title())
-
-        surnlst = []
-        if self.mode == self.MODE_REPLACE_COMPLETE_NAME:
-            surname = Surname(source=old_name.get_primary_surname())
-            surname.set_surname(self._p_s_n)
+        return restrict_person(person, self.mode, self._p_f_n, self._p_s_n)
+
+def restrict_person(person, mode, given_text, surname_text):
+    """
+    Return a copy of the living person with only the name, as the mode of
+    LivingProxyDb allows, and the family links. given_text and surname_text
+    replace the hidden parts of the name.
+    """
+    new_person = Person()
+    new_name = Name()
+    old_name = person.get_primary_name()
+
+    new_name.set_group_as(old_name.get_group_as())
+    new_name.set_sort_as(old_name.get_sort_as())
+    new_name.set_display_as(old_name.get_display_as())
+    new_name.set_type(old_name.get_type())
+    if (mode == LivingProxyDb.MODE_INCLUDE_LAST_NAME_ONLY or
+        mode == LivingProxyDb.MODE_REPLACE_COMPLETE_NAME):
+        new_name.set_first_name(given_text)
+        new_name.set_title("")
+    else: # mode == LivingProxyDb.MODE_INCLUDE_FULL_NAME_ONLY
+        new_name.set_first_name(old_name.get_first_name())
+        new_name.set_suffix(old_name.get_suffix())
+        new_name.set_title(old_name.get_title())
+
+    surnlst = []
+    if mode == LivingProxyDb.MODE_REPLACE_COMPLETE_NAME:
+        surname = Surname(source=old_name.get_primary_surname())
+        surname.set_surname(surname_text)
+        surnlst.append(surname)
+    else:
+        for surn in old_name.get_surname_list():
+            surname = Surname(source=surn)
+            if int(surname.origintype) in [NameOriginType.PATRONYMIC,
+                                           NameOriginType.MATRONYMIC]:
+                surname.set_surname(surname_text)
             surnlst.append(surname)
-        else:
-            for surn in old_name.get_surname_list():
-                surname = Surname(source=surn)
-                if int(surname.origintype) in [NameOriginType.PATRONYMIC,
-                                               NameOriginType.MATRONYMIC]:
-                    surname.set_surname(self._p_s_n)
-                surnlst.append(surname)
-
-        new_name.set_surname_list(surnlst)
-        new_person.set_primary_name(new_name)
-        new_person.set_privacy(person.get_privacy())
-        new_person.set_gender(person.get_gender())
-        new_person.set_gid(person.get_gid())
-        new_person.set_handle(person.get_handle())
-        new_person.set_change_time(person.get_change_time())
-        new_person.set_family_handle_list(person.get_family_handle_list())
-        new_person.set_parent_family_handle_list(
-                                        person.get_parent_family_handle_list() )
-        new_person.set_tag_list(person.get_tag_list())
-
-        return new_person
 
+    new_name.set_surname_list(surnlst)
+    new_person.set_primary_name(new_name)
+    new_person.set_privacy(person.get_privacy())
+    new_person.set_gender(person.get_gender())
+    new_person.set_gid(person.get_gid())
+    new_person.set_handle(person.get_handle())
+    new_person.set_change_time(person.get_change_time())
+    new_person.set_family_handle_list(person.get_family_handle_list())
+    new_person.set_parent_family_handle_list(
+                                    person.get_parent_family_handle_list() )
+    new_person.set_tag_list(person.get_tag_list())
+
+    return new_person
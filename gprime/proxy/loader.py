@@ -0,0 +1,183 @@
+#
+# gPrime - A web-based genealogy program
+#
+# Copyright (c) 2017 gPrime Development Team
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Proxy class for the Gramps databases. Loads objects in batches, and keeps
+one object per handle.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Gprime modules
+#
+#-------------------------------------------------------------------------
+from ..errors import HandleError
+from .cache import TABLES
+
+class LoaderProxyDb:
+    """
+    A Proxy for a database that keeps the objects it has loaded, one per
+    handle, for the length of a request.
+
+    Handles that will be needed can be declared with :meth:`defer`; they
+    are read with the first one that is looked up, in one query per
+    table. :meth:`prefetch` reads the objects that given objects refer
+    to, a table at a time. Commits through the proxy empty it.
+    """
+    def __init__(self, database):
+        """
+        Database is called self.db for consistency with other proxies.
+        """
+        self.db = database
+        self.basedb = getattr(database, 'basedb', database)
+        self.objects = {}
+        self.pending = {}
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        for class_name, (handle_func, raw_func) in TABLES.items():
+            setattr(self, handle_func, self.__make_getter(class_name))
+
+    def __getattr__(self, attr):
+        """
+        If an attribute isn't found here, use the self.db
+        version.
+        """
+        return getattr(self.db, attr)
+
+    def __make_getter(self, class_name):
+        return lambda handle: self.__get(class_name, handle)
+
+    def __get(self, class_name, handle):
+        if isinstance(handle, bytes):
+            handle = str(handle, "utf-8")
+        key = (class_name, handle)
+        if key in self.objects:
+            self.hits += 1
+            return self.objects[key]
+        self.misses += 1
+        if handle:
+            handles = self.pending.pop(class_name, set())
+            handles.add(handle)
+            self.load(class_name, handles)
+            if key in self.objects:
+                return self.objects[key]
+        # not found; the database decides what that means
+        return getattr(self.db, TABLES[class_name][0])(handle)
+
+    def get_table_func(self, table=None, func=None):
+        if func == "handle_func" and table in TABLES:
+            return getattr(self, TABLES[table][0])
+        return self.db.get_table_func(table, func)
+
+    def get_from_name_and_handle(self, table_name, handle):
+        if table_name in TABLES:
+            if handle:
+                return getattr(self, TABLES[table_name][0])(handle)
+            return None
+        return self.db.get_from_name_and_handle(table_name, handle)
+
+    def defer(self, class_name, handles):
+        """
+        Declare that the objects of the class with the handles will be
+        looked up, so that they are read together.
+        """
+        pending = self.pending.setdefault(class_name, set())
+        for handle in handles:
+            if isinstance(handle, bytes):
+                handle = str(handle, "utf-8")
+            if handle and (class_name, handle) not in self.objects:
+                pending.add(handle)
+
+    def load(self, class_name, handles):
+        """
+        Read the objects of the class with the handles that are not loaded
+        yet, in one query if the database can. Handles that are not found
+        are left out.
+        """
+        handles = set(str(handle, "utf-8") if isinstance(handle, bytes)
+                      else handle for handle in handles)
+        handles = [handle for handle in handles
+                   if handle and (class_name, handle) not in self.objects]
+        if not handles:
+            return
+        self.loads += 1
+        if self.basedb is self.db and hasattr(self.db, "select_raw_data"):
+            # a database, whose raw data needs no filtering
+            create = self.db.get_table_func(class_name, "class_func").create
+            for handle, data in self.db.select_raw_data(class_name,
+                                                        handles).items():
+                self.objects[(class_name, handle)] = create(data, self.db)
+        else:
+            get_object = getattr(self.db, TABLES[class_name][0])
+            for handle in handles:
+                try:
+                    obj = get_object(handle)
+                except HandleError:
+                    obj = None
+                if obj is not None:
+                    self.objects[(class_name, handle)] = obj
+
+    def prefetch(self, objects, *class_names):
+        """
+        Load the objects of the first class that the objects refer to,
+        then the objects of the second class that those refer to, and so
+        on. Returns the objects of the last class.
+
+        >>> db.prefetch([person], "Event", "Place")
+        """
+        for class_name in class_names:
+            handles = set()
+            for obj in objects:
+                for (ref_class, handle) in \
+                        obj.get_referenced_handles_recursively():
+                    if ref_class == class_name and handle:
+                        handles.add(handle)
+            self.load(class_name, handles)
+            objects = [self.objects[(class_name, handle)]
+                       for handle in handles
+                       if (class_name, handle) in self.objects]
+        return objects
+
+    def clear(self):
+        """
+        Forget all loaded objects.
+        """
+        self.objects.clear()
+        self.pending.clear()
+
+    def transaction_commit(self, txn):
+        """
+        Commit the transaction, and forget the loaded objects, which may
+        have changed.
+        """
+        try:
+            return self.db.transaction_commit(txn)
+        finally:
+            self.clear()
+
+    def get_metrics(self):
+        """
+        Return a dictionary with the loader statistics.
+        """
+        return {'size': len(self.objects),
+                'hits': self.hits,
+                'misses': self.misses,
+                'loads': self.loads}
@@ -43,19 +43,42 @@ from ..lib import (MediaRef, Attribute, Address, EventRef,
                    Person, Name, Source, RepoRef, Media, Place, Event,
                    Family, ChildRef, Repository, LdsOrd, Surname, Citation,
                    SrcAttribute, Note, Tag)
+from ..utils.lru import LRU
 from .proxybase import ProxyDbBase
 
+# The classes of the objects that can be marked private:
+PRIVACY_CLASSES = ['Person', 'Family', 'Event', 'Source', 'Citation',
+                   'Place', 'Media', 'Repository', 'Note']
+# The privacy of this many handles is kept per sanitized object:
+DECISIONS_PER_OBJECT = 10
+
 class PrivateProxyDb(ProxyDbBase):
     """
     A proxy to a Gramps database. This proxy will act like a Gramps database,
     but all data marked private will be hidden from the user.
+
+    The sanitized objects, and whether handles are public, are kept in
+    bounded caches, as reports and exports get the same objects many times.
+    The proxy assumes that the database doesn't change while it is used;
+    otherwise clear_cache has to be called. precompute_privacy looks up the
+    public objects of the whole database at once.
     """
 
-    def __init__(self, db):
+    def __init__(self, db, cache_size=None):
         """
-        Create a new PrivateProxyDb instance.
+        Create a new PrivateProxyDb instance, which keeps up to cache_size
+        sanitized objects.
         """
         ProxyDbBase.__init__(self, db)
+        if cache_size is None:
+            cache_size = 10000
+            try:
+                from ..config import config
+                cache_size = config.get('behavior.private-proxy-cache-size')
+            except ImportError:
+                pass
+        self.cache_size = cache_size
+        self.clear_cache()
         self.__tables = {
             'Person':
             {
@@ -172,185 +195,244 @@ class PrivateProxyDb(ProxyDbBase):
         else:
             return super().get_table_func(table, func)
 
+    def clear_cache(self):
+        """
+        Clears the sanitized objects and the privacy of the handles, which
+        is needed when the database has changed.
+        """
+        self.cache_object = LRU(self.cache_size)
+        self.cache_include = LRU(self.cache_size * DECISIONS_PER_OBJECT)
+        self.public_handles = {}
+
+    def precompute_privacy(self):
+        """
+        Look up the public objects of every table at once, with the private
+        column of the database, so that the privacy of a handle is known
+        without fetching its object. Tables the database can't select from
+        are still looked up object by object.
+
+        Returns the number of tables that were looked up.
+        """
+        self.clear_cache()
+        for class_name in PRIVACY_CLASSES:
+            handles = self.db.select_handles(class_name,
+                                             ("private", "=", False))
+            if handles is not None:
+                self.public_handles[class_name] = set(
+                    str(handle, "utf-8") if isinstance(handle, bytes)
+                    else handle for handle in handles)
+        return len(self.public_handles)
+
+    def __get_decision(self, class_name, handle):
+        """
+        Return True if the object is public, False if it is private or
+        doesn't exist, and None if this isn't known yet.
+        """
+        public = self.public_handles.get(class_name)
+        if public is not None:
+            return handle in public
+        key = (class_name, handle)
+        if key in self.cache_include:
+            return self.cache_include[key]
+        return None
+
+    def __include(self, class_name, handle, get_object):
+        """
+        Return True if the object of the class is public.
+        """
+        if not handle:
+            return False
+        if isinstance(handle, bytes):
+            handle = str(handle, "utf-8")
+        decision = self.__get_decision(class_name, handle)
+        if decision is None:
+            obj = get_object(handle)
+            decision = bool(obj and not obj.get_privacy())
+            self.cache_include[(class_name, handle)] = decision
+        return decision
+
+    def __sanitize(self, class_name, obj, sanitize):
+        """
+        Return the sanitized copy of obj, made once, or None if obj doesn't
+        exist or is private.
+        """
+        if not obj:
+            return None
+        key = (class_name, obj.get_handle())
+        if obj.get_privacy():
+            self.cache_include[key] = False
+            return None
+        self.cache_include[key] = True
+        if key not in self.cache_object:
+            self.cache_object[key] = sanitize(self, obj) if sanitize else obj
+        return self.cache_object[key]
+
+    def __get_object(self, class_name, handle, get_object, sanitize):
+        """
+        Return the sanitized object of the class with the handle, or None
+        if it doesn't exist or is private.
+        """
+        if isinstance(handle, bytes):
+            handle = str(handle, "utf-8")
+        key = (class_name, handle)
+        if key in self.cache_object:
+            return self.cache_object[key]
+        if self.__get_decision(class_name, handle) is False:
+            return None
+        return self.__sanitize(class_name, get_object(handle), sanitize)
+
     def get_person_from_handle(self, handle):
         """
         Finds a Person in the database from the passed GID.
         If no such Person exists, None is returned.
         """
-        person = self.db.get_person_from_handle(handle)
-        if person and not person.get_privacy():
-            return sanitize_person(self.db, person)
-        return None
+        return self.__get_object('Person', handle,
+                                 self.db.get_person_from_handle,
+                                 sanitize_person)
 
     def get_source_from_handle(self, handle):
         """
         Finds a Source in the database from the passed GID.
         If no such Source exists, None is returned.
         """
-        source = self.db.get_source_from_handle(handle)
-        if source and not source.get_privacy():
-            return sanitize_source(self.db, source)
-        return None
+        return self.__get_object('Source', handle,
+                                 self.db.get_source_from_handle,
+                                 sanitize_source)
 
     def get_citation_from_handle(self, handle):
         """
         Finds a Citation in the database from the passed GID.
         If no such Citation exists, None is returned.
         """
-        citation = self.db.get_citation_from_handle(handle)
-        if citation and not citation.get_privacy():
-            return sanitize_citation(self.db, citation)
-        return None
+        return self.__get_object('Citation', handle,
+                                 self.db.get_citation_from_handle,
+                                 sanitize_citation)
 
     def get_media_from_handle(self, handle):
         """
         Finds an Object in the database from the passed GID.
         If no such Object exists, None is returned.
         """
-        media = self.db.get_media_from_handle(handle)
-        if media and not media.get_privacy():
-            return sanitize_media(self.db, media)
-        return None
+        return self.__get_object('Media', handle,
+                                 self.db.get_media_from_handle,
+                                 sanitize_media)
 
     def get_place_from_handle(self, handle):
         """
         Finds a Place in the database from the passed GID.
         If no such Place exists, None is returned.
         """
-        place = self.db.get_place_from_handle(handle)
-        if place and not place.get_privacy():
-            return sanitize_place(self.db, place)
-        return None
+        return self.__get_object('Place', handle,
+                                 self.db.get_place_from_handle,
+                                 sanitize_place)
 
     def get_event_from_handle(self, handle):
         """
         Finds a Event in the database from the passed GID.
         If no such Event exists, None is returned.
         """
-        event = self.db.get_event_from_handle(handle)
-        if event and not event.get_privacy():
-            return sanitize_event(self.db, event)
-        return None
+        return self.__get_object('Event', handle,
+                                 self.db.get_event_from_handle,
+                                 sanitize_event)
 
     def get_family_from_handle(self, handle):
         """
         Finds a Family in the database from the passed GID.
         If no such Family exists, None is returned.
         """
-        family = self.db.get_family_from_handle(handle)
-        if family and not family.get_privacy():
-            return sanitize_family(self.db, family)
-        return None
+        return self.__get_object('Family', handle,
+                                 self.db.get_family_from_handle,
+                                 sanitize_family)
 
     def get_repository_from_handle(self, handle):
         """
         Finds a Repository in the database from the passed GID.
         If no such Repository exists, None is returned.
         """
-        repository = self.db.get_repository_from_handle(handle)
-        if repository and not repository.get_privacy():
-            return sanitize_repository(self.db, repository)
-        return None
+        return self.__get_object('Repository', handle,
+                                 self.db.get_repository_from_handle,
+                                 sanitize_repository)
 
     def get_note_from_handle(self, handle):
         """
         Finds a Note in the database from the passed GID.
         If no such Note exists, None is returned.
         """
-        note = self.db.get_note_from_handle(handle)
-        if note and not note.get_privacy():
-            return note
-        return None
+        return self.__get_object('Note', handle,
+                                 self.db.get_note_from_handle, None)
 
     def get_person_from_gid(self, val):
         """
         Finds a Person in the database from the passed GID.
         If no such Person exists, None is returned.
         """
-        person = self.db.get_person_from_gid(val)
-        if person and not person.get_privacy():
-            return sanitize_person(self.db, person)
-        return None
+        return self.__sanitize('Person', self.db.get_person_from_gid(val),
+                               sanitize_person)
 
     def get_family_from_gid(self, val):
         """
         Finds a Family in the database from the passed GID.
         If no such Family exists, None is returned.
         """
-        family = self.db.get_family_from_gid(val)
-        if family and not family.get_privacy():
-            return sanitize_family(self.db, family)
-        return None
+        return self.__sanitize('Family', self.db.get_family_from_gid(val),
+                               sanitize_family)
 
     def get_event_from_gid(self, val):
         """
         Finds an Event in the database from the passed GID.
         If no such Event exists, None is returned.
         """
-        event = self.db.get_event_from_gid(val)
-        if event and not event.get_privacy():
-            return sanitize_event(self.db, event)
-        return None
+        return self.__sanitize('Event', self.db.get_event_from_gid(val),
+                               sanitize_event)
 
     def get_place_from_gid(self, val):
         """
         Finds a Place in the database from the passed GID.
         If no such Place exists, None is returned.
         """
-        place = self.db.get_place_from_gid(val)
-        if place and not place.get_privacy():
-            return sanitize_place(self.db, place)
-        return None
+        return self.__sanitize('Place', self.db.get_place_from_gid(val),
+                               sanitize_place)
 
     def get_source_from_gid(self, val):
         """
         Finds a Source in the database from the passed GID.
         If no such Source exists, None is returned.
         """
-        source = self.db.get_source_from_gid(val)
-        if source and not source.get_privacy():
-            return sanitize_source(self.db, source)
-        return None
+        return self.__sanitize('Source', self.db.get_source_from_gid(val),
+                               sanitize_source)
 
     def get_citation_from_gid(self, val):
         """
         Finds a Citation in the database from the passed GID.
         If no such Citation exists, None is returned.
         """
-        citation = self.db.get_citation_from_gid(val)
-        if citation and not citation.get_privacy():
-            return sanitize_citation(self.db, citation)
-        return None
+        return self.__sanitize('Citation',
+                               self.db.get_citation_from_gid(val),
+                               sanitize_citation)
 
     def get_media_from_gid(self, val):
         """
         Finds a Media in the database from the passed GID.
         If no such Media exists, None is returned.
         """
-        obj = self.db.get_media_from_gid(val)
-        if obj and not obj.get_privacy():
-            return sanitize_media(self.db, obj)
-        return None
+        return self.__sanitize('Media', self.db.get_media_from_gid(val),
+                               sanitize_media)
 
     def get_repository_from_gid(self, val):
         """
         Finds a Repository in the database from the passed GID.
         If no such Repository exists, None is returned.
         """
-        repository = self.db.get_repository_from_gid(val)
-        if repository and not repository.get_privacy():
-            return sanitize_repository(self.db, repository)
-        return None
+        return self.__sanitize('Repository',
+                               self.db.get_repository_from_gid(val),
+                               sanitize_repository)
 
     def get_note_from_gid(self, val):
         """
         Finds a Note in the database from the passed GID.
         If no such Note exists, None is returned.
         """
-        note = self.db.get_note_from_gid(val)
-        if note and not note.get_privacy():
-            return note
-        return None
+        return self.__sanitize('Note', self.db.get_note_from_gid(val), None)
 
     # Define predicate functions for use by default iterator methods
 
@@ -358,161 +440,140 @@ class PrivateProxyDb(ProxyDbBase):
         """
         Predicate returning True if object is to be included, else False
         """
-        obj = self.get_unfiltered_person(handle)
-        return obj and not obj.get_privacy()
+        return self.__include('Person', handle, self.get_unfiltered_person)
 
     def include_family(self, handle):
         """
         Predicate returning True if object is to be included, else False
         """
-        obj = self.get_unfiltered_family(handle)
-        return obj and not obj.get_privacy()
+        return self.__include('Family', handle, self.get_unfiltered_family)
 
     def include_event(self, handle):
         """
         Predicate returning True if object is to be included, else False
         """
-        obj = self.get_unfiltered_event(handle)
-        return obj and not obj.get_privacy()
+        return self.__include('Event', handle, self.get_unfiltered_event)
 
     def include_source(self, handle):
         """
         Predicate returning True if object is to be included, else False
         """
-        obj = self.get_unfiltered_source(handle)
-        return obj and not obj.get_privacy()
+        return self.__include('Source', handle, self.get_unfiltered_source)
 
     def include_citation(self, handle):
         """
         Predicate returning True if object is to be included, else False
         """
-        obj = self.get_unfiltered_citation(handle)
-        return obj and not obj.get_privacy()
+        return self.__include('Citation', handle,
+                              self.get_unfiltered_citation)
 
     def include_place(self, handle):
         """
         Predicate returning True if object is to be included, else False
         """
-        obj = self.get_unfiltered_place(handle)
-        return obj and not obj.get_privacy()
+        return self.__include('Place', handle, self.get_unfiltered_place)
 
     def include_media(self, handle):
         """
         Predicate returning True if object is to be included, else False
         """
-        obj = self.get_unfiltered_media(handle)
-        return obj and not obj.get_privacy()
+        return self.__include('Media', handle, self.get_unfiltered_media)
 
     def include_repository(self, handle):
         """
         Predicate returning True if object is to be included, else False
         """
-        obj = self.get_unfiltered_repository(handle)
-        return obj and not obj.get_privacy()
+        return self.__include('Repository', handle,
+                              self.get_unfiltered_repository)
 
     def include_note(self, handle):
         """
         Predicate returning True if object is to be included, else False
         """
-        obj = self.get_unfiltered_note(handle)
-        return obj and not obj.get_privacy()
+        return self.__include('Note', handle, self.get_unfiltered_note)
+
+    def include_citation_ref(self, handle):
+        """
+        Predicate returning True if a reference to the citation is to be
+        included, which needs both the citation and its source to be public
+        """
+        if isinstance(handle, bytes):
+            handle = str(handle, "utf-8")
+        key = ('CitationRef', handle)
+        if key not in self.cache_include:
+            included = self.include_citation(handle)
+            if included:
+                citation = self.get_unfiltered_citation(handle)
+                included = self.include_source(
+                    citation.get_reference_handle())
+            self.cache_include[key] = included
+        return self.cache_include[key]
 
     def get_default_person(self):
         """returns the default Person of the database"""
-        person = self.db.get_default_person()
-        if person and not person.get_privacy():
-            return sanitize_person(self.db, person)
-        return None
+        return self.__sanitize('Person', self.db.get_default_person(),
+                               sanitize_person)
 
     def get_default_handle(self):
         """returns the default Person of the database"""
         handle = self.db.get_default_handle()
-        if handle:
-            person = self.db.get_person_from_handle(handle)
-            if person and not person.get_privacy():
-                return handle
+        if handle and self.include_person(handle):
+            return handle
         return None
 
     def has_person_handle(self, handle):
         """
         returns True if the handle exists in the current Person database.
         """
-        person = self.db.get_person_from_handle(handle)
-        if person and not person.get_privacy():
-            return True
-        return False
+        return self.include_person(handle)
 
     def has_event_handle(self, handle):
         """
         returns True if the handle exists in the current Event database.
         """
-        event = self.db.get_event_from_handle(handle)
-        if event and not event.get_privacy():
-            return True
-        return False
+        return self.include_event(handle)
 
     def has_source_handle(self, handle):
         """
         returns True if the handle exists in the current Source database.
         """
-        source = self.db.get_source_from_handle(handle)
-        if source and not source.get_privacy():
-            return True
-        return False
+        return self.include_source(handle)
 
     def has_citation_handle(self, handle):
         """
         returns True if the handle exists in the current Citation database.
         """
-        citation = self.db.get_citation_from_handle(handle)
-        if citation and not citation.get_privacy():
-            return True
-        return False
+        return self.include_citation(handle)
 
     def has_place_handle(self, handle):
         """
         returns True if the handle exists in the current Place database.
         """
-        place = self.db.get_place_from_handle(handle)
-        if place and not place.get_privacy():
-            return True
-        return False
+        return self.include_place(handle)
 
     def has_family_handle(self, handle):
         """
         Return True if the handle exists in the current Family database.
         """
-        family = self.db.get_family_from_handle(handle)
-        if family and not family.get_privacy():
-            return True
-        return False
+        return self.include_family(handle)
 
     def has_object_handle(self, handle):
         """
         Return True if the handle exists in the current Mediadatabase.
         """
-        object = self.db.get_media_from_handle(handle)
-        if object and not object.get_privacy():
-            return True
-        return False
+        return self.include_media(handle)
 
     def has_repository_handle(self, handle):
         """
         Return True if the handle exists in the current Repository database.
         """
-        repository = self.db.get_repository_from_handle(handle)
-        if repository and not repository.get_privacy():
-            return True
-        return False
+        return self.include_repository(handle)
 
     def has_note_handle(self, handle):
         """
         Return True if the handle exists in the current Note database.
         """
-        note = self.db.get_note_from_handle(handle)
-        if note and not note.get_privacy():
-            return True
-        return False
+        return self.include_note(handle)
 
     def find_backlink_handles(self, handle, include_classes=None):
         """
@@ -541,22 +602,21 @@ class PrivateProxyDb(ProxyDbBase):
         # referenced object is private.
 
         objects = {
-            'Person'        : self.db.get_person_from_handle,
-            'Family'        : self.db.get_family_from_handle,
-            'Event'         : self.db.get_event_from_handle,
-            'Source'        : self.db.get_source_from_handle,
-            'Citation'      : self.db.get_citation_from_handle,
-            'Place'         : self.db.get_place_from_handle,
-            'Media'   : self.db.get_media_from_handle,
-            'Note'          : self.db.get_note_from_handle,
-            'Repository'    : self.db.get_repository_from_handle,
+            'Person'        : self.include_person,
+            'Family'        : self.include_family,
+            'Event'         : self.include_event,
+            'Source'        : self.include_source,
+            'Citation'      : self.include_citation,
+            'Place'         : self.include_place,
+            'Media'   : self.include_media,
+            'Note'          : self.include_note,
+            'Repository'    : self.include_repository,
             }
 
         handle_itr = self.db.find_backlink_handles(handle, include_classes)
         for (class_name, handle) in handle_itr:
             if class_name in objects:
-                obj = objects[class_name](handle)
-                if obj and not obj.get_privacy():
+                if objects[class_name](handle):
                     yield (class_name, handle)
             else:
                 raise NotImplementedError
@@ -568,7 +628,7 @@ def copy_media_ref_list(db, original_obj, clean_obj):
     references and references to private objects.
 
     :param db: Gramps database to which the references belongs
-    :type db: DbBase
+    :type db: PrivateProxyDb
     :param original_obj: Object that may have private references
     :type original_obj: MediaBase
     :param clean_obj: Object that will have only non-private references
@@ -578,8 +638,7 @@ def copy_media_ref_list(db, original_obj, clean_obj):
     for media_ref in original_obj.get_media_list():
         if media_ref and not media_ref.get_privacy():
             handle = media_ref.get_reference_handle()
-            media = db.get_media_from_handle(handle)
-            if media and not media.get_privacy():
+            if db.include_media(handle):
                 clean_obj.add_media_reference(sanitize_media_ref(db, media_ref))
 
 def copy_citation_ref_list(db, original_obj, clean_obj):
@@ -589,7 +648,7 @@ def copy_citation_ref_list(db, original_obj, clean_obj):
     sources.
 
     :param db: Gramps database to which the references belongs
-    :type db: DbBase
+    :type db: PrivateProxyDb
     :param original_obj: Object that may have private references
     :type original_obj: CitationBase
     :param clean_obj: Object that will have only non-private references
@@ -597,12 +656,8 @@ def copy_citation_ref_list(db, original_obj, clean_obj):
     :returns: Nothing
     """
     for citation_handle in original_obj.get_citation_list():
-        citation = db.get_citation_from_handle(citation_handle)
-        if citation and not citation.get_privacy():
-            handle = citation.get_reference_handle()
-            source = db.get_source_from_handle(handle)
-            if source and not source.get_privacy():
-                clean_obj.add_citation(citation_handle)
+        if db.include_citation_ref(citation_handle):
+            clean_obj.add_citation(citation_handle)
 
 def copy_notes(db, original_obj, clean_obj):
     """
@@ -610,7 +665,7 @@ def copy_notes(db, original_obj, clean_obj):
     notes.
 
     :param db: Gramps database to which the references belongs
-    :type db: DbBase
+    :type db: PrivateProxyDb
     :param original_obj: Object that may have private references
     :type original_obj: NoteBase
     :param clean_obj: Object that will have only non-private references
@@ -618,8 +673,7 @@ def copy_notes(db, original_obj, clean_obj):
     :returns: Nothing
     """
     for note_handle in original_obj.get_note_list():
-        note = db.get_note_from_handle(note_handle)
-        if note and not note.get_privacy():
+        if db.include_note(note_handle):
             clean_obj.add_note(note_handle)
 
 def copy_associations(db, original_obj, clean_obj):
@@ -628,7 +682,7 @@ def copy_associations(db, original_obj, clean_obj):
     references to private notes.
 
     :param db: Gramps database to which the references belongs
-    :type db: DbBase
+    :type db: PrivateProxyDb
     :param original_obj: Object that may have private references
     :type original_obj: Base
     :param clean_obj: Object that will have only non-private references
@@ -638,8 +692,7 @@ def copy_associations(db, original_obj, clean_obj):
     new_person_ref_list = []
     for person_ref in original_obj.get_person_ref_list():
         if person_ref and not person_ref.get_privacy():
-            associated_person = db.get_person_from_handle(person_ref.ref)
-            if associated_person and not associated_person.get_privacy():
+            if db.include_person(person_ref.ref):
                 new_person_ref_list.append(person_ref)
     clean_obj.set_person_ref_list(new_person_ref_list)
 
@@ -649,7 +702,7 @@ def copy_attributes(db, original_obj, clean_obj):
     private attributes.
 
     :param db: Gramps database to which the references belongs
-    :type db: DbBase
+    :type db: PrivateProxyDb
     :param original_obj: Object that may have private references
     :type original_obj: AttributeBase
     :param clean_obj: Object that will have only non-private references
@@ -671,7 +724,7 @@ def copy_srcattributes(db, original_obj, clean_obj):
     private srcattributes.
 
     :param db: Gramps database to which the references belongs
-    :type db: DbBase
+    :type db: PrivateProxyDb
     :param original_obj: Object that may have private references
     :type original_obj: SrcAttributeBase
     :param clean_obj: Object that will have only non-private references
@@ -691,7 +744,7 @@ def copy_urls(db, original_obj, clean_obj):
     private urls.
 
     :param db: Gramps database to which the references belongs
-    :type db: DbBase
+    :type db: PrivateProxyDb
     :param original_obj: Object that may have urls
     :type original_obj: UrlBase
     :param clean_obj: Object that will have only non-private urls
@@ -708,7 +761,7 @@ def copy_lds_ords(db, original_obj, clean_obj):
     private LDS ORDs.
 
     :param db: Gramps database to which the references belongs
-    :type db: DbBase
+    :type db: PrivateProxyDb
     :param original_obj: Object that may have LDS ORDs
     :type original_obj: LdsOrdBase
     :param clean_obj: Object that will have only non-private LDS ORDs
@@ -725,7 +778,7 @@ def copy_addresses(db, original_obj, clean_obj):
     private addresses.
 
     :param db: Gramps database to which the references belongs
-    :type db: DbBase
+    :type db: PrivateProxyDb
     :param original_obj: Object that may have addresses
     :type original_obj: AddressBase
     :param clean_obj: Object that will have only non-private addresses
@@ -743,7 +796,7 @@ def sanitize_lds_ord(db, lds_ord):
     removed from it.
 
     :param db: Gramps database to which the LdsOrd object belongs
-    :type db: DbBase
+    :type db: PrivateProxyDb
     :param name: source LdsOrd object that will be copied with
                  privacy records removed
     :type name: LdsOrd
@@ -757,16 +810,14 @@ def sanitize_lds_ord(db, lds_ord):
 
     fam_handle = lds_ord.get_family_handle()
     if fam_handle:
-        fam = db.get_family_from_handle(fam_handle)
-        if fam and not fam.get_privacy():
+        if db.include_family(fam_handle):
             new_lds_ord.set_family_handle(fam_handle)
 
     new_lds_ord.set_date_object(lds_ord.get_date_object())
 
     place_handle = lds_ord.get_place_handle()
     if place_handle:
-        place = db.get_place_from_handle(place_handle)
-        if place and not place.get_privacy():
+        if db.include_place(place_handle):
             new_lds_ord.set_place_handle(place_handle)
 
     copy_citation_ref_list(db, lds_ord, new_lds_ord)
@@ -781,7 +832,7 @@ def sanitize_address(db, address):
     removed from it.
 
     :param db: Gramps database to which the Person object belongs
-    :type db: DbBase
+    :type db: PrivateProxyDb
     :param name: source Address object that will be copied with
                  privacy records removed
     :type name: Address
@@ -812,7 +863,7 @@ def sanitize_name(db, name):
     removed from it.
 
     :param db: Gramps database to which the Person object belongs
-    :type db: DbBase
+    :type db: PrivateProxyDb
     :param name: source Name object that will be copied with
                  privacy records removed
     :type name: Name
@@ -845,7 +896,7 @@ def sanitize_media_ref(db, media_ref):
     removed from it.
 
     :param db: Gramps database to which the MediaRef object belongs
-    :type db: DbBase
+    :type db: PrivateProxyDb
     :param source_ref: source MediaRef object that will be copied with
                        privacy records removed
     :type source_ref: MediaRef
@@ -869,7 +920,7 @@ def sanitize_citation(db, citation):
     removed from it.
 
     :param db: Gramps database to which the Person object belongs
-    :type db: DbBase
+    :type db: PrivateProxyDb
     :param citation: source Citation object that will be copied with
                      privacy records removed
     :type citation: Citation
@@ -897,7 +948,7 @@ def sanitize_event_ref(db, event_ref):
     removed from it.
 
     :param db: Gramps database to which the Person object belongs
-    :type db: DbBase
+    :type db: PrivateProxyDb
     :param event_ref: source EventRef object that will be copied with
                       privacy records removed
     :type event_ref: EventRef
@@ -920,7 +971,7 @@ def sanitize_person(db, person):
     removed from it.
 
     :param db: Gramps database to which the Person object belongs
-    :type db: DbBase
+    :type db: PrivateProxyDb
     :param person: source Person object that will be copied with
                    privacy records removed
     :type person: Person
@@ -951,17 +1002,14 @@ def sanitize_person(db, person):
 
     # copy Family reference list
     for handle in person.get_family_handle_list():
-        family = db.get_family_from_handle(handle)
-        if family and not family.get_privacy():
+        if db.include_family(handle):
             new_person.add_family_handle(handle)
 
     # copy Family reference list
     for handle in person.get_parent_family_handle_list():
-        family = db.get_family_from_handle(handle)
-        if not family:
-            continue
-        elif family.get_privacy():
+        if not db.include_family(handle):
             continue
+        family = db.get_unfiltered_family(handle)
         child_ref_list = family.get_child_ref_list()
         for child_ref in child_ref_list:
             if child_ref.get_reference_handle() == person.get_handle():
@@ -976,23 +1024,20 @@ def sanitize_person(db, person):
     # copy event list
     for event_ref in person.get_event_ref_list():
         if event_ref and not event_ref.get_privacy():
-            event = db.get_event_from_handle(event_ref.ref)
-            if event and not event.get_privacy():
+            if db.include_event(event_ref.ref):
                 new_person.add_event_ref(sanitize_event_ref(db, event_ref))
 
     # Copy birth and death after event list to maintain the order.
     # copy birth event
     event_ref = person.get_birth_ref()
     if event_ref and not event_ref.get_privacy():
-        event = db.get_event_from_handle(event_ref.ref)
-        if event and not event.get_privacy():
+        if db.include_event(event_ref.ref):
             new_person.set_birth_ref(sanitize_event_ref(db, event_ref))
 
     # copy death event
     event_ref = person.get_death_ref()
     if event_ref and not event_ref.get_privacy():
-        event = db.get_event_from_handle(event_ref.ref)
-        if event and not event.get_privacy():
+        if db.include_event(event_ref.ref):
             new_person.set_death_ref(sanitize_event_ref(db, event_ref))
 
     copy_addresses(db, person, new_person)
@@ -1013,7 +1058,7 @@ def sanitize_source(db, source):
     removed from it.
 
     :param db: Gramps database to which the Person object belongs
-    :type db: DbBase
+    :type db: PrivateProxyDb
     :param source: source Source object that will be copied with
                    privacy records removed
     :type source: Source
@@ -1033,8 +1078,7 @@ def sanitize_source(db, source):
     for repo_ref in source.get_reporef_list():
         if repo_ref and not repo_ref.get_privacy():
             handle = repo_ref.get_reference_handle()
-            repo = db.get_repository_from_handle(handle)
-            if repo and not repo.get_privacy():
+            if db.include_repository(handle):
                 new_source.add_repo_reference(RepoRef(repo_ref))
 
     copy_srcattributes(db, source, new_source)
@@ -1050,7 +1094,7 @@ def sanitize_media(db, media):
     removed from it.
 
     :param db: Gramps database to which the Person object belongs
-    :type db: DbBase
+    :type db: PrivateProxyDb
     :param media: source Media object that will be copied with
                   privacy records removed
     :type media: Media
@@ -1081,7 +1125,7 @@ def sanitize_place(db, place):
     removed from it.
 
     :param db: Gramps database to which the Person object belongs
-    :type db: DbBase
+    :type db: PrivateProxyDb
     :param place: source Place object that will be copied with
                   privacy records removed
     :type place: Place
@@ -1117,7 +1161,7 @@ def sanitize_event(db, event):
     removed from it.
 
     :param db: Gramps database to which the Person object belongs
-    :type db: DbBase
+    :type db: PrivateProxyDb
     :param event: source Event object that will be copied with
                   privacy records removed
     :type event: Event
@@ -1140,8 +1184,7 @@ def sanitize_event(db, event):
 
     place_handle = event.get_place_handle()
     if place_handle:
-        place = db.get_place_from_handle(place_handle)
-        if place and not place.get_privacy():
+        if db.include_place(place_handle):
             new_event.set_place_handle(place_handle)
 
     return new_event
@@ -1153,7 +1196,7 @@ def sanitize_family(db, family):
     removed from it.
 
     :param db: Gramps database to which the Person object belongs
-    :type db: DbBase
+    :type db: PrivateProxyDb
     :param family: source Family object that will be copied with
                    privacy records removed
     :type family: Family
@@ -1171,15 +1214,13 @@ def sanitize_family(db, family):
     # Copy the father handle.
     father_handle = family.get_father_handle()
     if father_handle:
-        father = db.get_person_from_handle(father_handle)
-        if father and not father.get_privacy():
+        if db.include_person(father_handle):
             new_family.set_father_handle(father_handle)
 
     # Copy the mother handle.
     mother_handle = family.get_mother_handle()
     if mother_handle:
-        mother = db.get_person_from_handle(mother_handle)
-        if mother and not mother.get_privacy():
+        if db.include_person(mother_handle):
             new_family.set_mother_handle(mother_handle)
 
     # Copy child references.
@@ -1187,8 +1228,7 @@ def sanitize_family(db, family):
         if child_ref and child_ref.get_privacy():
             continue
         child_handle = child_ref.get_reference_handle()
-        child = db.get_person_from_handle(child_handle)
-        if child and child.get_privacy():
+        if not db.include_person(child_handle):
             continue
         # Copy this reference
         new_ref = ChildRef()
@@ -1202,8 +1242,7 @@ def sanitize_family(db, family):
     # Copy event ref list.
     for event_ref in family.get_event_ref_list():
         if event_ref and not event_ref.get_privacy():
-            event = db.get_event_from_handle(event_ref.ref)
-            if event and not event.get_privacy():
+            if db.include_event(event_ref.ref):
                 new_family.add_event_ref(sanitize_event_ref(db, event_ref))
 
     copy_citation_ref_list(db, family, new_family)
@@ -1221,7 +1260,7 @@ def sanitize_repository(db, repository):
     removed from it.
 
     :param db: Gramps database to which the Person object belongs
-    :type db: DbBase
+    :type db: PrivateProxyDb
     :param repository: source Repository object that will be copied with
                        privacy records removed
     :type repository: Repository
@@ -58,7 +58,9 @@ class ProxyCursor:
 
     def __iter__(self):
         for handle in self.get_handles():
-            yield bytes(handle, "utf-8"), self.get_raw(handle)
+            if isinstance(handle, str):
+                handle = bytes(handle, "utf-8")
+            yield handle, self.get_raw(handle)
 
 class ProxyMap:
     """
@@ -275,6 +277,11 @@ class ProxyDbBase(DbReadBase):
     include_tag = \
         None
 
+    # True if the proxy only hides whole objects, so that the objects it
+    # shows refer to the same objects as in the database, less the hidden
+    # ones:
+    keeps_references = False
+
     def get_person_cursor(self):
         return ProxyCursor(self.get_raw_person_data,
                            self.get_person_handles)
@@ -968,6 +975,45 @@ class ProxyDbBase(DbReadBase):
     def get_raw_tag_data(self, handle):
         return self.get_tag_from_handle(handle).to_struct()
 
+    def select_handles(self, table, where):
+        # the base database doesn't know what the proxy hides or changes
+        return None
+
+    def get_place_enclosure(self, handle):
+        if self.include_place is None:
+            return self.db.get_place_enclosure(handle)
+        return super().get_place_enclosure(handle)
+
+    def get_enclosed_place_handles(self, handle):
+        if self.include_place is None:
+            return self.db.get_enclosed_place_handles(handle)
+        return super().get_enclosed_place_handles(handle)
+
+    def get_cached_place_title(self, handle, key):
+        """
+        Return the cached title of the base database, if the place and all
+        of its enclosing places are visible through the proxy.
+        """
+        if self.include_place is not None:
+            if not self.include_place(handle):
+                return None
+            for (ancestor, depth, start, stop) in \
+                    self.db.get_place_enclosure(handle):
+                if not self.include_place(ancestor):
+                    return None
+        return self.db.get_cached_place_title(handle, key)
+
+    def get_place_coordinates(self, handle):
+        if self.include_place is not None and not self.include_place(handle):
+            return (None, None)
+        return self.db.get_place_coordinates(handle)
+
+    def _place_coordinates_within(self, bbox):
+        rows = self.db._place_coordinates_within(bbox)
+        if self.include_place is None:
+            return rows
+        return [row for row in rows if self.include_place(row[0])]
+
     def has_person_handle(self, handle):
         """
         Returns True if the handle exists in the current Person database.
@@ -42,6 +42,8 @@ class ReferencedBySelectionProxyDb(ProxyDbBase):
     is eventually referenced by one of the selected objects.
     """
 
+    keeps_references = True
+
     def __init__(self, dbase, all_people=False):
         """
         Create a new ReferencedByPeopleProxyDb instance.
@@ -56,34 +58,11 @@ class ReferencedBySelectionProxyDb(ProxyDbBase):
         # If restricted_to["Person"] is a set, restrict process to
         # them, and do not process others outside of them
         self.restricted_to = {"Person": None}
-        # Build lists of referenced objects
-        # iter through whatever object(s) you want to start
-        # the trace.
         self.queue = []
-        if all_people:
-            # Do not add references to those not already included
-            self.restricted_to["Person"] = [x for x in
-                                            self.db.iter_person_handles()]
-            # Spread activation to all other items:
-            for handle in self.restricted_to["Person"]:
-                if handle:
-                    self.queue_object("Person", handle)
+        if self.can_trace_references():
+            self.trace_references(all_people)
         else:
-            # get rid of orphaned people:
-            # first, get all of the links from people:
-            for person in self.db.iter_people():
-                self.queue_object("Person", person.handle, False)
-            # save those people:
-            self.restricted_to["Person"] = self.referenced["Person"]
-            # reset, and just follow those people
-            self.reset_references()
-            for handle in self.restricted_to["Person"]:
-                if handle:
-                    self.queue_object("Person", handle)
-        # process:
-        while len(self.queue):
-            obj_type, handle, reference = self.queue.pop()
-            self.process_object(obj_type, handle, reference)
+            self.trace_objects(all_people)
 
         self.__tables = {
             'Person':
@@ -201,6 +180,128 @@ class ReferencedBySelectionProxyDb(ProxyDbBase):
         else:
             return super().get_table_func(table, func)
 
+    def can_trace_references(self):
+        """
+        Return True if the referenced objects can be found with the
+        references that the database keeps, which needs the proxies below
+        this one to hide only whole objects.
+        """
+        dbase = self.db
+        while dbase is not self.basedb:
+            if not dbase.keeps_references:
+                return False
+            dbase = dbase.db
+        return self.basedb.select_references([]) is not None
+
+    def trace_references(self, all_people):
+        """
+        Find the referenced objects with the references that the database
+        keeps, for a batch of objects at a time. Only the handles of the
+        referenced objects are kept.
+        """
+        people = set(self.db.iter_person_handles())
+        if not all_people:
+            # get rid of orphaned people: keep the people that are
+            # referenced by the objects that people refer to
+            self.follow_references(people, False)
+            people = self.referenced["Person"]
+            self.reset_references()
+        self.restricted_to["Person"] = people
+        self.follow_references(people)
+
+    def follow_references(self, handles, reference=True):
+        """
+        Add the people with the handles (if reference is True), and all
+        objects they refer to through a chain of references, to the
+        referenced objects, until no new objects are found.
+        """
+        if reference:
+            self.referenced["Person"].update(handles)
+        current = [("Person", handle) for handle in handles]
+        while current:
+            found = self.basedb.select_references(
+                [handle for (class_name, handle) in current])
+            people = [handle for (class_name, handle) in current
+                      if class_name == "Person"]
+            # include backward references to the people:
+            found.extend(self.basedb.select_references(
+                people, True, ["Person", "Family"]))
+            current = []
+            for (class_name, handle) in found:
+                if handle in self.referenced[class_name]:
+                    continue
+                if (class_name == "Person" and
+                        self.restricted_to["Person"] is not None and
+                        handle not in self.restricted_to["Person"]):
+                    continue
+                if not self.is_visible(class_name, handle):
+                    continue
+                self.referenced[class_name].add(handle)
+                if class_name == "Note":
+                    # links in notes are not kept as references
+                    found.extend(self.get_note_links(handle))
+                if class_name != "Tag":
+                    current.append((class_name, handle))
+
+    def is_visible(self, class_name, handle):
+        """
+        Return True if the proxies below this one include the object.
+        """
+        dbase = self.db
+        while dbase is not self.basedb:
+            include = getattr(dbase, "include_" + class_name.lower())
+            if include is not None and not include(handle):
+                return False
+            dbase = dbase.db
+        return True
+
+    def get_note_links(self, handle):
+        """
+        Return the list of (class_name, handle) tuples of the objects that
+        the note links to.
+        """
+        links = []
+        note = self.db.get_note_from_handle(handle)
+        for tag in note.text.get_tags():
+            if tag.name == 'Link' and tag.value.startswith("gramps://"):
+                obj_class, prop, value = tag.value[9:].split("/")
+                if prop == "handle":
+                    links.append((obj_class, value))
+        return links
+
+    def trace_objects(self, all_people):
+        """
+        Find the referenced objects by loading every object and following
+        its references, for databases that don't keep the references.
+        """
+        # Build lists of referenced objects
+        # iter through whatever object(s) you want to start
+        # the trace.
+        if all_people:
+            # Do not add references to those not already included
+            self.restricted_to["Person"] = [x for x in
+                                            self.db.iter_person_handles()]
+            # Spread activation to all other items:
+            for handle in self.restricted_to["Person"]:
+                if handle:
+                    self.queue_object("Person", handle)
+        else:
+            # get rid of orphaned people:
+            # first, get all of the links from people:
+            for person in self.db.iter_people():
+                self.queue_object("Person", person.handle, False)
+            # save those people:
+            self.restricted_to["Person"] = self.referenced["Person"]
+            # reset, and just follow those people
+            self.reset_references()
+            for handle in self.restricted_to["Person"]:
+                if handle:
+                    self.queue_object("Person", handle)
+        # process:
+        while len(self.queue):
+            obj_type, handle, reference = self.queue.pop()
+            self.process_object(obj_type, handle, reference)
+
     def queue_object(self, obj_type, handle, reference=True):
         self.queue.append((obj_type, handle, reference))
 
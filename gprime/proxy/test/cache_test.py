@@ -0,0 +1,92 @@
+#
+# gPrime - A web-based genealogy program
+#
+# Copyright (C) 2017  gPrime contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for cache.py """
+
+import unittest
+
+from ...utils.test.traversal_test import make_tree
+from ..cache import CacheProxyDb, get_size
+from ..private import PrivateProxyDb
+
+FAMILIES = [("gf", "gm", ["a", "b"]),
+            ("a", "x", ["c"])]
+
+class CacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db, self.people = make_tree(FAMILIES)
+        self.handle = self.people["a"].handle
+
+    def test_lookups(self):
+        cache = CacheProxyDb(self.db)
+        person = cache.get_person_from_handle(self.handle)
+        self.assertIs(cache.get_person_from_handle(self.handle.encode()),
+                      person)
+        self.assertEqual(cache.get_raw_person_data(self.handle),
+                         self.db.get_raw_person_data(self.handle))
+        cache.get_family_from_handle(person.get_main_parents_family_handle())
+        metrics = cache.get_metrics()
+        self.assertEqual(metrics['size'], 3)
+        self.assertEqual(metrics['tables']['Person'],
+                         {'hits': 1, 'misses': 2, 'evictions': 0})
+        self.assertEqual(metrics['tables']['Family']['misses'], 1)
+        # unknown entries are ignored
+        cache.clear_cache("missing")
+        cache.clear_cache(self.handle)
+        self.assertEqual(cache.get_metrics()['size'], 1)
+        cache.clear_cache()
+        self.assertEqual(cache.get_metrics()['bytes'], 0)
+
+    def test_bounded(self):
+        size = get_size(self.db.get_person_from_handle(self.handle))
+        cache = CacheProxyDb(self.db, cache_size=size * 2.5)
+        for person in self.people.values():
+            cache.get_person_from_handle(person.handle)
+        metrics = cache.get_metrics()
+        self.assertEqual(metrics['size'], 2)
+        self.assertLessEqual(metrics['bytes'], metrics['capacity'])
+        self.assertEqual(metrics['tables']['Person']['evictions'],
+                         len(self.people) - 2)
+
+    def test_signals(self):
+        cache = CacheProxyDb(self.db, connect=True)
+        cache.get_person_from_handle(self.handle)
+        self.db.emit('person-update', ([self.handle],))
+        self.assertEqual(cache.get_metrics()['size'], 0)
+        cache.get_person_from_handle(self.handle)
+        self.db.emit('person-rebuild')
+        self.assertEqual(cache.get_metrics()['size'], 0)
+
+    def test_warm_up(self):
+        cache = CacheProxyDb(self.db)
+        self.assertEqual(cache.warm_up('Person'), len(self.people))
+        self.assertEqual(cache.warm_up('Person'), 0)
+        cache.get_person_from_handle(self.handle)
+        self.assertEqual(cache.get_metrics()['tables']['Person']['hits'], 1)
+        # through a proxy, every object is fetched from the proxy
+        cache = CacheProxyDb(PrivateProxyDb(self.db))
+        self.assertEqual(cache.warm_up('Family'), len(FAMILIES))
+        size = get_size(self.db.get_person_from_handle(self.handle))
+        cache = CacheProxyDb(self.db, cache_size=size * 2.5)
+        self.assertEqual(cache.warm_up('Person'), 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+#
+# gPrime - A web-based genealogy program
+#
+# Copyright (C) 2017  gPrime contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for fused.py """
+
+import unittest
+
+from ...db import DbTxn
+from ...lib import (Person, Event, EventType, EventRef, Date, Place, Note,
+                    Citation, Source)
+from ...filters import GenericFilter
+from ...filters.rules.person import IsFemale
+from ...utils.test.traversal_test import make_tree
+from ..fused import FusedProxyDb
+from ..private import PrivateProxyDb
+from ..living import LivingProxyDb
+from ..filter import FilterProxyDb
+from ..referencedbyselection import ReferencedBySelectionProxyDb
+
+FAMILIES = [("gf", "gm", ["a"]),
+            ("a", "x", ["c", "s"]),
+            (None, None, ["p"])]
+
+CLASSES = ["Person", "Family", "Event", "Place", "Source", "Citation",
+           "Note"]
+
+class FusedTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db, self.people = make_tree(FAMILIES)
+        with DbTxn("Add objects", self.db, batch=True) as trans:
+            self.people["gm"].set_gender(Person.FEMALE)
+            self.people["x"].set_gender(Person.FEMALE)
+            for name, year in (("gf", 1700), ("gm", 1705), ("a", 1730),
+                               ("x", 1990), ("c", 2010)):
+                place = Place()
+                self.db.add_place(place, trans)
+                event = Event()
+                event.set_type(EventType.BIRTH)
+                event.set_date_object(Date(year))
+                event.set_place_handle(place.handle)
+                self.db.add_event(event, trans)
+                ref = EventRef()
+                ref.set_reference_handle(event.handle)
+                self.people[name].add_event_ref(ref)
+                self.people[name].set_birth_ref(ref)
+            source = Source()
+            source.set_privacy(True)
+            self.db.add_source(source, trans)
+            citation = Citation()
+            citation.set_reference_handle(source.handle)
+            self.db.add_citation(citation, trans)
+            note = Note()
+            note.set_privacy(True)
+            self.db.add_note(note, trans)
+            self.people["a"].add_citation(citation.handle)
+            self.people["a"].add_note(note.handle)
+            self.people["s"].set_privacy(True)
+            event = Event()
+            event.set_type(EventType.MARRIAGE)
+            self.db.add_event(event, trans)
+            ref = EventRef()
+            ref.set_reference_handle(event.handle)
+            family = self.db.get_family_from_handle(
+                self.people["x"].get_family_handle_list()[0])
+            family.add_event_ref(ref)
+            self.db.commit_family(family, trans)
+            self.db.add_place(Place(), trans)
+            for person in self.people.values():
+                self.db.commit_person(person, trans)
+
+    def make_filter(self):
+        gfilter = GenericFilter()
+        gfilter.add_rule(IsFemale([]))
+        gfilter.set_invert(True)
+        return gfilter
+
+    def assertSame(self, fused, stack):
+        # the private proxy only sanitizes the objects it is asked for
+        for class_name in CLASSES:
+            get_object = stack.get_table_func(class_name, "handle_func")
+            handles = [handle.decode() if isinstance(handle, bytes)
+                       else handle for handle in
+                       stack.get_table_func(class_name, "handles_func")()]
+            objects = dict((obj.handle, obj.to_struct()) for obj in
+                           map(get_object, handles) if obj)
+            self.assertEqual(dict((obj.handle, obj.to_struct()) for obj in
+                                  fused.get_table_func(class_name,
+                                                       "iter_func")()),
+                             objects, class_name)
+        for handle in self.db.iter_person_handles():
+            person = stack.get_person_from_handle(handle)
+            self.assertEqual(fused.has_person_handle(handle),
+                             person is not None)
+        with fused.get_family_cursor() as cursor:
+            cursor_handles = sorted(handle for (handle, data) in cursor)
+            self.assertEqual(cursor_handles,
+                             sorted(handle.encode() for handle in
+                                    self.db.iter_family_handles()
+                                    if stack.get_family_from_handle(handle)))
+        self.assertEqual(fused.get_number_of_families(), len(cursor_handles))
+
+    def test_private(self):
+        self.assertSame(FusedProxyDb(self.db, private=True),
+                        PrivateProxyDb(self.db))
+
+    def test_living(self):
+        for mode in (LivingProxyDb.MODE_EXCLUDE_ALL,
+                     LivingProxyDb.MODE_INCLUDE_LAST_NAME_ONLY):
+            self.assertSame(
+                FusedProxyDb(self.db, living_mode=mode, current_year=2017),
+                LivingProxyDb(self.db, mode, current_year=2017))
+
+    def test_private_living(self):
+        for mode in (LivingProxyDb.MODE_EXCLUDE_ALL,
+                     LivingProxyDb.MODE_INCLUDE_LAST_NAME_ONLY):
+            self.assertSame(
+                FusedProxyDb(self.db, private=True, living_mode=mode,
+                             current_year=2017),
+                LivingProxyDb(PrivateProxyDb(self.db), mode,
+                              current_year=2017))
+
+    def test_stack(self):
+        fused = FusedProxyDb(
+            self.db, private=True,
+            living_mode=LivingProxyDb.MODE_INCLUDE_LAST_NAME_ONLY,
+            current_year=2017, person_filter=self.make_filter(),
+            referenced=True)
+        stack = ReferencedBySelectionProxyDb(FilterProxyDb(LivingProxyDb(
+            PrivateProxyDb(self.db),
+            LivingProxyDb.MODE_INCLUDE_LAST_NAME_ONLY, current_year=2017),
+            self.make_filter()), all_people=True)
+        self.assertSame(fused, stack)
+        self.assertFalse(fused.include_person(self.people["gm"].handle))
+        self.assertFalse(fused.include_person(self.people["s"].handle))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+#
+# gPrime - A web-based genealogy program
+#
+# Copyright (C) 2017  gPrime contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for loader.py """
+
+import unittest
+
+from ...db import DbTxn
+from ...errors import HandleError
+from ...filters._filtercache import get_filter_cache
+from ...relationship import get_relationship_cache
+from ...utils.graph import get_genealogy_graph
+from ...utils.traversal import get_traversal
+from ...utils.test.traversal_test import make_tree
+from ..loader import LoaderProxyDb
+from ..private import PrivateProxyDb
+
+FAMILIES = [("gf", "gm", ["a", "b"]),
+            ("a", "x", ["c"])]
+
+class LoaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db, self.people = make_tree(FAMILIES)
+        self.handle = self.people["a"].handle
+
+    def test_identity(self):
+        loader = LoaderProxyDb(self.db)
+        person = loader.get_person_from_handle(self.handle)
+        self.assertIs(loader.get_person_from_handle(self.handle.encode()),
+                      person)
+        self.assertIs(loader.get_from_name_and_handle("Person", self.handle),
+                      person)
+        self.assertIs(loader.get_table_func("Person", "handle_func")(
+            self.handle), person)
+        self.assertEqual(person.to_struct(),
+                         self.db.get_person_from_handle(
+                             self.handle).to_struct())
+        self.assertRaises(HandleError, loader.get_person_from_handle,
+                          "missing")
+        self.assertEqual(loader.get_metrics(),
+                         {'size': 1, 'hits': 3, 'misses': 2, 'loads': 2})
+
+    def test_defer(self):
+        loader = LoaderProxyDb(self.db)
+        loader.defer("Person", [person.handle
+                                for person in self.people.values()])
+        loader.get_person_from_handle(self.handle)
+        for person in self.people.values():
+            loader.get_person_from_handle(person.handle)
+        metrics = loader.get_metrics()
+        self.assertEqual(metrics['size'], len(self.people))
+        self.assertEqual(metrics['loads'], 1)
+
+    def test_prefetch(self):
+        loader = LoaderProxyDb(self.db)
+        person = loader.get_person_from_handle(self.handle)
+        people = loader.prefetch([person], "Family", "Person")
+        # the parents, spouse, children and siblings:
+        self.assertEqual(sorted(obj.handle for obj in people),
+                         sorted(obj.handle for obj in self.people.values()))
+        self.assertEqual(loader.get_metrics()['loads'], 3)
+        for obj in people:
+            loader.get_person_from_handle(obj.handle)
+        self.assertEqual(loader.get_metrics()['loads'], 3)
+
+    def test_proxy(self):
+        loader = LoaderProxyDb(PrivateProxyDb(self.db))
+        loader.prefetch([loader.get_person_from_handle(self.handle)],
+                        "Family")
+        self.assertEqual(loader.get_metrics()['size'], 3)
+
+    def test_commit(self):
+        loader = LoaderProxyDb(self.db)
+        person = loader.get_person_from_handle(self.handle)
+        person.gid = "I9999"
+        with DbTxn("test", loader, batch=True) as trans:
+            loader.commit_person(person, trans)
+        self.assertEqual(loader.get_metrics()['size'], 0)
+        self.assertIsNot(loader.get_person_from_handle(self.handle), person)
+        self.assertEqual(loader.get_person_from_handle(self.handle).gid,
+                         "I9999")
+
+    def test_caches(self):
+        # the per-database caches are shared by the requests
+        for get_cache in (get_genealogy_graph, get_traversal,
+                          get_relationship_cache, get_filter_cache):
+            cache = get_cache(LoaderProxyDb(self.db))
+            self.assertIsNotNone(cache)
+            self.assertIs(cache, get_cache(self.db))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+#
+# gPrime - A web-based genealogy program
+#
+# Copyright (C) 2017  gPrime contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for private.py """
+
+import unittest
+
+from ...db import make_database, DbTxn
+from ...lib import Person, Family, ChildRef, Source, Citation, Note
+from ..private import PrivateProxyDb, PRIVACY_CLASSES
+
+class PrivateProxyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db = make_database("inmemorydb")
+        self.db.load(None)
+        with DbTxn("Add objects", self.db, batch=True) as trans:
+            self.hidden_source = Source()
+            self.hidden_source.set_privacy(True)
+            self.db.add_source(self.hidden_source, trans)
+            self.source = Source()
+            self.db.add_source(self.source, trans)
+            self.citations = []
+            for source in (self.source, self.hidden_source):
+                citation = Citation()
+                citation.set_reference_handle(source.handle)
+                self.db.add_citation(citation, trans)
+                self.citations.append(citation.handle)
+            note = Note()
+            note.set_privacy(True)
+            self.db.add_note(note, trans)
+            self.father = Person()
+            self.mother = Person()
+            self.mother.set_privacy(True)
+            self.family = Family()
+            self.db.add_family(self.family, trans)
+            self.children = []
+            for person in (self.father, self.mother):
+                person.add_family_handle(self.family.handle)
+                self.db.add_person(person, trans)
+            for index in range(3):
+                child = Person()
+                child.add_parent_family_handle(self.family.handle)
+                child.add_note(note.handle)
+                for handle in self.citations:
+                    child.add_citation(handle)
+                self.db.add_person(child, trans)
+                ref = ChildRef()
+                ref.set_reference_handle(child.handle)
+                self.family.add_child_ref(ref)
+                self.children.append(child.handle)
+            self.family.set_father_handle(self.father.handle)
+            self.family.set_mother_handle(self.mother.handle)
+            self.db.commit_family(self.family, trans)
+        self.fetched = []
+        for name in ("get_person_from_handle", "get_family_from_handle"):
+            setattr(self.db, name, self.counted(getattr(self.db, name)))
+
+    def counted(self, func):
+        def wrapper(handle):
+            self.fetched.append(handle)
+            return func(handle)
+        return wrapper
+
+    def test_sanitize(self):
+        proxy = PrivateProxyDb(self.db)
+        self.assertIsNone(proxy.get_person_from_handle(self.mother.handle))
+        family = proxy.get_family_from_handle(self.family.handle)
+        self.assertEqual(family.get_father_handle(), self.father.handle)
+        self.assertIsNone(family.get_mother_handle())
+        child = proxy.get_person_from_handle(self.children[0])
+        self.assertEqual(child.get_citation_list(), self.citations[:1])
+        self.assertEqual(child.get_note_list(), [])
+        self.assertEqual(child.get_parent_family_handle_list(),
+                         [self.family.handle])
+        self.assertFalse(proxy.has_person_handle(self.mother.handle))
+        self.assertFalse(proxy.has_source_handle(self.hidden_source.handle))
+
+    def test_cache(self):
+        proxy = PrivateProxyDb(self.db)
+        first = proxy.get_family_from_handle(self.family.handle)
+        fetched = len(self.fetched)
+        self.assertIs(proxy.get_family_from_handle(self.family.handle), first)
+        self.assertIs(proxy.get_family_from_gid(self.family.gid), first)
+        self.assertEqual(len(self.fetched), fetched)
+        # the parents were looked up once, for all of the children
+        for handle in self.children:
+            proxy.get_person_from_handle(handle)
+        self.assertEqual(self.fetched.count(self.father.handle), 1)
+        proxy.clear_cache()
+        self.assertIsNot(proxy.get_family_from_handle(self.family.handle),
+                         first)
+
+    def test_bounded(self):
+        proxy = PrivateProxyDb(self.db, cache_size=2)
+        for handle in self.children:
+            proxy.get_person_from_handle(handle)
+        self.assertEqual(len(proxy.cache_object), 2)
+
+    def test_precompute(self):
+        proxy = PrivateProxyDb(self.db)
+        self.assertEqual(proxy.precompute_privacy(), len(PRIVACY_CLASSES))
+        self.assertTrue(proxy.include_person(self.father.handle))
+        self.assertFalse(proxy.include_person(self.mother.handle))
+        self.assertFalse(proxy.include_citation_ref(self.citations[1]))
+        self.assertEqual(self.fetched, [])
+        self.assertIsNone(proxy.get_person_from_handle(self.mother.handle))
+        self.assertEqual(self.fetched, [])
+        self.assertEqual(set(proxy.get_person_handles()),
+                         set(handle.encode() for handle in
+                             [self.father.handle] + self.children))
+        # a proxy below can't be selected from, and is looked up per object
+        proxy = PrivateProxyDb(PrivateProxyDb(self.db))
+        self.assertEqual(proxy.precompute_privacy(), 0)
+        self.assertFalse(proxy.include_person(self.mother.handle))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+#
+# gPrime - A web-based genealogy program
+#
+# Copyright (C) 2017  gPrime contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for referencedbyselection.py """
+
+import unittest
+
+from ...db import DbTxn
+from ...lib import (Person, Event, EventRef, Place, PlaceRef, Source,
+                    Citation, Repository, RepoRef, Note, Media, PersonRef,
+                    StyledText, StyledTextTag, StyledTextTagType)
+from ...filters import GenericFilter
+from ...filters.rules.person import IsFemale
+from ...utils.test.traversal_test import make_tree
+from ..referencedbyselection import ReferencedBySelectionProxyDb
+from ..private import PrivateProxyDb
+from ..filter import FilterProxyDb
+
+# Person o, added later, is an orphan, and p is only an associate of a
+FAMILIES = [("gf", "gm", ["a"]),
+            ("a", "x", ["c"])]
+
+class ReferencedBySelectionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db, self.people = make_tree(FAMILIES)
+        self.objects = {}
+        with DbTxn("Add objects", self.db, batch=True) as trans:
+            for name, obj, add in (
+                    ("o", Person(), self.db.add_person),
+                    ("p", Person(), self.db.add_person),
+                    ("town", Place(), self.db.add_place),
+                    ("country", Place(), self.db.add_place),
+                    ("unused", Place(), self.db.add_place),
+                    ("birth", Event(), self.db.add_event),
+                    ("source", Source(), self.db.add_source),
+                    ("citation", Citation(), self.db.add_citation),
+                    ("repository", Repository(), self.db.add_repository),
+                    ("photo", Media(), self.db.add_media),
+                    ("note", Note(), self.db.add_note)):
+                add(obj, trans)
+                self.objects[name] = obj
+            objects = self.objects
+            ref = PlaceRef()
+            ref.set_reference_handle(objects["country"].handle)
+            objects["town"].add_placeref(ref)
+            self.db.commit_place(objects["town"], trans)
+            objects["birth"].set_place_handle(objects["town"].handle)
+            objects["birth"].add_citation(objects["citation"].handle)
+            self.db.commit_event(objects["birth"], trans)
+            objects["citation"].set_reference_handle(
+                objects["source"].handle)
+            self.db.commit_citation(objects["citation"], trans)
+            ref = RepoRef()
+            ref.set_reference_handle(objects["repository"].handle)
+            objects["source"].add_repo_reference(ref)
+            self.db.commit_source(objects["source"], trans)
+            # a link in a note isn't a reference
+            link = "gramps://Media/handle/%s" % objects["photo"].handle
+            objects["note"].set_styledtext(StyledText("photo", [
+                StyledTextTag(StyledTextTagType.LINK, link, [(0, 5)])]))
+            self.db.commit_note(objects["note"], trans)
+            person = self.people["c"]
+            ref = EventRef()
+            ref.set_reference_handle(objects["birth"].handle)
+            person.add_event_ref(ref)
+            person.add_note(objects["note"].handle)
+            self.db.commit_person(person, trans)
+            person = self.people["a"]
+            ref = PersonRef()
+            ref.set_reference_handle(objects["p"].handle)
+            person.add_person_ref(ref)
+            self.db.commit_person(person, trans)
+        self.people.update((name, objects[name]) for name in ("o", "p"))
+
+    def traced(self, proxy, all_people=False):
+        # the referenced objects found by loading every object
+        referenced = proxy.referenced
+        proxy.reset_references()
+        proxy.restricted_to = {"Person": None}
+        proxy.trace_objects(all_people)
+        traced, proxy.referenced = proxy.referenced, referenced
+        return traced
+
+    def handles(self, names):
+        return set(self.people[name].handle for name in names)
+
+    def test_references(self):
+        proxy = ReferencedBySelectionProxyDb(self.db)
+        self.assertEqual(proxy.referenced["Person"],
+                         self.handles(["gf", "gm", "a", "x", "c", "p"]))
+        for name in ("town", "country", "birth", "source", "citation",
+                     "repository", "photo", "note"):
+            self.assertTrue(proxy.get_table_func(
+                self.objects[name].__class__.__name__, "handle_func")(
+                    self.objects[name].handle), name)
+        self.assertFalse(proxy.include_place(self.objects["unused"].handle))
+        self.assertEqual(proxy.referenced, self.traced(proxy))
+
+    def test_all_people(self):
+        proxy = ReferencedBySelectionProxyDb(self.db, True)
+        self.assertIn(self.people["o"].handle, proxy.referenced["Person"])
+        self.assertEqual(proxy.referenced, self.traced(proxy, True))
+
+    def test_filter_below(self):
+        self.people["gm"].set_gender(Person.FEMALE)
+        with DbTxn("Set gender", self.db, batch=True) as trans:
+            self.db.commit_person(self.people["gm"], trans)
+        gfilter = GenericFilter()
+        gfilter.add_rule(IsFemale([]))
+        gfilter.set_invert(True)
+        proxy = ReferencedBySelectionProxyDb(
+            FilterProxyDb(self.db, gfilter))
+        self.assertTrue(proxy.can_trace_references())
+        self.assertEqual(proxy.referenced["Person"],
+                         self.handles(["gf", "a", "x", "c", "p"]))
+        self.assertEqual(proxy.referenced, self.traced(proxy))
+
+    def test_private_below(self):
+        # the private proxy also hides references to public citations
+        with DbTxn("Hide", self.db, batch=True) as trans:
+            self.objects["source"].set_privacy(True)
+            self.db.commit_source(self.objects["source"], trans)
+        proxy = ReferencedBySelectionProxyDb(PrivateProxyDb(self.db))
+        self.assertFalse(proxy.can_trace_references())
+        self.assertEqual(proxy.referenced["Citation"], set())
+        self.assertEqual(proxy.referenced["Repository"], set())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -26,7 +26,9 @@ Classes for relationships.
 # Python modules
 #
 #-------------------------------------------------------------------------
+import copy
 import logging
+import weakref
 
 #-------------------------------------------------------------------------
 #
@@ -36,6 +38,9 @@ import logging
 from .lib import Person, ChildRefType, EventType, FamilyRelType
 from .plug import PluginRegister, BasePluginManager
 from .const import LOCALE as glocale
+from .utils.graph import get_genealogy_graph, NONE
+from .proxy import LoaderProxyDb
+from .utils.lru import LRU
 _ = glocale.translation.sgettext
 
 MALE = Person.MALE
@@ -425,6 +430,8 @@ class RelationshipCalculator:
         self.map_handle = None
         self.map_meta = None
         self.__db_connected = False
+        self.use_graph = True
+        self.use_cache = True
         self.depth = 15
         try:
             from .config import config
@@ -827,14 +834,18 @@ class RelationshipCalculator:
         self.__only_birth = only_birth
         self.__crosslinks = False    # no crosslinks
 
-        first_rel = -1
-        second_rel = -1
         self.__msg = []
-
-        common = []
         first_map = {}
         second_map = {}
-        rank = 9999999
+
+        graph = self._get_graph(db)
+        if graph is not None:
+            orig = graph.get_person_id(orig_person.handle)
+            other = graph.get_person_id(other_person.handle)
+            if orig is None or other is None:
+                graph = None
+        if graph is not None:
+            return self.__graph_distance(graph, db, orig, other)
 
         try:
             if (self.storemap and self.stored_map is not None
@@ -864,6 +875,48 @@ class RelationshipCalculator:
             self.dirtymap = False
             self.map_handle = orig_person.handle
 
+        common = self._merge_common_ancestors(first_map, second_map)
+        return self.__distance_result(common)
+
+    def __distance_result(self, common):
+        """
+        Build the get_relationship_distance_new result from the merged
+        common ancestors and the collected messages.
+        """
+        #check for extra messages
+        if self.__max_depth_reached:
+            self.__msg += [_('Family Tree reaches back more than the maximum '
+                             '%d generations searched.\nIt is possible that '
+                             'relationships have been missed') %
+                           (self.__max_depth)]
+
+        if common and not self.__all_dist:
+            rank = common[0][0]
+            person_handle = common[0][1]
+            first_rel = common[0][2]
+            first_fam = common[0][3]
+            second_rel = common[0][4]
+            second_fam = common[0][5]
+            return (rank, person_handle, first_rel, first_fam, second_rel,
+                    second_fam), self.__msg
+        if common:
+            #list with tuples (rank, handle person,rel_str_orig,rel_fam_orig,
+            #       rel_str_other,rel_fam_str) and messages
+            return common, self.__msg
+        if not self.__all_dist:
+            return  (-1, None, '', [], '', []), self.__msg
+        else:
+            return [(-1, None, '', [], '', [])], self.__msg
+
+    @staticmethod
+    def _merge_common_ancestors(first_map, second_map):
+        """
+        Combine the paths of two maps built by the ancestor walk into the
+        list of common ancestor tuples (rank, key, rel1, fam1, rel2, fam2),
+        ordered on rank, without paths that extend a shorter path to
+        another common ancestor.
+        """
+        common = []
         for person_handle in second_map:
             if person_handle in first_map:
                 com = []
@@ -914,30 +967,7 @@ class RelationshipCalculator:
                         deletelist.reverse()
                         for index in deletelist:
                             del common[index]
-        #check for extra messages
-        if self.__max_depth_reached:
-            self.__msg += [_('Family Tree reaches back more than the maximum '
-                             '%d generations searched.\nIt is possible that '
-                             'relationships have been missed') %
-                           (self.__max_depth)]
-
-        if common and not self.__all_dist:
-            rank = common[0][0]
-            person_handle = common[0][1]
-            first_rel = common[0][2]
-            first_fam = common[0][3]
-            second_rel = common[0][4]
-            second_fam = common[0][5]
-            return (rank, person_handle, first_rel, first_fam, second_rel,
-                    second_fam), self.__msg
-        if common:
-            #list with tuples (rank, handle person,rel_str_orig,rel_fam_orig,
-            #       rel_str_other,rel_fam_str) and messages
-            return common, self.__msg
-        if not self.__all_dist:
-            return  (-1, None, '', [], '', []), self.__msg
-        else:
-            return [(-1, None, '', [], '', [])], self.__msg
+        return common
 
     def __apply_filter(self, db, person, rel_str, rel_fam, pmap,
                        depth=1, stoprecursemap=None):
@@ -1081,6 +1111,305 @@ class RelationshipCalculator:
             traceback.print_exc()
             return
 
+    def _get_graph(self, db):
+        """
+        Return the GenealogyGraph used to walk the tree of db, or None if
+        the database objects must be used.
+        """
+        if not self.use_graph:
+            return None
+        return get_genealogy_graph(db)
+
+    def _get_cache(self, db):
+        """
+        Return the RelationshipCache shared for db, or None.
+        """
+        if not (self.use_graph and self.use_cache):
+            return None
+        return get_relationship_cache(db)
+
+    def __graph_distance(self, graph, db, orig, other):
+        """
+        Return the get_relationship_distance_new result for orig and other,
+        found on the graph and cached in the shared RelationshipCache.
+        """
+        max_len = self.__max_depth - 1
+        cache = self._get_cache(db)
+        key = ('distance', orig, other, self.__all_families,
+               self.__all_dist, self.__only_birth, max_len)
+        if cache is not None:
+            result = cache.get(key)
+            if result is not None:
+                return copy.deepcopy(result)
+
+        persons = set()
+        common = self._merge_common_ancestors(
+            *self.__graph_maps(graph, db, orig, other, max_len, persons))
+        common = [(rank, graph.person_handles[pid], rel1, fam1, rel2, fam2)
+                  for (rank, pid, rel1, fam1, rel2, fam2) in common]
+        result = self.__distance_result(common)
+        if cache is not None:
+            cache.set(key, copy.deepcopy(result), persons)
+        return result
+
+    def __graph_first_map(self, graph, db, orig, limit):
+        """
+        Return the ancestor map of orig with paths of at most limit
+        generations, and the ids of the persons that were searched. The
+        map is shared through the RelationshipCache, it must not be
+        changed.
+        """
+        cache = self._get_cache(db)
+        key = ('map', orig, self.__all_families, self.__only_birth, limit,
+               self.__max_depth)
+        value = cache.get(key) if cache is not None else None
+        if value is not None:
+            first_map, meta, visited = value
+            self.__max_depth_reached, self.__loop_detected, \
+                self.__crosslinks, self.__msg = meta
+            self.__msg = list(self.__msg)
+            return first_map, visited
+        first_map = {}
+        visited = set()
+        self.__graph_apply_filter(graph, db, orig, first_map, limit,
+                                  visited=visited)
+        if cache is not None:
+            meta = (self.__max_depth_reached, self.__loop_detected,
+                    self.__crosslinks, list(self.__msg))
+            cache.set(key, (first_map, meta, visited), visited)
+        return first_map, visited
+
+    def __graph_maps(self, graph, db, orig, other, limit, persons):
+        """
+        Build the ancestor maps of orig and other on the graph, with paths
+        of at most limit generations. The maps have person ids as keys.
+        The ids of the persons searched are added to persons.
+        """
+        first_map, visited = self.__graph_first_map(graph, db, orig, limit)
+        persons.update(visited)
+        second_map = {}
+        self.__graph_apply_filter(graph, db, other, second_map, limit,
+                                  stoprecursemap=first_map, visited=persons)
+        return first_map, second_map
+
+    def get_relationship_distance_map(self, db, orig_person, handles=None,
+                                      all_families=False, all_dist=False,
+                                      only_birth=True):
+        """
+        Return a dictionary with for every person handle in handles (all
+        persons if None) the result of get_relationship_distance_new
+        between orig_person and that person.
+
+        The ancestors of orig_person are only searched once, and a
+        multi-source breadth-first search down from them determines which
+        persons can be related at all; the others are not searched.
+        """
+        if handles is None:
+            handles = db.iter_person_handles()
+        graph = self._get_graph(db)
+        orig = None
+        if graph is not None:
+            orig = graph.get_person_id(orig_person.handle)
+        if orig is None:
+            return {handle: self.get_relationship_distance_new(
+                        db, orig_person, db.get_person_from_handle(handle),
+                        all_families, all_dist, only_birth)
+                    for handle in handles}
+
+        self.__max_depth_reached = False
+        self.__loop_detected = False
+        self.__max_depth = self.get_depth()
+        self.__all_families = all_families
+        self.__all_dist = all_dist
+        self.__only_birth = only_birth
+        self.__crosslinks = False
+        self.__msg = []
+        max_len = self.__max_depth - 1
+        first_map, visited = self.__graph_first_map(graph, db, orig, max_len)
+        meta = (self.__max_depth_reached, self.__loop_detected,
+                self.__crosslinks, list(self.__msg))
+
+        related = set(first_map)
+        frontier = list(first_map)
+        for dummy in range(max_len):
+            next_frontier = []
+            for pid in frontier:
+                for child in graph.get_children_ids(pid):
+                    if child not in related:
+                        related.add(child)
+                        next_frontier.append(child)
+            frontier = next_frontier
+
+        cache = self._get_cache(db)
+        result = {}
+        for handle in handles:
+            self.__max_depth_reached, self.__loop_detected, \
+                self.__crosslinks, self.__msg = meta
+            self.__msg = list(self.__msg)
+            other = graph.get_person_id(handle)
+            if other not in related:
+                result[handle] = self.__distance_result([])
+                continue
+            key = ('distance', orig, other, all_families, all_dist,
+                   only_birth, max_len)
+            if cache is not None:
+                value = cache.get(key)
+                if value is not None:
+                    result[handle] = copy.deepcopy(value)
+                    continue
+            persons = set(visited)
+            second_map = {}
+            self.__graph_apply_filter(graph, db, other, second_map,
+                                      max_len, stoprecursemap=first_map,
+                                      visited=persons)
+            common = [(rank, graph.person_handles[pid], rel1, fam1,
+                       rel2, fam2)
+                      for (rank, pid, rel1, fam1, rel2, fam2)
+                      in self._merge_common_ancestors(first_map,
+                                                      second_map)]
+            result[handle] = self.__distance_result(common)
+            if cache is not None:
+                cache.set(key, copy.deepcopy(result[handle]), persons)
+        return result
+
+    def __graph_parent_families(self, graph, pid):
+        """
+        Return the parent family ids of a person that must be searched.
+        """
+        family_ids = graph.get_parent_family_ids(pid)
+        if not self.__all_families:
+            return family_ids[:1]
+        return family_ids
+
+    def __graph_parent_rel(self, frel, mrel):
+        """
+        Return the path letters for going up to the father and the mother,
+        an empty string if that parent must not be followed.
+        """
+        result = []
+        for rel, birth, nonbirth in ((frel, self.REL_FATHER,
+                                      self.REL_FATHER_NOTBIRTH),
+                                     (mrel, self.REL_MOTHER,
+                                      self.REL_MOTHER_NOTBIRTH)):
+            if rel == ChildRefType.BIRTH:
+                result.append(birth)
+            elif not self.__only_birth:
+                result.append(nonbirth)
+            else:
+                result.append('')
+        return result
+
+    def __graph_apply_filter(self, graph, db, start, pmap, max_len,
+                             stoprecursemap=None, visited=None):
+        """
+        Iterative version of __apply_filter working on the graph. The
+        persons are visited in the same order as the recursive version
+        does, so that the maps, and hence the results, are identical.
+        The ids of the persons whose links are read are added to visited.
+        """
+        stack = [(start, '', [], 0)]
+        while stack:
+            pid, rel_str, rel_fam, length = stack.pop()
+            if length > max_len:
+                if max_len == self.__max_depth - 1:
+                    self.__max_depth_reached = True
+                continue
+            if visited is not None:
+                visited.add(pid)
+
+            commonancestor = False
+            store = True
+            if stoprecursemap:
+                store = False
+                if pid in stoprecursemap:
+                    commonancestor = True
+                    store = True
+
+            if pid in pmap:
+                if not stoprecursemap:
+                    self.__crosslinks = True
+                pmap[pid][0] += [rel_str]
+                pmap[pid][1] += [rel_fam]
+                if self.__graph_loop(graph, db, pid, pmap[pid][0]):
+                    continue
+            elif store:
+                pmap[pid] = [[rel_str], [rel_fam]]
+
+            if commonancestor and not self.__crosslinks:
+                continue
+
+            parentstodo = {}
+            for fam, family_id in enumerate(
+                    self.__graph_parent_families(graph, pid)):
+                rel_fam_new = rel_fam + [fam]
+                children = graph.get_child_refs(family_id)
+                childrel = [(frel, mrel) for (child, frel, mrel) in children
+                            if child == pid]
+                if not childrel:
+                    LOG.warning("Person %s missing from the child list of "
+                                "family %s", graph.person_handles[pid],
+                                graph.family_handles[family_id])
+                    parentstodo = {}
+                    break
+                father = graph.father[family_id]
+                mother = graph.mother[family_id]
+                for parent, addstr in zip(
+                        (father, mother),
+                        self.__graph_parent_rel(*childrel[0])):
+                    if parent == NONE:
+                        continue
+                    if parent not in parentstodo:
+                        if addstr:
+                            parentstodo[parent] = (rel_str + addstr,
+                                                   rel_fam_new)
+                    else:
+                        #this person is already scheduled to research
+                        #update family list
+                        famlist = parentstodo[parent][1]
+                        if not isinstance(famlist[-1], list) and \
+                                fam != famlist[-1]:
+                            famlist = famlist[:-1] + [[famlist[-1]]]
+                        if isinstance(famlist[-1], list) and \
+                                fam not in famlist[-1]:
+                            famlist = famlist[:-1] + [famlist[-1] + [fam]]
+                            parentstodo[parent] = (parentstodo[parent][0],
+                                                   famlist)
+                if (father == NONE and mother == NONE
+                        and stoprecursemap is None):
+                    #family without parents, add brothers for orig person
+                    for child, frel, mrel in children:
+                        if child == pid:
+                            continue
+                        if child in pmap:
+                            pmap[child][0] += [rel_str + self.REL_SIBLING]
+                            pmap[child][1] += [rel_fam_new]
+                        else:
+                            pmap[child] = [[rel_str + self.REL_SIBLING],
+                                           [rel_fam_new]]
+
+            for parent, (new_str, new_fam) in reversed(
+                    list(parentstodo.items())):
+                stack.append((parent, new_str, new_fam, length + 1))
+
+    def __graph_loop(self, graph, db, pid, rel_strs):
+        """
+        Check if a person is reached twice on one path, and if so record
+        the loop message.
+        """
+        for rel1 in rel_strs:
+            for rel2 in rel_strs:
+                if len(rel1) < len(rel2) and rel1 == rel2[:len(rel1)]:
+                    #loop, keep one message in storage!
+                    self.__loop_detected = True
+                    person = db.get_person_from_handle(
+                        graph.person_handles[pid])
+                    self.__msg += [_("Relationship loop detected:") + " " +
+                                   _("Person %(person)s connects to himself via %(relation)s")  %
+                                   {'person' : person.get_primary_name().get_name(),
+                                    'relation' : rel2[len(rel1):]}]
+                    return True
+        return False
+
     def collapse_relations(self, relations):
         """
         Internal method to condense the relationships as returned by
@@ -1383,22 +1712,57 @@ class RelationshipCalculator:
         relationships in text, and the second a list of lists of all common
         ancestors that have that text as relationship
         """
-        relstrings = []
-        commons = {}
         if orig_person is None:
             return ([], [])
 
         if orig_person.get_handle() == other_person.get_handle():
             return ([], [])
 
+        data, msg = self.get_relationship_distance_new(
+            db, orig_person, other_person, all_dist=True, all_families=True,
+            only_birth=False)
+        return self.__all_relationships(db, orig_person, other_person, data)
+
+    def get_all_relationships_map(self, db, orig_person, handles=None):
+        """
+        Return a dictionary with for every person handle in handles (all
+        persons if None) the result of get_all_relationships between
+        orig_person and that person, eg all relationships to the home
+        person. See get_relationship_distance_map.
+        """
+        if orig_person is None:
+            return {}
+        spouses = set()
+        for family_handle in orig_person.get_family_handle_list():
+            family = db.get_family_from_handle(family_handle)
+            if family:
+                spouses.update([family.get_father_handle(),
+                                family.get_mother_handle()])
+        distances = self.get_relationship_distance_map(
+            db, orig_person, handles, all_dist=True, all_families=True,
+            only_birth=False)
+        result = {}
+        for handle, (data, msg) in distances.items():
+            if (handle == orig_person.handle or
+                    (data[0][0] == -1 and handle not in spouses)):
+                result[handle] = ([], [])
+                continue
+            other_person = db.get_person_from_handle(handle)
+            result[handle] = self.__all_relationships(db, orig_person,
+                                                      other_person, data)
+        return result
+
+    def __all_relationships(self, db, orig_person, other_person, data):
+        """
+        Build the get_all_relationships result from the distance data.
+        """
+        relstrings = []
+        commons = {}
         is_spouse = self.is_spouse(db, orig_person, other_person)
         if is_spouse:
             relstrings.append(is_spouse)
             commons[is_spouse] = []
 
-        data, msg = self.get_relationship_distance_new(
-            db, orig_person, other_person, all_dist=True, all_families=True,
-            only_birth=False)
         if data[0][0] != -1:
             data = self.collapse_relations(data)
             for rel in data:
@@ -1830,6 +2194,9 @@ class RelationshipCalculator:
                    'family-delete', 'family-rebuild', 'database-changed']
         for name in signals:
             self.signal_keys.append(db.connect(name, self._datachange_callback))
+        if self.use_graph:
+            # make the shared cache follow the changes from now on
+            get_relationship_cache(db)
         self.storemap = True
         self.__db_connected = True
 
@@ -1861,6 +2228,99 @@ class RelationshipCalculator:
         """
         self.dirtymap = True
 
+#-------------------------------------------------------------------------
+#
+# RelationshipCache
+#
+#-------------------------------------------------------------------------
+class RelationshipCache:
+    """
+    Cache of relationship results and ancestor maps computed on the
+    GenealogyGraph of a database, shared by all relationship calculators.
+
+    Every entry remembers the persons whose links were read to compute it,
+    and the graph generation it is valid for. An entry is only dropped if
+    one of these persons changed since; other changes to the database just
+    move the entry to the new generation.
+    """
+    def __init__(self, graph, size=None):
+        if size is None:
+            size = 10000
+            try:
+                from .config import config
+                size = config.get('behavior.relationship-cache-size')
+            except ImportError:
+                pass
+        self.graph = graph
+        self.entries = LRU(size)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """
+        Return the value cached for key, or None.
+        """
+        if key not in self.entries:
+            self.misses += 1
+            return None
+        entry = self.entries[key]
+        generation, persons, value = entry
+        if generation != self.graph.generation:
+            changed = self.graph.changed_since(generation)
+            if changed is None or not changed.isdisjoint(persons):
+                del self.entries[key]
+                self.invalidations += 1
+                self.misses += 1
+                return None
+            entry[0] = self.graph.generation
+        self.hits += 1
+        return value
+
+    def set(self, key, value, persons):
+        """
+        Cache value for key; persons are the ids of the persons it depends
+        on.
+        """
+        size = len(self.entries)
+        replace = key in self.entries
+        self.entries[key] = [self.graph.generation, frozenset(persons), value]
+        if not replace and len(self.entries) == size:
+            self.evictions += 1
+
+    def clear(self):
+        """
+        Remove all entries.
+        """
+        self.entries.clear()
+
+    def get_metrics(self):
+        """
+        Return a dictionary with the cache statistics.
+        """
+        return {'size': len(self.entries),
+                'capacity': self.entries.count,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations}
+
+_CACHES = weakref.WeakKeyDictionary()
+
+def get_relationship_cache(db):
+    """
+    Return the RelationshipCache of db, creating it on first use.
+    """
+    if isinstance(db, LoaderProxyDb):
+        # the objects are the database's
+        db = db.db
+    cache = _CACHES.get(db)
+    if cache is None:
+        cache = RelationshipCache(get_genealogy_graph(db))
+        _CACHES[db] = cache
+    return cache
+
 #-------------------------------------------------------------------------
 #
 # define the default relationshipcalculator
@@ -0,0 +1,103 @@
+#
+# gPrime - A web-based genealogy program
+#
+# Copyright (C) 2017  gPrime contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Check that the relationship calculator gives the same results on the
+genealogy graph as on the database objects.
+"""
+
+import gc
+import unittest
+import os
+import weakref
+
+from gprime.merge.diff import import_as_dict
+from gprime.cli.user import User
+from gprime.proxy import PrivateProxyDb
+from gprime.relationship import (RelationshipCalculator,
+                                 get_relationship_cache)
+from gprime.utils.test.graph_test import make_tree
+
+ddir = os.path.dirname(__file__)
+example = os.path.join(ddir, "..", "..",
+                       "example", "gramps", "example.gramps")
+loop = os.path.join(ddir, "..", "..",
+                    "example", "gramps", "test_complex_loop.gramps")
+
+class GraphTest:
+    """
+    Compare use_graph True and False for pairs of persons of a tree.
+    """
+    step = 1
+
+    @classmethod
+    def setUpClass(cls):
+        cls.db = import_as_dict(cls.filename, User())
+        cls.persons = list(cls.db.iter_people())[::cls.step]
+
+    def compare(self, method, **kwargs):
+        calc = RelationshipCalculator()
+        for orig in self.persons:
+            for other in self.persons:
+                calc.use_graph = True
+                graph = method(calc, self.db, orig, other, **kwargs)
+                calc.use_graph = False
+                objects = method(calc, self.db, orig, other, **kwargs)
+                self.assertEqual(graph, objects,
+                                 "%s - %s" % (orig.gid, other.gid))
+
+    def test_distance(self):
+        for all_families in (True, False):
+            for only_birth in (True, False):
+                for all_dist in (True, False):
+                    self.compare(
+                        RelationshipCalculator.get_relationship_distance_new,
+                        all_families=all_families, all_dist=all_dist,
+                        only_birth=only_birth)
+
+    def test_all_relationships(self):
+        self.compare(RelationshipCalculator.get_all_relationships)
+
+class LoopTest(GraphTest, unittest.TestCase):
+    filename = loop
+
+class ExampleTest(GraphTest, unittest.TestCase):
+    filename = example
+    step = 97
+
+class CacheTest(unittest.TestCase):
+
+    def test_per_database(self):
+        db, people = make_tree()
+        proxy = PrivateProxyDb(db)
+        cache = get_relationship_cache(proxy)
+        self.assertIs(get_relationship_cache(proxy), cache)
+        calc = RelationshipCalculator()
+        self.assertEqual(calc.get_one_relationship(
+            proxy, people["child1"], people["grandfather"]), "grandfather")
+        self.assertGreater(len(cache.entries), 0)
+        # the cache doesn't keep its database alive
+        ref = weakref.ref(proxy)
+        del proxy
+        gc.collect()
+        self.assertIsNone(ref())
+
+if __name__ == "__main__":
+    unittest.main()
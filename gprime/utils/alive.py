@@ -30,6 +30,7 @@ privacy in reports and exports.
 # Standard python modules
 #
 #-------------------------------------------------------------------------
+import json
 import logging
 LOG = logging.getLogger(".gen.utils.alive")
 
@@ -55,11 +56,14 @@ try:
     _MAX_AGE_PROB_ALIVE   = config.get('behavior.max-age-prob-alive')
     _MAX_SIB_AGE_DIFF     = config.get('behavior.max-sib-age-diff')
     _AVG_GENERATION_GAP   = config.get('behavior.avg-generation-gap')
+    _MAX_GENERATIONS_PROB_ALIVE = config.get(
+        'behavior.max-generations-prob-alive')
 except ImportError:
     # Utils used as module not part of GRAMPS
     _MAX_AGE_PROB_ALIVE   = 110
     _MAX_SIB_AGE_DIFF     = 20
     _AVG_GENERATION_GAP   = 20
+    _MAX_GENERATIONS_PROB_ALIVE = 10
 
 #-------------------------------------------------------------------------
 #
@@ -69,13 +73,17 @@ except ImportError:
 class ProbablyAlive:
     """
     An object to hold the parameters for considering someone alive.
+
+    Ancestors and descendants are searched for evidence up to
+    max_generations generations away.
     """
 
     def __init__(self,
                  db,
                  max_sib_age_diff=None,
                  max_age_prob_alive=None,
-                 avg_generation_gap=None):
+                 avg_generation_gap=None,
+                 max_generations=None):
         self.db = db
         if max_sib_age_diff is None:
             max_sib_age_diff = _MAX_SIB_AGE_DIFF
@@ -83,10 +91,71 @@ class ProbablyAlive:
             max_age_prob_alive = _MAX_AGE_PROB_ALIVE
         if avg_generation_gap is None:
             avg_generation_gap = _AVG_GENERATION_GAP
+        if max_generations is None:
+            max_generations = _MAX_GENERATIONS_PROB_ALIVE
         self.MAX_SIB_AGE_DIFF = max_sib_age_diff
         self.MAX_AGE_PROB_ALIVE = max_age_prob_alive
         self.AVG_GENERATION_GAP = avg_generation_gap
+        self.MAX_GENERATIONS = max_generations
         self.pset = set()
+        self.people = self.families = self.events = None
+
+    def preload(self):
+        """
+        Read all people, families and events once, for computing the
+        ranges of many people.
+        """
+        self.people = dict((person.handle, person)
+                           for person in self.db.iter_people())
+        self.families = dict((family.handle, family)
+                             for family in self.db.iter_families())
+        self.events = dict((event.handle, event)
+                           for event in self.db.iter_events())
+
+    def get_person(self, handle):
+        if self.people is not None:
+            return self.people.get(handle)
+        return self.db.get_person_from_handle(handle)
+
+    def get_family(self, handle):
+        if self.families is not None:
+            return self.families.get(handle)
+        return self.db.get_family_from_handle(handle)
+
+    def get_event(self, handle):
+        if self.events is not None:
+            return self.events.get(handle)
+        return self.db.get_event_from_handle(handle)
+
+    def get_key(self):
+        """
+        Return the key of the parameters, for the cache of the database.
+        """
+        return "%d|%d|%d|%d" % (self.MAX_SIB_AGE_DIFF,
+                                self.MAX_AGE_PROB_ALIVE,
+                                self.AVG_GENERATION_GAP,
+                                self.MAX_GENERATIONS)
+
+    def cached_range(self, person):
+        """
+        Return the result of :meth:`probably_alive_range` for the person,
+        from the cache of the database if it has one, and store it there
+        otherwise.
+        """
+        if person is None or not person.handle:
+            return self.probably_alive_range(person)
+        key = self.get_key()
+        data = self.db.get_cached_alive_range(person.handle, key)
+        if data is not None:
+            birth, death, explain, relative_handle = data
+            relative = None
+            if relative_handle:
+                relative = self.get_person(relative_handle)
+            return (_load_date(birth), _load_date(death), explain, relative)
+        result = self.probably_alive_range(person)
+        self.db.set_cached_alive_ranges(key, [(person.handle,
+                                               _dump_range(result))])
+        return result
 
     def probably_alive_range(self, person, is_spouse=False):
         # FIXME: some of these computed dates need to be a span. For
@@ -106,7 +175,7 @@ class ProbablyAlive:
         # things are simple.
         if death_ref and death_ref.get_role().is_primary():
             if death_ref:
-                death = self.db.get_event_from_handle(death_ref.ref)
+                death = self.get_event(death_ref.ref)
                 if death:
                     if death.get_date_object().is_valid():
                         death_date = death.get_date_object()
@@ -119,7 +188,7 @@ class ProbablyAlive:
         if not death_date:
             for ev_ref in person.get_primary_event_ref_list():
                 if ev_ref:
-                    ev = self.db.get_event_from_handle(ev_ref.ref)
+                    ev = self.get_event(ev_ref.ref)
                     if ev and ev.type.is_death_fallback():
                         death_date = ev.get_date_object()
                         if not death_date.is_valid():
@@ -130,7 +199,7 @@ class ProbablyAlive:
         # assume they are alive (we already know they are not dead).
         if not birth_date:
             if birth_ref and birth_ref.get_role().is_primary():
-                birth = self.db.get_event_from_handle(birth_ref.ref)
+                birth = self.get_event(birth_ref.ref)
                 if birth and birth.get_date_object().get_start_date() != Date.EMPTY:
                     birth_date = birth.get_date_object()
 
@@ -138,7 +207,7 @@ class ProbablyAlive:
         # These are fairly good indications that someone's birth.
         if not birth_date:
             for ev_ref in person.get_primary_event_ref_list():
-                ev = self.db.get_event_from_handle(ev_ref.ref)
+                ev = self.get_event(ev_ref.ref)
                 if ev and ev.type.is_birth_fallback():
                     birth_date = ev.get_date_object()
 
@@ -163,17 +232,17 @@ class ProbablyAlive:
 
         family_list = person.get_parent_family_handle_list()
         for family_handle in family_list:
-            family = self.db.get_family_from_handle(family_handle)
+            family = self.get_family(family_handle)
             if family is None:
                 continue
             for child_ref in family.get_child_ref_list():
                 child_handle = child_ref.ref
-                child = self.db.get_person_from_handle(child_handle)
+                child = self.get_person(child_handle)
                 if child is None:
                     continue
                 # Go through once looking for direct evidence:
                 for ev_ref in child.get_primary_event_ref_list():
-                    ev = self.db.get_event_from_handle(ev_ref.ref)
+                    ev = self.get_event(ev_ref.ref)
                     if ev and ev.type.is_birth():
                         dobj = ev.get_date_object()
                         if dobj.get_start_date() != Date.EMPTY:
@@ -199,7 +268,7 @@ class ProbablyAlive:
                                         child)
                 # Go through again looking for fallback:
                 for ev_ref in child.get_primary_event_ref_list():
-                    ev = self.db.get_event_from_handle(ev_ref.ref)
+                    ev = self.get_event(ev_ref.ref)
                     if ev and ev.type.is_birth_fallback():
                         dobj = ev.get_date_object()
                         if dobj.get_start_date() != Date.EMPTY:
@@ -225,12 +294,12 @@ class ProbablyAlive:
 
         if not is_spouse: # if you are not in recursion, let's recurse:
             for family_handle in person.get_family_handle_list():
-                family = self.db.get_family_from_handle(family_handle)
+                family = self.get_family(family_handle)
                 if family:
                     mother_handle = family.get_mother_handle()
                     father_handle = family.get_father_handle()
                     if mother_handle == person.handle and father_handle:
-                        father = self.db.get_person_from_handle(father_handle)
+                        father = self.get_person(father_handle)
                         date1, date2, explain, other = self.probably_alive_range(father, is_spouse=True)
                         if date1 and date1.get_year() != 0:
                             return (Date().copy_ymd(date1.get_year() - self.AVG_GENERATION_GAP),
@@ -241,7 +310,7 @@ class ProbablyAlive:
                                     Date().copy_ymd(date2.get_year() + self.AVG_GENERATION_GAP),
                                     _("a spouse's death-related date, ") + explain, other)
                     elif father_handle == person.handle and mother_handle:
-                        mother = self.db.get_person_from_handle(mother_handle)
+                        mother = self.get_person(mother_handle)
                         date1, date2, explain, other = self.probably_alive_range(mother, is_spouse=True)
                         if date1 and date1.get_year() != 0:
                             return (Date().copy_ymd(date1.get_year() - self.AVG_GENERATION_GAP),
@@ -254,16 +323,16 @@ class ProbablyAlive:
                     # Let's check the family events and see if we find something
                     for ref in family.get_event_ref_list():
                         if ref:
-                            event = self.db.get_event_from_handle(ref.ref)
+                            event = self.get_event(ref.ref)
                             if event:
                                 date = event.get_date_object()
                                 year = date.get_year()
                                 if year != 0:
                                     other = None
                                     if person.handle == mother_handle and father_handle:
-                                        other = self.db.get_person_from_handle(father_handle)
+                                        other = self.get_person(father_handle)
                                     elif person.handle == father_handle and mother_handle:
-                                        other = self.db.get_person_from_handle(mother_handle)
+                                        other = self.get_person(mother_handle)
                                     return (Date().copy_ymd(year - self.AVG_GENERATION_GAP),
                                             Date().copy_ymd(year - self.AVG_GENERATION_GAP +
                                                                     self.MAX_AGE_PROB_ALIVE),
@@ -273,21 +342,21 @@ class ProbablyAlive:
         # Try looking for descendants that were born more than a lifespan
         # ago.
 
-        def descendants_too_old (person, years):
-            if person.handle in self.pset:
+        def descendants_too_old (person, years, generations):
+            if person.handle in self.pset or generations <= 0:
                 return (None, None, "", None)
             self.pset.add(person.handle)
             for family_handle in person.get_family_handle_list():
-                family = self.db.get_family_from_handle(family_handle)
+                family = self.get_family(family_handle)
                 if not family:
                     # can happen with LivingProxyDb(PrivateProxyDb(db))
                     continue
                 for child_ref in family.get_child_ref_list():
                     child_handle = child_ref.ref
-                    child = self.db.get_person_from_handle(child_handle)
+                    child = self.get_person(child_handle)
                     child_birth_ref = child.get_birth_ref()
                     if child_birth_ref:
-                        child_birth = self.db.get_event_from_handle(child_birth_ref.ref)
+                        child_birth = self.get_event(child_birth_ref.ref)
                         dobj = child_birth.get_date_object()
                         if dobj.get_start_date() != Date.EMPTY:
                             d = Date(dobj)
@@ -299,19 +368,20 @@ class ProbablyAlive:
                                     child)
                     child_death_ref = child.get_death_ref()
                     if child_death_ref:
-                        child_death = self.db.get_event_from_handle(child_death_ref.ref)
+                        child_death = self.get_event(child_death_ref.ref)
                         dobj = child_death.get_date_object()
                         if dobj.get_start_date() != Date.EMPTY:
                             return (dobj.copy_offset_ymd(- self.AVG_GENERATION_GAP),
                                     dobj.copy_offset_ymd(- self.AVG_GENERATION_GAP + self.MAX_AGE_PROB_ALIVE),
                                     _("descendant death date"),
                                     child)
-                    date1, date2, explain, other = descendants_too_old (child, years + self.AVG_GENERATION_GAP)
+                    date1, date2, explain, other = descendants_too_old (child, years + self.AVG_GENERATION_GAP,
+                                                                       generations - 1)
                     if date1 and date2:
                         return date1, date2, explain, other
                     # Check fallback data:
                     for ev_ref in child.get_primary_event_ref_list():
-                        ev = self.db.get_event_from_handle(ev_ref.ref)
+                        ev = self.get_event(ev_ref.ref)
                         if ev and ev.type.is_birth_fallback():
                             dobj = ev.get_date_object()
                             if dobj.get_start_date() != Date.EMPTY:
@@ -338,7 +408,8 @@ class ProbablyAlive:
 
         date1, date2, explain, other = None, None, "", None
         try:
-            date1, date2, explain, other = descendants_too_old(person, self.AVG_GENERATION_GAP)
+            date1, date2, explain, other = descendants_too_old(person, self.AVG_GENERATION_GAP,
+                                                                   self.MAX_GENERATIONS)
         except RuntimeError:
             raise DatabaseError(
                 _("Database error: loop in %s's descendants") %
@@ -347,24 +418,23 @@ class ProbablyAlive:
         if date1 and date2:
             return (date1, date2, explain, other)
 
-        def ancestors_too_old(person, year):
-            if person.handle in self.pset:
+        def ancestors_too_old(person, year, generations):
+            if person.handle in self.pset or generations <= 0:
                 return (None, None, "", None)
             self.pset.add(person.handle)
-            LOG.debug("ancestors_too_old('%s', %s)".format(
-                name_displayer.display(person), year) )
+            LOG.debug("ancestors_too_old('%s', %s)", person.handle, year)
             family_handle = person.get_main_parents_family_handle()
             if family_handle:
-                family = self.db.get_family_from_handle(family_handle)
+                family = self.get_family(family_handle)
                 if not family:
                     # can happen with LivingProxyDb(PrivateProxyDb(db))
                     return (None, None, "", None)
                 father_handle = family.get_father_handle()
                 if father_handle:
-                    father = self.db.get_person_from_handle(father_handle)
+                    father = self.get_person(father_handle)
                     father_birth_ref = father.get_birth_ref()
                     if father_birth_ref and father_birth_ref.get_role().is_primary():
-                        father_birth = self.db.get_event_from_handle(
+                        father_birth = self.get_event(
                             father_birth_ref.ref)
                         dobj = father_birth.get_date_object()
                         if dobj.get_start_date() != Date.EMPTY:
@@ -374,7 +444,7 @@ class ProbablyAlive:
                                     father)
                     father_death_ref = father.get_death_ref()
                     if father_death_ref and father_death_ref.get_role().is_primary():
-                        father_death = self.db.get_event_from_handle(
+                        father_death = self.get_event(
                             father_death_ref.ref)
                         dobj = father_death.get_date_object()
                         if dobj.get_start_date() != Date.EMPTY:
@@ -385,7 +455,7 @@ class ProbablyAlive:
 
                     # Check fallback data:
                     for ev_ref in father.get_primary_event_ref_list():
-                        ev = self.db.get_event_from_handle(ev_ref.ref)
+                        ev = self.get_event(ev_ref.ref)
                         if ev and ev.type.is_birth_fallback():
                             dobj = ev.get_date_object()
                             if dobj.get_start_date() != Date.EMPTY:
@@ -402,16 +472,17 @@ class ProbablyAlive:
                                         _("ancestor death-related date"),
                                         father)
 
-                    date1, date2, explain, other = ancestors_too_old (father, year - self.AVG_GENERATION_GAP)
+                    date1, date2, explain, other = ancestors_too_old (father, year - self.AVG_GENERATION_GAP,
+                                                                     generations - 1)
                     if date1 and date2:
                         return date1, date2, explain, other
 
                 mother_handle = family.get_mother_handle()
                 if mother_handle:
-                    mother = self.db.get_person_from_handle(mother_handle)
+                    mother = self.get_person(mother_handle)
                     mother_birth_ref = mother.get_birth_ref()
                     if mother_birth_ref and mother_birth_ref.get_role().is_primary():
-                        mother_birth = self.db.get_event_from_handle(mother_birth_ref.ref)
+                        mother_birth = self.get_event(mother_birth_ref.ref)
                         dobj = mother_birth.get_date_object()
                         if dobj.get_start_date() != Date.EMPTY:
                             return (dobj.copy_offset_ymd(- year),
@@ -420,7 +491,7 @@ class ProbablyAlive:
                                     mother)
                     mother_death_ref = mother.get_death_ref()
                     if mother_death_ref and mother_death_ref.get_role().is_primary():
-                        mother_death = self.db.get_event_from_handle(
+                        mother_death = self.get_event(
                             mother_death_ref.ref)
                         dobj = mother_death.get_date_object()
                         if dobj.get_start_date() != Date.EMPTY:
@@ -431,7 +502,7 @@ class ProbablyAlive:
 
                     # Check fallback data:
                     for ev_ref in mother.get_primary_event_ref_list():
-                        ev = self.db.get_event_from_handle(ev_ref.ref)
+                        ev = self.get_event(ev_ref.ref)
                         if ev and ev.type.is_birth_fallback():
                             dobj = ev.get_date_object()
                             if dobj.get_start_date() != Date.EMPTY:
@@ -448,18 +519,22 @@ class ProbablyAlive:
                                         _("ancestor death-related date"),
                                         mother)
 
-                    date1, date2, explain, other = ancestors_too_old (mother, year - self.AVG_GENERATION_GAP)
+                    date1, date2, explain, other = ancestors_too_old (mother, year - self.AVG_GENERATION_GAP,
+                                                                     generations - 1)
                     if date1 and date2:
                         return (date1, date2, explain, other)
 
             return (None, None, "", None)
 
+        # the descendants walk marked the person as seen:
+        self.pset = set()
         try:
             # If there are ancestors that would be too old in the current year
             # then assume our person must be dead too.
-            date1, date2, explain, other = ancestors_too_old (person, - self.AVG_GENERATION_GAP)
+            date1, date2, explain, other = ancestors_too_old (person, - self.AVG_GENERATION_GAP,
+                                                            self.MAX_GENERATIONS)
         except RuntimeError:
-            raise Errors.DatabaseError(
+            raise DatabaseError(
                 _("Database error: loop in %s's ancestors") %
                 name_displayer.display(person))
         if date1 and date2:
@@ -502,9 +577,7 @@ def probably_alive(person, db,
             max_sib_age_diff, max_age_prob_alive, avg_generation_gap)
     if current_date is None:
         current_date = Today()
-    LOG.debug("%s: b.%s, d.%s - %s".format(
-        " ".join(person.get_primary_name().get_text_data_list()),
-        birth, death, explain))
+    LOG.debug("%s: b.%s, d.%s - %s", person.handle, birth, death, explain)
     if not birth or not death:
         # no evidence, must consider alive
         return ((True, None, None, _("no evidence"), None) if return_range
@@ -527,17 +600,109 @@ def probably_alive_range(person, db,
     """
     Computes estimated birth and death dates.
     Returns: (birth_date, death_date, explain_text, related_person)
+
+    The result is cached by the database, which drops it when the person
+    or a relative it depends on changes.
+    """
+    # Now, we create a wrapper for doing work:
+    pb = ProbablyAlive(_get_basedb(db), max_sib_age_diff,
+                       max_age_prob_alive, avg_generation_gap)
+    return pb.cached_range(person)
+
+def update_alive_ranges(db, handles=None, callback=None):
+    """
+    Compute and store the probably alive ranges of the people with the
+    given handles (all people if None), reading the database only once.
+    Calls callback(percent) while working. Returns the number of people.
+    """
+    basedb = _get_basedb(db)
+    pb = ProbablyAlive(basedb)
+    pb.preload()
+    if handles is None:
+        basedb.clear_cached_alive_ranges()
+        handles = list(pb.people)
+    else:
+        handles = [handle.decode() if isinstance(handle, bytes) else handle
+                   for handle in handles]
+        basedb.clear_cached_alive_ranges(handles)
+    items = []
+    for count, handle in enumerate(handles):
+        person = pb.get_person(handle)
+        if person is not None:
+            items.append((handle,
+                          _dump_range(pb.probably_alive_range(person))))
+        if callback:
+            callback(100 * (count + 1) // len(handles))
+    basedb.set_cached_alive_ranges(pb.get_key(), items)
+    return len(items)
+
+def get_alive_dependents(db, handles, max_generations=None):
+    """
+    Return the set of the handles of the people whose probably alive
+    range can depend on the people with the given handles: themselves,
+    their siblings, their ancestors and descendants up to max_generations
+    away, and the spouses of all of these.
+    """
+    from .graph import get_genealogy_graph, NONE
+    if max_generations is None:
+        max_generations = _MAX_GENERATIONS_PROB_ALIVE
+    graph = get_genealogy_graph(db)
+    result = set()
+    for handle in handles:
+        pid = graph.get_person_id(handle)
+        if pid is None:
+            continue
+        result.add(pid)
+        # the siblings look at the person
+        for fid in graph.get_parent_family_ids(pid):
+            result.update(graph.get_child_ids(fid))
+        # the relatives that look past the person
+        for neighbours in (graph.get_parent_ids, graph.get_children_ids):
+            seen = set([pid])
+            current = [pid]
+            for generation in range(max_generations):
+                current = [other for person_id in current
+                           for other in neighbours(person_id)
+                           if other not in seen]
+                if not current:
+                    break
+                seen.update(current)
+            result.update(seen)
+    # the spouses look at all of these
+    for pid in list(result):
+        for fid in graph.get_family_ids(pid):
+            result.update((graph.father[fid], graph.mother[fid]))
+    result.discard(NONE)
+    handles = set(handle.decode() if isinstance(handle, bytes) else handle
+                  for handle in handles)
+    handles.update(graph.person_handles[pid] for pid in result)
+    return handles
+
+def _get_basedb(db):
+    """
+    Return the real database of db, to use all people for determining
+    alive status.
     """
-    # First, find the real database to use all people
-    # for determining alive status:
     from ..proxy.proxybase import ProxyDbBase
     basedb = db
     while isinstance(basedb, ProxyDbBase):
         basedb = basedb.db
-    # Now, we create a wrapper for doing work:
-    pb = ProbablyAlive(basedb, max_sib_age_diff,
-                       max_age_prob_alive, avg_generation_gap)
-    return pb.probably_alive_range(person)
+    return basedb
+
+def _dump_range(result):
+    birth, death, explain, relative = result
+    return (_dump_date(birth), _dump_date(death), explain,
+            relative.handle if relative else None)
+
+def _dump_date(date):
+    if date is None:
+        return None
+    return json.dumps(date.to_struct(), sort_keys=True)
+
+def _load_date(text):
+    if text is None:
+        return None
+    return Date.from_struct(json.loads(text))
 
 def update_constants():
     """
@@ -545,6 +710,9 @@ def update_constants():
     """
     from ..config import config
     global _MAX_AGE_PROB_ALIVE, _MAX_SIB_AGE_DIFF, _AVG_GENERATION_GAP
+    global _MAX_GENERATIONS_PROB_ALIVE
     _MAX_AGE_PROB_ALIVE   = config.get('behavior.max-age-prob-alive')
     _MAX_SIB_AGE_DIFF     = config.get('behavior.max-sib-age-diff')
     _AVG_GENERATION_GAP   = config.get('behavior.avg-generation-gap')
+    _MAX_GENERATIONS_PROB_ALIVE = config.get(
+        'behavior.max-generations-prob-alive')
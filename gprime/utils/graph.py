@@ -0,0 +1,682 @@
+#
+# gPrime - A web-based genealogy program
+#
+# Copyright (C) 2017  gPrime contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+In-memory index of the genealogy graph.
+
+Persons and families are mapped to dense integer ids and the parent/child
+links are kept in compressed sparse row (CSR) arrays, so that walking the
+pedigree does not need to touch the database or unserialize any object.
+The index is kept up to date from the database commit signals and can be
+exported to a :mod:`multiprocessing.shared_memory` block for use by worker
+processes.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Python modules
+#
+#-------------------------------------------------------------------------
+from array import array
+from collections import deque
+import json
+import logging
+import struct
+import weakref
+
+#-------------------------------------------------------------------------
+#
+# Gprime modules
+#
+#-------------------------------------------------------------------------
+from ..lib.childreftype import ChildRefType
+from .callback import Callback
+from ..proxy import LoaderProxyDb
+
+LOG = logging.getLogger(".graph")
+
+#-------------------------------------------------------------------------
+#
+# Constants
+#
+#-------------------------------------------------------------------------
+NONE = -1
+
+_PERSON_SIGNALS = ('person-add', 'person-update', 'person-delete')
+_FAMILY_SIGNALS = ('family-add', 'family-update', 'family-delete')
+_REBUILD_SIGNALS = ('person-rebuild', 'family-rebuild')
+
+# Number of overlay entries after which the CSR arrays are rebuilt.
+COMPACT_THRESHOLD = 1000
+
+# Number of changes remembered for changed_since().
+CHANGE_LOG_SIZE = 1000
+
+# Arrays exported to shared memory, in order.
+_SHARED_ARRAYS = ('gender', 'birth_sortval', 'father', 'mother',
+                  'parent_family_ptr', 'parent_family_ids',
+                  'family_ptr', 'family_ids',
+                  'child_ptr', 'child_ids', 'child_frel', 'child_mrel')
+
+def _handle(handle):
+    """
+    Normalize a handle to str.
+    """
+    if isinstance(handle, bytes):
+        return handle.decode('utf-8')
+    return handle
+
+def _rel_value(rel):
+    """
+    Return the integer value of a serialized ChildRefType.
+    """
+    if isinstance(rel, dict):
+        return rel.get("value", ChildRefType.BIRTH)
+    if rel is None:
+        return ChildRefType.BIRTH
+    return int(rel)
+
+def _build_csr(lists):
+    """
+    Build (ptr, ids) arrays from a list of lists of ints.
+    """
+    ptr = array('q', [0])
+    ids = array('q')
+    for items in lists:
+        ids.extend(items)
+        ptr.append(len(ids))
+    return ptr, ids
+
+#-------------------------------------------------------------------------
+#
+# GenealogyGraph
+#
+#-------------------------------------------------------------------------
+class GenealogyGraph:
+    """
+    Compact, integer based index of persons, families and the links
+    between them.
+
+    Person ids index the columns ``gender`` and ``birth_sortval`` (0 if
+    unknown), and the CSR pairs ``parent_family_ptr``/``parent_family_ids``
+    (in the order of the person's parent family list, so the first entry
+    is the main family) and ``family_ptr``/``family_ids``.
+
+    Family ids index ``father`` and ``mother`` (person ids, or NONE) and
+    the CSR pair ``child_ptr``/``child_ids`` with the parallel
+    ``child_frel`` and ``child_mrel`` ChildRefType values.
+
+    Changes received through the signals are kept in small overlays that
+    are folded back into the arrays by :meth:`compact`. The ``generation``
+    counter is incremented on every change.
+    """
+    def __init__(self, db=None):
+        self.db = None
+        self.generation = 0
+        self.readonly = False
+        self._change_log = deque(maxlen=CHANGE_LOG_SIZE)
+        self._log_start = 0
+        self._signal_keys = []
+        self._shm = None
+        self._clear()
+        if db is not None:
+            self.rebuild(db)
+
+    @property
+    def db(self):
+        """
+        The database of the graph, or None. It is held weakly, so that the
+        per-database graphs don't keep their databases alive.
+        """
+        return self._db() if self._db is not None else None
+
+    @db.setter
+    def db(self, db):
+        self._db = weakref.ref(db) if db is not None else None
+
+    def _clear(self):
+        self.person_handles = []
+        self.person_index = {}
+        self.family_handles = []
+        self.family_index = {}
+        self.gender = array('b')
+        self.birth_sortval = array('q')
+        self.father = array('q')
+        self.mother = array('q')
+        self.parent_family_ptr, self.parent_family_ids = _build_csr([])
+        self.family_ptr, self.family_ids = _build_csr([])
+        self.child_ptr, self.child_ids = _build_csr([])
+        self.child_frel = array('b')
+        self.child_mrel = array('b')
+        # overlays: id -> list, for entries changed since the last compact
+        self._parent_family_overlay = {}
+        self._family_overlay = {}
+        self._child_overlay = {}
+        # birth event handle -> person id, to follow event updates
+        self._birth_events = {}
+
+    #---------------------------------------------------------------------
+    # Building
+    #---------------------------------------------------------------------
+    def rebuild(self, db=None):
+        """
+        Rebuild the complete index from the database.
+        """
+        if db is not None:
+            self.db = db
+        db = self.db
+        self._check_writable()
+        self._clear()
+        parent_families = []
+        families = []
+        births = {}
+        with db.get_person_cursor() as cursor:
+            for handle, data in cursor:
+                pid = self._new_person(_handle(handle))
+                self.gender[pid] = data.get("gender", 2)
+                parent_families.append(data.get("parent_family_list", []))
+                families.append(data.get("family_list", []))
+                event_handle = self._birth_ref(data)
+                if event_handle:
+                    births[event_handle] = pid
+        children = []
+        with db.get_family_cursor() as cursor:
+            for handle, data in cursor:
+                fid = self._new_family(_handle(handle))
+                self.father[fid] = self.person_index.get(
+                    data.get("father_handle"), NONE)
+                self.mother[fid] = self.person_index.get(
+                    data.get("mother_handle"), NONE)
+                children.append(data.get("child_ref_list", []))
+        if births:
+            with db.get_event_cursor() as cursor:
+                for handle, data in cursor:
+                    pid = births.get(_handle(handle))
+                    if pid is not None:
+                        self.birth_sortval[pid] = self._sortval(data)
+        self._birth_events = births
+
+        self.parent_family_ptr, self.parent_family_ids = _build_csr(
+            [self._family_ids(hlist) for hlist in parent_families])
+        self.family_ptr, self.family_ids = _build_csr(
+            [self._family_ids(hlist) for hlist in families])
+        self.child_ptr = array('q', [0])
+        self.child_ids = array('q')
+        self.child_frel = array('b')
+        self.child_mrel = array('b')
+        for ref_list in children:
+            for pid, frel, mrel in self._child_refs(ref_list):
+                self.child_ids.append(pid)
+                self.child_frel.append(frel)
+                self.child_mrel.append(mrel)
+            self.child_ptr.append(len(self.child_ids))
+        self.generation += 1
+        self._change_log.clear()
+        self._log_start = self.generation
+
+    def compact(self):
+        """
+        Fold the pending overlays back into the CSR arrays.
+        """
+        if not (self._parent_family_overlay or self._family_overlay or
+                self._child_overlay):
+            return
+        self._check_writable()
+        self.parent_family_ptr, self.parent_family_ids = _build_csr(
+            [self.get_parent_family_ids(pid)
+             for pid in range(len(self.person_handles))])
+        self.family_ptr, self.family_ids = _build_csr(
+            [self.get_family_ids(pid)
+             for pid in range(len(self.person_handles))])
+        child_ptr = array('q', [0])
+        child_ids = array('q')
+        child_frel = array('b')
+        child_mrel = array('b')
+        for fid in range(len(self.family_handles)):
+            for pid, frel, mrel in self.get_child_refs(fid):
+                child_ids.append(pid)
+                child_frel.append(frel)
+                child_mrel.append(mrel)
+            child_ptr.append(len(child_ids))
+        self.child_ptr, self.child_ids = child_ptr, child_ids
+        self.child_frel, self.child_mrel = child_frel, child_mrel
+        self._parent_family_overlay = {}
+        self._family_overlay = {}
+        self._child_overlay = {}
+
+    def _check_writable(self):
+        if self.readonly:
+            raise ValueError("genealogy graph snapshot is read-only")
+
+    def _new_person(self, handle):
+        pid = self.person_index.get(handle)
+        if pid is None:
+            pid = len(self.person_handles)
+            self.person_handles.append(handle)
+            self.person_index[handle] = pid
+            self.gender.append(2)
+            self.birth_sortval.append(0)
+        return pid
+
+    def _new_family(self, handle):
+        fid = self.family_index.get(handle)
+        if fid is None:
+            fid = len(self.family_handles)
+            self.family_handles.append(handle)
+            self.family_index[handle] = fid
+            self.father.append(NONE)
+            self.mother.append(NONE)
+        return fid
+
+    def _person_id(self, handle):
+        """
+        Return the id of a person handle, allocating a new id for a handle
+        referenced before its person is seen.
+        """
+        if handle is None:
+            return NONE
+        handle = _handle(handle)
+        pid = self.person_index.get(handle)
+        if pid is None:
+            pid = self._new_person(handle)
+            self._parent_family_overlay[pid] = []
+            self._family_overlay[pid] = []
+        return pid
+
+    def _family_ids(self, handle_list):
+        result = []
+        for handle in handle_list:
+            handle = _handle(handle)
+            fid = self.family_index.get(handle)
+            if fid is None:
+                fid = self._new_family(handle)
+                self._child_overlay[fid] = []
+            result.append(fid)
+        return result
+
+    def _child_refs(self, ref_list):
+        result = []
+        for ref in ref_list:
+            pid = self.person_index.get(_handle(ref.get("ref")))
+            if pid is None:
+                continue
+            result.append((pid, _rel_value(ref.get("frel")),
+                           _rel_value(ref.get("mrel"))))
+        return result
+
+    @staticmethod
+    def _birth_ref(data):
+        index = data.get("birth_ref_index", -1)
+        ref_list = data.get("event_ref_list", [])
+        if index is not None and 0 <= index < len(ref_list):
+            return _handle(ref_list[index].get("ref"))
+        return None
+
+    @staticmethod
+    def _sortval(data):
+        date = data.get("date") or {}
+        return date.get("sortval", 0) or 0
+
+    #---------------------------------------------------------------------
+    # Incremental updates
+    #---------------------------------------------------------------------
+    def connect_db_signals(self, db):
+        """
+        Follow the changes of db through its commit signals.
+        """
+        self.disconnect_db_signals()
+        self.db = db
+        for signal in _PERSON_SIGNALS:
+            self._signal_keys.append(db.connect(signal, self.update_persons))
+        for signal in _FAMILY_SIGNALS:
+            self._signal_keys.append(db.connect(signal, self.update_families))
+        self._signal_keys.append(db.connect('event-update',
+                                            self.update_events))
+        for signal in _REBUILD_SIGNALS:
+            self._signal_keys.append(db.connect(signal, self.rebuild))
+
+    def disconnect_db_signals(self):
+        """
+        Stop following the database changes.
+        """
+        if self.db is not None:
+            for key in self._signal_keys:
+                if key is not None:
+                    self.db.disconnect(key)
+        self._signal_keys = []
+
+    def update_persons(self, handle_list):
+        """
+        Reload the given persons from the database; persons no longer in
+        the database are unlinked.
+        """
+        self._check_writable()
+        changed = set()
+        for handle in handle_list:
+            handle = _handle(handle)
+            data = self.db.get_raw_person_data(handle)
+            pid = self._person_id(handle)
+            changed.add(pid)
+            if data is None:
+                self.gender[pid] = 2
+                self.birth_sortval[pid] = 0
+                self._parent_family_overlay[pid] = []
+                self._family_overlay[pid] = []
+                continue
+            self.gender[pid] = data.get("gender", 2)
+            self._parent_family_overlay[pid] = self._family_ids(
+                data.get("parent_family_list", []))
+            self._family_overlay[pid] = self._family_ids(
+                data.get("family_list", []))
+            self.birth_sortval[pid] = 0
+            event_handle = self._birth_ref(data)
+            if event_handle:
+                self._birth_events[event_handle] = pid
+                event = self.db.get_raw_event_data(event_handle)
+                if event:
+                    self.birth_sortval[pid] = self._sortval(event)
+        self._changed(changed)
+
+    def update_families(self, handle_list):
+        """
+        Reload the given families from the database; families no longer
+        in the database are unlinked.
+        """
+        self._check_writable()
+        changed = set()
+        for handle in handle_list:
+            handle = _handle(handle)
+            data = self.db.get_raw_family_data(handle)
+            fid = self._family_ids([handle])[0]
+            changed.update(self._family_members(fid))
+            if data is None:
+                self.father[fid] = NONE
+                self.mother[fid] = NONE
+                self._child_overlay[fid] = []
+                continue
+            self.father[fid] = self._person_id(data.get("father_handle"))
+            self.mother[fid] = self._person_id(data.get("mother_handle"))
+            self._child_overlay[fid] = self._child_refs(
+                data.get("child_ref_list", []))
+            changed.update(self._family_members(fid))
+        self._changed(changed)
+
+    def update_events(self, handle_list):
+        """
+        Refresh the birth dates depending on the given events.
+        """
+        self._check_writable()
+        changed = set()
+        for handle in handle_list:
+            pid = self._birth_events.get(_handle(handle))
+            if pid is not None:
+                event = self.db.get_raw_event_data(handle)
+                self.birth_sortval[pid] = self._sortval(event) if event else 0
+                changed.add(pid)
+        self._changed(changed)
+
+    def _family_members(self, fid):
+        members = set(self.get_child_ids(fid))
+        members.update((self.father[fid], self.mother[fid]))
+        members.discard(NONE)
+        return members
+
+    def _changed(self, persons):
+        self.generation += 1
+        self._change_log.append((self.generation, frozenset(persons)))
+        if (len(self._parent_family_overlay) + len(self._child_overlay)
+                > COMPACT_THRESHOLD):
+            self.compact()
+
+    def changed_since(self, generation):
+        """
+        Return the set of person ids whose links, gender or birth changed
+        after the given generation, or None if that is no longer known
+        (eg the graph was rebuilt).
+        """
+        if generation < self._log_start:
+            return None
+        if generation == self.generation:
+            return set()
+        if (not self._change_log or
+                self._change_log[0][0] > generation + 1):
+            return None
+        result = set()
+        for (change, persons) in reversed(self._change_log):
+            if change <= generation:
+                break
+            result.update(persons)
+        return result
+
+    #---------------------------------------------------------------------
+    # Accessors
+    #---------------------------------------------------------------------
+    def get_person_id(self, handle):
+        """
+        Return the id of the person handle, or None.
+        """
+        return self.person_index.get(_handle(handle))
+
+    def get_family_id(self, handle):
+        """
+        Return the id of the family handle, or None.
+        """
+        return self.family_index.get(_handle(handle))
+
+    def get_parent_family_ids(self, pid):
+        """
+        Return the parent family ids of a person, main family first.
+        """
+        if pid in self._parent_family_overlay:
+            return list(self._parent_family_overlay[pid])
+        if pid + 1 >= len(self.parent_family_ptr):
+            return []
+        return list(self.parent_family_ids[
+            self.parent_family_ptr[pid]:self.parent_family_ptr[pid + 1]])
+
+    def get_family_ids(self, pid):
+        """
+        Return the ids of the families in which the person is a parent.
+        """
+        if pid in self._family_overlay:
+            return list(self._family_overlay[pid])
+        if pid + 1 >= len(self.family_ptr):
+            return []
+        return list(self.family_ids[
+            self.family_ptr[pid]:self.family_ptr[pid + 1]])
+
+    def get_child_refs(self, fid):
+        """
+        Return a list of (person id, frel, mrel) for the family children.
+        """
+        if fid in self._child_overlay:
+            return list(self._child_overlay[fid])
+        if fid + 1 >= len(self.child_ptr):
+            return []
+        start, end = self.child_ptr[fid], self.child_ptr[fid + 1]
+        return list(zip(self.child_ids[start:end],
+                        self.child_frel[start:end],
+                        self.child_mrel[start:end]))
+
+    def get_child_ids(self, fid):
+        """
+        Return the person ids of the family children.
+        """
+        return [ref[0] for ref in self.get_child_refs(fid)]
+
+    def get_parent_ids(self, pid, only_birth=False):
+        """
+        Return the person ids of the parents in all parent families.
+        """
+        result = []
+        for fid in self.get_parent_family_ids(pid):
+            frel = mrel = ChildRefType.BIRTH
+            if only_birth:
+                for child, child_frel, child_mrel in self.get_child_refs(fid):
+                    if child == pid:
+                        frel, mrel = child_frel, child_mrel
+                        break
+            for parent, rel in ((self.father[fid], frel),
+                                (self.mother[fid], mrel)):
+                if parent != NONE and rel == ChildRefType.BIRTH:
+                    result.append(parent)
+        return result
+
+    def get_children_ids(self, pid):
+        """
+        Return the person ids of the children in all families of a person.
+        """
+        result = []
+        for fid in self.get_family_ids(pid):
+            result.extend(self.get_child_ids(fid))
+        return result
+
+    def ancestors(self, pid, max_depth=None, only_birth=False):
+        """
+        Breadth-first walk up the tree; yields (person id, generation),
+        each person once.
+        """
+        return self._bfs(pid, max_depth,
+                         lambda p: self.get_parent_ids(p, only_birth))
+
+    def descendants(self, pid, max_depth=None):
+        """
+        Breadth-first walk down the tree; yields (person id, generation),
+        each person once.
+        """
+        return self._bfs(pid, max_depth, self.get_children_ids)
+
+    @staticmethod
+    def _bfs(pid, max_depth, neighbours):
+        seen = {pid}
+        queue = deque([(pid, 0)])
+        while queue:
+            current, depth = queue.popleft()
+            yield current, depth
+            if max_depth is not None and depth >= max_depth:
+                continue
+            for other in neighbours(current):
+                if other not in seen:
+                    seen.add(other)
+                    queue.append((other, depth + 1))
+
+    #---------------------------------------------------------------------
+    # Shared memory
+    #---------------------------------------------------------------------
+    def to_shared_memory(self, name=None):
+        """
+        Copy the index to a new shared memory block and return it. The
+        caller owns the block and must ``close()`` and ``unlink()`` it.
+        """
+        from multiprocessing import shared_memory
+        self.compact()
+        layout = {}
+        chunks = []
+        offset = 0
+        for attr in _SHARED_ARRAYS:
+            data = getattr(self, attr)
+            raw = data.tobytes()
+            layout[attr] = (data.typecode, offset, len(data))
+            chunks.append(raw)
+            offset += len(raw)
+        for attr in ('person_handles', 'family_handles'):
+            raw = "\n".join(getattr(self, attr)).encode('utf-8')
+            layout[attr] = ('s', offset, len(raw))
+            chunks.append(raw)
+            offset += len(raw)
+        layout['generation'] = self.generation
+        header = json.dumps(layout).encode('utf-8')
+        prefix = struct.calcsize('<Q')
+        size = prefix + len(header) + offset
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        struct.pack_into('<Q', shm.buf, 0, len(header))
+        position = prefix
+        for chunk in [header] + chunks:
+            shm.buf[position:position + len(chunk)] = chunk
+            position += len(chunk)
+        return shm
+
+    @classmethod
+    def from_shared_memory(cls, name):
+        """
+        Attach to a graph exported by :meth:`to_shared_memory`. The arrays
+        are views on the shared block; the returned graph is read-only.
+        Call :meth:`close` when done.
+        """
+        from multiprocessing import shared_memory
+        shm = shared_memory.SharedMemory(name=name)
+        prefix = struct.calcsize('<Q')
+        (header_size,) = struct.unpack_from('<Q', shm.buf, 0)
+        base = prefix + header_size
+        layout = json.loads(bytes(shm.buf[prefix:base]).decode('utf-8'))
+        graph = cls()
+        graph.generation = layout.pop('generation')
+        for attr, (typecode, offset, length) in layout.items():
+            start = base + offset
+            if typecode == 's':
+                text = bytes(shm.buf[start:start + length]).decode('utf-8')
+                setattr(graph, attr, text.split("\n") if text else [])
+            else:
+                size = array(typecode).itemsize
+                view = shm.buf[start:start + length * size].cast(typecode)
+                setattr(graph, attr, view)
+        graph.person_index = {handle: pid for (pid, handle)
+                              in enumerate(graph.person_handles)}
+        graph.family_index = {handle: fid for (fid, handle)
+                              in enumerate(graph.family_handles)}
+        graph.readonly = True
+        graph._shm = shm
+        return graph
+
+    def close(self):
+        """
+        Release the shared memory block of an attached graph.
+        """
+        if self._shm is not None:
+            for attr in _SHARED_ARRAYS:
+                value = getattr(self, attr)
+                if isinstance(value, memoryview):
+                    value.release()
+                setattr(self, attr, array('q'))
+            self._shm.close()
+            self._shm = None
+
+#-------------------------------------------------------------------------
+#
+# Per-database instances
+#
+#-------------------------------------------------------------------------
+_GRAPHS = weakref.WeakKeyDictionary()
+
+def get_genealogy_graph(db):
+    """
+    Return the GenealogyGraph of db, building it on first use. The graph
+    of a database (as opposed to a proxy) follows its signals.
+    """
+    if isinstance(db, LoaderProxyDb):
+        # the objects are the database's
+        db = db.db
+    graph = _GRAPHS.get(db)
+    if graph is None:
+        graph = GenealogyGraph(db)
+        if isinstance(db, Callback):
+            graph.connect_db_signals(db)
+        _GRAPHS[db] = graph
+    return graph
@@ -0,0 +1,328 @@
+#
+# gPrime - A web-based genealogy program
+#
+# Copyright (C) 2017  gPrime contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Runs reports, imports and exports as jobs, in a pool of processes, out of
+the requests that start them.
+
+Every job opens the database itself. Its status and progress are kept in
+a table of their own database, beside the family tree, so that any server
+process can tell them, and so that the updates don't wait for the
+transactions of the job.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Python modules
+#
+#-------------------------------------------------------------------------
+from concurrent.futures import ProcessPoolExecutor
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+#-------------------------------------------------------------------------
+#
+# Gprime modules
+#
+#-------------------------------------------------------------------------
+from ..cli.user import User
+from .id import create_id
+
+LOG = logging.getLogger(".jobs")
+
+# The columns of the job table, and the states of the jobs:
+JOB_FIELDS = ["handle", "username", "name", "kind", "status", "progress",
+              "message", "output", "created", "finished", "cancel"]
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = ("queued", "running", "done",
+                                            "failed", "cancelled")
+# Number of seconds at most between the progress updates of a job:
+PROGRESS_INTERVAL = 1
+
+class JobCancelled(Exception):
+    """
+    Raised in a job, from its progress, when it has been cancelled.
+    """
+
+#-------------------------------------------------------------------------
+#
+# JobTable
+#
+#-------------------------------------------------------------------------
+class JobTable:
+    """
+    The jobs, in a sqlite database of their own.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            """CREATE TABLE IF NOT EXISTS job (
+                 handle VARCHAR(50) PRIMARY KEY, username VARCHAR(50),
+                 name TEXT, kind VARCHAR(20), status VARCHAR(20),
+                 progress INTEGER, message TEXT, output TEXT,
+                 created REAL, finished REAL, cancel INTEGER);""")
+        self.connection.commit()
+
+    def execute(self, query, args=()):
+        """
+        Run the query, commit, and return the rows.
+        """
+        with self.lock:
+            cursor = self.connection.execute(query, args)
+            rows = cursor.fetchall()
+            self.connection.commit()
+        return rows
+
+    def add(self, username, name, kind):
+        """
+        Add a queued job, and return its handle.
+        """
+        handle = create_id()
+        self.execute("INSERT INTO job (%s) VALUES (%s);"
+                     % (", ".join(JOB_FIELDS),
+                        ", ".join(["?"] * len(JOB_FIELDS))),
+                     [handle, username, name, kind, QUEUED, 0, "", "",
+                      time.time(), None, 0])
+        return handle
+
+    def get(self, handle):
+        """
+        Return the job with the handle as a dictionary, or None.
+        """
+        rows = self.execute("SELECT %s FROM job WHERE handle = ?;"
+                            % ", ".join(JOB_FIELDS), [handle])
+        return dict(zip(JOB_FIELDS, rows[0])) if rows else None
+
+    def get_all(self, username=None):
+        """
+        Return the jobs, of the user if given, the latest first.
+        """
+        if username is None:
+            rows = self.execute("SELECT %s FROM job ORDER BY created DESC;"
+                                % ", ".join(JOB_FIELDS))
+        else:
+            rows = self.execute("SELECT %s FROM job WHERE username = ? "
+                                "ORDER BY created DESC;"
+                                % ", ".join(JOB_FIELDS), [username])
+        return [dict(zip(JOB_FIELDS, row)) for row in rows]
+
+    def update(self, handle, **data):
+        """
+        Set the fields of the job.
+        """
+        fields = [field for field in data if field in JOB_FIELDS]
+        self.execute("UPDATE job SET %s WHERE handle = ?;"
+                     % ", ".join("%s = ?" % field for field in fields),
+                     [data[field] for field in fields] + [handle])
+
+    def cancel(self, handle):
+        """
+        Ask the job to stop. Returns False if it has already ended.
+        """
+        job = self.get(handle)
+        if job is None or job["status"] not in (QUEUED, RUNNING):
+            return False
+        if job["status"] == QUEUED:
+            self.update(handle, cancel=1, status=CANCELLED,
+                        finished=time.time())
+        else:
+            self.update(handle, cancel=1)
+        return True
+
+    def close(self):
+        self.connection.close()
+
+#-------------------------------------------------------------------------
+#
+# JobUser
+#
+#-------------------------------------------------------------------------
+class JobUser(User):
+    """
+    The user of a job, whose progress is written to the job table. Every
+    update checks if the job has been cancelled, and raises JobCancelled
+    if so; questions are answered yes.
+    """
+    def __init__(self, table, handle):
+        User.__init__(self, auto_accept=True)
+        self.table = table
+        self.handle = handle
+        self.message = ""
+        self.last_update = 0
+
+    def update(self, percentage, message=None, force=False):
+        """
+        Write the progress, at most every PROGRESS_INTERVAL seconds unless
+        forced.
+        """
+        now = time.time()
+        if force or now - self.last_update >= PROGRESS_INTERVAL:
+            self.last_update = now
+            if message is not None:
+                self.message = message
+            if self.table.get(self.handle)["cancel"]:
+                raise JobCancelled()
+            self.table.update(self.handle, progress=int(percentage),
+                              message=self.message)
+
+    def begin_progress(self, title, message, steps):
+        self.steps = steps
+        self.current_step = 0
+        self.update(0, message, force=True)
+
+    def step_progress(self):
+        self.current_step += 1
+        if self.steps:
+            self.update(100 * self.current_step / self.steps)
+        else:
+            self.update(0)
+
+    def end_progress(self):
+        pass
+
+    def callback(self, percentage, text=None):
+        self.update(percentage, text)
+
+    def warn(self, title, warning=""):
+        LOG.warning("%s: %s", title, warning)
+
+    def notify_error(self, title, error=""):
+        self.table.update(self.handle, message="%s %s" % (title, error))
+
+    def notify_db_error(self, error):
+        self.notify_error("Database error", error)
+
+    def notify_db_repair(self, error):
+        self.notify_error("Database repair", error)
+
+    def info(self, msg1, infotext, parent=None, monospaced=False):
+        LOG.info("%s: %s", msg1, infotext)
+
+#-------------------------------------------------------------------------
+#
+# Running jobs
+#
+#-------------------------------------------------------------------------
+def run_job(table_path, database_dir, handle, output_dir, function, args):
+    """
+    Run function(db, output_dir, user, *args) as the job with the handle,
+    on the database in database_dir. The function returns the name of the
+    file it made in output_dir, if any.
+    """
+    from ..dbstate import DbState
+    table = JobTable(table_path)
+    try:
+        if table.get(handle)["cancel"]:
+            return
+        table.update(handle, status=RUNNING)
+        db = DbState().open_database(database_dir)
+        try:
+            output = function(db, output_dir, JobUser(table, handle), *args)
+        finally:
+            db.close(update=False)
+        if output is False:
+            # the job may have failed because it was cancelled
+            status = CANCELLED if table.get(handle)["cancel"] else FAILED
+            table.update(handle, status=status, finished=time.time())
+        else:
+            table.update(handle, status=DONE, progress=100,
+                         output=output or "", finished=time.time())
+    except JobCancelled:
+        table.update(handle, status=CANCELLED, finished=time.time())
+    except Exception as exc:
+        LOG.exception("job %s failed", handle)
+        table.update(handle, status=FAILED, message=str(exc),
+                     finished=time.time())
+    finally:
+        table.close()
+
+class JobRunner:
+    """
+    Runs jobs in a pool of at most workers processes; more wait in a
+    queue. Every job has a directory of its own for its output, in
+    jobs_dir.
+    """
+    def __init__(self, database_dir, jobs_dir, workers=2):
+        self.database_dir = database_dir
+        self.jobs_dir = jobs_dir
+        os.makedirs(jobs_dir, exist_ok=True)
+        self.table_path = os.path.join(jobs_dir, "jobs.sqlite")
+        self.table = JobTable(self.table_path)
+        self.workers = workers
+        self.pool = None
+        self.futures = {}
+
+    def get_output_dir(self, handle):
+        """
+        Return the directory of the output of the job.
+        """
+        return os.path.join(self.jobs_dir, handle)
+
+    def submit(self, username, name, kind, function, *args):
+        """
+        Queue function(db, output_dir, user, *args), see :func:`run_job`,
+        as a job of the user, and return its handle. The function must be
+        defined at the top level of a module.
+        """
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        handle = self.table.add(username, name, kind)
+        output_dir = self.get_output_dir(handle)
+        os.makedirs(output_dir, exist_ok=True)
+        self.futures[handle] = self.pool.submit(
+            run_job, self.table_path, self.database_dir, handle, output_dir,
+            function, args)
+        return handle
+
+    def cancel(self, handle):
+        """
+        Cancel the job; it stops at its next progress update if running.
+        Returns False if it has already ended.
+        """
+        future = self.futures.get(handle)
+        if future is not None:
+            future.cancel()
+        return self.table.cancel(handle)
+
+    def get(self, handle):
+        return self.table.get(handle)
+
+    def get_all(self, username=None):
+        return self.table.get_all(username)
+
+    def changed(self):
+        """
+        Return True if jobs have run since the last call, and may have
+        changed the database.
+        """
+        changed = bool(self.futures)
+        for handle, future in list(self.futures.items()):
+            if future.done():
+                del self.futures[handle]
+        return changed
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False)
+        self.table.close()
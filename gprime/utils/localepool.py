@@ -0,0 +1,74 @@
+#
+# gPrime - A web-based genealogy program
+#
+# Copyright (C) 2017  gPrime contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+
+"""
+Process-wide pool of the Locales of the languages the users choose, with
+their translations and displayers, made once per language.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Gprime modules
+#
+#-------------------------------------------------------------------------
+from ..const import LOCALE as glocale
+from .locale import Locale
+
+class Translator:
+    """
+    The Locale of a language, with its gettext bound, and its date and
+    name displayers.
+    """
+    def __init__(self, language=None):
+        self.language = language
+        if language and language != Locale.DEFAULT_TRANSLATION_STR:
+            self.locale = Locale(lang=language)
+        else:
+            self.locale = glocale
+        self.gettext = self.locale.translation.gettext
+        self.sgettext = self.locale.translation.sgettext
+        self._name_displayer = None
+
+    @property
+    def date_displayer(self):
+        return self.locale.date_displayer
+
+    @property
+    def name_displayer(self):
+        """
+        The NameDisplay of the language, made on first use.
+        """
+        if self._name_displayer is None:
+            from ..display.name import NameDisplay
+            self._name_displayer = NameDisplay(self.locale)
+        return self._name_displayer
+
+_TRANSLATORS = {}
+
+def get_translator(language=None):
+    """
+    Return the Translator of the language, or of the default locale if
+    None, from the pool.
+    """
+    translator = _TRANSLATORS.get(language)
+    if translator is None:
+        translator = _TRANSLATORS[language] = Translator(language)
+    return translator
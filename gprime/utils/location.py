@@ -22,6 +22,7 @@
 Location utility functions
 """
 from ..lib.date import Today
+from ..errors import HandleError
 
 #-------------------------------------------------------------------------
 #
@@ -32,15 +33,27 @@ def get_location_list(db, place, date=None, lang=''):
     """
     Return a list of place names for display.
     """
+    return get_dated_location_list(db, place, date, lang)[0]
+
+def get_dated_location_list(db, place, date=None, lang=''):
+    """
+    Return a list of place names for display, and True if the list can
+    depend on the date (a dated place reference or name was consulted).
+    """
     if date is None:
         date = Today()
     visited = [place.handle]
+    dated = __has_dated_name(place)
     lines = [(__get_name(place, date, lang), place.get_type())]
     while True:
         handle = None
         for placeref in place.get_placeref_list():
             ref_date = placeref.get_date_object()
-            if ref_date.is_empty() or date.match_exact(ref_date):
+            if ref_date.is_empty():
+                handle = placeref.ref
+                break
+            dated = True
+            if date.match_exact(ref_date):
                 handle = placeref.ref
                 break
         if handle is None or handle in visited:
@@ -49,8 +62,9 @@ def get_location_list(db, place, date=None, lang=''):
         if place is None:
             break
         visited.append(handle)
+        dated = dated or __has_dated_name(place)
         lines.append((__get_name(place, date, lang), place.get_type()))
-    return lines
+    return lines, dated
 
 def __get_name(place, date, lang):
     names = {}
@@ -62,6 +76,10 @@ def __get_name(place, date, lang):
                 names[name_lang] = place_name.get_value()
     return names.get(lang, names.get('', '?'))
 
+def __has_dated_name(place):
+    return any(not place_name.get_date_object().is_empty()
+               for place_name in place.get_all_names())
+
 #-------------------------------------------------------------------------
 #
 # get_main_location
@@ -117,16 +135,43 @@ def located_in(db, handle1, handle2):
     Determine if the place identified by handle1 is located within the place
     identified by handle2.
     """
-    place = db.get_place_from_handle(handle1)
-    todo = [(place, [handle1])]
-    while len(todo):
-        place, visited = todo.pop()
-        for parent in place.get_placeref_list():
-            if parent.ref == handle2:
-                return True
-            if parent.ref not in visited:
-                parent_place = db.get_place_from_handle(parent.ref)
-                if parent_place is not None:
-                    parent_visited = visited + [parent.ref]
-                    todo.append((parent_place, parent_visited))
-    return False
+    return any(ancestor == handle2 for (ancestor, depth, start, stop)
+               in db.get_place_enclosure(handle1))
+
+#-------------------------------------------------------------------------
+#
+# get_enclosure
+#
+#-------------------------------------------------------------------------
+def get_enclosure(db, place):
+    """
+    Walk every route up the place hierarchy, and return a list of rows
+    (ancestor handle, depth, start, stop), one for each route to each
+    enclosing place. start and stop bound the sortval of the dates for
+    which all place references on the route match (None if unbounded);
+    for routes that never match start is larger than stop.
+    """
+    rows = []
+    todo = [(place, 1, None, None, [place.handle])]
+    while todo:
+        place, depth, start, stop, visited = todo.pop()
+        for placeref in place.get_placeref_list():
+            if placeref.ref in visited:
+                continue
+            ref_range = placeref.get_date_object().get_match_exact_range()
+            ref_start, ref_stop = ref_range or (1, 0)
+            if start is not None and (ref_start is None or start > ref_start):
+                ref_start = start
+            if stop is not None and (ref_stop is None or stop < ref_stop):
+                ref_stop = stop
+            try:
+                parent_place = db.get_place_from_handle(placeref.ref)
+            except HandleError:
+                parent_place = None
+            if parent_place is None:
+                continue
+            rows.append((placeref.ref, depth, ref_start, ref_stop))
+            todo.append((parent_place, depth + 1, ref_start, ref_stop,
+                         visited + [placeref.ref]))
+    return rows
+
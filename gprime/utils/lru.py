@@ -53,11 +53,28 @@ class LRU:
         """
         return obj in self.data
 
+    def __len__(self):
+        """
+        Return the number of items in the LRU
+        """
+        return len(self.data)
+
     def __getitem__(self, obj):
         """
-        Return item associated with Obj
+        Return item associated with Obj, marking it as most recently used
         """
-        return self.data[obj].value[1]
+        nobj = self.data[obj]
+        if nobj is not self.last:
+            if nobj.prev:
+                nobj.prev.next = nobj.next
+            else:
+                self.first = nobj.next
+            nobj.next.prev = nobj.prev
+            nobj.prev = self.last
+            nobj.next = None
+            self.last.next = nobj
+            self.last = nobj
+        return nobj.value[1]
 
     def __setitem__(self, obj, val):
         """
@@ -111,7 +128,6 @@ class LRU:
             cur2 = cur.next
             yield cur.value[1]
             cur = cur2
-        raise StopIteration
 
     def iteritems(self):
         """
@@ -122,7 +138,6 @@ class LRU:
             cur2 = cur.next
             yield cur.value
             cur = cur2
-        raise StopIteration
 
     def iterkeys(self):
         """
@@ -134,26 +149,26 @@ class LRU:
         """
         Return items and keys in the LRU using a generator
         """
-        for data in self.items():
+        for data in self.iteritems():
             yield data[1]
 
     def keys(self):
         """
         Return all keys
         """
-        return [data[0] for data in self.items()]
+        return [data[0] for data in self.iteritems()]
 
     def values(self):
         """
         Return all values
         """
-        return [data[1] for data in self.items()]
+        return [data[1] for data in self.iteritems()]
 
     def items(self):
         """
         Return all items
         """
-        return [data[0] for data in self.items()]
+        return list(self.iteritems())
 
     def clear(self):
         """
@@ -0,0 +1,117 @@
+#
+# gPrime - A web-based genealogy program
+#
+# Copyright (C) 2017  gPrime contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+
+"""
+Incremental parser of multipart/form-data bodies, such as uploads, that
+hands on the data of the parts as they arrive rather than holding them.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Python modules
+#
+#-------------------------------------------------------------------------
+import re
+
+# Longest headers of a part:
+MAX_HEADER_SIZE = 16 * 1024
+
+_PARAM_RE = re.compile(r';\s*([\w\-*]+)\s*=\s*("(?:[^"\\]|\\.)*"|[^;\s]*)')
+
+def parse_header(value):
+    """
+    Parse a header value such as 'form-data; name="file"' into the value
+    and a dictionary of its parameters.
+    """
+    main = value.split(";", 1)[0].strip()
+    params = {}
+    for name, param in _PARAM_RE.findall(value):
+        if param[:1] == '"':
+            param = param[1:-1].replace('\\"', '"').replace('\\\\', '\\')
+        params[name.lower()] = param
+    return main, params
+
+class MultipartParser:
+    """
+    Parses a multipart/form-data body, fed to it a chunk at a time.
+    on_part(headers) is called at the start of every part, with its
+    headers in a dictionary with lower case names, and on_data(data) with
+    the data of the part, in pieces.
+    """
+    def __init__(self, boundary, on_part, on_data):
+        if isinstance(boundary, str):
+            boundary = boundary.encode("latin-1")
+        self.delimiter = b"\r\n--" + boundary
+        self.on_part = on_part
+        self.on_data = on_data
+        # the first delimiter has no line break before it:
+        self.buffer = b"\r\n"
+        self.state = "preamble"
+
+    def feed(self, data):
+        """
+        Parse the next chunk of the body.
+        """
+        self.buffer += data
+        while self.state != "end":
+            if self.state in ("preamble", "data"):
+                index = self.buffer.find(self.delimiter)
+                if index < 0:
+                    # keep what may be the start of a delimiter
+                    keep = len(self.delimiter) - 1
+                    if len(self.buffer) > keep:
+                        if self.state == "data":
+                            self.on_data(self.buffer[:-keep])
+                        self.buffer = self.buffer[-keep:]
+                    return
+                if index and self.state == "data":
+                    self.on_data(self.buffer[:index])
+                self.buffer = self.buffer[index + len(self.delimiter):]
+                self.state = "boundary"
+            elif self.state == "boundary":
+                if len(self.buffer) < 2:
+                    return
+                if self.buffer[:2] == b"--":
+                    self.state = "end"
+                    self.buffer = b""
+                    return
+                self.state = "headers"
+            elif self.state == "headers":
+                index = self.buffer.find(b"\r\n\r\n")
+                if index < 0:
+                    if len(self.buffer) > MAX_HEADER_SIZE:
+                        raise ValueError("Headers of part too long")
+                    return
+                headers = {}
+                for line in self.buffer[:index].decode("utf-8").split("\r\n"):
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+                self.buffer = self.buffer[index + 4:]
+                self.state = "data"
+                self.on_part(headers)
+
+    def close(self):
+        """
+        End the body; raises ValueError if it is incomplete.
+        """
+        if self.state != "end":
+            raise ValueError("Incomplete multipart body")
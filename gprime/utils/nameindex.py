@@ -0,0 +1,220 @@
+#
+# gPrime - A web-based genealogy program
+#
+# Copyright (C) 2017  gPrime contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Sorted index of the names of the people of a database, to complete the
+names that are typed in a few steps of bisection.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Python modules
+#
+#-------------------------------------------------------------------------
+from bisect import bisect_left, insort
+import weakref
+
+#-------------------------------------------------------------------------
+#
+# Gprime modules
+#
+#-------------------------------------------------------------------------
+from ..lib.gendertype import GenderType
+from .callback import Callback
+
+_PERSON_SIGNALS = ('person-add', 'person-update', 'person-delete')
+
+# Above any character of a name, to end the range of a prefix:
+_LAST = "\U0010ffff"
+
+def parse_name_query(query):
+    """
+    Parse what is typed to find a person: "surname", "surname, given",
+    either with "[gid]", and "+" for people of all genders.
+
+    Returns (surname, given, gid, all_genders); given and gid are None if
+    not typed.
+    """
+    all_genders = "+" in query
+    query = query.replace("+", "")
+    gid = None
+    if "[" in query:
+        query, gid = query.split("[", 1)
+        gid = gid.replace("]", "").strip()
+    given = None
+    if "," in query:
+        query, given = query.split(",", 1)
+        given = given.strip()
+    return query.strip(), given, gid, all_genders
+
+#-------------------------------------------------------------------------
+#
+# NameIndex
+#
+#-------------------------------------------------------------------------
+class NameIndex:
+    """
+    The (surname, given name, handle) of every person, in lower case, in
+    sorted lists: one of all people, one of the people of the female
+    genders and one of the male genders.
+
+    Finding the people whose surname starts with a prefix is two
+    bisections, and their number the distance between them. The lists
+    follow the commits of the database through its signals.
+    """
+    def __init__(self, db=None):
+        self.db = None
+        self.people = {}
+        self.keys = {None: [], "female": [], "male": []}
+        self.genders = {}
+        for code in GenderType.get_female_codes():
+            self.genders[code] = "female"
+        for code in GenderType.get_male_codes():
+            self.genders[code] = "male"
+        self._signal_keys = []
+        if db is not None:
+            self.rebuild(db)
+
+    def rebuild(self, db=None):
+        """
+        Rebuild the complete index from the database.
+        """
+        if db is not None:
+            self.db = db
+        self.people = {}
+        self.keys = {None: [], "female": [], "male": []}
+        with self.db.get_person_cursor() as cursor:
+            for handle, data in cursor:
+                self._add(_handle(handle), data, sort=False)
+        for keys in self.keys.values():
+            keys.sort()
+
+    def _add(self, handle, data, sort=True):
+        name = data.get("primary_name") or {}
+        surnames = name.get("surname_list") or [{}]
+        surname = surnames[0].get("surname") or ""
+        given = name.get("first_name") or ""
+        gender = self.genders.get(data.get("gender"))
+        key = (surname.lower(), given.lower(), handle)
+        self.people[handle] = (key, surname, given, data.get("gid") or "",
+                               gender)
+        for group in (None, gender) if gender else (None,):
+            if sort:
+                insort(self.keys[group], key)
+            else:
+                self.keys[group].append(key)
+
+    def _remove(self, handle):
+        (key, surname, given, gid, gender) = self.people.pop(handle)
+        for group in (None, gender) if gender else (None,):
+            keys = self.keys[group]
+            del keys[bisect_left(keys, key)]
+
+    def connect_db_signals(self, db):
+        """
+        Follow the changes of db through its commit signals.
+        """
+        self.disconnect_db_signals()
+        self.db = db
+        for signal in _PERSON_SIGNALS:
+            self._signal_keys.append(db.connect(signal, self.update_persons))
+        self._signal_keys.append(db.connect('person-rebuild', self.rebuild))
+
+    def disconnect_db_signals(self):
+        """
+        Stop following the database changes.
+        """
+        if self.db is not None:
+            for key in self._signal_keys:
+                if key is not None:
+                    self.db.disconnect(key)
+        self._signal_keys = []
+
+    def update_persons(self, handle_list):
+        """
+        Reload the given persons from the database.
+        """
+        for handle in handle_list:
+            handle = _handle(handle)
+            if handle in self.people:
+                self._remove(handle)
+            data = self.db.get_raw_person_data(handle)
+            if data:
+                self._add(handle, data)
+
+    def search(self, surname="", given=None, gid=None, gender=None,
+               start=0, count=10):
+        """
+        Find the people whose surname starts with surname, and whose given
+        name starts with given, and whose gid contains gid, if given; of
+        the gender ("female" or "male"), or of all genders if None.
+
+        Returns the number of people found, and a list of (handle,
+        surname, given name, gid) of count of them, from start, by surname
+        and given name. The case of the letters doesn't matter.
+        """
+        keys = self.keys[gender]
+        surname = surname.lower()
+        low = bisect_left(keys, (surname,))
+        high = bisect_left(keys, (surname + _LAST,))
+        if given is None and not gid:
+            found = keys[low + start:min(low + start + count, high)]
+            total = high - low
+        else:
+            given = (given or "").lower()
+            gid = (gid or "").lower()
+            found = []
+            total = 0
+            for position in range(low, high):
+                key = keys[position]
+                if (key[1].startswith(given) and
+                        gid in self.people[key[2]][3].lower()):
+                    if start <= total < start + count:
+                        found.append(key)
+                    total += 1
+        return total, [(key[2],) + self.people[key[2]][1:4] for key in found]
+
+def _handle(handle):
+    """
+    Normalize a handle to str.
+    """
+    if isinstance(handle, bytes):
+        return str(handle, "utf-8")
+    return handle
+
+#-------------------------------------------------------------------------
+#
+# Per-database instances
+#
+#-------------------------------------------------------------------------
+_INDEXES = weakref.WeakKeyDictionary()
+
+def get_name_index(db):
+    """
+    Return the NameIndex of db, building it on first use. The index of a
+    database (as opposed to a proxy) follows its signals.
+    """
+    index = _INDEXES.get(db)
+    if index is None:
+        index = NameIndex(db)
+        if isinstance(db, Callback):
+            index.connect_db_signals(db)
+        _INDEXES[db] = index
+    return index
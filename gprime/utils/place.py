@@ -572,6 +572,67 @@ def conv_lat_lon(latitude, longitude, format="D.D4"):
         return str_lat + str_lon
 
 
+#-------------------------------------------------------------------------
+#
+# coordinate functions
+#
+#-------------------------------------------------------------------------
+
+EARTH_RADIUS = 6371.0088 # mean earth radius, in km
+
+def conv_lat_lon_float(latitude, longitude):
+    """
+    Convert given string latitude and longitude to a tuple of 2 floats, in
+    degrees. If conversion fails: returns (None, None).
+    """
+    if not latitude or not longitude:
+        return (None, None)
+    lat, lon = conv_lat_lon(latitude, longitude, "D.D8")
+    if lat is None or lon is None:
+        return (None, None)
+    return (float(lat), float(lon))
+
+def get_distance(lat1, lon1, lat2, lon2):
+    """
+    Return the great-circle distance in km between two positions given in
+    degrees.
+    """
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    hav = (math.sin((lat2 - lat1) / 2) ** 2 +
+           math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS * math.asin(min(1., math.sqrt(hav)))
+
+def get_bounding_box(lat, lon, radius):
+    """
+    Return the bounding box (min_lat, min_lon, max_lat, max_lon) of all
+    positions within radius km of the position lat, lon. min_lon is larger
+    than max_lon if the box crosses the 180th meridian.
+    """
+    dlat = math.degrees(radius / EARTH_RADIUS)
+    min_lat, max_lat = lat - dlat, lat + dlat
+    if min_lat <= -90. or max_lat >= 90.:
+        # a pole is in range, so are all longitudes:
+        return (max(min_lat, -90.), -180., min(max_lat, 90.), 180.)
+    dlon = math.degrees(math.asin(min(1., math.sin(radius / EARTH_RADIUS) /
+                                      math.cos(math.radians(lat)))))
+    min_lon, max_lon = lon - dlon, lon + dlon
+    if min_lon < -180.:
+        min_lon += 360.
+    if max_lon > 180.:
+        max_lon -= 360.
+    return (min_lat, min_lon, max_lat, max_lon)
+
+def split_bounding_box(bbox):
+    """
+    Return a list of bounding boxes that don't cross the 180th meridian,
+    covering the bounding box (min_lat, min_lon, max_lat, max_lon).
+    """
+    min_lat, min_lon, max_lat, max_lon = bbox
+    if min_lon <= max_lon:
+        return [tuple(bbox)]
+    return [(min_lat, min_lon, max_lat, 180.),
+            (min_lat, -180., max_lat, max_lon)]
+
 
 def atanh(x):
     """arctangent hyperbolicus"""
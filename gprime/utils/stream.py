@@ -0,0 +1,300 @@
+#
+# gPrime - A web-based genealogy program
+#
+# Copyright (C) 2017  gPrime contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+
+"""
+Streams what a function writes to a file object, from a thread, to a
+reader in another thread, in chunks; and spools what arrives, such as an
+upload, to a file that can be read, from any process, as it is written.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Python modules
+#
+#-------------------------------------------------------------------------
+import gzip
+import hashlib
+import io
+import logging
+import os
+import queue
+import threading
+import time
+
+LOG = logging.getLogger(".stream")
+
+# Bytes written at a time, and chunks held for the reader at most:
+CHUNK_SIZE = 64 * 1024
+QUEUE_SIZE = 16
+# Seconds between the checks of a blocked writer for cancellation:
+_POLL_INTERVAL = 0.5
+# Seconds between the checks of a spool for more data, and at most
+# without any, by default:
+_SPOOL_INTERVAL = 0.05
+SPOOL_TIMEOUT = 300
+
+class StreamCancelled(IOError):
+    """
+    Raised in the writer of a stream when the reader has gone.
+    """
+
+#-------------------------------------------------------------------------
+#
+# QueueWriter
+#
+#-------------------------------------------------------------------------
+class QueueWriter(io.RawIOBase):
+    """
+    A binary file object whose data are read, a chunk at a time, with
+    :meth:`get`. Writing blocks while the reader is QUEUE_SIZE chunks
+    behind, so that the writer goes no faster than the reader.
+    """
+    def __init__(self, chunk_size=CHUNK_SIZE, size=QUEUE_SIZE):
+        super().__init__()
+        self.chunk_size = chunk_size
+        self.queue = queue.Queue(maxsize=size)
+        self.buffer = bytearray()
+        self.cancelled = False
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        if self.cancelled:
+            raise StreamCancelled("The reader of the stream has gone")
+        self.buffer += data
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+        return len(data)
+
+    def flush(self):
+        if self.cancelled:
+            # nobody reads what is left
+            self.buffer.clear()
+        elif self.buffer:
+            self._put(bytes(self.buffer))
+            self.buffer.clear()
+
+    def close(self):
+        """
+        End the stream; only marks it closed once it is cancelled.
+        """
+        if not self.closed:
+            try:
+                if not self.cancelled:
+                    self.flush()
+                    self._put(None)
+            finally:
+                super().close()
+
+    def fail(self, error):
+        """
+        End the stream with an error, raised in the reader.
+        """
+        self.buffer.clear()
+        try:
+            if not self.cancelled:
+                self._put(error)
+        except StreamCancelled:
+            pass
+        finally:
+            super().close()
+
+    def cancel(self):
+        """
+        Stop the writer, from the reader, at its next write.
+        """
+        self.cancelled = True
+
+    def _put(self, item):
+        while True:
+            if self.cancelled:
+                raise StreamCancelled("The reader of the stream has gone")
+            try:
+                self.queue.put(item, timeout=_POLL_INTERVAL)
+                return
+            except queue.Full:
+                pass
+
+    def get(self):
+        """
+        Return the next chunk, or None at the end of the stream. Raises
+        the error the stream failed with, if any.
+        """
+        item = self.queue.get()
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+def stream(function, *args, compress=False):
+    """
+    Call function(file, *args) in a thread of its own, and return the
+    QueueWriter from which to get what it writes to file, compressed
+    with gzip on the way if compress. The stream ends when the function
+    returns; if it returns False or raises, the stream fails.
+    """
+    writer = QueueWriter()
+    def run():
+        try:
+            if compress:
+                with gzip.GzipFile(mode="wb", fileobj=writer) as output:
+                    result = function(output, *args)
+            else:
+                result = function(writer, *args)
+            if result is False:
+                writer.fail(IOError("Writing the stream failed"))
+            else:
+                writer.close()
+        except StreamCancelled:
+            pass
+        except Exception as exc:
+            LOG.exception("stream failed")
+            writer.fail(exc)
+        finally:
+            # once cancelled, this only marks the writer closed
+            writer.close()
+    threading.Thread(target=run, daemon=True).start()
+    return writer
+
+#-------------------------------------------------------------------------
+#
+# Spool
+#
+#-------------------------------------------------------------------------
+class Spool:
+    """
+    Writes data to a file as it arrives, and hashes it with sha256 on the
+    way. The file is complete once its digest is written beside it, in
+    path + ".sha256"; path + ".failed" marks a file that will never be.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "wb")
+        self.hash = hashlib.sha256()
+        self.size = 0
+        self.done = False
+
+    def write(self, data):
+        """
+        Append the data, for the readers to see at once.
+        """
+        self.file.write(data)
+        self.file.flush()
+        self.hash.update(data)
+        self.size += len(data)
+
+    def finish(self):
+        """
+        Complete the file, and return its digest.
+        """
+        self.file.close()
+        digest = self.hash.hexdigest()
+        # written at once, so that readers see all of it or nothing:
+        with open(self.path + ".tmp", "w") as ofile:
+            ofile.write(digest)
+        os.replace(self.path + ".tmp", self.path + ".sha256")
+        self.done = True
+        return digest
+
+    def fail(self):
+        """
+        Give up the file, if not complete.
+        """
+        if not self.done:
+            self.file.close()
+            open(self.path + ".failed", "w").close()
+            self.done = True
+
+class SpoolReader(io.RawIOBase):
+    """
+    Reads the file of a Spool, in this or another process, while it is
+    written: at its end, reading waits for more, until the file is
+    complete. Raises IOError if the spool fails, or has no more data for
+    timeout seconds.
+
+    size is the size the file is expected to have, if known, to tell the
+    progress by.
+    """
+    def __init__(self, path, size=None, timeout=SPOOL_TIMEOUT):
+        super().__init__()
+        self.name = path
+        self.size = size
+        self.timeout = timeout
+        self.file = None
+        self._wait(lambda: os.path.exists(path))
+        self.file = open(path, "rb", buffering=0)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = self.file.readinto(buffer)
+        if not count:
+            self._wait(self._more)
+            count = self.file.readinto(buffer)
+        return count
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_END:
+            self.wait()
+        return self.file.seek(offset, whence)
+
+    def tell(self):
+        return self.file.tell()
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+        super().close()
+
+    def is_complete(self):
+        return os.path.exists(self.name + ".sha256")
+
+    def wait(self):
+        """
+        Wait for the file to be complete, and return its digest.
+        """
+        self._wait(self.is_complete)
+        with open(self.name + ".sha256") as ifile:
+            return ifile.read()
+
+    def _more(self):
+        """
+        Return True if there is more to read, or will never be.
+        """
+        return (self.is_complete() or
+                os.fstat(self.file.fileno()).st_size > self.file.tell())
+
+    def _wait(self, condition):
+        waited = 0
+        while not condition():
+            if os.path.exists(self.name + ".failed"):
+                raise IOError("%s was not completed" % self.name)
+            if waited > self.timeout:
+                raise IOError("Timed out waiting for %s" % self.name)
+            time.sleep(_SPOOL_INTERVAL)
+            waited += _SPOOL_INTERVAL
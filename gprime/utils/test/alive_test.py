@@ -0,0 +1,106 @@
+#
+# gPrime - A web-based genealogy program
+#
+# Copyright (C) 2017  gPrime contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for alive.py """
+
+import unittest
+
+from ...db import DbTxn
+from ...lib import Event, EventType, EventRef, Date
+from ..alive import (ProbablyAlive, probably_alive, probably_alive_range,
+                     update_alive_ranges, get_alive_dependents)
+from .traversal_test import make_tree
+
+# x's spouse, p, is unrelated to the others.
+FAMILIES = [("gf", "gm", ["a"]),
+            ("a", "x", ["c", "s"]),
+            ("c", None, ["e"]),
+            (None, None, ["p"])]
+
+class AliveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db, self.people = make_tree(FAMILIES)
+        self.key = ProbablyAlive(self.db).get_key()
+
+    def add_birth(self, name, year):
+        person = self.people[name]
+        with DbTxn("Add birth", self.db, batch=True) as trans:
+            event = Event()
+            event.set_type(EventType.BIRTH)
+            event.set_date_object(Date(year))
+            self.db.add_event(event, trans)
+            ref = EventRef()
+            ref.set_reference_handle(event.handle)
+            person.add_event_ref(ref)
+            person.set_birth_ref(ref)
+            self.db.commit_person(person, trans)
+        return event
+
+    def test_cached(self):
+        self.add_birth("gf", 1700)
+        person = self.people["e"]
+        birth, death, explain, relative = probably_alive_range(person,
+                                                               self.db)
+        self.assertEqual(relative.handle, self.people["gf"].handle)
+        self.assertFalse(probably_alive(person, self.db))
+        self.assertIsNotNone(self.db.get_cached_alive_range(person.handle,
+                                                            self.key))
+        self.assertEqual(probably_alive_range(person, self.db)[:3],
+                         (birth, death, explain))
+        # a batch change drops all ranges
+        self.add_birth("gm", 1710)
+        self.assertIsNone(self.db.get_cached_alive_range(person.handle,
+                                                         self.key))
+
+    def test_dependents(self):
+        handles = lambda names: set(self.people[name].handle
+                                    for name in names)
+        self.assertEqual(get_alive_dependents(self.db, handles(["gf"])),
+                         handles(["gf", "gm", "a", "x", "c", "s", "e"]))
+        self.assertEqual(get_alive_dependents(self.db, handles(["gf"]), 1),
+                         handles(["gf", "gm", "a", "x"]))
+        self.assertEqual(get_alive_dependents(self.db, handles(["p"])),
+                         handles(["p"]))
+        self.assertEqual(get_alive_dependents(self.db, handles(["s"])),
+                         handles(["a", "x", "s", "c", "gf", "gm"]))
+
+    def test_batch(self):
+        self.add_birth("gf", 1700)
+        self.assertEqual(update_alive_ranges(self.db), len(self.people))
+        data = self.db.get_cached_alive_range(self.people["e"].handle,
+                                              self.key)
+        self.assertEqual(data[3], self.people["gf"].handle)
+        self.assertEqual(self.db.get_cached_alive_range(
+            self.people["p"].handle, self.key)[:3], (None, None, ""))
+        self.db.clear_cached_alive_ranges([self.people["e"].handle])
+        self.assertIsNone(self.db.get_cached_alive_range(
+            self.people["e"].handle, self.key))
+
+    def test_horizon(self):
+        self.add_birth("gf", 1700)
+        person = self.people["e"]
+        self.assertFalse(probably_alive(person, self.db))
+        pb = ProbablyAlive(self.db, max_generations=2)
+        self.assertEqual(pb.probably_alive_range(person),
+                         (None, None, "", None))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+#
+# gPrime - A web-based genealogy program
+#
+# Copyright (C) 2017  gPrime contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for graph.py """
+
+import gc
+import unittest
+import weakref
+
+from ...db import make_database, DbTxn
+from ...lib import Person, Family, ChildRef
+from ...proxy import PrivateProxyDb
+from ..graph import GenealogyGraph, get_genealogy_graph
+
+def make_tree():
+    """
+    Three generations: grandfather + grandmother -> father;
+    father + mother -> child1, child2.
+    """
+    db = make_database("inmemorydb")
+    db.load(None)
+    people = {}
+    with DbTxn("Build tree", db, batch=True) as trans:
+        for name, gender in (("grandfather", Person.MALE),
+                             ("grandmother", Person.FEMALE),
+                             ("father", Person.MALE),
+                             ("mother", Person.FEMALE),
+                             ("child1", Person.MALE),
+                             ("child2", Person.FEMALE)):
+            person = Person()
+            person.set_gender(gender)
+            db.add_person(person, trans)
+            people[name] = person
+        for dad, mom, kids in (("grandfather", "grandmother", ["father"]),
+                               ("father", "mother", ["child1", "child2"])):
+            family = Family()
+            db.add_family(family, trans)
+            family.set_father_handle(people[dad].handle)
+            family.set_mother_handle(people[mom].handle)
+            for kid in kids:
+                ref = ChildRef()
+                ref.set_reference_handle(people[kid].handle)
+                family.add_child_ref(ref)
+                people[kid].add_parent_family_handle(family.handle)
+            db.commit_family(family, trans)
+            people[dad].add_family_handle(family.handle)
+            people[mom].add_family_handle(family.handle)
+        for person in people.values():
+            db.commit_person(person, trans)
+    return db, people
+
+class GraphTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db, self.people = make_tree()
+        self.graph = GenealogyGraph(self.db)
+
+    def pid(self, name):
+        return self.graph.get_person_id(self.people[name].handle)
+
+    def test_links(self):
+        graph = self.graph
+        self.assertEqual(sorted(graph.get_parent_ids(self.pid("child1"))),
+                         sorted([self.pid("father"), self.pid("mother")]))
+        self.assertEqual(sorted(graph.get_children_ids(self.pid("father"))),
+                         sorted([self.pid("child1"), self.pid("child2")]))
+        self.assertEqual(graph.gender[self.pid("mother")], Person.FEMALE)
+
+    def test_ancestors(self):
+        result = dict(self.graph.ancestors(self.pid("child2")))
+        self.assertEqual(result[self.pid("grandmother")], 2)
+        self.assertEqual(len(result), 5)
+        result = dict(self.graph.ancestors(self.pid("child2"), max_depth=1))
+        self.assertEqual(len(result), 3)
+
+    def test_update(self):
+        child = self.people["child1"]
+        with DbTxn("Remove parents", self.db, batch=True) as trans:
+            child.clear_parent_family_handle_list()
+            self.db.commit_person(child, trans)
+        generation = self.graph.generation
+        self.graph.update_persons([child.handle])
+        self.assertGreater(self.graph.generation, generation)
+        self.assertEqual(self.graph.get_parent_ids(self.pid("child1")), [])
+        self.graph.compact()
+        self.assertEqual(self.graph.get_parent_ids(self.pid("child1")), [])
+        self.assertEqual(len(self.graph.get_parent_ids(self.pid("child2"))),
+                         2)
+
+    def test_changed_since(self):
+        graph = self.graph
+        generation = graph.generation
+        self.assertEqual(graph.changed_since(generation), set())
+        graph.update_families(self.people["father"].get_family_handle_list())
+        self.assertEqual(graph.changed_since(generation),
+                         set([self.pid("father"), self.pid("mother"),
+                              self.pid("child1"), self.pid("child2")]))
+        graph.rebuild()
+        self.assertIsNone(graph.changed_since(generation))
+
+    def test_shared_memory(self):
+        shm = self.graph.to_shared_memory()
+        try:
+            copy = GenealogyGraph.from_shared_memory(shm.name)
+            self.assertEqual(copy.person_handles, self.graph.person_handles)
+            self.assertEqual(
+                dict(copy.descendants(self.pid("grandfather"))),
+                dict(self.graph.descendants(self.pid("grandfather"))))
+            self.assertRaises(ValueError, copy.update_persons, [])
+            copy.close()
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def test_per_database(self):
+        proxy = PrivateProxyDb(self.db)
+        graph = get_genealogy_graph(proxy)
+        self.assertIs(get_genealogy_graph(proxy), graph)
+        self.assertEqual(len(graph.person_handles), 6)
+        # the graph doesn't keep its database alive
+        ref = weakref.ref(proxy)
+        del proxy
+        gc.collect()
+        self.assertIsNone(ref())
+        self.assertIsNone(graph.db)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+#
+# gPrime - A web-based genealogy program
+#
+# Copyright (C) 2017  gPrime contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for jobs.py """
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from ...dbstate import DbState
+from ...db import DbTxn
+from ...lib import Person
+from ..jobs import (JobTable, JobRunner, run_job, QUEUED, RUNNING, DONE,
+                    FAILED, CANCELLED)
+
+## Jobs, at the top level to be run in other processes:
+
+def count_job(db, output_dir, user, name):
+    user.begin_progress("Count", "Counting", db.get_number_of_people())
+    for handle in db.get_person_handles():
+        user.step_progress()
+    user.end_progress()
+    output_file = os.path.join(output_dir, name)
+    with open(output_file, "w") as out:
+        out.write(str(db.get_number_of_people()))
+    return output_file
+
+def failing_job(db, output_dir, user):
+    return False
+
+def raising_job(db, output_dir, user):
+    raise ValueError("broken")
+
+def cancelling_job(db, output_dir, user, table_path, handle):
+    JobTable(table_path).cancel(handle)
+    user.begin_progress("Wait", "Waiting", 1)
+
+class JobsTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.database_dir = os.path.join(cls.tmpdir, "tree")
+        db = DbState().create_database(cls.database_dir)
+        with DbTxn("Add people", db, batch=True) as trans:
+            for index in range(5):
+                db.add_person(Person(), trans)
+        db.close(update=False)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmpdir)
+
+    def setUp(self):
+        self.jobs_dir = tempfile.mkdtemp(dir=self.tmpdir)
+        self.table_path = os.path.join(self.jobs_dir, "jobs.sqlite")
+        self.table = JobTable(self.table_path)
+
+    def tearDown(self):
+        self.table.close()
+
+    def run_job(self, function, *args):
+        handle = self.table.add("user", "job", "test")
+        run_job(self.table_path, self.database_dir, handle, self.jobs_dir,
+                function, args)
+        return self.table.get(handle)
+
+    def test_table(self):
+        first = self.table.add("ann", "Report", "report")
+        second = self.table.add("bob", "Export", "export")
+        self.assertEqual(self.table.get(first)["status"], QUEUED)
+        self.assertEqual([job["handle"] for job in self.table.get_all("ann")],
+                         [first])
+        self.assertEqual(len(self.table.get_all()), 2)
+        self.table.update(second, status=RUNNING, progress=50)
+        self.assertEqual(self.table.get(second)["progress"], 50)
+        self.assertTrue(self.table.cancel(first))
+        self.assertEqual(self.table.get(first)["status"], CANCELLED)
+        self.assertFalse(self.table.cancel(first))
+        self.assertTrue(self.table.cancel(second))
+        self.assertEqual(self.table.get(second)["status"], RUNNING)
+        self.assertEqual(self.table.get(second)["cancel"], 1)
+        self.assertIsNone(self.table.get("missing"))
+
+    def test_run(self):
+        job = self.run_job(count_job, "count.txt")
+        self.assertEqual(job["status"], DONE)
+        self.assertEqual(job["progress"], 100)
+        with open(job["output"]) as output:
+            self.assertEqual(output.read(), "5")
+        self.assertEqual(self.run_job(failing_job)["status"], FAILED)
+        job = self.run_job(raising_job)
+        self.assertEqual((job["status"], job["message"]), (FAILED, "broken"))
+
+    def test_cancel(self):
+        handle = self.table.add("user", "job", "test")
+        run_job(self.table_path, self.database_dir, handle, self.jobs_dir,
+                cancelling_job, (self.table_path, handle))
+        self.assertEqual(self.table.get(handle)["status"], CANCELLED)
+
+    def test_runner(self):
+        runner = JobRunner(self.database_dir, self.jobs_dir, workers=1)
+        try:
+            handle = runner.submit("ann", "Count", "test", count_job,
+                                   "count.txt")
+            runner.futures[handle].result(timeout=60)
+            job = runner.get(handle)
+            self.assertEqual(job["status"], DONE)
+            self.assertEqual(os.path.dirname(job["output"]),
+                             runner.get_output_dir(handle))
+            self.assertTrue(runner.changed())
+            self.assertFalse(runner.changed())
+            self.assertFalse(runner.cancel(handle))
+        finally:
+            runner.shutdown()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+#
+# gPrime - A web-based genealogy program
+#
+# Copyright (C) 2017  gPrime contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for localepool.py """
+
+import unittest
+
+from ...const import LOCALE as glocale
+from ..localepool import get_translator
+
+class LocalePoolTest(unittest.TestCase):
+
+    def test_pool(self):
+        default = get_translator()
+        self.assertIs(default.locale, glocale)
+        self.assertIs(get_translator(), default)
+        self.assertIs(get_translator("default").locale, glocale)
+        german = get_translator("de")
+        self.assertIs(get_translator("de"), german)
+        self.assertIsNot(german, default)
+        self.assertEqual(german.gettext("Person"),
+                         german.locale.translation.gettext("Person"))
+        self.assertIs(german.name_displayer, german.name_displayer)
+        self.assertIs(german.date_displayer, german.locale.date_displayer)
+
+if __name__ == "__main__":
+    unittest.main()
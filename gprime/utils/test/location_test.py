@@ -0,0 +1,155 @@
+#
+# gPrime - A web-based genealogy program
+#
+# Copyright (C) 2017  gPrime contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for location.py and the place enclosure and coordinates """
+
+import unittest
+
+from ...db import make_database, DbTxn
+from ...lib import Place, PlaceName, PlaceRef, Date
+from ..location import located_in, get_dated_location_list
+
+class LocationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db = make_database("inmemorydb")
+        self.db.load(None)
+        with DbTxn("Add places", self.db, batch=True) as trans:
+            self.country = self.add_place("Country", None, trans)
+            self.state = self.add_place("State", self.country, trans)
+            self.town = self.add_place("Town", self.state, trans)
+
+    def add_place(self, name, parent, trans, date=None):
+        place = Place()
+        place.set_name(PlaceName(value=name))
+        if parent is not None:
+            placeref = PlaceRef()
+            placeref.ref = parent.handle
+            if date is not None:
+                placeref.set_date_object(date)
+            place.add_placeref(placeref)
+        self.db.add_place(place, trans)
+        return place
+
+    def test_enclosure(self):
+        self.assertEqual(
+            self.db.get_place_enclosure(self.town.handle),
+            [(self.state.handle, 1, None, None),
+             (self.country.handle, 2, None, None)])
+        self.assertEqual(
+            sorted(self.db.get_enclosed_place_handles(self.country.handle)),
+            sorted([self.state.handle, self.town.handle]))
+        self.assertTrue(located_in(self.db, self.town.handle,
+                                   self.country.handle))
+        self.assertFalse(located_in(self.db, self.country.handle,
+                                    self.town.handle))
+
+    def test_update(self):
+        with DbTxn("Move town", self.db, batch=True) as trans:
+            self.town.set_placeref_list([])
+            self.db.commit_place(self.town, trans)
+        self.assertEqual(self.db.get_place_enclosure(self.town.handle), [])
+        self.assertEqual(
+            self.db.get_enclosed_place_handles(self.country.handle),
+            [self.state.handle])
+
+    def test_dated(self):
+        lines, dated = get_dated_location_list(self.db, self.town)
+        self.assertEqual([line[0] for line in lines],
+                         ["Town", "State", "Country"])
+        self.assertFalse(dated)
+        date = Date()
+        date.set_yr_mon_day(1900, 1, 1)
+        with DbTxn("Add village", self.db, batch=True) as trans:
+            village = self.add_place("Village", self.town, trans, date)
+        lines, dated = get_dated_location_list(self.db, village)
+        self.assertEqual(len(lines), 1)
+        self.assertTrue(dated)
+        lines, dated = get_dated_location_list(self.db, village, date)
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(self.db.get_place_enclosure(village.handle)[0],
+                         (self.town.handle, 1, date.sortval, date.sortval))
+
+    def test_title_cache(self):
+        self.db.set_cached_place_title(self.town.handle, "key", "Town, Land")
+        self.assertEqual(
+            self.db.get_cached_place_title(self.town.handle, "key"),
+            "Town, Land")
+        with DbTxn("Rename country", self.db, batch=True) as trans:
+            self.db.commit_place(self.country, trans)
+        self.assertIsNone(
+            self.db.get_cached_place_title(self.town.handle, "key"))
+
+class PlaceCoordinatesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db = make_database("inmemorydb")
+        self.db.load(None)
+        self.places = {}
+        with DbTxn("Add places", self.db, batch=True) as trans:
+            for name, lat, lon in (("Paris", "48.8566", "2.3522"),
+                                   ("London", "51°30'N", "0°7'W"),
+                                   ("Berlin", "52.52", "13.405"),
+                                   ("Suva", "-18.14", "178.44"),
+                                   ("Apia", "-13.83", "-171.76"),
+                                   ("Nowhere", "", "")):
+                place = Place()
+                place.set_name(PlaceName(value=name))
+                place.set_latitude(lat)
+                place.set_longitude(lon)
+                self.db.add_place(place, trans)
+                self.places[place.handle] = name
+
+    def names(self, handles):
+        return sorted(self.places[handle] for handle in handles)
+
+    def test_within(self):
+        self.assertEqual(self.names(self.db.places_within((45, -5, 55, 10))),
+                         ["London", "Paris"])
+        self.assertEqual(
+            self.names(self.db.places_within((-20, 170, -10, -170))),
+            ["Apia", "Suva"])
+
+    def test_near(self):
+        result = self.db.places_near(48.8566, 2.3522, 400)
+        self.assertEqual([self.places[handle] for (handle, dist) in result],
+                         ["Paris", "London"])
+        self.assertAlmostEqual(result[1][1], 342, places=0)
+
+    def test_update(self):
+        handle = [handle for handle in self.places
+                  if self.places[handle] == "Berlin"][0]
+        place = self.db.get_place_from_handle(handle)
+        with DbTxn("Move Berlin", self.db, batch=True) as trans:
+            place.set_latitude("48.86")
+            place.set_longitude("2.35")
+            self.db.commit_place(place, trans)
+        self.assertEqual(self.db.get_place_coordinates(handle), (48.86, 2.35))
+        self.assertEqual(self.names(self.db.places_within((45, -5, 50, 10))),
+                         ["Berlin", "Paris"])
+
+    def test_queryset(self):
+        names = [place.get_name().get_value()
+                 for place in self.db.Place.near(48.8566, 2.3522, 1000)
+                 .order("gid").select()]
+        self.assertEqual(sorted(names), ["Berlin", "London", "Paris"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+#
+# gPrime - A web-based genealogy program
+#
+# Copyright (C) 2017  gPrime contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for multipart.py """
+
+import unittest
+
+from ..multipart import MultipartParser, parse_header
+
+BODY = (b"--xyz\r\n"
+        b'Content-Disposition: form-data; name="format"\r\n'
+        b"\r\n"
+        b"ged\r\n"
+        b"--xyz\r\n"
+        b'Content-Disposition: form-data; name="file"; '
+        b'filename="my \\"tree\\".ged"\r\n'
+        b"Content-Type: application/octet-stream\r\n"
+        b"\r\n"
+        b"0 HEAD\r\n--xy\r\n0 TRLR\r\n"
+        b"\r\n--xyz--\r\n")
+
+class MultipartTest(unittest.TestCase):
+
+    def parse(self, size):
+        parts = []
+        def on_part(headers):
+            parts.append([headers, b""])
+        def on_data(data):
+            parts[-1][1] += data
+        parser = MultipartParser("xyz", on_part, on_data)
+        for start in range(0, len(BODY), size):
+            parser.feed(BODY[start:start + size])
+        parser.close()
+        return parts
+
+    def test_parse(self):
+        for size in (1, 2, 7, len(BODY)):
+            parts = self.parse(size)
+            self.assertEqual([data for (headers, data) in parts],
+                             [b"ged", b"0 HEAD\r\n--xy\r\n0 TRLR\r\n"])
+            self.assertEqual(parts[1][0]["content-type"],
+                             "application/octet-stream")
+
+    def test_incomplete(self):
+        parser = MultipartParser("xyz", lambda headers: None,
+                                 lambda data: None)
+        parser.feed(BODY[:50])
+        self.assertRaises(ValueError, parser.close)
+
+    def test_parse_header(self):
+        self.assertEqual(
+            parse_header('form-data; name="file"; filename="my \\"tree\\".ged"'),
+            ("form-data", {"name": "file", "filename": 'my "tree".ged'}))
+        self.assertEqual(parse_header("multipart/form-data; boundary=xyz"),
+                         ("multipart/form-data", {"boundary": "xyz"}))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+#
+# gPrime - A web-based genealogy program
+#
+# Copyright (C) 2017  gPrime contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for nameindex.py """
+
+import unittest
+
+from ...db import make_database, DbTxn
+from ...lib import Person, Surname
+from ..nameindex import NameIndex, get_name_index, parse_name_query
+
+PEOPLE = [("Smith", "John", Person.MALE),
+          ("Smith", "Mary", Person.FEMALE),
+          ("smithers", "Anne", Person.FEMALE),
+          ("Jones", "Sam", Person.UNKNOWN),
+          ("Jonas", "Pat", Person.MALE)]
+
+def make_person(surname, given, gender):
+    person = Person()
+    person.primary_name.first_name = given
+    name = Surname()
+    name.surname = surname
+    person.primary_name.add_surname(name)
+    person.gender = gender
+    return person
+
+class NameIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db = make_database("inmemorydb")
+        self.db.load(None)
+        self.handles = {}
+        with DbTxn("Add people", self.db, batch=True) as trans:
+            for surname, given, gender in PEOPLE:
+                person = make_person(surname, given, gender)
+                self.db.add_person(person, trans)
+                self.handles[given] = person.handle
+
+    def names(self, result):
+        return [given for (handle, surname, given, gid) in result[1]]
+
+    def test_parse(self):
+        self.assertEqual(parse_name_query("smi"), ("smi", None, None, False))
+        self.assertEqual(parse_name_query("Smith, J [I00+"),
+                         ("Smith", "J", "I00", True))
+
+    def test_search(self):
+        index = NameIndex(self.db)
+        total, people = index.search("smi")
+        self.assertEqual(total, 3)
+        john = self.db.get_person_from_handle(self.handles["John"])
+        self.assertEqual(people[0],
+                         (john.handle, "Smith", "John", john.gid))
+        self.assertEqual(self.names(index.search("SMI")),
+                         ["John", "Mary", "Anne"])
+        self.assertEqual(self.names(index.search("smi", gender="female")),
+                         ["Mary", "Anne"])
+        self.assertEqual(self.names(index.search("jon", gender="male")),
+                         ["Pat"])
+        self.assertEqual(self.names(index.search("smith", "m")), ["Mary"])
+        self.assertEqual(index.search("", start=1, count=2)[0], 5)
+        self.assertEqual(self.names(index.search("", start=1, count=2)),
+                         ["Sam", "John"])
+        gid = self.db.get_person_from_handle(self.handles["Sam"]).gid
+        self.assertEqual(self.names(index.search(gid=gid)), ["Sam"])
+        self.assertEqual(index.search("x"), (0, []))
+
+    def test_signals(self):
+        index = get_name_index(self.db)
+        self.assertIs(get_name_index(self.db), index)
+        with DbTxn("Add", self.db, batch=True) as trans:
+            person = make_person("Smart", "Ann", Person.FEMALE)
+            self.db.add_person(person, trans)
+            mary = self.db.get_person_from_handle(self.handles["Mary"])
+            mary.gender = Person.MALE
+            self.db.commit_person(mary, trans)
+            self.db.remove_person(self.handles["John"], trans)
+        # batch transactions emit no signals
+        self.db.emit('person-add', ([person.handle],))
+        self.db.emit('person-update', ([mary.handle],))
+        self.db.emit('person-delete', ([self.handles["John"]],))
+        self.assertEqual(self.names(index.search("sm")),
+                         ["Ann", "Mary", "Anne"])
+        self.assertEqual(self.names(index.search("sm", gender="male")),
+                         ["Mary"])
+        self.assertEqual(self.names(index.search("sm", gender="female")),
+                         ["Ann", "Anne"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -34,7 +34,9 @@ import math
 # Gprime modules
 #
 #-------------------------------------------------------------------------
-from gprime.utils.place import conv_lat_lon
+from gprime.utils.place import (conv_lat_lon, conv_lat_lon_float,
+                                get_distance, get_bounding_box,
+                                split_bounding_box)
 
 #-------------------------------------------------------------------------
 #
@@ -246,6 +248,29 @@ class PlaceTest(unittest.TestCase):
         self.assertAlmostEqual(lat, expetced_lat, places=3)
         self.assertAlmostEqual(lon, expetced_lon, places=3)
 
+    def test_float(self):
+        self.assertEqual(conv_lat_lon_float('50.5', '-2.25'), (50.5, -2.25))
+        self.assertEqual(conv_lat_lon_float('', '2.0'), (None, None))
+        self.assertEqual(conv_lat_lon_float('dummy', '2.0'), (None, None))
+
+    def test_distance(self):
+        # Paris - London
+        self.assertAlmostEqual(get_distance(48.8566, 2.3522, 51.5074, -0.1278),
+                               343.5, places=0)
+        self.assertEqual(get_distance(10., 20., 10., 20.), 0.)
+
+    def test_bounding_box(self):
+        min_lat, min_lon, max_lat, max_lon = get_bounding_box(0., 0., 111.2)
+        self.assertAlmostEqual(min_lat, -1., places=2)
+        self.assertAlmostEqual(max_lon, 1., places=2)
+        # crosses the 180th meridian:
+        bbox = get_bounding_box(0., 179.5, 111.2)
+        self.assertGreater(bbox[1], bbox[3])
+        self.assertEqual(len(split_bounding_box(bbox)), 2)
+        # includes the north pole:
+        self.assertEqual(get_bounding_box(89.5, 10., 111.2)[1::2],
+                         (-180., 180.))
+
 
 def conv_SWED_RT90_WGS84(X, Y):
     """
@@ -0,0 +1,159 @@
+#
+# gPrime - A web-based genealogy program
+#
+# Copyright (C) 2017  gPrime contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for stream.py """
+
+import gzip
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from ...db import make_database, DbTxn
+from ...lib import Person
+from ...cli.user import User
+from ..stream import QueueWriter, stream, Spool, SpoolReader
+
+def read_all(writer):
+    chunks = []
+    while True:
+        chunk = writer.get()
+        if chunk is None:
+            return b"".join(chunks)
+        chunks.append(chunk)
+
+def write_lines(output, count):
+    for index in range(count):
+        output.write(b"line %d\n" % index)
+
+def write_and_fail(output):
+    output.write(b"start\n")
+    raise ValueError("broken")
+
+class StreamTest(unittest.TestCase):
+
+    def test_writer(self):
+        writer = QueueWriter(chunk_size=4, size=10)
+        writer.write(b"ab")
+        writer.write(b"cdef")
+        writer.write(b"g")
+        writer.close()
+        self.assertEqual(writer.get(), b"abcdef")
+        self.assertEqual(writer.get(), b"g")
+        self.assertIsNone(writer.get())
+
+    def test_stream(self):
+        expected = b"".join(b"line %d\n" % index for index in range(20000))
+        self.assertEqual(read_all(stream(write_lines, 20000)), expected)
+        self.assertEqual(
+            gzip.decompress(read_all(stream(write_lines, 20000,
+                                            compress=True))),
+            expected)
+
+    def test_fail(self):
+        writer = stream(write_and_fail)
+        self.assertRaises(ValueError, writer.get)
+
+    def test_cancel(self):
+        errors = []
+        excepthook = threading.excepthook
+        threading.excepthook = errors.append
+        try:
+            for compress in (False, True):
+                writer = stream(write_lines, 10 ** 7, compress=compress)
+                writer.get()
+                writer.cancel()
+                # the writer stops, rather than waiting for the reader
+                for count in range(100):
+                    if writer.closed:
+                        break
+                    time.sleep(0.1)
+                self.assertTrue(writer.closed)
+                # and doesn't raise when its thread ends
+                time.sleep(0.2)
+        finally:
+            threading.excepthook = excepthook
+        self.assertEqual(errors, [])
+
+    def export(self, export_function, db):
+        """
+        Export db to a QueueWriter, in this thread as the database is in
+        memory, and return the data.
+        """
+        writer = QueueWriter()
+        export_function(db, writer, User(quiet=True))
+        writer.close()
+        return read_all(writer)
+
+    def test_export(self):
+        from ...plugins.export import JSONExport
+        db = make_database("inmemorydb")
+        db.load(None)
+        with DbTxn("Add people", db, batch=True) as trans:
+            for index in range(3):
+                db.add_person(Person(), trans)
+        data = self.export(JSONExport.exportData, db)
+        self.assertEqual(data.count(b'"_class": "Person"'), 3)
+
+class SpoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "upload")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_read_while_written(self):
+        chunks = [b"chunk %d\n" % index for index in range(50)]
+        def write():
+            spool = Spool(self.path)
+            for chunk in chunks:
+                spool.write(chunk)
+                time.sleep(0.001)
+            self.digest = spool.finish()
+        writer = threading.Thread(target=write)
+        writer.start()
+        with SpoolReader(self.path, timeout=10) as reader:
+            lines = list(reader)
+            self.assertEqual(reader.wait(), self.digest)
+            reader.seek(0)
+            self.assertEqual(reader.read(), b"".join(chunks))
+        writer.join()
+        self.assertEqual(lines, chunks)
+
+    def test_fail(self):
+        spool = Spool(self.path)
+        spool.write(b"start")
+        with SpoolReader(self.path, timeout=10) as reader:
+            self.assertEqual(reader.read(5), b"start")
+            spool.fail()
+            self.assertRaises(IOError, reader.read, 1)
+        spool.fail()
+
+    def test_timeout(self):
+        Spool(self.path)
+        with SpoolReader(self.path, timeout=0.1) as reader:
+            self.assertRaises(IOError, reader.read, 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,178 @@
+#
+# gPrime - A web-based genealogy program
+#
+# Copyright (C) 2017  gPrime contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+""" Unittest for traversal.py """
+
+import gc
+import sys
+import unittest
+import weakref
+
+from ...db import make_database, DbTxn
+from ...lib import Person, Family, ChildRef
+from ...filters import GenericFilter
+from ...proxy import PrivateProxyDb
+from ...filters.rules.person import (IsAncestorOf, IsDuplicatedAncestorOf,
+                                     IsMoreThanNthGenerationDescendantOf,
+                                     HasCommonAncestorWith)
+from ..traversal import get_traversal
+
+def make_tree(families):
+    """
+    Build a database from a list of (father, mother, children) names; a
+    parent can be None.
+    """
+    db = make_database("inmemorydb")
+    db.load(None)
+    people = {}
+    with DbTxn("Build tree", db, batch=True) as trans:
+        for names in families:
+            for name in (names[0], names[1]) + tuple(names[2]):
+                if name is not None and name not in people:
+                    person = Person()
+                    db.add_person(person, trans)
+                    people[name] = person
+        for dad, mom, kids in families:
+            family = Family()
+            db.add_family(family, trans)
+            for name, setter in ((dad, family.set_father_handle),
+                                 (mom, family.set_mother_handle)):
+                if name is not None:
+                    setter(people[name].handle)
+                    people[name].add_family_handle(family.handle)
+            for kid in kids:
+                ref = ChildRef()
+                ref.set_reference_handle(people[kid].handle)
+                family.add_child_ref(ref)
+                people[kid].add_parent_family_handle(family.handle)
+            db.commit_family(family, trans)
+        for person in people.values():
+            db.commit_person(person, trans)
+    return db, people
+
+# Cousins c and d marry, so that e descends twice from gf and gm.
+COLLAPSE = [("gf", "gm", ["a", "b"]),
+            ("a", "x", ["c"]),
+            ("b", "y", ["d"]),
+            ("c", "d", ["e"]),
+            (None, None, ["p", "q"])]
+
+class TraversalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db, self.people = make_tree(COLLAPSE)
+        self.traversal = get_traversal(self.db)
+
+    def handles(self, names):
+        return set(self.people[name].handle for name in names)
+
+    def test_ancestors(self):
+        result = self.traversal.ancestors(self.handles(["e"]))
+        self.assertEqual(set(result), self.handles(
+            ["e", "c", "d", "a", "x", "b", "y", "gf", "gm"]))
+        self.assertEqual(result[self.people["gf"].handle], 3)
+        result = self.traversal.ancestors(self.handles(["e"]), 2,
+                                          inclusive=False)
+        self.assertEqual(set(result), self.handles(["c", "d", "a", "x",
+                                                    "b", "y"]))
+        # several persons at once
+        result = self.traversal.ancestors(self.handles(["c", "d"]), 1)
+        self.assertEqual(set(result), self.handles(["c", "d", "a", "x",
+                                                    "b", "y"]))
+
+    def test_descendants(self):
+        result = self.traversal.descendants(self.handles(["gm"]),
+                                            inclusive=False)
+        self.assertEqual(set(result), self.handles(["a", "b", "c", "d",
+                                                    "e"]))
+        self.assertEqual(self.traversal.descendants_beyond(
+            self.handles(["gm"]), 2), self.handles(["c", "d", "e"]))
+        self.assertEqual(self.traversal.ancestors_beyond(
+            self.handles(["e"]), 3), self.handles(["gf", "gm"]))
+
+    def test_duplicated(self):
+        self.assertEqual(self.traversal.duplicated_ancestors(
+            self.people["e"].handle), self.handles(["gf", "gm"]))
+        self.assertEqual(self.traversal.duplicated_ancestors(
+            self.people["c"].handle), set())
+
+    def test_common_ancestry(self):
+        self.assertEqual(self.traversal.common_ancestry(self.handles(["x"])),
+                         self.handles(["x", "c", "e"]))
+        self.assertEqual(self.traversal.common_ancestry(self.handles(["p"])),
+                         self.handles(["p", "q"]))
+        self.assertEqual(self.traversal.partners(self.handles(["c"])),
+                         self.handles(["d"]))
+
+    def test_memo(self):
+        traversal = self.traversal
+        first = traversal.ancestors(self.handles(["e"]))
+        first.clear()
+        self.assertEqual(len(traversal.ancestors(self.handles(["e"]))), 9)
+        self.assertEqual(len(traversal.memo), 1)
+        # a change to the tree drops the results
+        child = self.people["e"]
+        with DbTxn("Remove parents", self.db, batch=True) as trans:
+            child.clear_parent_family_handle_list()
+            self.db.commit_person(child, trans)
+        self.db.emit('person-update', ([child.handle],))
+        self.assertEqual(len(traversal.ancestors(self.handles(["e"]))), 1)
+
+    def test_rules(self):
+        gid = self.people["e"].gid
+        for rule, names in (
+                (IsAncestorOf([gid, '0']), ["c", "d", "a", "x", "b", "y",
+                                            "gf", "gm"]),
+                (IsDuplicatedAncestorOf([gid]), ["gf", "gm"]),
+                (IsMoreThanNthGenerationDescendantOf(
+                    [self.people["gf"].gid, '3']), ["e"]),
+                (HasCommonAncestorWith([self.people["y"].gid]),
+                 ["y", "d", "e"])):
+            gfilter = GenericFilter()
+            gfilter.add_rule(rule)
+            self.assertEqual(set(handle.decode()
+                                 for handle in gfilter.apply(self.db)),
+                             self.handles(names))
+
+    def test_deep(self):
+        # deeper than the recursion limit
+        depth = sys.getrecursionlimit() + 100
+        names = ["p%d" % index for index in range(depth)]
+        db, people = make_tree([(names[index], None, [names[index + 1]])
+                                for index in range(len(names) - 1)])
+        traversal = get_traversal(db)
+        result = traversal.ancestors([people[names[-1]].handle])
+        self.assertEqual(len(result), depth)
+        self.assertEqual(len(traversal.descendants_beyond(
+            [people[names[0]].handle], depth - 10)), 10)
+
+    def test_per_database(self):
+        proxy = PrivateProxyDb(self.db)
+        traversal = get_traversal(proxy)
+        self.assertIs(get_traversal(proxy), traversal)
+        self.assertEqual(len(traversal.ancestors(self.handles(["c"]))), 5)
+        # the traversal doesn't keep its database alive
+        ref = weakref.ref(proxy)
+        del proxy
+        gc.collect()
+        self.assertIsNone(ref())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,296 @@
+#
+# gPrime - A web-based genealogy program
+#
+# Copyright (C) 2017  gPrime contributors
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+#
+
+"""
+Walks up and down the family tree for the ancestral filter rules.
+
+The walks use the GenealogyGraph of the database and explicit work queues,
+so deep trees and pedigree collapse don't hit the recursion limit or
+repeat work. Results are kept per graph generation, so that the rules of
+a filter, and the filters applied until the tree changes, share them.
+"""
+
+#-------------------------------------------------------------------------
+#
+# Python modules
+#
+#-------------------------------------------------------------------------
+from collections import deque
+import weakref
+
+#-------------------------------------------------------------------------
+#
+# Gprime modules
+#
+#-------------------------------------------------------------------------
+from .graph import get_genealogy_graph, NONE
+from .lru import LRU
+from ..proxy import LoaderProxyDb
+
+# Number of walks kept per database:
+MEMO_SIZE = 100
+
+#-------------------------------------------------------------------------
+#
+# Traversal
+#
+#-------------------------------------------------------------------------
+class Traversal:
+    """
+    Ancestor and descendant walks on a GenealogyGraph.
+
+    All methods take and return person handles. Ancestors are found
+    through the main parent family of every person, descendants through
+    all families in which a person is a parent. A walk can start from
+    several persons at once.
+    """
+    def __init__(self, graph):
+        self.graph = graph
+        self.generation = graph.generation
+        self.memo = LRU(MEMO_SIZE)
+
+    def _memoize(self, key, func):
+        if self.generation != self.graph.generation:
+            self.memo.clear()
+            self.generation = self.graph.generation
+        if key not in self.memo:
+            self.memo[key] = func()
+        return self.memo[key]
+
+    def _ids(self, handles):
+        ids = []
+        for handle in handles:
+            pid = self.graph.get_person_id(handle)
+            if pid is not None:
+                ids.append(pid)
+        return ids
+
+    def main_parent_ids(self, pid):
+        """
+        Return the person ids of the parents in the main parent family.
+        """
+        families = self.graph.get_parent_family_ids(pid)
+        if not families:
+            return []
+        fid = families[0]
+        return [parent for parent in (self.graph.father[fid],
+                                      self.graph.mother[fid])
+                if parent != NONE]
+
+    def _walk(self, handles, neighbours, max_depth, inclusive):
+        """
+        Breadth-first walk from all handles at once; return a dictionary
+        of person handle to the number of generations to the nearest
+        start. If not inclusive, the walk starts with the neighbours of
+        the start persons, at 1 generation, and these persons are only
+        included if they are reached again.
+        """
+        depth = {}
+        queue = deque()
+        for pid in self._ids(handles):
+            for start in ([pid] if inclusive else neighbours(pid)):
+                if start not in depth:
+                    depth[start] = 0 if inclusive else 1
+                    queue.append(start)
+        while queue:
+            pid = queue.popleft()
+            current = depth[pid]
+            if max_depth is not None and current >= max_depth:
+                continue
+            for other in neighbours(pid):
+                if other not in depth:
+                    depth[other] = current + 1
+                    queue.append(other)
+        person_handles = self.graph.person_handles
+        return dict((person_handles[pid], generation)
+                    for (pid, generation) in depth.items())
+
+    def _walk_beyond(self, handles, neighbours, min_depth):
+        """
+        Return the set of the persons that are at least min_depth
+        generations away from one of the handles, through any path.
+        """
+        seen = set()
+        result = set()
+        queue = deque()
+        for pid in self._ids(handles):
+            if (pid, 0) not in seen:
+                seen.add((pid, 0))
+                queue.append((pid, 0))
+        while queue:
+            pid, current = queue.popleft()
+            if current >= min_depth:
+                result.add(pid)
+            # beyond min_depth only reaching a person matters, not how far
+            following = min(current + 1, min_depth)
+            for other in neighbours(pid):
+                if (other, following) not in seen:
+                    seen.add((other, following))
+                    queue.append((other, following))
+        person_handles = self.graph.person_handles
+        return frozenset(person_handles[pid] for pid in result)
+
+    def ancestors(self, handles, max_depth=None, inclusive=True):
+        """
+        Return a dictionary of the ancestors of the handles, not more than
+        max_depth generations away, to their generation.
+        """
+        key = ('ancestors', frozenset(handles), max_depth, inclusive)
+        return dict(self._memoize(key, lambda: self._walk(
+            handles, self.main_parent_ids, max_depth, inclusive)))
+
+    def descendants(self, handles, max_depth=None, inclusive=True):
+        """
+        Return a dictionary of the descendants of the handles, not more
+        than max_depth generations away, to their generation.
+        """
+        key = ('descendants', frozenset(handles), max_depth, inclusive)
+        return dict(self._memoize(key, lambda: self._walk(
+            handles, self.graph.get_children_ids, max_depth, inclusive)))
+
+    def ancestors_beyond(self, handles, min_depth):
+        """
+        Return the set of the ancestors of the handles that are at least
+        min_depth generations away through some line.
+        """
+        key = ('ancestors_beyond', frozenset(handles), min_depth)
+        return set(self._memoize(key, lambda: self._walk_beyond(
+            handles, self.main_parent_ids, min_depth)))
+
+    def descendants_beyond(self, handles, min_depth):
+        """
+        Return the set of the descendants of the handles that are at least
+        min_depth generations away through some line.
+        """
+        key = ('descendants_beyond', frozenset(handles), min_depth)
+        return set(self._memoize(key, lambda: self._walk_beyond(
+            handles, self.graph.get_children_ids, min_depth)))
+
+    def partners(self, handles):
+        """
+        Return the set of the other parents in the families of the handles.
+        """
+        graph = self.graph
+        result = set()
+        for pid in self._ids(handles):
+            for fid in graph.get_family_ids(pid):
+                for parent in (graph.father[fid], graph.mother[fid]):
+                    if parent != NONE and parent != pid:
+                        result.add(graph.person_handles[parent])
+        return result
+
+    def duplicated_ancestors(self, handle):
+        """
+        Return the set of the ancestors of the person that are reached
+        through more than one line.
+        """
+        key = ('duplicated_ancestors', handle)
+        return set(self._memoize(key, lambda: self._duplicated(handle)))
+
+    def _duplicated(self, handle):
+        ids = self._ids([handle])
+        if not ids:
+            return frozenset()
+        root = ids[0]
+        # count the links into every ancestor
+        links = {}
+        queue = deque([root])
+        seen = {root}
+        while queue:
+            pid = queue.popleft()
+            for parent in self.main_parent_ids(pid):
+                links[parent] = links.get(parent, 0) + 1
+                if parent not in seen:
+                    seen.add(parent)
+                    queue.append(parent)
+        # count the lines (up to 2) in topological order
+        lines = {root: 1}
+        queue = deque([root])
+        while queue:
+            pid = queue.popleft()
+            for parent in self.main_parent_ids(pid):
+                lines[parent] = min(2, lines.get(parent, 0) + lines[pid])
+                links[parent] -= 1
+                if links[parent] == 0 and parent != root:
+                    queue.append(parent)
+        person_handles = self.graph.person_handles
+        # ancestors that still have links left are in a loop
+        return frozenset(person_handles[pid] for pid in links
+                         if lines.get(pid, 0) > 1 or links[pid] > 0)
+
+    def common_ancestry(self, handles):
+        """
+        Return the set of the persons that have a common ancestor with one
+        of the handles, through any parent family. A family without parents
+        counts as a common ancestor of its children.
+        """
+        key = ('common_ancestry', frozenset(handles))
+        return set(self._memoize(key, lambda: self._common_ancestry(handles)))
+
+    def _common_ancestry(self, handles):
+        graph = self.graph
+        # the ancestors, and the families without parents above them
+        ancestors = set()
+        families = set()
+        queue = deque(self._ids(handles))
+        ancestors.update(queue)
+        while queue:
+            pid = queue.popleft()
+            for fid in graph.get_parent_family_ids(pid):
+                parents = [parent for parent in (graph.father[fid],
+                                                 graph.mother[fid])
+                           if parent != NONE]
+                if not parents:
+                    families.add(fid)
+                for parent in parents:
+                    if parent not in ancestors:
+                        ancestors.add(parent)
+                        queue.append(parent)
+        # and everybody who descends from them
+        result = set(ancestors)
+        queue = deque(ancestors)
+        for fid in families:
+            for child in graph.get_child_ids(fid):
+                if child not in result:
+                    result.add(child)
+                    queue.append(child)
+        while queue:
+            pid = queue.popleft()
+            for child in graph.get_children_ids(pid):
+                if child not in result:
+                    result.add(child)
+                    queue.append(child)
+        person_handles = graph.person_handles
+        return frozenset(person_handles[pid] for pid in result)
+
+_TRAVERSALS = weakref.WeakKeyDictionary()
+
+def get_traversal(db):
+    """
+    Return the Traversal of db, creating it on first use.
+    """
+    if isinstance(db, LoaderProxyDb):
+        # the objects are the database's
+        db = db.db
+    traversal = _TRAVERSALS.get(db)
+    if traversal is None:
+        traversal = Traversal(get_genealogy_graph(db))
+        _TRAVERSALS[db] = traversal
+    return traversal